@@ -20,8 +20,12 @@ load_dotenv()
 # access to the values within the .ini file in use.
 config = context.config
 
-# Override sqlalchemy.url from environment
-config.set_main_option('sqlalchemy.url', os.getenv('DATABASE_URL'))
+# Override sqlalchemy.url from environment (unless the caller already set one)
+if not config.get_main_option('sqlalchemy.url'):
+    config.set_main_option('sqlalchemy.url', os.getenv('DATABASE_URL'))
+
+# Serializes migrations when several app instances start at once
+MIGRATION_LOCK_ID = 7240531
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -62,13 +66,44 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def run_migrations_on(connection) -> None:
+    """Run migrations on an open connection.
+
+    On PostgreSQL a session advisory lock makes concurrent starts wait for
+    the first one instead of racing it. It is session-level so it survives
+    the autocommit blocks used for CREATE INDEX CONCURRENTLY.
+    """
+    is_postgres = connection.dialect.name == "postgresql"
+    if is_postgres:
+        connection.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})")
+        connection.commit()
+
+    try:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        if is_postgres:
+            connection.exec_driver_sql(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})")
+            connection.commit()
+
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
 
     In this scenario we need to create an Engine
     and associate a connection with the context.
+    init_db passes its own connection through config.attributes.
 
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations_on(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -76,12 +111,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        run_migrations_on(connection)
 
 
 if context.is_offline_mode():
@@ -0,0 +1,552 @@
+"""baseline schema
+
+The schema as created by Base.metadata.create_all before migrations were
+introduced. Databases bootstrapped that way are stamped at this revision
+by init_db instead of being recreated.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 06:57:23.539781
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('question_options',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('question_type', sa.String(), nullable=False),
+    sa.Column('option_text', sa.String(), nullable=False),
+    sa.Column('option_label', sa.String(), nullable=False),
+    sa.Column('order', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_question_options_id'), 'question_options', ['id'], unique=False)
+    op.create_table('question_type_templates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('type_enum', sa.String(), nullable=False),
+    sa.Column('section_type', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('instructions', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_question_type_templates_id'), 'question_type_templates', ['id'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('password_hash', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('role', sa.Enum('STUDENT', 'TEACHER', 'ADMIN', name='userrole'), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('teacher_assignments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('submission_id', sa.Integer(), nullable=False),
+    sa.Column('submission_type', sa.String(length=20), nullable=False),
+    sa.Column('assigned_at', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['teacher_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_teacher_status', 'teacher_assignments', ['teacher_id', 'status'], unique=False)
+    op.create_index(op.f('ix_teacher_assignments_id'), 'teacher_assignments', ['id'], unique=False)
+    op.create_table('test_templates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=300), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('test_type', sa.Enum('ACADEMIC', 'GENERAL_TRAINING', name='testtype'), nullable=False),
+    sa.Column('difficulty_level', sa.String(length=50), nullable=True),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('is_published', sa.Boolean(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='RESTRICT'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_test_templates_id'), 'test_templates', ['id'], unique=False)
+    op.create_table('user_profiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('date_of_birth', sa.DateTime(), nullable=True),
+    sa.Column('target_band_score', sa.Float(), nullable=True),
+    sa.Column('preparation_level', sa.String(), nullable=True),
+    sa.Column('preferred_test_type', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_profiles_id'), 'user_profiles', ['id'], unique=False)
+    op.create_table('regrade_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_by_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('test_template_id', sa.Integer(), nullable=True),
+    sa.Column('listening_question_ids', sa.JSON(), nullable=True),
+    sa.Column('reading_question_ids', sa.JSON(), nullable=True),
+    sa.Column('submitted_from', sa.DateTime(), nullable=True),
+    sa.Column('submitted_to', sa.DateTime(), nullable=True),
+    sa.Column('current_section', sa.String(length=20), nullable=False),
+    sa.Column('last_submission_id', sa.Integer(), nullable=False),
+    sa.Column('total_submissions', sa.Integer(), nullable=True),
+    sa.Column('processed_submissions', sa.Integer(), nullable=False),
+    sa.Column('changed_submissions', sa.Integer(), nullable=False),
+    sa.Column('results_recalculated', sa.Integer(), nullable=False),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['test_template_id'], ['test_templates.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_regrade_job_status', 'regrade_jobs', ['status'], unique=False)
+    op.create_index(op.f('ix_regrade_jobs_id'), 'regrade_jobs', ['id'], unique=False)
+    op.create_table('test_attempts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('test_template_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('overall_band_score', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['test_template_id'], ['test_templates.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_attempt_template', 'test_attempts', ['test_template_id'], unique=False)
+    op.create_index('idx_attempt_user_status', 'test_attempts', ['user_id', 'status'], unique=False)
+    op.create_index(op.f('ix_test_attempts_id'), 'test_attempts', ['id'], unique=False)
+    op.create_table('test_sections',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_template_id', sa.Integer(), nullable=False),
+    sa.Column('section_type', sa.Enum('LISTENING', 'READING', 'WRITING', 'SPEAKING', name='sectiontype'), nullable=False),
+    sa.Column('order', sa.Integer(), nullable=False),
+    sa.Column('total_questions', sa.Integer(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['test_template_id'], ['test_templates.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_test_sections_id'), 'test_sections', ['id'], unique=False)
+    op.create_table('test_structure_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_template_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['test_template_id'], ['test_templates.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('test_template_id', 'version', name='uq_structure_snapshot_version')
+    )
+    op.create_index(op.f('ix_test_structure_snapshots_id'), 'test_structure_snapshots', ['id'], unique=False)
+    op.create_table('answer_drafts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('section_type', sa.String(length=20), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('answer', sa.Text(), nullable=False),
+    sa.Column('client_seq', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['test_attempt_id'], ['test_attempts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('test_attempt_id', 'section_type', 'item_id', name='uq_answer_draft')
+    )
+    op.create_index(op.f('ix_answer_drafts_id'), 'answer_drafts', ['id'], unique=False)
+    op.create_table('grading_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['test_attempt_id'], ['test_attempts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('test_attempt_id')
+    )
+    op.create_index('idx_grading_job_claim', 'grading_jobs', ['status', 'run_after'], unique=False)
+    op.create_index(op.f('ix_grading_jobs_id'), 'grading_jobs', ['id'], unique=False)
+    op.create_table('listening_parts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('section_id', sa.Integer(), nullable=False),
+    sa.Column('part_number', sa.Integer(), nullable=False),
+    sa.Column('audio_url', sa.String(length=500), nullable=False),
+    sa.Column('transcript', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['section_id'], ['test_sections.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_listening_parts_id'), 'listening_parts', ['id'], unique=False)
+    op.create_table('reading_passages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('section_id', sa.Integer(), nullable=False),
+    sa.Column('passage_number', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=300), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('order', sa.Integer(), nullable=False),
+    sa.Column('word_count', sa.Integer(), nullable=True),
+    sa.Column('difficulty_level', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['section_id'], ['test_sections.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reading_passages_id'), 'reading_passages', ['id'], unique=False)
+    op.create_table('speaking_tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('section_id', sa.Integer(), nullable=False),
+    sa.Column('part_number', sa.Integer(), nullable=False),
+    sa.Column('task_type', sa.String(length=100), nullable=False),
+    sa.Column('prompt_text', sa.Text(), nullable=False),
+    sa.Column('preparation_time_seconds', sa.Integer(), nullable=True),
+    sa.Column('speaking_time_seconds', sa.Integer(), nullable=False),
+    sa.Column('order', sa.Integer(), nullable=False),
+    sa.Column('cue_card_points', sa.JSON(), nullable=True),
+    sa.Column('instructions', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['section_id'], ['test_sections.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_speaking_tasks_id'), 'speaking_tasks', ['id'], unique=False)
+    op.create_table('test_results',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('listening_score', sa.Float(), nullable=True),
+    sa.Column('reading_score', sa.Float(), nullable=True),
+    sa.Column('writing_score', sa.Float(), nullable=True),
+    sa.Column('speaking_score', sa.Float(), nullable=True),
+    sa.Column('overall_band_score', sa.Float(), nullable=False),
+    sa.Column('generated_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.CheckConstraint('listening_score IS NULL OR (listening_score >= 0 AND listening_score <= 9)', name='check_listening_result'),
+    sa.CheckConstraint('overall_band_score >= 0 AND overall_band_score <= 9', name='check_overall_result'),
+    sa.CheckConstraint('reading_score IS NULL OR (reading_score >= 0 AND reading_score <= 9)', name='check_reading_result'),
+    sa.CheckConstraint('speaking_score IS NULL OR (speaking_score >= 0 AND speaking_score <= 9)', name='check_speaking_result'),
+    sa.CheckConstraint('writing_score IS NULL OR (writing_score >= 0 AND writing_score <= 9)', name='check_writing_result'),
+    sa.ForeignKeyConstraint(['test_attempt_id'], ['test_attempts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('test_attempt_id')
+    )
+    op.create_index(op.f('ix_test_results_id'), 'test_results', ['id'], unique=False)
+    op.create_table('writing_tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('section_id', sa.Integer(), nullable=False),
+    sa.Column('task_number', sa.Integer(), nullable=False),
+    sa.Column('task_type', sa.String(length=100), nullable=False),
+    sa.Column('prompt_text', sa.Text(), nullable=False),
+    sa.Column('image_url', sa.String(length=500), nullable=True),
+    sa.Column('word_limit_min', sa.Integer(), nullable=False),
+    sa.Column('word_limit_max', sa.Integer(), nullable=True),
+    sa.Column('instructions', sa.Text(), nullable=True),
+    sa.Column('time_limit_minutes', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['section_id'], ['test_sections.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_writing_tasks_id'), 'writing_tasks', ['id'], unique=False)
+    op.create_table('listening_questions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('section_id', sa.Integer(), nullable=False),
+    sa.Column('part_id', sa.Integer(), nullable=False),
+    sa.Column('question_number', sa.Integer(), nullable=False),
+    sa.Column('question_type', sa.String(length=100), nullable=False),
+    sa.Column('question_text', sa.Text(), nullable=False),
+    sa.Column('order', sa.Integer(), nullable=False),
+    sa.Column('has_options', sa.Boolean(), nullable=True),
+    sa.Column('options', sa.JSON(), nullable=True),
+    sa.Column('marks', sa.Integer(), nullable=False),
+    sa.Column('instructions', sa.Text(), nullable=True),
+    sa.Column('image_url', sa.String(length=500), nullable=True),
+    sa.Column('type_specific_data', sa.JSON(), nullable=True),
+    sa.Column('answer_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['part_id'], ['listening_parts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['section_id'], ['test_sections.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('section_id', 'question_number', name='uq_listening_question')
+    )
+    op.create_index(op.f('ix_listening_questions_id'), 'listening_questions', ['id'], unique=False)
+    op.create_table('reading_questions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('passage_id', sa.Integer(), nullable=False),
+    sa.Column('question_number', sa.Integer(), nullable=False),
+    sa.Column('question_type', sa.String(length=100), nullable=False),
+    sa.Column('question_text', sa.Text(), nullable=False),
+    sa.Column('order', sa.Integer(), nullable=False),
+    sa.Column('has_options', sa.Boolean(), nullable=True),
+    sa.Column('options', sa.JSON(), nullable=True),
+    sa.Column('marks', sa.Integer(), nullable=False),
+    sa.Column('instructions', sa.Text(), nullable=True),
+    sa.Column('image_url', sa.String(length=500), nullable=True),
+    sa.Column('type_specific_data', sa.JSON(), nullable=True),
+    sa.Column('answer_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['passage_id'], ['reading_passages.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('passage_id', 'question_number', name='uq_reading_question')
+    )
+    op.create_index(op.f('ix_reading_questions_id'), 'reading_questions', ['id'], unique=False)
+    op.create_table('speaking_submissions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('audio_url', sa.String(length=500), nullable=False),
+    sa.Column('duration_seconds', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=False),
+    sa.Column('assigned_teacher_id', sa.Integer(), nullable=True),
+    sa.Column('graded_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assigned_teacher_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['task_id'], ['speaking_tasks.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['test_attempt_id'], ['test_attempts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('test_attempt_id', 'task_id', name='uq_speaking_submission')
+    )
+    op.create_index('idx_speaking_attempt', 'speaking_submissions', ['test_attempt_id'], unique=False)
+    op.create_index('idx_speaking_status', 'speaking_submissions', ['status'], unique=False)
+    op.create_index(op.f('ix_speaking_submissions_id'), 'speaking_submissions', ['id'], unique=False)
+    op.create_table('writing_submissions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('response_text', sa.Text(), nullable=False),
+    sa.Column('word_count', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=False),
+    sa.Column('assigned_teacher_id', sa.Integer(), nullable=True),
+    sa.Column('graded_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assigned_teacher_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['task_id'], ['writing_tasks.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['test_attempt_id'], ['test_attempts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('test_attempt_id', 'task_id', name='uq_writing_submission')
+    )
+    op.create_index('idx_writing_attempt', 'writing_submissions', ['test_attempt_id'], unique=False)
+    op.create_index('idx_writing_status', 'writing_submissions', ['status'], unique=False)
+    op.create_index(op.f('ix_writing_submissions_id'), 'writing_submissions', ['id'], unique=False)
+    op.create_table('listening_answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('correct_answer', sa.String(length=500), nullable=False),
+    sa.Column('alternative_answers', sa.JSON(), nullable=True),
+    sa.Column('case_sensitive', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['listening_questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_listening_answers_id'), 'listening_answers', ['id'], unique=False)
+    op.create_table('listening_submissions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('user_answer', sa.String(length=500), nullable=False),
+    sa.Column('is_correct', sa.Boolean(), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['listening_questions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['test_attempt_id'], ['test_attempts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('test_attempt_id', 'question_id', name='uq_listening_submission')
+    )
+    op.create_index('idx_listening_attempt', 'listening_submissions', ['test_attempt_id'], unique=False)
+    op.create_index(op.f('ix_listening_submissions_id'), 'listening_submissions', ['id'], unique=False)
+    op.create_table('reading_answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('correct_answer', sa.String(length=500), nullable=False),
+    sa.Column('alternative_answers', sa.JSON(), nullable=True),
+    sa.Column('case_sensitive', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['reading_questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reading_answers_id'), 'reading_answers', ['id'], unique=False)
+    op.create_table('reading_submissions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('user_answer', sa.String(length=500), nullable=False),
+    sa.Column('is_correct', sa.Boolean(), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['reading_questions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['test_attempt_id'], ['test_attempts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('test_attempt_id', 'question_id', name='uq_reading_submission')
+    )
+    op.create_index('idx_reading_attempt', 'reading_submissions', ['test_attempt_id'], unique=False)
+    op.create_index(op.f('ix_reading_submissions_id'), 'reading_submissions', ['id'], unique=False)
+    op.create_table('speaking_grades',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('submission_id', sa.Integer(), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=True),
+    sa.Column('fluency_coherence_score', sa.Float(), nullable=False),
+    sa.Column('lexical_resource_score', sa.Float(), nullable=False),
+    sa.Column('grammatical_range_score', sa.Float(), nullable=False),
+    sa.Column('pronunciation_score', sa.Float(), nullable=False),
+    sa.Column('overall_band_score', sa.Float(), nullable=False),
+    sa.Column('feedback_text', sa.Text(), nullable=True),
+    sa.Column('graded_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.CheckConstraint('fluency_coherence_score >= 0 AND fluency_coherence_score <= 9', name='check_fluency'),
+    sa.CheckConstraint('grammatical_range_score >= 0 AND grammatical_range_score <= 9', name='check_grammar_speaking'),
+    sa.CheckConstraint('lexical_resource_score >= 0 AND lexical_resource_score <= 9', name='check_lexical_speaking'),
+    sa.CheckConstraint('overall_band_score >= 0 AND overall_band_score <= 9', name='check_overall_speaking'),
+    sa.CheckConstraint('pronunciation_score >= 0 AND pronunciation_score <= 9', name='check_pronunciation'),
+    sa.ForeignKeyConstraint(['submission_id'], ['speaking_submissions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['teacher_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('submission_id')
+    )
+    op.create_index(op.f('ix_speaking_grades_id'), 'speaking_grades', ['id'], unique=False)
+    op.create_table('writing_grades',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('submission_id', sa.Integer(), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=True),
+    sa.Column('task_achievement_score', sa.Float(), nullable=False),
+    sa.Column('coherence_cohesion_score', sa.Float(), nullable=False),
+    sa.Column('lexical_resource_score', sa.Float(), nullable=False),
+    sa.Column('grammatical_range_score', sa.Float(), nullable=False),
+    sa.Column('overall_band_score', sa.Float(), nullable=False),
+    sa.Column('feedback_text', sa.Text(), nullable=True),
+    sa.Column('graded_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.CheckConstraint('coherence_cohesion_score >= 0 AND coherence_cohesion_score <= 9', name='check_coherence'),
+    sa.CheckConstraint('grammatical_range_score >= 0 AND grammatical_range_score <= 9', name='check_grammar_writing'),
+    sa.CheckConstraint('lexical_resource_score >= 0 AND lexical_resource_score <= 9', name='check_lexical_writing'),
+    sa.CheckConstraint('overall_band_score >= 0 AND overall_band_score <= 9', name='check_overall_writing'),
+    sa.CheckConstraint('task_achievement_score >= 0 AND task_achievement_score <= 9', name='check_task_achievement'),
+    sa.ForeignKeyConstraint(['submission_id'], ['writing_submissions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['teacher_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('submission_id')
+    )
+    op.create_index(op.f('ix_writing_grades_id'), 'writing_grades', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_writing_grades_id'), table_name='writing_grades')
+    op.drop_table('writing_grades')
+    op.drop_index(op.f('ix_speaking_grades_id'), table_name='speaking_grades')
+    op.drop_table('speaking_grades')
+    op.drop_index(op.f('ix_reading_submissions_id'), table_name='reading_submissions')
+    op.drop_index('idx_reading_attempt', table_name='reading_submissions')
+    op.drop_table('reading_submissions')
+    op.drop_index(op.f('ix_reading_answers_id'), table_name='reading_answers')
+    op.drop_table('reading_answers')
+    op.drop_index(op.f('ix_listening_submissions_id'), table_name='listening_submissions')
+    op.drop_index('idx_listening_attempt', table_name='listening_submissions')
+    op.drop_table('listening_submissions')
+    op.drop_index(op.f('ix_listening_answers_id'), table_name='listening_answers')
+    op.drop_table('listening_answers')
+    op.drop_index(op.f('ix_writing_submissions_id'), table_name='writing_submissions')
+    op.drop_index('idx_writing_status', table_name='writing_submissions')
+    op.drop_index('idx_writing_attempt', table_name='writing_submissions')
+    op.drop_table('writing_submissions')
+    op.drop_index(op.f('ix_speaking_submissions_id'), table_name='speaking_submissions')
+    op.drop_index('idx_speaking_status', table_name='speaking_submissions')
+    op.drop_index('idx_speaking_attempt', table_name='speaking_submissions')
+    op.drop_table('speaking_submissions')
+    op.drop_index(op.f('ix_reading_questions_id'), table_name='reading_questions')
+    op.drop_table('reading_questions')
+    op.drop_index(op.f('ix_listening_questions_id'), table_name='listening_questions')
+    op.drop_table('listening_questions')
+    op.drop_index(op.f('ix_writing_tasks_id'), table_name='writing_tasks')
+    op.drop_table('writing_tasks')
+    op.drop_index(op.f('ix_test_results_id'), table_name='test_results')
+    op.drop_table('test_results')
+    op.drop_index(op.f('ix_speaking_tasks_id'), table_name='speaking_tasks')
+    op.drop_table('speaking_tasks')
+    op.drop_index(op.f('ix_reading_passages_id'), table_name='reading_passages')
+    op.drop_table('reading_passages')
+    op.drop_index(op.f('ix_listening_parts_id'), table_name='listening_parts')
+    op.drop_table('listening_parts')
+    op.drop_index(op.f('ix_grading_jobs_id'), table_name='grading_jobs')
+    op.drop_index('idx_grading_job_claim', table_name='grading_jobs')
+    op.drop_table('grading_jobs')
+    op.drop_index(op.f('ix_answer_drafts_id'), table_name='answer_drafts')
+    op.drop_table('answer_drafts')
+    op.drop_index(op.f('ix_test_structure_snapshots_id'), table_name='test_structure_snapshots')
+    op.drop_table('test_structure_snapshots')
+    op.drop_index(op.f('ix_test_sections_id'), table_name='test_sections')
+    op.drop_table('test_sections')
+    op.drop_index(op.f('ix_test_attempts_id'), table_name='test_attempts')
+    op.drop_index('idx_attempt_user_status', table_name='test_attempts')
+    op.drop_index('idx_attempt_template', table_name='test_attempts')
+    op.drop_table('test_attempts')
+    op.drop_index(op.f('ix_regrade_jobs_id'), table_name='regrade_jobs')
+    op.drop_index('idx_regrade_job_status', table_name='regrade_jobs')
+    op.drop_table('regrade_jobs')
+    op.drop_index(op.f('ix_user_profiles_id'), table_name='user_profiles')
+    op.drop_table('user_profiles')
+    op.drop_index(op.f('ix_test_templates_id'), table_name='test_templates')
+    op.drop_table('test_templates')
+    op.drop_index(op.f('ix_teacher_assignments_id'), table_name='teacher_assignments')
+    op.drop_index('idx_teacher_status', table_name='teacher_assignments')
+    op.drop_table('teacher_assignments')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_question_type_templates_id'), table_name='question_type_templates')
+    op.drop_table('question_type_templates')
+    op.drop_index(op.f('ix_question_options_id'), table_name='question_options')
+    op.drop_table('question_options')
+
+    # PostgreSQL keeps enum types after their tables are dropped
+    bind = op.get_bind()
+    for name in ('userrole', 'testtype', 'sectiontype'):
+        sa.Enum(name=name).drop(bind, checkfirst=True)
@@ -0,0 +1,76 @@
+"""hot path indexes
+
+Indexes from an EXPLAIN review of the router and worker queries:
+
+- writing/speaking_submissions (status, assigned_teacher_id, submitted_at):
+  teacher grading queue, pending counts and "graded today". Replaces the
+  status-only indexes, which are its prefix.
+- writing/speaking_grades (teacher_id, graded_at): grading history and
+  "completed today".
+- test_templates (is_published, created_at): test catalog.
+- test_attempts (user_id, created_at): "my attempts" ordered by date.
+- listening/reading_submissions (question_id): regrade by question and
+  cascading question deletes.
+
+The single-column test_attempt_id indexes on the submission tables are
+dropped: the (test_attempt_id, question_id/task_id) unique constraints
+already serve those lookups and the submit path no longer pays for a
+second index on every insert.
+
+Indexes are built CONCURRENTLY on PostgreSQL so the tables stay writable,
+which needs to run outside a transaction. if_not_exists/if_exists let the
+migration run against databases that were created by create_all after the
+models gained these indexes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 07:10:41.118902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NEW_INDEXES = [
+    ('idx_writing_queue', 'writing_submissions', ['status', 'assigned_teacher_id', 'submitted_at']),
+    ('idx_speaking_queue', 'speaking_submissions', ['status', 'assigned_teacher_id', 'submitted_at']),
+    ('idx_writing_grade_teacher', 'writing_grades', ['teacher_id', 'graded_at']),
+    ('idx_speaking_grade_teacher', 'speaking_grades', ['teacher_id', 'graded_at']),
+    ('idx_template_catalog', 'test_templates', ['is_published', 'created_at']),
+    ('idx_attempt_user_created', 'test_attempts', ['user_id', 'created_at']),
+    ('idx_listening_question', 'listening_submissions', ['question_id']),
+    ('idx_reading_question', 'reading_submissions', ['question_id']),
+]
+
+REDUNDANT_INDEXES = [
+    ('idx_writing_status', 'writing_submissions', ['status']),
+    ('idx_speaking_status', 'speaking_submissions', ['status']),
+    ('idx_listening_attempt', 'listening_submissions', ['test_attempt_id']),
+    ('idx_reading_attempt', 'reading_submissions', ['test_attempt_id']),
+    ('idx_writing_attempt', 'writing_submissions', ['test_attempt_id']),
+    ('idx_speaking_attempt', 'speaking_submissions', ['test_attempt_id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in NEW_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in NEW_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
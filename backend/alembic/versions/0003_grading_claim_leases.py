@@ -0,0 +1,48 @@
+"""grading claim leases
+
+Teacher assignments become leased claims on writing/speaking submissions:
+lease_expires_at is renewed by heartbeats, idx_assignment_lease finds lapsed
+claims, and a partial unique index allows one live claim per submission.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 08:02:15.406233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_CLAIM = sa.text("status = 'pending'")
+
+
+def upgrade() -> None:
+    op.add_column('teacher_assignments', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_assignment_lease', 'teacher_assignments', ['status', 'lease_expires_at'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'uq_active_assignment', 'teacher_assignments', ['submission_type', 'submission_id'], unique=True,
+            postgresql_where=ACTIVE_CLAIM, sqlite_where=ACTIVE_CLAIM,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_active_assignment', table_name='teacher_assignments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_assignment_lease', table_name='teacher_assignments', postgresql_concurrently=True, if_exists=True)
+
+    with op.batch_alter_table('teacher_assignments') as batch_op:
+        batch_op.drop_column('lease_expires_at')
@@ -0,0 +1,75 @@
+"""grading queue stats
+
+Materialized counters for the teacher dashboard: open writing/speaking
+submissions per status and assigned teacher (grading_queue_stats), and
+submissions graded per teacher and day (grading_daily_stats). Both are
+filled from the existing rows here; afterwards the write paths keep them
+current and the grading worker reconciles them.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:12:40.517362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SOURCES = (
+    ('writing', 'writing_submissions', 'writing_grades'),
+    ('speaking', 'speaking_submissions', 'speaking_grades'),
+)
+
+
+def upgrade() -> None:
+    op.create_table('grading_queue_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('submission_type', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('submission_type', 'status', 'teacher_id', name='uq_grading_queue_stat')
+    )
+    op.create_index(op.f('ix_grading_queue_stats_id'), 'grading_queue_stats', ['id'], unique=False)
+    op.create_table('grading_daily_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('submission_type', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('teacher_id', 'day', 'submission_type', name='uq_grading_daily_stat')
+    )
+    op.create_index(op.f('ix_grading_daily_stats_id'), 'grading_daily_stats', ['id'], unique=False)
+
+    for submission_type, submissions, grades in SOURCES:
+        op.execute(
+            f"INSERT INTO grading_queue_stats (submission_type, status, teacher_id, count, updated_at) "
+            f"SELECT '{submission_type}', status, COALESCE(assigned_teacher_id, 0), COUNT(*), CURRENT_TIMESTAMP "
+            f"FROM {submissions} WHERE status IN ('pending', 'under_review') "
+            f"GROUP BY status, COALESCE(assigned_teacher_id, 0)"
+        )
+        op.execute(
+            f"INSERT INTO grading_daily_stats (teacher_id, day, submission_type, count, updated_at) "
+            f"SELECT teacher_id, DATE(graded_at), '{submission_type}', COUNT(*), CURRENT_TIMESTAMP "
+            f"FROM {grades} WHERE teacher_id IS NOT NULL "
+            f"GROUP BY teacher_id, DATE(graded_at)"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_grading_daily_stats_id'), table_name='grading_daily_stats')
+    op.drop_table('grading_daily_stats')
+    op.drop_index(op.f('ix_grading_queue_stats_id'), table_name='grading_queue_stats')
+    op.drop_table('grading_queue_stats')
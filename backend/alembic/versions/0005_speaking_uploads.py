@@ -0,0 +1,51 @@
+"""speaking uploads
+
+Resumable speaking recording uploads: one row per upload session with its
+declared size, the offset received so far and the expected checksum.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 11:03:27.184925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('speaking_uploads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('upload_length', sa.Integer(), nullable=False),
+    sa.Column('received_bytes', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.Column('extension', sa.String(length=10), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('audio_url', sa.String(length=500), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['task_id'], ['speaking_tasks.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['test_attempt_id'], ['test_attempts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_speaking_upload_task', 'speaking_uploads', ['test_attempt_id', 'task_id', 'status'], unique=False)
+    op.create_index(op.f('ix_speaking_uploads_id'), 'speaking_uploads', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_speaking_uploads_id'), table_name='speaking_uploads')
+    op.drop_index('idx_speaking_upload_task', table_name='speaking_uploads')
+    op.drop_table('speaking_uploads')
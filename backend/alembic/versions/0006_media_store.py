@@ -0,0 +1,59 @@
+"""media store
+
+Content-addressed uploads: media_blobs records each stored audio/image
+file by path and SHA-256, media_references ties blobs to the content
+columns that use them. Files uploaded before this keep their random names
+and are not tracked.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 13:41:09.662018
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('media_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('path')
+    )
+    op.create_index(op.f('ix_media_blobs_id'), 'media_blobs', ['id'], unique=False)
+    op.create_index(op.f('ix_media_blobs_sha256'), 'media_blobs', ['sha256'], unique=False)
+    op.create_table('media_references',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('blob_id', sa.Integer(), nullable=False),
+    sa.Column('owner_type', sa.String(length=30), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['blob_id'], ['media_blobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('owner_type', 'owner_id', name='uq_media_reference_owner')
+    )
+    op.create_index('idx_media_reference_blob', 'media_references', ['blob_id'], unique=False)
+    op.create_index(op.f('ix_media_references_id'), 'media_references', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_media_references_id'), table_name='media_references')
+    op.drop_index('idx_media_reference_blob', table_name='media_references')
+    op.drop_table('media_references')
+    op.drop_index(op.f('ix_media_blobs_sha256'), table_name='media_blobs')
+    op.drop_index(op.f('ix_media_blobs_id'), table_name='media_blobs')
+    op.drop_table('media_blobs')
@@ -0,0 +1,57 @@
+"""media catalog
+
+Turns media_blobs into the media library's catalog: media type, MIME
+type, original filename, duration or dimensions and uploader, plus keyset
+indexes for the newest-first listing. Existing rows take their media type
+from their directory; files on disk are catalogued by
+scripts/backfill_media_catalog.py.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 15:27:52.308164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('media_blobs', sa.Column('media_type', sa.String(length=10), nullable=True))
+    op.execute("UPDATE media_blobs SET media_type = CASE WHEN path LIKE 'audio/%' THEN 'audio' ELSE 'image' END")
+
+    with op.batch_alter_table('media_blobs') as batch_op:
+        batch_op.alter_column('media_type', existing_type=sa.String(length=10), nullable=False)
+        batch_op.add_column(sa.Column('mime_type', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('original_filename', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('duration_seconds', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('uploaded_by', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_media_blobs_uploaded_by', 'users', ['uploaded_by'], ['id'], ondelete='SET NULL')
+
+    op.create_index('idx_media_blob_listing', 'media_blobs', ['created_at', 'id'], unique=False)
+    op.create_index('idx_media_blob_type_listing', 'media_blobs', ['media_type', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_media_blob_type_listing', table_name='media_blobs')
+    op.drop_index('idx_media_blob_listing', table_name='media_blobs')
+
+    with op.batch_alter_table('media_blobs') as batch_op:
+        batch_op.drop_constraint('fk_media_blobs_uploaded_by', type_='foreignkey')
+        batch_op.drop_column('uploaded_by')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
+        batch_op.drop_column('duration_seconds')
+        batch_op.drop_column('original_filename')
+        batch_op.drop_column('mime_type')
+        batch_op.drop_column('media_type')
@@ -0,0 +1,29 @@
+"""speaking upload expiry
+
+Index for the grading worker's sweep of unfinished speaking uploads that
+have been idle longer than SPEAKING_UPLOAD_EXPIRY_SECONDS.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 18:42:09.561203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_speaking_upload_expiry', 'speaking_uploads', ['status', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_speaking_upload_expiry', table_name='speaking_uploads')
@@ -0,0 +1,53 @@
+"""sharded queue stats
+
+Adds a shard column to grading_queue_stats, so the unassigned pending
+counter that every submit and claim updates is spread over
+GRADING_STATS_SHARDS rows instead of serializing on one row lock.
+Existing counters become shard 0.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 10:14:36.902715
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('grading_queue_stats') as batch_op:
+        batch_op.add_column(sa.Column('shard', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.drop_constraint('uq_grading_queue_stat', type_='unique')
+        batch_op.create_unique_constraint('uq_grading_queue_stat', ['submission_type', 'status', 'teacher_id', 'shard'])
+    with op.batch_alter_table('grading_queue_stats') as batch_op:
+        batch_op.alter_column('shard', server_default=None)
+
+
+def downgrade() -> None:
+    # Fold the shards back into one row per counter
+    op.execute(
+        "INSERT INTO grading_queue_stats (submission_type, status, teacher_id, shard, count, updated_at) "
+        "SELECT DISTINCT submission_type, status, teacher_id, 0, 0, CURRENT_TIMESTAMP FROM grading_queue_stats s "
+        "WHERE NOT EXISTS (SELECT 1 FROM grading_queue_stats z WHERE z.submission_type = s.submission_type "
+        "AND z.status = s.status AND z.teacher_id = s.teacher_id AND z.shard = 0)"
+    )
+    op.execute(
+        "UPDATE grading_queue_stats SET count = (SELECT SUM(s.count) FROM grading_queue_stats s "
+        "WHERE s.submission_type = grading_queue_stats.submission_type "
+        "AND s.status = grading_queue_stats.status AND s.teacher_id = grading_queue_stats.teacher_id) "
+        "WHERE shard = 0"
+    )
+    op.execute("DELETE FROM grading_queue_stats WHERE shard <> 0")
+    with op.batch_alter_table('grading_queue_stats') as batch_op:
+        batch_op.drop_constraint('uq_grading_queue_stat', type_='unique')
+        batch_op.create_unique_constraint('uq_grading_queue_stat', ['submission_type', 'status', 'teacher_id'])
+        batch_op.drop_column('shard')
@@ -0,0 +1,31 @@
+"""attempt snapshot version
+
+Pins each test attempt to the structure snapshot version that was current
+when it started. Existing attempts stay unpinned and are served the
+latest version.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 11:02:51.447310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('test_attempts', sa.Column('snapshot_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('test_attempts') as batch_op:
+        batch_op.drop_column('snapshot_version')
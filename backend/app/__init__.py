@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
+# app.core first: app.database reads its settings
+from app.core.security import get_password_hash
 from app.database import SessionLocal
 from app.models import QuestionTypeTemplate, QuestionTypeEnum
-from app.core.security import get_password_hash
 from app.models import User
 
 def init_question_types(db: Session):
@@ -12,7 +12,11 @@ from .security import (
     verify_password,
     create_access_token,
     decode_access_token,
+    verify_access_token,
+    invalidate_user,
+    CurrentUser,
     get_current_user,
+    get_current_db_user,
     get_current_admin_user,
     get_current_teacher_user,
     oauth2_scheme,
@@ -30,10 +34,14 @@ __all__ = [
     # Security - JWT
     "create_access_token",
     "decode_access_token",
+    "verify_access_token",
+    "invalidate_user",
     "ACCESS_TOKEN_EXPIRE_MINUTES",
     
     # Security - Dependencies
+    "CurrentUser",
     "get_current_user",
+    "get_current_db_user",
     "get_current_admin_user",
     "get_current_teacher_user",
     "oauth2_scheme",
@@ -5,7 +5,7 @@ Reads configuration from environment variables and .env file.
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -24,12 +24,44 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5  # Connections kept open per engine
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed beyond DB_POOL_SIZE
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a connection
+    DB_POOL_RECYCLE: int = 300  # Seconds before a connection is replaced
+    
+    # Read replicas (get_read_db); empty sends every query to the primary
+    DATABASE_REPLICA_URLS: str = ""  # Comma-separated
+    REPLICA_STICKY_SECONDS: float = 5.0  # Reads go to the primary this long after the client's last write
+    REPLICA_RETRY_SECONDS: float = 30.0  # A replica that failed to connect is skipped this long
+    
+    @property
+    def replica_urls(self) -> List[str]:
+        """Parse replica URLs from comma-separated string."""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    
+    # Async database (get_async_db); the engine is only created on first use
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL when unset (postgresql+asyncpg://...)
+    ASYNC_DB_POOL_SIZE: int = 20
+    ASYNC_DB_MAX_OVERFLOW: int = 20
+    ASYNC_DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a connection
+    ASYNC_DB_POOL_RECYCLE: int = 300  # Seconds before a connection is replaced
     
     # Security - JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # Changing this rehashes passwords at their next successful login
+    PASSWORD_HASH_WORKERS: int = 4  # Concurrent bcrypt operations per process
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Queued operations before new ones get 429
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
+    
+    # Authentication caches (per process)
+    TOKEN_CACHE_SIZE: int = 10000  # Verified tokens kept until they expire
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30.0  # How long a user's id/email/role is trusted without a query
+    
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:5173, http://localhost:80"
     
@@ -41,6 +73,14 @@ class Settings(BaseSettings):
     # File Uploads
     UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_SIZE_MB: int = 10
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes copied per step, so memory per upload stays constant
+    UPLOAD_MAX_CHUNK_BYTES: int = 5 * 1024 * 1024  # Largest PATCH chunk of a resumable upload
+    SPEAKING_UPLOAD_EXPIRY_SECONDS: int = 6 * 3600  # Unfinished resumable uploads idle this long are aborted
+    SPEAKING_UPLOAD_SWEEP_INTERVAL_SECONDS: float = 900.0  # How often the grading worker aborts them
+    
+    # Content-addressed media (audio/images): unreferenced blobs are collected by the grading worker
+    MEDIA_GC_GRACE_SECONDS: int = 24 * 3600  # Time to save the content that uses a fresh upload
+    MEDIA_GC_INTERVAL_SECONDS: float = 3600.0
     
     @property
     def max_upload_size_bytes(self) -> int:
@@ -50,6 +90,7 @@ class Settings(BaseSettings):
     # Allowed file extensions
     ALLOWED_AUDIO_EXTENSIONS: str = ".mp3,.wav,.m4a,.ogg"
     ALLOWED_IMAGE_EXTENSIONS: str = ".jpg,.jpeg,.png,.gif,.webp"
+    ALLOWED_SPEAKING_EXTENSIONS: str = ".webm,.ogg,.m4a,.mp3,.wav"  # Speaking recordings
     
     @property
     def audio_extensions(self) -> set:
@@ -61,6 +102,44 @@ class Settings(BaseSettings):
         """Parse image extensions."""
         return set(ext.strip() for ext in self.ALLOWED_IMAGE_EXTENSIONS.split(","))
     
+    @property
+    def speaking_extensions(self) -> set:
+        """Parse speaking recording extensions."""
+        return set(ext.strip() for ext in self.ALLOWED_SPEAKING_EXTENSIONS.split(","))
+    
+    # Grading queue
+    GRADING_JOB_MAX_ATTEMPTS: int = 5
+    GRADING_JOB_LEASE_SECONDS: int = 300  # Running jobs older than this are reclaimed
+    GRADING_WORKER_POLL_SECONDS: float = 2.0
+    GRADING_WORKER_BATCH_SIZE: int = 10
+    
+    # Teacher grading claims (writing/speaking)
+    GRADING_CLAIM_LEASE_SECONDS: int = 900  # A claim lapses back to the queue unless renewed
+    GRADING_CLAIM_MAX_BATCH: int = 20  # Most submissions one claim request can take
+    
+    # Teacher dashboard counters (recounted by the grading worker)
+    GRADING_STATS_RECONCILE_SECONDS: float = 300.0
+    GRADING_STATS_SHARDS: int = 16  # Rows per unassigned counter, so concurrent submits and claims rarely share a row lock
+    
+    # Live updates (GET /events/stream)
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0  # Keep-alive comment on idle streams
+    EVENTS_QUEUE_SIZE: int = 100  # Events buffered per client before it is told to resync
+    EVENTS_PG_NOTIFY: bool = True  # Fan events out to every process through PostgreSQL LISTEN/NOTIFY
+    EVENTS_LISTEN_RETRY_SECONDS: float = 5.0
+    EVENTS_TICKET_TTL_SECONDS: int = 60  # Lifetime of the stream tickets EventSource clients pass in the URL
+    
+    # Bulk regrades (run by the grading worker)
+    REGRADE_CHUNK_SIZE: int = 1000  # Submissions per transaction
+    REGRADE_CHUNKS_PER_POLL: int = 10  # Chunks per worker poll before checking the grading queue again
+    REGRADE_PROCESSES: int = 0  # Grading processes per chunk; 0 grades in the worker process
+    
+    # Autosave write-behind buffer
+    AUTOSAVE_BUFFER_ENABLED: bool = True
+    AUTOSAVE_FLUSH_INTERVAL_SECONDS: float = 2.0
+    AUTOSAVE_FLUSH_MAX_ITEMS: int = 500  # Flush early once this many answers are pending
+    AUTOSAVE_JOURNAL_DIR: str = "autosave_journal"
+    AUTOSAVE_JOURNAL_FSYNC: bool = True  # fsync every acknowledged write
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,137 @@
+"""
+Keyset (cursor) pagination.
+
+Lists are ordered by a unique key such as (created_at, id) or (order, id),
+and each page starts strictly after the last row of the previous one with a
+row-value comparison the index can seek to. Deep pages cost the same as the
+first, and rows inserted or deleted between requests can't shift a page.
+
+Cursors are opaque to clients: the last row's key values as base64 JSON,
+signed with an HMAC of SECRET_KEY together with the ordering they belong
+to. A tampered cursor, or one taken from a different list, is rejected with
+400. The next cursor is returned in the X-Next-Cursor response header, so
+list responses keep their plain JSON array body; it is absent on the last
+page.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+from app.core.config import settings
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(list):
+    """One page of rows; next_cursor is None on the last page"""
+
+    def __init__(self, items: Sequence[Any] = (), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def _signing_key() -> bytes:
+    # Derived so a cursor signature can never double as any other signature
+    return hashlib.sha256(b"pagination-cursor:" + settings.SECRET_KEY.encode("utf-8")).digest()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def encode_cursor(scope: str, values: Sequence[Any]) -> str:
+    """Signed cursor holding the key values of the last row of a page"""
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":")
+    ).encode("utf-8")
+    body = _b64encode(payload)
+    signature = hmac.new(_signing_key(), f"{scope}|{body}".encode("utf-8"), hashlib.sha256).digest()[:16]
+    return f"{body}.{_b64encode(signature)}"
+
+
+def decode_cursor(scope: str, cursor: str) -> List[Any]:
+    """Key values from a cursor; 400 if it was altered or belongs to another list"""
+    try:
+        body, signature = cursor.split(".")
+        expected = hmac.new(_signing_key(), f"{scope}|{body}".encode("utf-8"), hashlib.sha256).digest()[:16]
+        if not hmac.compare_digest(_b64decode(signature), expected):
+            raise ValueError("bad signature")
+        values = json.loads(_b64decode(body))
+        if not isinstance(values, list):
+            raise ValueError("bad payload")
+        return values
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def cursor_scope(order_by: Sequence[Any], descending: bool) -> str:
+    """Name of an ordering, e.g. "test_templates.created_at,test_templates.id:desc" """
+    columns = ",".join(f"{column.table.name}.{column.key}" for column in order_by)
+    return f"{columns}:{'desc' if descending else 'asc'}"
+
+
+def _load_value(column: Any, value: Any) -> Any:
+    if value is not None and column.type.python_type is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+
+def keyset_filter(query: Any, order_by: Sequence[Any], values: Sequence[Any], descending: bool = False):
+    """Restrict a query to the rows after the given key values"""
+    if len(values) != len(order_by):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    key = tuple_(*order_by)
+    after = tuple_(*[_load_value(column, value) for column, value in zip(order_by, values)])
+    return query.filter(key < after if descending else key > after)
+
+
+def paginate(
+    query: Any,
+    order_by: Sequence[Any],
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    descending: bool = False
+) -> Page:
+    """
+    Fetch one page of a query ordered by order_by (a unique key, ending in id).
+
+    One extra row is read to tell whether another page follows.
+    """
+    scope = cursor_scope(order_by, descending)
+    if cursor:
+        query = keyset_filter(query, order_by, decode_cursor(scope, cursor), descending)
+
+    ordering = [column.desc() if descending else column.asc() for column in order_by]
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(scope, [getattr(rows[-1], column.key) for column in order_by])
+    return Page(rows, next_cursor)
+
+
+def set_next_cursor(response: Response, page: Page) -> None:
+    """Expose the next page's cursor to the client"""
+    if page.next_cursor:
+        response.headers[CURSOR_HEADER] = page.next_cursor
@@ -6,13 +6,34 @@ Provides:
 - JWT token creation and validation
 - FastAPI dependencies for route protection
 - Role-based access control
+
+bcrypt work runs on a small dedicated thread pool so a login storm can't
+occupy every request thread. When PASSWORD_HASH_MAX_PENDING operations are
+already waiting, new ones are rejected with 429 and Retry-After.
+
+Blocking work never runs on the event loop: dependencies that query the
+database are plain def functions (run in FastAPI's threadpool), and
+get_current_user only leaves the loop on a principal cache miss.
+
+Verified tokens and user principals are cached per process, so most
+authenticated requests don't query the database. A token stays cached until
+its exp; a principal for USER_CACHE_TTL_SECONDS or until invalidate_user()
+is called after the user's email, name or role changes.
 """
 
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Annotated
+from typing import Any, Callable, Dict, Optional, Tuple, Annotated
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
@@ -21,14 +42,102 @@ from app.database import get_db
 from app.models import User, UserRole
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max rounds pin the cost, so hashes made with any other cost need an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
+
+# Bounded pool for bcrypt; slots cover running plus queued operations
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+password_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_PENDING)
 
 # OAuth2 scheme for token-based authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token", auto_error=False)
 
 # Token expiration
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+# "purpose" claim of stream tickets; get_current_user rejects any token with a purpose
+STREAM_TICKET_PURPOSE = "stream"
+
+
+# ==================== Authentication Caches ====================
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Authenticated user principal resolved from a token"""
+    id: int
+    email: str
+    full_name: str
+    role: UserRole
+
+
+class ExpiringCache:
+    """Thread-safe LRU cache whose entries expire at a given time (epoch seconds)"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Any, value: Any, expires_at: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Keyed by SHA-256 of the token, so raw tokens are never held as keys
+token_cache = ExpiringCache(settings.TOKEN_CACHE_SIZE)
+# Keyed by user id
+user_cache = ExpiringCache(settings.USER_CACHE_SIZE)
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Drop a cached principal after the user's email, name or role changed
+    (or the user was deleted).
+    
+    Other API processes pick up the change within USER_CACHE_TTL_SECONDS.
+    """
+    user_cache.invalidate(user_id)
+
 
 # ==================== Password Management ====================
 
@@ -59,6 +168,41 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def run_password_task(func: Callable, *args: Any) -> Any:
+    """
+    Run a bcrypt operation on the password pool without blocking the event loop.
+    
+    Raises HTTPException 429 when the pool's queue is full.
+    """
+    if not password_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-in requests, please try again shortly",
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+        )
+    
+    try:
+        return await asyncio.wrap_future(password_executor.submit(func, *args))
+    finally:
+        password_slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password pool"""
+    return await run_password_task(pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password pool.
+    
+    Returns:
+        (matches, new_hash) where new_hash is set when the stored hash uses
+        outdated cost parameters and should be replaced
+    """
+    return await run_password_task(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 # ==================== JWT Token Management ====================
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -85,6 +229,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_stream_ticket(user_id: int) -> str:
+    """
+    Create a short-lived ticket that only authenticates event streams.
+    
+    Args:
+        user_id: ID of the user the ticket is for
+        
+    Returns:
+        Encoded JWT ticket string
+    """
+    return create_access_token(
+        {"sub": str(user_id), "purpose": STREAM_TICKET_PURPOSE},
+        expires_delta=timedelta(seconds=settings.EVENTS_TICKET_TTL_SECONDS)
+    )
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and validate a JWT access token.
@@ -102,21 +262,48 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
+def verify_access_token(token: str) -> Optional[dict]:
+    """
+    Decode an access token, reusing the result of an earlier verification.
+    
+    Only valid tokens are cached, and only until their exp, so the cache
+    never accepts a token that decode_access_token would reject.
+    
+    Args:
+        token: JWT token string
+        
+    Returns:
+        Decoded token payload dict, or None if invalid
+    """
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+    
+    payload = decode_access_token(token)
+    if payload is not None and payload.get("exp") is not None:
+        token_cache.set(key, payload, float(payload["exp"]))
+    
+    return payload
+
+
 # ==================== Authentication Dependencies ====================
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Session = Depends(get_db)
-) -> User:
+) -> CurrentUser:
     """
     FastAPI dependency to get the current authenticated user.
     
-    Validates JWT token and returns the user from database.
+    Validates JWT token and returns the user's principal (id, email,
+    full_name, role), from cache when possible. Use get_current_db_user
+    for endpoints that need the full User row.
     Raises HTTPException if token is invalid or user not found.
     
     Usage:
         @router.get("/protected")
-        def protected_route(current_user: User = Depends(get_current_user)):
+        def protected_route(current_user: CurrentUser = Depends(get_current_user)):
             return {"user": current_user.email}
     """
     credentials_exception = HTTPException(
@@ -125,9 +312,9 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    # Decode token
-    payload = decode_access_token(token)
-    if payload is None:
+    # Decode token; purpose-scoped tokens such as stream tickets aren't access tokens
+    payload = verify_access_token(token)
+    if payload is None or payload.get("purpose") is not None:
         raise credentials_exception
     
     # Extract user ID
@@ -135,25 +322,87 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    # Get user from database
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
+    return await load_principal(int(user_id), db, credentials_exception)
+
+
+async def load_principal(user_id: int, db: Session, credentials_exception: HTTPException) -> CurrentUser:
+    """Get a user's principal from cache, or from the database on a miss"""
+    principal = user_cache.get(user_id)
+    if principal is not None:
+        return principal
+    
+    # Get user from database (off the event loop)
+    row = await run_in_threadpool(
+        lambda: db.query(User.id, User.email, User.full_name, User.role).filter(User.id == user_id).first()
+    )
+    if row is None:
         raise credentials_exception
     
+    principal = CurrentUser(id=row.id, email=row.email, full_name=row.full_name, role=row.role)
+    user_cache.set(principal.id, principal, time.time() + settings.USER_CACHE_TTL_SECONDS)
+    
+    return principal
+
+
+def get_current_db_user(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    FastAPI dependency to get the current user's database row.
+    
+    For endpoints that return or modify the User itself.
+    """
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        invalidate_user(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
+async def get_current_stream_user(
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
+    ticket: Optional[str] = Query(None, description="Stream ticket from POST /events/ticket, for EventSource clients that can't send headers"),
+    db: Session = Depends(get_db)
+) -> CurrentUser:
+    """
+    FastAPI dependency like get_current_user for streaming endpoints.
+    
+    Browsers' EventSource can't set an Authorization header, so clients may
+    instead pass a stream ticket as the ticket query parameter. Tickets only
+    open streams and expire after EVENTS_TICKET_TTL_SECONDS, so one leaking
+    into access logs doesn't leak the access token.
+    """
+    if token:
+        return await get_current_user(token, db)
+    
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = decode_access_token(ticket) if ticket else None
+    if payload is None or payload.get("purpose") != STREAM_TICKET_PURPOSE or payload.get("sub") is None:
+        raise credentials_exception
+    
+    return await load_principal(int(payload["sub"]), db, credentials_exception)
+
+
 # ==================== Role-Based Access Control ====================
 
 async def get_current_admin_user(
-    current_user: Annotated[User, Depends(get_current_user)]
-) -> User:
+    current_user: Annotated[CurrentUser, Depends(get_current_user)]
+) -> CurrentUser:
     """
     FastAPI dependency to ensure current user is an admin.
     
     Usage:
         @router.post("/admin/users")
-        def create_user(current_user: User = Depends(get_current_admin_user)):
+        def create_user(current_user: CurrentUser = Depends(get_current_admin_user)):
             # Only admins can access this
             pass
     """
@@ -166,8 +415,8 @@ async def get_current_admin_user(
 
 
 async def get_current_teacher_user(
-    current_user: Annotated[User, Depends(get_current_user)]
-) -> User:
+    current_user: Annotated[CurrentUser, Depends(get_current_user)]
+) -> CurrentUser:
     """
     FastAPI dependency to ensure current user is a teacher or admin.
     
@@ -175,7 +424,7 @@ async def get_current_teacher_user(
     
     Usage:
         @router.post("/grading/writing/{submission_id}")
-        def grade_writing(current_user: User = Depends(get_current_teacher_user)):
+        def grade_writing(current_user: CurrentUser = Depends(get_current_teacher_user)):
             # Teachers and admins can access this
             pass
     """
@@ -188,8 +437,8 @@ async def get_current_teacher_user(
 
 
 async def get_current_student_user(
-    current_user: Annotated[User, Depends(get_current_user)]
-) -> User:
+    current_user: Annotated[CurrentUser, Depends(get_current_user)]
+) -> CurrentUser:
     """
     FastAPI dependency to ensure current user is a student.
     
@@ -197,7 +446,7 @@ async def get_current_student_user(
     
     Usage:
         @router.post("/tests/{test_id}/start")
-        def start_test(current_user: User = Depends(get_current_student_user)):
+        def start_test(current_user: CurrentUser = Depends(get_current_student_user)):
             # Only students can take tests
             pass
     """
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
 
+from app.core.pagination import Page, paginate
 from app.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -30,11 +31,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self, 
         db: Session, 
         *, 
-        skip: int = 0, 
+        cursor: Optional[str] = None, 
         limit: int = 100
-    ) -> List[ModelType]:
-        """Get multiple records with pagination"""
-        return db.query(self.model).offset(skip).limit(limit).all()
+    ) -> Page:
+        """Get multiple records, one keyset page at a time (by id)"""
+        return paginate(db.query(self.model), [self.model.id], cursor=cursor, limit=limit)
     
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """Create a new record"""
@@ -1,6 +1,7 @@
 from typing import Optional, List
 from sqlalchemy.orm import Session
 
+from app.core.pagination import Page, paginate
 from app.crud.base import CRUDBase
 from app.models import TestTemplate, TestSection, TestAttempt
 from app.schemas.test import (
@@ -13,24 +14,24 @@ from app.schemas.test import (
 class CRUDTestTemplate(CRUDBase[TestTemplate, TestTemplateCreate, TestTemplateUpdate]):
     """CRUD operations for TestTemplate"""
     
-    def get_published(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[TestTemplate]:
-        """Get all published test templates"""
-        return db.query(TestTemplate).filter(
+    def get_published(self, db: Session, *, cursor: Optional[str] = None, limit: int = 100) -> Page:
+        """Get all published test templates, newest first"""
+        return paginate(db.query(TestTemplate).filter(
             TestTemplate.is_published == True
-        ).offset(skip).limit(limit).all()
+        ), [TestTemplate.created_at, TestTemplate.id], cursor=cursor, limit=limit, descending=True)
     
-    def get_by_type(self, db: Session, *, test_type: str, skip: int = 0, limit: int = 100):
+    def get_by_type(self, db: Session, *, test_type: str, cursor: Optional[str] = None, limit: int = 100) -> Page:
         """Get tests by type (academic/general_training)"""
-        return db.query(TestTemplate).filter(
+        return paginate(db.query(TestTemplate).filter(
             TestTemplate.test_type == test_type,
             TestTemplate.is_published == True
-        ).offset(skip).limit(limit).all()
+        ), [TestTemplate.created_at, TestTemplate.id], cursor=cursor, limit=limit, descending=True)
     
-    def get_by_creator(self, db: Session, *, creator_id: int, skip: int = 0, limit: int = 100):
+    def get_by_creator(self, db: Session, *, creator_id: int, cursor: Optional[str] = None, limit: int = 100) -> Page:
         """Get tests created by a specific user"""
-        return db.query(TestTemplate).filter(
+        return paginate(db.query(TestTemplate).filter(
             TestTemplate.created_by == creator_id
-        ).offset(skip).limit(limit).all()
+        ), [TestTemplate.created_at, TestTemplate.id], cursor=cursor, limit=limit, descending=True)
     
     def publish(self, db: Session, *, db_obj: TestTemplate) -> TestTemplate:
         """Publish a test template"""
@@ -69,11 +70,11 @@ class CRUDTestSection(CRUDBase[TestSection, TestSectionCreate, TestSectionUpdate
 class CRUDTestAttempt(CRUDBase[TestAttempt, TestAttemptCreate, TestAttemptUpdate]):
     """CRUD operations for TestAttempt"""
     
-    def get_by_user(self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100) -> List[TestAttempt]:
-        """Get all attempts by a user"""
-        return db.query(TestAttempt).filter(
+    def get_by_user(self, db: Session, *, user_id: int, cursor: Optional[str] = None, limit: int = 100) -> Page:
+        """Get all attempts by a user, newest first"""
+        return paginate(db.query(TestAttempt).filter(
             TestAttempt.user_id == user_id
-        ).order_by(TestAttempt.created_at.desc()).offset(skip).limit(limit).all()
+        ), [TestAttempt.created_at, TestAttempt.id], cursor=cursor, limit=limit, descending=True)
     
     def get_in_progress(self, db: Session, *, user_id: int) -> List[TestAttempt]:
         """Get user's in-progress attempts"""
@@ -82,11 +83,11 @@ class CRUDTestAttempt(CRUDBase[TestAttempt, TestAttemptCreate, TestAttemptUpdate
             TestAttempt.status == "in_progress"
         ).all()
     
-    def get_by_template(self, db: Session, *, template_id: int, skip: int = 0, limit: int = 100):
+    def get_by_template(self, db: Session, *, template_id: int, cursor: Optional[str] = None, limit: int = 100) -> Page:
         """Get all attempts for a specific template"""
-        return db.query(TestAttempt).filter(
+        return paginate(db.query(TestAttempt).filter(
             TestAttempt.test_template_id == template_id
-        ).offset(skip).limit(limit).all()
+        ), [TestAttempt.id], cursor=cursor, limit=limit)
     
     def mark_submitted(self, db: Session, *, db_obj: TestAttempt) -> TestAttempt:
         """Mark attempt as submitted"""
@@ -1,6 +1,7 @@
 from typing import Optional
 from sqlalchemy.orm import Session
 
+from app.core.pagination import Page, paginate
 from app.crud.base import CRUDBase
 from app.models import User, UserProfile
 from app.schemas.user import UserCreate, UserUpdate, UserProfileCreate, UserProfileUpdate
@@ -45,9 +46,9 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db.refresh(db_obj)
         return db_obj
     
-    def get_by_role(self, db: Session, *, role: str, skip: int = 0, limit: int = 100):
+    def get_by_role(self, db: Session, *, role: str, cursor: Optional[str] = None, limit: int = 100) -> Page:
         """Get users by role"""
-        return db.query(User).filter(User.role == role).offset(skip).limit(limit).all()
+        return paginate(db.query(User).filter(User.role == role), [User.id], cursor=cursor, limit=limit)
 
 
 class CRUDUserProfile(CRUDBase[UserProfile, UserProfileCreate, UserProfileUpdate]):
@@ -6,11 +6,16 @@ from sqlalchemy import text
 from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
-from fastapi.staticfiles import StaticFiles
 
-from app.database import engine, get_db, init_db
+from app.core.config import settings
+from app.core.pagination import CURSOR_HEADER
+from app.database import engine, get_db, init_db, dispose_async_engine, ReadYourWritesMiddleware
 from app.models import Base
 from app.routers import api_router  # Changed from app.api.v1.router
+from app.services.autosave_buffer import autosave_buffer
+from app.services.event_bus import event_bus
+from app.services.media_store import MediaStaticFiles
+from app.services.upload_service import UploadSizeLimitMiddleware
 import time
 
 # Load environment variables
@@ -39,8 +44,15 @@ async def lifespan(app: FastAPI):
         init_db()
     else:
         print("⚠️ Starting without database initialization")
+    if settings.AUTOSAVE_BUFFER_ENABLED:
+        autosave_buffer.start()
+    event_bus.start()
     yield
     print("👋 Shutting down ACE Platform...")
+    if settings.AUTOSAVE_BUFFER_ENABLED:
+        autosave_buffer.stop()
+    event_bus.stop()
+    await dispose_async_engine()
 
 # Create FastAPI application
 app = FastAPI(
@@ -52,6 +64,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# MAX_UPLOAD_SIZE_MB, enforced while multipart bodies are received. Added
+# before CORSMiddleware so CORS wraps it and its early 413 carries the CORS
+# headers (the browser would otherwise report a network error).
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS Configuration
 origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
 
@@ -61,9 +78,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CURSOR_HEADER],  # Keyset pagination cursor of list endpoints
 )
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Read-your-writes stickiness for replica routing (get_read_db)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Content-addressed uploads are served as immutable
+app.mount("/uploads", MediaStaticFiles(directory="uploads"), name="uploads")
 
 # Health check endpoints
 @app.get("/", tags=["Health"])
@@ -2,7 +2,7 @@ from app.database import Base
 
 # Import all models
 from .user import User, UserProfile, UserRole
-from .test import TestTemplate, TestSection, TestAttempt, TestType, SectionType
+from .test import TestTemplate, TestStructureSnapshot, TestSection, TestAttempt, TestType, SectionType
 from .question import (
     ListeningPart,
     ListeningQuestion, 
@@ -19,17 +19,24 @@ from .question_types import (
     QuestionOption
 )
 from .submission import (
+    AnswerDraft,
     ListeningSubmission,
     ReadingSubmission,
     WritingSubmission,
-    SpeakingSubmission
+    SpeakingSubmission,
+    SpeakingUpload
 )
 from .grade import (
     WritingGrade,
     SpeakingGrade,
     TestResult,
-    TeacherAssignment
+    TeacherAssignment,
+    GradingJob,
+    RegradeJob,
+    GradingQueueStat,
+    GradingDailyStat
 )
+from .media import MediaBlob, MediaReference
 
 # Export all models
 __all__ = [
@@ -43,6 +50,7 @@ __all__ = [
     
     # Test models
     "TestTemplate",
+    "TestStructureSnapshot",
     "TestSection",
     "TestAttempt",
     "TestType",
@@ -64,14 +72,24 @@ __all__ = [
     "QuestionOption",
     
     # Submission models
+    "AnswerDraft",
     "ListeningSubmission",
     "ReadingSubmission",
     "WritingSubmission",
     "SpeakingSubmission",
+    "SpeakingUpload",
     
     # Grade models
     "WritingGrade",
     "SpeakingGrade",
     "TestResult",
     "TeacherAssignment",
+    "GradingJob",
+    "RegradeJob",
+    "GradingQueueStat",
+    "GradingDailyStat",
+    
+    # Media models
+    "MediaBlob",
+    "MediaReference",
 ]
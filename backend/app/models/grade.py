@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Text, DateTime, ForeignKey, String, CheckConstraint, Index
+from sqlalchemy import Column, Integer, Float, Text, Date, DateTime, ForeignKey, String, CheckConstraint, Index, JSON, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.database import Base
@@ -11,6 +11,7 @@ class WritingGrade(Base):
         CheckConstraint('lexical_resource_score >= 0 AND lexical_resource_score <= 9', name='check_lexical_writing'),
         CheckConstraint('grammatical_range_score >= 0 AND grammatical_range_score <= 9', name='check_grammar_writing'),
         CheckConstraint('overall_band_score >= 0 AND overall_band_score <= 9', name='check_overall_writing'),
+        Index('idx_writing_grade_teacher', 'teacher_id', 'graded_at'),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -39,6 +40,7 @@ class SpeakingGrade(Base):
         CheckConstraint('grammatical_range_score >= 0 AND grammatical_range_score <= 9', name='check_grammar_speaking'),
         CheckConstraint('pronunciation_score >= 0 AND pronunciation_score <= 9', name='check_pronunciation'),
         CheckConstraint('overall_band_score >= 0 AND overall_band_score <= 9', name='check_overall_speaking'),
+        Index('idx_speaking_grade_teacher', 'teacher_id', 'graded_at'),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -85,9 +87,16 @@ class TestResult(Base):
     test_attempt = relationship("TestAttempt", back_populates="result")
 
 class TeacherAssignment(Base):
+    """A teacher's claim on a writing/speaking submission, held by a renewable lease"""
     __tablename__ = "teacher_assignments"
     __table_args__ = (
         Index('idx_teacher_status', 'teacher_id', 'status'),
+        Index('idx_assignment_lease', 'status', 'lease_expires_at'),
+        # At most one live claim per submission
+        Index(
+            'uq_active_assignment', 'submission_type', 'submission_id', unique=True,
+            postgresql_where=text("status = 'pending'"), sqlite_where=text("status = 'pending'")
+        ),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -95,7 +104,8 @@ class TeacherAssignment(Base):
     submission_id = Column(Integer, nullable=False)  # Can be writing or speaking submission
     submission_type = Column(String(20), nullable=False)  # 'writing' or 'speaking'
     assigned_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    status = Column(String(20), default="pending", nullable=False)  # pending, completed
+    status = Column(String(20), default="pending", nullable=False)  # pending (claimed), completed, released, expired
+    lease_expires_at = Column(DateTime, nullable=True)  # Claim lapses unless renewed by a heartbeat
     completed_at = Column(DateTime, nullable=True)
     
     # Timestamps
@@ -103,3 +113,99 @@ class TeacherAssignment(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
     
     teacher = relationship("User", foreign_keys=[teacher_id])
+
+class GradingJob(Base):
+    """Durable queue entry for auto-grading a submitted attempt (claimed by grading workers)"""
+    __tablename__ = "grading_jobs"
+    __table_args__ = (
+        Index('idx_grading_job_claim', 'status', 'run_after'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    test_attempt_id = Column(Integer, ForeignKey("test_attempts.id", ondelete="CASCADE"), unique=True, nullable=False)
+    status = Column(String(20), default="queued", nullable=False)  # queued, running, completed, failed
+    payload = Column(JSON, nullable=True)  # Raw listening/reading answers as submitted
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    test_attempt = relationship("TestAttempt", back_populates="grading_job")
+
+class RegradeJob(Base):
+    """Resumable bulk regrade of listening/reading submissions after an answer key change"""
+    __tablename__ = "regrade_jobs"
+    __table_args__ = (
+        Index('idx_regrade_job_status', 'status'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    status = Column(String(20), default="queued", nullable=False)  # queued, running, completed, failed
+    
+    # Filters (combined with AND; at least one is set)
+    test_template_id = Column(Integer, ForeignKey("test_templates.id", ondelete="CASCADE"), nullable=True)
+    listening_question_ids = Column(JSON, nullable=True)
+    reading_question_ids = Column(JSON, nullable=True)
+    submitted_from = Column(DateTime, nullable=True)
+    submitted_to = Column(DateTime, nullable=True)
+    
+    # Resume cursor: section being regraded and the last submission id done
+    current_section = Column(String(20), default="listening", nullable=False)
+    last_submission_id = Column(Integer, default=0, nullable=False)
+    
+    # Progress
+    total_submissions = Column(Integer, nullable=True)
+    processed_submissions = Column(Integer, default=0, nullable=False)
+    changed_submissions = Column(Integer, default=0, nullable=False)
+    results_recalculated = Column(Integer, default=0, nullable=False)
+    
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
+
+class GradingQueueStat(Base):
+    """Materialized number of writing/speaking submissions per queue status and assigned teacher"""
+    __tablename__ = "grading_queue_stats"
+    __table_args__ = (
+        UniqueConstraint('submission_type', 'status', 'teacher_id', 'shard', name='uq_grading_queue_stat'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    submission_type = Column(String(20), nullable=False)  # 'writing' or 'speaking'
+    status = Column(String(20), nullable=False)  # pending, under_review
+    teacher_id = Column(Integer, nullable=False)  # Assigned teacher; 0 = unassigned
+    shard = Column(Integer, default=0, nullable=False)  # Unassigned counters are spread over GRADING_STATS_SHARDS rows
+    count = Column(Integer, default=0, nullable=False)  # A single shard may go negative; only the sum is meaningful
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
+
+class GradingDailyStat(Base):
+    """Materialized number of writing/speaking submissions a teacher graded per (UTC) day"""
+    __tablename__ = "grading_daily_stats"
+    __table_args__ = (
+        UniqueConstraint('teacher_id', 'day', 'submission_type', name='uq_grading_daily_stat'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    teacher_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    submission_type = Column(String(20), nullable=False)  # 'writing' or 'speaking'
+    count = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
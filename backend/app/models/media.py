@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from app.database import Base
+
+class MediaBlob(Base):
+    """An uploaded audio/image file (UPLOAD_DIR/<path>); the media library's catalog entry"""
+    __tablename__ = "media_blobs"
+    __table_args__ = (
+        Index('idx_media_blob_listing', 'created_at', 'id'),
+        Index('idx_media_blob_type_listing', 'media_type', 'created_at', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(255), unique=True, nullable=False)  # Relative to UPLOAD_DIR, e.g. audio/<sha256>.mp3
+    sha256 = Column(String(64), index=True, nullable=False)
+    size = Column(Integer, nullable=False)
+    media_type = Column(String(10), nullable=False)  # audio, image
+    mime_type = Column(String(100), nullable=True)
+    original_filename = Column(String(255), nullable=True)  # As first uploaded
+    duration_seconds = Column(Float, nullable=True)  # Audio, when the header tells
+    width = Column(Integer, nullable=True)  # Images
+    height = Column(Integer, nullable=True)
+    uploaded_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # First uploader; None for backfilled files
+
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    uploaded_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)  # Last (re-)upload; starts the GC grace period
+
+    references = relationship("MediaReference", back_populates="blob", passive_deletes=True)
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def url(self) -> str:
+        return f"/uploads/{self.path}"
+
+class MediaReference(Base):
+    """A content column (e.g. ListeningPart.audio_url) pointing at a blob; a blob's reference count is its number of rows"""
+    __tablename__ = "media_references"
+    __table_args__ = (
+        UniqueConstraint('owner_type', 'owner_id', name='uq_media_reference_owner'),
+        Index('idx_media_reference_blob', 'blob_id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    blob_id = Column(Integer, ForeignKey("media_blobs.id", ondelete="CASCADE"), nullable=False)
+    owner_type = Column(String(30), nullable=False)  # listening_part, listening_question, reading_question, writing_task
+    owner_id = Column(Integer, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    blob = relationship("MediaBlob", back_populates="references")
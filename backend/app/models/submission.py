@@ -3,11 +3,31 @@ from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.database import Base
 
+class AnswerDraft(Base):
+    """Autosaved answer of an in-progress attempt, finalized on submit"""
+    __tablename__ = "answer_drafts"
+    __table_args__ = (
+        UniqueConstraint('test_attempt_id', 'section_type', 'item_id', name='uq_answer_draft'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    test_attempt_id = Column(Integer, ForeignKey("test_attempts.id", ondelete="CASCADE"), nullable=False)
+    section_type = Column(String(20), nullable=False)  # listening, reading, writing
+    item_id = Column(Integer, nullable=False)  # Question id, or writing task id
+    answer = Column(Text, nullable=False)
+    client_seq = Column(Integer, nullable=False)  # Client sequence number of the last accepted write
+    
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    test_attempt = relationship("TestAttempt", back_populates="answer_drafts")
+
 class ListeningSubmission(Base):
     __tablename__ = "listening_submissions"
     __table_args__ = (
-        UniqueConstraint('test_attempt_id', 'question_id', name='uq_listening_submission'),
-        Index('idx_listening_attempt', 'test_attempt_id'),
+        UniqueConstraint('test_attempt_id', 'question_id', name='uq_listening_submission'),  # Also serves test_attempt_id lookups
+        Index('idx_listening_question', 'question_id'),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -27,8 +47,8 @@ class ListeningSubmission(Base):
 class ReadingSubmission(Base):
     __tablename__ = "reading_submissions"
     __table_args__ = (
-        UniqueConstraint('test_attempt_id', 'question_id', name='uq_reading_submission'),
-        Index('idx_reading_attempt', 'test_attempt_id'),
+        UniqueConstraint('test_attempt_id', 'question_id', name='uq_reading_submission'),  # Also serves test_attempt_id lookups
+        Index('idx_reading_question', 'question_id'),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -48,9 +68,8 @@ class ReadingSubmission(Base):
 class WritingSubmission(Base):
     __tablename__ = "writing_submissions"
     __table_args__ = (
-        UniqueConstraint('test_attempt_id', 'task_id', name='uq_writing_submission'),
-        Index('idx_writing_attempt', 'test_attempt_id'),
-        Index('idx_writing_status', 'status'),
+        UniqueConstraint('test_attempt_id', 'task_id', name='uq_writing_submission'),  # Also serves test_attempt_id lookups
+        Index('idx_writing_queue', 'status', 'assigned_teacher_id', 'submitted_at'),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -75,9 +94,8 @@ class WritingSubmission(Base):
 class SpeakingSubmission(Base):
     __tablename__ = "speaking_submissions"
     __table_args__ = (
-        UniqueConstraint('test_attempt_id', 'task_id', name='uq_speaking_submission'),
-        Index('idx_speaking_attempt', 'test_attempt_id'),
-        Index('idx_speaking_status', 'status'),
+        UniqueConstraint('test_attempt_id', 'task_id', name='uq_speaking_submission'),  # Also serves test_attempt_id lookups
+        Index('idx_speaking_queue', 'status', 'assigned_teacher_id', 'submitted_at'),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -98,3 +116,27 @@ class SpeakingSubmission(Base):
     task = relationship("SpeakingTask", back_populates="submissions")
     assigned_teacher = relationship("User", foreign_keys=[assigned_teacher_id])
     grade = relationship("SpeakingGrade", back_populates="submission", uselist=False, cascade="all, delete-orphan")
+
+class SpeakingUpload(Base):
+    """A resumable upload of a speaking recording; its SpeakingSubmission is written on finalize"""
+    __tablename__ = "speaking_uploads"
+    __table_args__ = (
+        Index('idx_speaking_upload_task', 'test_attempt_id', 'task_id', 'status'),
+        Index('idx_speaking_upload_expiry', 'status', 'updated_at'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    test_attempt_id = Column(Integer, ForeignKey("test_attempts.id", ondelete="CASCADE"), nullable=False)
+    task_id = Column(Integer, ForeignKey("speaking_tasks.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    upload_length = Column(Integer, nullable=False)  # Declared size of the whole recording in bytes
+    received_bytes = Column(Integer, default=0, nullable=False)  # Offset the next chunk must start at
+    sha256 = Column(String(64), nullable=True)  # Expected checksum of the whole recording, if the client sent one
+    extension = Column(String(10), default=".webm", nullable=False)
+    status = Column(String(20), default="uploading", nullable=False)  # uploading, completed, aborted
+    audio_url = Column(String(500), nullable=True)  # Set on finalize
+    completed_at = Column(DateTime, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
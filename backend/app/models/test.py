@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Float, Boolean, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Float, Boolean, Index, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 import enum
@@ -16,6 +16,9 @@ class SectionType(str, enum.Enum):
 
 class TestTemplate(Base):
     __tablename__ = "test_templates"
+    __table_args__ = (
+        Index('idx_template_catalog', 'is_published', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(300), nullable=False)
@@ -39,6 +42,27 @@ class TestTemplate(Base):
     creator = relationship("User", back_populates="created_tests")
     sections = relationship("TestSection", back_populates="test_template", cascade="all, delete-orphan")
     test_attempts = relationship("TestAttempt", back_populates="test_template")
+    structure_snapshots = relationship("TestStructureSnapshot", back_populates="test_template", cascade="all, delete-orphan")
+
+class TestStructureSnapshot(Base):
+    """
+    Compiled, student-safe test structure. A new version is written on publish and on every edit;
+    older versions are kept while an in-progress attempt is pinned to them.
+    """
+    __tablename__ = "test_structure_snapshots"
+    __table_args__ = (
+        UniqueConstraint('test_template_id', 'version', name='uq_structure_snapshot_version'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    test_template_id = Column(Integer, ForeignKey("test_templates.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)  # TestStructureResponse without answer_data
+    
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    test_template = relationship("TestTemplate", back_populates="structure_snapshots")
 
 class TestSection(Base):
     __tablename__ = "test_sections"
@@ -65,6 +89,7 @@ class TestAttempt(Base):
     __tablename__ = "test_attempts"
     __table_args__ = (
         Index('idx_attempt_user_status', 'user_id', 'status'),
+        Index('idx_attempt_user_created', 'user_id', 'created_at'),
         Index('idx_attempt_template', 'test_template_id'),
     )
     
@@ -75,6 +100,7 @@ class TestAttempt(Base):
     end_time = Column(DateTime, nullable=True)
     status = Column(String(20), default="in_progress", nullable=False)
     overall_band_score = Column(Float, nullable=True)
+    snapshot_version = Column(Integer, nullable=True)  # Structure version pinned at start; later edits don't change a test being taken
     
     # Timestamps
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -87,4 +113,6 @@ class TestAttempt(Base):
     writing_submissions = relationship("WritingSubmission", back_populates="test_attempt")
     speaking_submissions = relationship("SpeakingSubmission", back_populates="test_attempt")
     result = relationship("TestResult", back_populates="test_attempt", uselist=False)
+    grading_job = relationship("GradingJob", back_populates="test_attempt", uselist=False, cascade="all, delete-orphan")
+    answer_drafts = relationship("AnswerDraft", back_populates="test_attempt", cascade="all, delete-orphan")
 
@@ -9,7 +9,8 @@ from app.routers import (
     writing,
     speaking,
     grading,
-    upload
+    upload,
+    events
 )
 
 # Create main API router
@@ -26,5 +27,6 @@ api_router.include_router(speaking.router, prefix="/speaking", tags=["Speaking"]
 api_router.include_router(grading.router, prefix="/grading", tags=["Grading"])
 api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
 api_router.include_router(upload.router, prefix="/upload", tags=["Upload"])
+api_router.include_router(events.router, prefix="/events", tags=["Events"])
 
 __all__ = ["api_router"]
@@ -6,17 +6,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
-from app.models import User, TestTemplate
+from app.database import get_db, get_read_db
+from app.models import User, TestTemplate, RegradeJob
 from app.schemas import UserResponse, TestTemplateResponse
-from app.core.security import get_current_admin_user
+from app.schemas.grade import RegradeJobCreate, RegradeJobResponse
+from app.core.security import CurrentUser, get_current_admin_user, invalidate_user
+from app.services.regrade_service import create_regrade_job, resume_regrade_job, JOB_FAILED
 
 router = APIRouter()
 
 @router.get("/users", response_model=List[UserResponse])
-async def get_all_users(
+def get_all_users(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """
     Get all users in the system. Admin only.
@@ -25,9 +27,9 @@ async def get_all_users(
     return users
 
 @router.get("/tests", response_model=List[TestTemplateResponse])
-async def get_all_tests(
+def get_all_tests(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """
     Get all tests in the system. Admin only.
@@ -37,8 +39,8 @@ async def get_all_tests(
 
 @router.get("/stats")
 def get_admin_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """
     Get platform statistics for admin dashboard  
@@ -72,7 +74,7 @@ def update_user_role(
     user_id: int,
     role: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """
     Update a user's role. Admin only.
@@ -103,5 +105,62 @@ def update_user_role(
     user.role = role
     db.commit()
     db.refresh(user)
+    invalidate_user(user.id)
     
     return user
+
+@router.post("/regrade-jobs", response_model=RegradeJobResponse, status_code=status.HTTP_201_CREATED)
+def start_regrade_job(
+    job_in: RegradeJobCreate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Queue a bulk regrade of listening/reading submissions. Admin only.
+    
+    The grading worker regrades the matching submissions in chunks and
+    recalculates the affected test results.
+    """
+    return create_regrade_job(db, job_in, created_by_id=current_user.id)
+
+@router.get("/regrade-jobs/{job_id}", response_model=RegradeJobResponse)
+def get_regrade_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Get the progress of a regrade job. Admin only.
+    """
+    job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Regrade job not found"
+        )
+    
+    return job
+
+@router.post("/regrade-jobs/{job_id}/resume", response_model=RegradeJobResponse)
+def resume_failed_regrade_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Requeue a failed regrade job from its last completed chunk. Admin only.
+    """
+    job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Regrade job not found"
+        )
+    
+    if job.status != JOB_FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only failed regrade jobs can be resumed"
+        )
+    
+    return resume_regrade_job(db, job)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
@@ -6,17 +7,43 @@ from datetime import timedelta
 from app.database import get_db
 from app.schemas.user import LoginRequest, Token, UserCreate, UserResponse, PasswordReset, PasswordResetConfirm
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    hash_password_async,
     create_access_token,
     decode_access_token,
     get_current_user,
+    CurrentUser,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from app.models import User
 
 router = APIRouter()
 
+async def authenticate_user(db: Session, email: str, password: str) -> User:
+    """
+    Check credentials with bcrypt running on the password pool.
+    
+    A hash made with outdated cost parameters is replaced on success.
+    Raises 401 for bad credentials and 429 when the password pool is saturated.
+    """
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == email).first())
+    if user:
+        matches, new_hash = await verify_password_async(password, user.password_hash)
+    
+    if not user or not matches:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if new_hash:
+        user.password_hash = new_hash
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(db.refresh, user)
+    
+    return user
+
 # ============================================================
 # REGISTRATION TEMPORARILY DISABLED
 # Users must be created by admin through the admin panel
@@ -69,7 +96,7 @@ router = APIRouter()
 #     return new_user
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     login_data: LoginRequest,
     db: Session = Depends(get_db)
 ):
@@ -79,14 +106,7 @@ def login(
     - **email**: User's email address
     - **password**: User's password
     """
-    # Find user
-    user = db.query(User).filter(User.email == login_data.email).first()
-    if not user or not verify_password(login_data.password, user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = await authenticate_user(db, login_data.email, login_data.password)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -102,7 +122,7 @@ def login(
     }
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -111,13 +131,7 @@ def login_for_access_token(
     
     Use email as username
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = await authenticate_user(db, form_data.username, form_data.password)
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -133,7 +147,7 @@ def login_for_access_token(
 
 @router.post("/refresh", response_model=Token)
 def refresh_token(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -180,7 +194,7 @@ def forgot_password(
     return {"message": "If email exists, a reset link has been sent"}
 
 @router.post("/reset-password", status_code=status.HTTP_200_OK)
-def reset_password(
+async def reset_password(
     reset_data: PasswordResetConfirm,
     db: Session = Depends(get_db)
 ):
@@ -196,7 +210,7 @@ def reset_password(
         )
     
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.id == int(user_id)).first())
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -204,7 +218,7 @@ def reset_password(
         )
     
     # Update password
-    user.password_hash = get_password_hash(reset_data.new_password)
-    db.commit()
+    user.password_hash = await hash_password_async(reset_data.new_password)
+    await run_in_threadpool(db.commit)
     
     return {"message": "Password updated successfully"}
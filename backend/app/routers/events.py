@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+import json
+
+from app.core.config import settings
+from app.core.security import (
+    CurrentUser,
+    create_stream_ticket,
+    get_current_admin_user,
+    get_current_stream_user,
+    get_current_user,
+)
+from app.models import UserRole
+from app.services.event_bus import GRADING_CHANNEL, event_bus, user_channel
+
+router = APIRouter()
+
+# How long browsers wait before reconnecting a dropped stream
+RECONNECT_MS = 3000
+
+
+def format_event(event: str, data: dict) -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/ticket")
+def create_event_ticket(
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Get a stream ticket for EventSource
+
+    EventSource can't send an Authorization header, so browsers open
+    /stream?ticket=... instead. The ticket only authenticates streams and
+    expires after EVENTS_TICKET_TTL_SECONDS; fetch a new one to reconnect.
+    """
+    return {
+        "ticket": create_stream_ticket(current_user.id),
+        "expires_in": settings.EVENTS_TICKET_TTL_SECONDS
+    }
+
+
+@router.get("/stream")
+async def stream_events(
+    current_user: CurrentUser = Depends(get_current_stream_user)
+):
+    """
+    Server-Sent Events stream of grading queue and result updates
+
+    Everyone receives events about their own attempts (attempt_submitted,
+    result_updated); teachers and admins also receive the grading queue
+    events (attempt_submitted, submission_graded) with the current pending
+    counts. A "resync" event means updates were dropped and the client
+    should refetch its state.
+    """
+    channels = [user_channel(current_user.id)]
+    if current_user.role in [UserRole.TEACHER, UserRole.ADMIN]:
+        channels.append(GRADING_CHANNEL)
+
+    async def stream():
+        subscription = event_bus.subscribe(channels)
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            yield format_event("ready", {"channels": channels})
+            while True:
+                message = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+                if message is None:
+                    yield ": keep-alive\n\n"  # Comment line; stops proxies closing an idle stream
+                    continue
+                yield format_event(message["event"], message["data"])
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats")
+def get_event_stats(
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Get event bus metrics (Admin only)
+    
+    Reports connected subscribers in this process, events delivered to
+    them, and whether the PostgreSQL listener is running.
+    """
+    return event_bus.stats()
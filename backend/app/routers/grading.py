@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import literal_column, or_, select, tuple_, union_all
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timezone
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.grade import (
     WritingGradeCreate,
     WritingGradeResponse,
     SpeakingGradeCreate,
     SpeakingGradeResponse,
-    TeacherWorkload
+    TeacherWorkload,
+    GradingHistoryItem,
+    GradingClaimRequest,
+    GradingClaimResponse
 )
 from app.schemas.submission import (
     WritingSubmissionResponse,
@@ -23,7 +27,13 @@ from app.models import (
     SpeakingGrade,
     TestAttempt
 )
-from app.core.security import get_current_teacher_user
+from app.core.security import CurrentUser, get_current_teacher_user
+from app.services.grading_claims import (
+    claim_submissions, get_active_claims, renew_claim, release_claim, claim_holder, complete_claim
+)
+from app.services.queue_stats import count_status_change, count_graded, queue_counts, graded_today
+from app.services.event_bus import GRADING_CHANNEL, publish, publish_result
+from app.core.pagination import CURSOR_HEADER, decode_cursor, encode_cursor, paginate, set_next_cursor
 
 router = APIRouter()
 
@@ -36,21 +46,28 @@ def calculate_band_score(*scores: float) -> float:
 # Writing Grading
 @router.get("/writing/pending", response_model=List[WritingSubmissionResponse])
 def get_pending_writing_submissions(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_teacher_user),
+    current_user: CurrentUser = Depends(get_current_teacher_user),
     db: Session = Depends(get_db)
 ):
     """
     Get pending writing submissions for grading (Teacher only)
+    
+    Submissions claimed by other teachers are left out; the caller's own
+    claims are included.
     """
     from sqlalchemy.orm import joinedload
     
-    submissions = db.query(WritingSubmission).options(
+    # Oldest first, so the queue is worked in submission order
+    submissions = paginate(db.query(WritingSubmission).options(
         joinedload(WritingSubmission.test_attempt).joinedload(TestAttempt.user)
     ).filter(
-        WritingSubmission.status.in_(["pending", "under_review"])
-    ).offset(skip).limit(limit).all()
+        WritingSubmission.status.in_(["pending", "under_review"]),
+        or_(WritingSubmission.assigned_teacher_id == None, WritingSubmission.assigned_teacher_id == current_user.id)
+    ), [WritingSubmission.submitted_at, WritingSubmission.id], cursor=cursor, limit=limit)
+    set_next_cursor(response, submissions)
     
     # Manually populate student info  
     result = []
@@ -67,16 +84,16 @@ def get_pending_writing_submissions(
 def grade_writing_submission(
     submission_id: int,
     grade_data: WritingGradeCreate,
-    current_user: User = Depends(get_current_teacher_user),
+    current_user: CurrentUser = Depends(get_current_teacher_user),
     db: Session = Depends(get_db)
 ):
     """
     Grade a writing submission (Teacher only)
     """
-    # Get submission
+    # Locked until commit, so claims (SKIP LOCKED) pass it over and its status can't change underneath
     submission = db.query(WritingSubmission).filter(
         WritingSubmission.id == submission_id
-    ).first()
+    ).with_for_update().first()
     
     if not submission:
         raise HTTPException(
@@ -95,6 +112,13 @@ def grade_writing_submission(
             detail="Submission already graded"
         )
     
+    holder = claim_holder(db, "writing", submission_id)
+    if holder is not None and holder != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Submission is claimed by another teacher"
+        )
+    
     # Calculate overall band score
     overall_score = calculate_band_score(
         grade_data.task_achievement_score,
@@ -118,9 +142,18 @@ def grade_writing_submission(
     db.add(grade)
     
     # Update submission status
+    count_status_change(db, "writing", submission.status, submission.assigned_teacher_id, "graded", current_user.id)
     submission.status = "graded"
     submission.graded_at = datetime.now(timezone.utc)
     submission.assigned_teacher_id = current_user.id
+    complete_claim(db, "writing", submission_id, current_user.id)
+    count_graded(db, "writing", current_user.id, submission.graded_at)
+    publish(db, GRADING_CHANNEL, "submission_graded", {
+        "submission_type": "writing",
+        "submission_id": submission_id,
+        "teacher_id": current_user.id,
+        "pending": queue_counts(db)
+    })
     
     db.commit()
     db.refresh(grade)
@@ -136,21 +169,28 @@ def grade_writing_submission(
 # Speaking Grading
 @router.get("/speaking/pending", response_model=List[SpeakingSubmissionResponse])
 def get_pending_speaking_submissions(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_teacher_user),
+    current_user: CurrentUser = Depends(get_current_teacher_user),
     db: Session = Depends(get_db)
 ):
     """
     Get pending speaking submissions for grading (Teacher only)
+    
+    Submissions claimed by other teachers are left out; the caller's own
+    claims are included.
     """
     from sqlalchemy.orm import joinedload
     
-    submissions = db.query(SpeakingSubmission).options(
+    # Oldest first, so the queue is worked in submission order
+    submissions = paginate(db.query(SpeakingSubmission).options(
         joinedload(SpeakingSubmission.test_attempt).joinedload(TestAttempt.user)
     ).filter(
-        SpeakingSubmission.status.in_(["pending", "under_review"])
-    ).offset(skip).limit(limit).all()
+        SpeakingSubmission.status.in_(["pending", "under_review"]),
+        or_(SpeakingSubmission.assigned_teacher_id == None, SpeakingSubmission.assigned_teacher_id == current_user.id)
+    ), [SpeakingSubmission.submitted_at, SpeakingSubmission.id], cursor=cursor, limit=limit)
+    set_next_cursor(response, submissions)
     
      # Manually populate student info  
     result = []
@@ -167,16 +207,16 @@ def get_pending_speaking_submissions(
 def grade_speaking_submission(
     submission_id: int,
     grade_data: SpeakingGradeCreate,
-    current_user: User = Depends(get_current_teacher_user),
+    current_user: CurrentUser = Depends(get_current_teacher_user),
     db: Session = Depends(get_db)
 ):
     """
     Grade a speaking submission (Teacher only)
     """
-    # Get submission
+    # Locked until commit, so claims (SKIP LOCKED) pass it over and its status can't change underneath
     submission = db.query(SpeakingSubmission).filter(
         SpeakingSubmission.id == submission_id
-    ).first()
+    ).with_for_update().first()
     
     if not submission:
         raise HTTPException(
@@ -195,6 +235,13 @@ def grade_speaking_submission(
             detail="Submission already graded"
         )
     
+    holder = claim_holder(db, "speaking", submission_id)
+    if holder is not None and holder != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Submission is claimed by another teacher"
+        )
+    
     # Calculate overall band score
     overall_score = calculate_band_score(
         grade_data.fluency_coherence_score,
@@ -218,9 +265,18 @@ def grade_speaking_submission(
     db.add(grade)
     
     # Update submission status
+    count_status_change(db, "speaking", submission.status, submission.assigned_teacher_id, "graded", current_user.id)
     submission.status = "graded"
     submission.graded_at = datetime.now(timezone.utc)
     submission.assigned_teacher_id = current_user.id
+    complete_claim(db, "speaking", submission_id, current_user.id)
+    count_graded(db, "speaking", current_user.id, submission.graded_at)
+    publish(db, GRADING_CHANNEL, "submission_graded", {
+        "submission_type": "speaking",
+        "submission_id": submission_id,
+        "teacher_id": current_user.id,
+        "pending": queue_counts(db)
+    })
     
     db.commit()
     db.refresh(grade)
@@ -233,35 +289,89 @@ def grade_speaking_submission(
     
     return grade
 
+# Grading Claims
+def claim_response(assignment, submission=None) -> GradingClaimResponse:
+    """Claim with its submission attached"""
+    response = GradingClaimResponse.model_validate(assignment)
+    if submission is not None:
+        if assignment.submission_type == "writing":
+            response.writing_submission = WritingSubmissionResponse.model_validate(submission)
+        else:
+            response.speaking_submission = SpeakingSubmissionResponse.model_validate(submission)
+    return response
+
+@router.post("/claims", response_model=List[GradingClaimResponse], status_code=status.HTTP_201_CREATED)
+def claim_grading_submissions(
+    claim_data: GradingClaimRequest,
+    current_user: CurrentUser = Depends(get_current_teacher_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Claim the next unclaimed submissions for grading (Teacher only)
+    
+    Concurrent claims never receive the same submission. Each claim is held
+    by a lease that the client renews with heartbeats; an empty list means
+    the queue is drained.
+    """
+    claimed = claim_submissions(db, current_user.id, claim_data.submission_type, claim_data.count)
+    return [claim_response(assignment, submission) for assignment, submission in claimed]
+
+@router.get("/claims", response_model=List[GradingClaimResponse])
+def get_my_claims(
+    current_user: CurrentUser = Depends(get_current_teacher_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the current teacher's live claims
+    """
+    return [claim_response(assignment) for assignment in get_active_claims(db, current_user.id)]
+
+@router.post("/claims/{assignment_id}/heartbeat", response_model=GradingClaimResponse)
+def renew_grading_claim(
+    assignment_id: int,
+    current_user: CurrentUser = Depends(get_current_teacher_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Extend a claim's lease while its submission is being graded
+    """
+    assignment = renew_claim(db, assignment_id, current_user.id)
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Claim has expired or is not yours"
+        )
+    return claim_response(assignment)
+
+@router.post("/claims/{assignment_id}/release", response_model=GradingClaimResponse)
+def release_grading_claim(
+    assignment_id: int,
+    current_user: CurrentUser = Depends(get_current_teacher_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Return a claimed submission to the queue without grading it
+    """
+    assignment = release_claim(db, assignment_id, current_user.id)
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Claim not found"
+        )
+    return claim_response(assignment)
+
 @router.get("/workload", response_model=TeacherWorkload)
 def get_teacher_workload(
-    current_user: User = Depends(get_current_teacher_user),
+    current_user: CurrentUser = Depends(get_current_teacher_user),
     db: Session = Depends(get_db)
 ):
     """
     Get teacher's current workload
     """
-    pending_writing = db.query(WritingSubmission).filter(
-        WritingSubmission.status.in_(["pending", "under_review"])
-    ).count()
-    
-    pending_speaking = db.query(SpeakingSubmission).filter(
-        SpeakingSubmission.status.in_(["pending", "under_review"])
-    ).count()
-    
-    # Count completed today
-    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    completed_today = (
-        db.query(WritingGrade).filter(
-            WritingGrade.teacher_id == current_user.id,
-            WritingGrade.graded_at >= today_start
-        ).count() +
-        db.query(SpeakingGrade).filter(
-            SpeakingGrade.teacher_id == current_user.id,
-            SpeakingGrade.graded_at >= today_start
-        ).count()
-    )
+    pending = queue_counts(db)
+    pending_writing = pending["writing"]
+    pending_speaking = pending["speaking"]
+    completed_today = graded_today(db, current_user.id)
     
     return {
         "teacher_id": current_user.id,
@@ -274,7 +384,7 @@ def get_teacher_workload(
 
 @router.get("/queue")
 def get_grading_queue(
-    current_user: User = Depends(get_current_teacher_user),
+    current_user: CurrentUser = Depends(get_current_teacher_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -284,21 +394,9 @@ def get_grading_queue(
     from app.schemas.stats import TeacherStatsResponse, RecentSubmissionResponse
     
     # Count pending submissions (assigned to this teacher OR unassigned)
-    pending_writing = db.query(WritingSubmission).filter(
-        or_(
-            WritingSubmission.assigned_teacher_id == current_user.id,
-            WritingSubmission.assigned_teacher_id == None
-        ),
-        WritingSubmission.status.in_(["pending", "under_review"])
-    ).count()
-    
-    pending_speaking = db.query(SpeakingSubmission).filter(
-        or_(
-            SpeakingSubmission.assigned_teacher_id == current_user.id,
-            SpeakingSubmission.assigned_teacher_id == None
-        ),
-        SpeakingSubmission.status.in_(["pending", "under_review"])
-    ).count()
+    pending = queue_counts(db, current_user.id)
+    pending_writing = pending["writing"]
+    pending_speaking = pending["speaking"]
     
     # Get recent submissions (last 3)
     from sqlalchemy.orm import joinedload
@@ -385,7 +483,7 @@ def get_grading_queue(
 
 @router.get("/stats")
 def get_grading_stats(
-    current_user: User = Depends(get_current_teacher_user),
+    current_user: CurrentUser = Depends(get_current_teacher_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -393,93 +491,108 @@ def get_grading_stats(
     """
     from app.schemas.stats import TeacherStatsResponse
     
-    # Count graded today
-    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    graded_writing_today = db.query(WritingSubmission).filter(
-        WritingSubmission.assigned_teacher_id == current_user.id,
-        WritingSubmission.status == "graded",
-        WritingSubmission.graded_at >= today_start
-    ).count()
-    
-    graded_speaking_today = db.query(SpeakingSubmission).filter(
-        SpeakingSubmission.assigned_teacher_id == current_user.id,
-        SpeakingSubmission.status == "graded",
-        SpeakingSubmission.graded_at >= today_start
-    ).count()
-    
-    graded_today = graded_writing_today + graded_speaking_today
-    
     # Average grading time (simplified)
     avg_grading_time = "15 min"
     
     return TeacherStatsResponse(
         pending_writing=0,  # Set by queue endpoint
         pending_speaking=0,  # Set by queue endpoint
-        graded_today=graded_today,
+        graded_today=graded_today(db, current_user.id),
         avg_grading_time=avg_grading_time
     ).model_dump()
 
 
-@router.get("/history")
+# Grading history sources: (sort rank, type, task label, grade model, submission model)
+HISTORY_SOURCES = (
+    (0, "Writing", "Task", WritingGrade, WritingSubmission),
+    (1, "Speaking", "Part", SpeakingGrade, SpeakingSubmission),
+)
+
+def _history_branch(rank: int, grade_model, submission_model, teacher_id: int, after: Optional[list], limit: int):
+    """
+    One teacher's grades from one table, after the cursor, newest first.
+    
+    The cursor compares against (graded_at, rank, id); rank is constant per
+    table, so each branch reduces to a seek on (teacher_id, graded_at).
+    """
+    query = select(
+        grade_model.id,
+        grade_model.submission_id,
+        literal_column(str(rank)).label("rank"),
+        submission_model.task_id,
+        User.full_name.label("student"),
+        grade_model.overall_band_score.label("score"),
+        grade_model.graded_at,
+        grade_model.feedback_text.label("feedback")
+    ).outerjoin(
+        submission_model, submission_model.id == grade_model.submission_id
+    ).outerjoin(
+        TestAttempt, TestAttempt.id == submission_model.test_attempt_id
+    ).outerjoin(
+        User, User.id == TestAttempt.user_id
+    ).where(grade_model.teacher_id == teacher_id)
+    
+    if after is not None:
+        graded_at, after_rank, after_id = after
+        if rank < after_rank:
+            query = query.where(grade_model.graded_at <= graded_at)
+        elif rank > after_rank:
+            query = query.where(grade_model.graded_at < graded_at)
+        else:
+            query = query.where(tuple_(grade_model.graded_at, grade_model.id) < tuple_(graded_at, after_id))
+    
+    return select(query.order_by(grade_model.graded_at.desc(), grade_model.id.desc()).limit(limit).subquery())
+
+@router.get("/history", response_model=List[GradingHistoryItem])
 def get_grading_history(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_teacher_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_teacher_user),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get history of graded submissions by the current teacher
-    """
-    # Get graded writing submissions
-    writing_grades = db.query(WritingGrade).filter(
-        WritingGrade.teacher_id == current_user.id
-    ).order_by(WritingGrade.graded_at.desc()).offset(skip).limit(limit).all()
     
-    # Get graded speaking submissions
-    speaking_grades = db.query(SpeakingGrade).filter(
-        SpeakingGrade.teacher_id == current_user.id
-    ).order_by(SpeakingGrade.graded_at.desc()).offset(skip).limit(limit).all()
-    
-    # Combine and sort (simplified approach, ideally we'd query a union or handle pagination better)
-    # For now, we'll just return a mixed list sorted by date
-    
-    history = []
-    
-    for grade in writing_grades:
-        submission = db.query(WritingSubmission).get(grade.submission_id)
-        student_name = submission.test_attempt.user.full_name if submission and submission.test_attempt and submission.test_attempt.user else "Unknown"
-        
-        history.append({
-            "id": grade.id,
-            "submission_id": grade.submission_id,
-            "student": student_name,
-            "type": "Writing",
-            "task": f"Task {submission.task_id}" if submission else "Unknown",
-            "score": grade.overall_band_score,
-            "graded_at": grade.graded_at,
-            "feedback": grade.feedback_text
-        })
-        
-    for grade in speaking_grades:
-        submission = db.query(SpeakingSubmission).get(grade.submission_id)
-        student_name = submission.test_attempt.user.full_name if submission and submission.test_attempt and submission.test_attempt.user else "Unknown"
-        
-        history.append({
-            "id": grade.id,
-            "submission_id": grade.submission_id,
-            "student": student_name,
-            "type": "Speaking",
-            "task": f"Part {submission.task_id}" if submission else "Unknown",
-            "score": grade.overall_band_score,
-            "graded_at": grade.graded_at,
-            "feedback": grade.feedback_text
-        })
-    
-    # Sort by graded_at desc
-    history.sort(key=lambda x: x["graded_at"], reverse=True)
-    
-    return history[:limit]
+    One UNION ALL over writing and speaking grades (joined to submission and
+    student), ordered by (graded_at, type, id) and keyset-paginated in the
+    database.
+    """
+    scope = "grading_history:graded_at,rank,id:desc"
+    after = None
+    if cursor:
+        after = decode_cursor(scope, cursor)
+        try:
+            after = [datetime.fromisoformat(after[0]), int(after[1]), int(after[2])]
+        except (TypeError, ValueError, IndexError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    
+    history = union_all(*[
+        _history_branch(rank, grade_model, submission_model, current_user.id, after, limit + 1)
+        for rank, _, _, grade_model, submission_model in HISTORY_SOURCES
+    ]).subquery()
+    rows = db.execute(
+        select(history).order_by(history.c.graded_at.desc(), history.c.rank.desc(), history.c.id.desc()).limit(limit + 1)
+    ).all()
+    
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[CURSOR_HEADER] = encode_cursor(scope, [last.graded_at, last.rank, last.id])
+    
+    return [
+        {
+            "id": row.id,
+            "submission_id": row.submission_id,
+            "student": row.student or "Unknown",
+            "type": HISTORY_SOURCES[row.rank][1],
+            "task": f"{HISTORY_SOURCES[row.rank][2]} {row.task_id}" if row.task_id is not None else "Unknown",
+            "score": row.score,
+            "graded_at": row.graded_at,
+            "feedback": row.feedback
+        }
+        for row in rows
+    ]
 
 def update_test_result(attempt_id: int, db: Session):
     """
@@ -537,5 +650,6 @@ def update_test_result(attempt_id: int, db: Session):
             attempt.overall_band_score = result.overall_band_score
             if len(scores) == 4: # All parts graded
                 attempt.status = "graded"
+            publish_result(db, attempt, result)
     
     db.commit()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -13,8 +13,10 @@ from app.schemas.question import (
     ListeningPartResponse,
     ListeningPartUpdate
 )
-from app.models import User, ListeningQuestion, ListeningAnswer, TestSection, ListeningPart
-from app.core.security import get_current_user, get_current_admin_user
+from app.models import ListeningQuestion, ListeningAnswer, TestSection, ListeningPart
+from app.core.security import CurrentUser, get_current_user, get_current_admin_user
+from app.core.pagination import paginate, set_next_cursor
+from app.services.test_snapshot import refresh_section_snapshot
 
 router = APIRouter()
 
@@ -23,7 +25,7 @@ router = APIRouter()
 @router.post("/parts", response_model=ListeningPartResponse, status_code=status.HTTP_201_CREATED)
 def create_listening_part(
     part_data: ListeningPartCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Create a listening part (audio + transcript)"""
@@ -38,6 +40,7 @@ def create_listening_part(
     part = ListeningPart(**part_data.model_dump())
     db.add(part)
     db.commit()
+    refresh_section_snapshot(db, part.section_id)
     db.refresh(part)
     return part
 
@@ -45,7 +48,7 @@ def create_listening_part(
 def get_listening_parts(
     section_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get all parts for a section"""
     parts = db.query(ListeningPart).filter(
@@ -56,7 +59,7 @@ def get_listening_parts(
 @router.delete("/parts/{part_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_listening_part(
     part_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Delete a listening part and its questions"""
@@ -64,8 +67,10 @@ def delete_listening_part(
     if not part:
         raise HTTPException(status_code=404, detail="Part not found")
         
+    section_id = part.section_id
     db.delete(part)
     db.commit()
+    refresh_section_snapshot(db, section_id)
     return None
 
 # --- Listening Questions ---
@@ -73,7 +78,7 @@ def delete_listening_part(
 @router.post("/questions", response_model=ListeningQuestionResponse, status_code=status.HTTP_201_CREATED)
 def create_listening_question(
     question_data: ListeningQuestionWithAnswerCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -113,18 +118,20 @@ def create_listening_question(
     
     db.add(answer)
     db.commit()
+    refresh_section_snapshot(db, question.section_id)
     db.refresh(question)
     
     return question
 
 @router.get("/questions", response_model=List[ListeningQuestionResponse])
 def get_listening_questions(
+    response: Response,
     section_id: int,
     part_id: Optional[int] = None,
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(50, ge=1, le=100),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get all listening questions for a section, optionally filtered by part
@@ -134,7 +141,8 @@ def get_listening_questions(
     if part_id:
         query = query.filter(ListeningQuestion.part_id == part_id)
         
-    questions = query.order_by(ListeningQuestion.order).offset(skip).limit(limit).all()
+    questions = paginate(query, [ListeningQuestion.order, ListeningQuestion.id], cursor=cursor, limit=limit)
+    set_next_cursor(response, questions)
     
     return questions
 
@@ -142,7 +150,7 @@ def get_listening_questions(
 def get_listening_question(
     question_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get a specific listening question with answer (answer only visible to admin/teacher)
@@ -163,7 +171,7 @@ def get_listening_question(
 def update_listening_question(
     question_id: int,
     question_update: ListeningQuestionUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -191,6 +199,7 @@ def update_listening_question(
         question.options = [opt.model_dump() for opt in question_update.options]
     
     db.commit()
+    refresh_section_snapshot(db, question.section_id)
     db.refresh(question)
     
     return question
@@ -199,7 +208,7 @@ def update_listening_question(
 @router.delete("/questions/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_listening_question(
     question_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -215,7 +224,9 @@ def delete_listening_question(
             detail="Question not found"
         )
     
+    section_id = question.section_id
     db.delete(question)
     db.commit()
+    refresh_section_snapshot(db, section_id)
     
     return None
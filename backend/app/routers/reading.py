@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.schemas.question import (
@@ -13,8 +13,10 @@ from app.schemas.question import (
     ReadingQuestionResponse,
     ReadingQuestionWithAnswerCreate
 )
-from app.models import User, ReadingPassage, ReadingQuestion, ReadingAnswer, TestSection
-from app.core.security import get_current_user, get_current_admin_user
+from app.models import ReadingPassage, ReadingQuestion, ReadingAnswer, TestSection
+from app.core.security import CurrentUser, get_current_user, get_current_admin_user
+from app.core.pagination import paginate, set_next_cursor
+from app.services.test_snapshot import refresh_section_snapshot
 
 router = APIRouter()
 
@@ -22,7 +24,7 @@ router = APIRouter()
 @router.post("/passages", response_model=ReadingPassageResponse, status_code=status.HTTP_201_CREATED)
 def create_reading_passage(
     passage_data: ReadingPassageCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -50,24 +52,27 @@ def create_reading_passage(
     
     db.add(passage)
     db.commit()
+    refresh_section_snapshot(db, passage.section_id)
     db.refresh(passage)
     
     return passage
 
 @router.get("/passages", response_model=List[ReadingPassageResponse])
 def get_reading_passages(
+    response: Response,
     section_id: int,
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get all reading passages for a section
     """
-    passages = db.query(ReadingPassage).filter(
+    passages = paginate(db.query(ReadingPassage).filter(
         ReadingPassage.section_id == section_id
-    ).order_by(ReadingPassage.order).offset(skip).limit(limit).all()
+    ), [ReadingPassage.order, ReadingPassage.id], cursor=cursor, limit=limit)
+    set_next_cursor(response, passages)
     
     return passages
 
@@ -75,7 +80,7 @@ def get_reading_passages(
 def get_reading_passage(
     passage_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get a specific reading passage with questions
@@ -96,7 +101,7 @@ def get_reading_passage(
 def update_reading_passage(
     passage_id: int,
     passage_update: ReadingPassageUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -122,6 +127,7 @@ def update_reading_passage(
         setattr(passage, field, value)
     
     db.commit()
+    refresh_section_snapshot(db, passage.section_id)
     db.refresh(passage)
     
     return passage
@@ -129,7 +135,7 @@ def update_reading_passage(
 @router.delete("/passages/{passage_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_reading_passage(
     passage_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -145,8 +151,10 @@ def delete_reading_passage(
             detail="Passage not found"
         )
     
+    section_id = passage.section_id
     db.delete(passage)
     db.commit()
+    refresh_section_snapshot(db, section_id)
     
     return None
 
@@ -154,7 +162,7 @@ def delete_reading_passage(
 @router.post("/questions", response_model=ReadingQuestionResponse, status_code=status.HTTP_201_CREATED)
 def create_reading_question(
     question_data: ReadingQuestionWithAnswerCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -188,6 +196,7 @@ def create_reading_question(
     
     db.add(answer)
     db.commit()
+    refresh_section_snapshot(db, passage.section_id)
     db.refresh(question)
     
     return question
@@ -196,7 +205,7 @@ def create_reading_question(
 def get_reading_question(
     question_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get a specific reading question
@@ -217,7 +226,7 @@ def get_reading_question(
 def update_reading_question(
     question_id: int,
     question_update: ReadingQuestionUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -243,6 +252,7 @@ def update_reading_question(
         question.options = [opt.model_dump() for opt in question_update.options]
     
     db.commit()
+    refresh_section_snapshot(db, question.passage.section_id)
     db.refresh(question)
     
     return question
@@ -250,7 +260,7 @@ def update_reading_question(
 @router.delete("/questions/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_reading_question(
     question_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -266,7 +276,9 @@ def delete_reading_question(
             detail="Question not found"
         )
     
+    section_id = question.passage.section_id
     db.delete(question)
     db.commit()
+    refresh_section_snapshot(db, section_id)
     
     return None
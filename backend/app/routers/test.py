@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Body, Depends, HTTPException, Header, status, Query, Response, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timezone
 import os
 import shutil
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.test import (
     TestTemplateCreate, 
     TestTemplateResponse, 
@@ -19,13 +19,32 @@ from app.schemas.test import (
     TestAttemptResponse, 
     TestAttemptWithDetails,
     TestStructureResponse,
-    TestSubmission
+    TestSubmission,
+    AnswerDraftBatch,
+    AnswerDraftSaveResponse
+)
+from app.schemas.submission import SpeakingUploadCreate, SpeakingUploadResponse
+from app.models import TestTemplate, TestSection, TestAttempt, SpeakingTask
+from app.core.security import CurrentUser, get_current_user, get_current_admin_user
+from app.core.pagination import paginate, set_next_cursor
+from app.schemas.grade import GradingJobResponse
+from app.core.config import settings
+from app.services.autosave_buffer import autosave_buffer
+from app.services.grading_queue import enqueue_grading_job, get_grading_job
+from app.services.queue_stats import queue_counts
+from app.services import speaking_upload
+from app.services.speaking_upload import save_speaking_recording
+from app.services.upload_service import CHUNK_CONTENT_TYPE
+from app.services.event_bus import GRADING_CHANNEL, publish, user_channel
+from app.services.submission_service import (
+    clear_answer_drafts,
+    merge_answer_drafts,
+    save_answer_drafts,
+    save_writing_answers
+)
+from app.services.test_snapshot import (
+    create_snapshot, get_latest_snapshot, get_or_create_snapshot, get_snapshot, refresh_snapshot
 )
-from app.models import User, TestTemplate, TestSection, TestAttempt
-from app.core.security import get_current_user, get_current_admin_user
-from app.services.question_grading import grade_question
-import json
-
 router = APIRouter()
 
 # ==================== Test Template Endpoints ====================
@@ -33,7 +52,7 @@ router = APIRouter()
 @router.post("/templates", response_model=TestTemplateResponse, status_code=status.HTTP_201_CREATED)
 def create_test_template(
     test_data: TestTemplateCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -88,13 +107,14 @@ def create_test_template(
 
 @router.get("/templates", response_model=List[TestTemplateResponse])
 def get_test_templates(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(20, ge=1, le=100),
     test_type: Optional[str] = Query(None, description="academic or general_training"),
     is_published: Optional[bool] = Query(None),
     difficulty_level: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get all test templates
@@ -117,14 +137,17 @@ def get_test_templates(
     if difficulty_level:
         query = query.filter(TestTemplate.difficulty_level == difficulty_level)
     
-    tests = query.order_by(TestTemplate.created_at.desc()).offset(skip).limit(limit).all()
+    tests = paginate(
+        query, [TestTemplate.created_at, TestTemplate.id], cursor=cursor, limit=limit, descending=True
+    )
+    set_next_cursor(response, tests)
     return tests
 
 @router.get("/templates/{test_id}", response_model=TestTemplateWithSections)
 def get_test_template(
     test_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get test template by ID with all sections
@@ -149,7 +172,7 @@ def get_test_template(
 def update_test_template(
     test_id: int,
     test_update: TestTemplateUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -167,6 +190,10 @@ def update_test_template(
         setattr(test, field, value)
     
     db.commit()
+    
+    if update_data.get("is_published"):
+        create_snapshot(db, test.id)
+    
     db.refresh(test)
     
     return test
@@ -174,7 +201,7 @@ def update_test_template(
 @router.delete("/templates/{test_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_test_template(
     test_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -205,7 +232,7 @@ def delete_test_template(
 @router.post("/templates/{test_id}/publish", response_model=TestTemplateResponse)
 def publish_test_template(
     test_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -220,6 +247,10 @@ def publish_test_template(
     
     test.is_published = True
     db.commit()
+    
+    # Compile the student-facing structure once, up front
+    create_snapshot(db, test.id)
+    
     db.refresh(test)
     
     return test
@@ -227,7 +258,7 @@ def publish_test_template(
 @router.post("/templates/{test_id}/unpublish", response_model=TestTemplateResponse)
 def unpublish_test_template(
     test_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -251,7 +282,7 @@ def unpublish_test_template(
 @router.post("/sections", response_model=TestSectionResponse, status_code=status.HTTP_201_CREATED)
 def create_test_section(
     section_data: TestSectionCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -269,6 +300,9 @@ def create_test_section(
     
     db.add(section)
     db.commit()
+    
+    refresh_snapshot(db, section.test_template_id)
+    
     db.refresh(section)
     
     return section
@@ -277,7 +311,7 @@ def create_test_section(
 def get_test_section(
     section_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get a specific test section
@@ -295,7 +329,7 @@ def get_test_section(
 def update_test_section(
     section_id: int,
     section_update: TestSectionUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -313,6 +347,9 @@ def update_test_section(
         setattr(section, field, value)
     
     db.commit()
+    
+    refresh_snapshot(db, section.test_template_id)
+    
     db.refresh(section)
     
     return section
@@ -320,7 +357,7 @@ def update_test_section(
 @router.delete("/sections/{section_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_test_section(
     section_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -333,9 +370,13 @@ def delete_test_section(
             detail="Section not found"
         )
     
+    template_id = section.test_template_id
+    
     db.delete(section)
     db.commit()
     
+    refresh_snapshot(db, template_id)
+    
     return None
 
 # ==================== Test Attempt Endpoints ====================
@@ -343,7 +384,7 @@ def delete_test_section(
 @router.post("/attempts", response_model=TestAttemptResponse, status_code=status.HTTP_201_CREATED)
 def start_test_attempt(
     attempt_data: TestAttemptCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -376,11 +417,15 @@ def start_test_attempt(
                 detail="You have already completed this test"
             )
     
+    # Pin the structure as it is now; later edits only reach new attempts
+    snapshot = get_or_create_snapshot(db, test.id)
+    
     # Create test attempt
     attempt = TestAttempt(
         user_id=current_user.id,
         test_template_id=attempt_data.test_template_id,
-        status="in_progress"
+        status="in_progress",
+        snapshot_version=snapshot.version
     )
     
     db.add(attempt)
@@ -391,11 +436,12 @@ def start_test_attempt(
 
 @router.get("/attempts/me", response_model=List[TestAttemptResponse])
 def get_my_test_attempts(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(20, ge=1, le=100),
     status: Optional[str] = Query(None, description="Filter by status"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get current user's test attempts
@@ -407,23 +453,39 @@ def get_my_test_attempts(
     if status:
         query = query.filter(TestAttempt.status == status)
     
-    attempts = query.options(
+    attempts = paginate(query.options(
         joinedload(TestAttempt.test_template),
         joinedload(TestAttempt.result)
-    ).order_by(TestAttempt.created_at.desc()).offset(skip).limit(limit).all()
+    ), [TestAttempt.created_at, TestAttempt.id], cursor=cursor, limit=limit, descending=True)
+    set_next_cursor(response, attempts)
             
     return attempts
 
 @router.get("/attempts/{attempt_id}", response_model=TestAttemptWithDetails)
 def get_test_attempt(
     attempt_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db)
 ):
     """
     Get test attempt by ID with details
-    """
-    attempt = db.query(TestAttempt).filter(TestAttempt.id == attempt_id).first()
+    
+    The test structure is served from the compiled snapshot the attempt
+    was pinned to when it started, so the number of queries does not grow
+    with the size of the test and edits made meanwhile don't show up.
+    A template without a snapshot has one compiled on the primary.
+    """
+    from sqlalchemy.orm import joinedload, selectinload
+    
+    attempt = db.query(TestAttempt).options(
+        joinedload(TestAttempt.test_template).selectinload(TestTemplate.sections),
+        joinedload(TestAttempt.result),
+        selectinload(TestAttempt.listening_submissions),
+        selectinload(TestAttempt.reading_submissions),
+        selectinload(TestAttempt.writing_submissions),
+        selectinload(TestAttempt.speaking_submissions)
+    ).filter(TestAttempt.id == attempt_id).first()
     if not attempt:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -437,35 +499,19 @@ def get_test_attempt(
             detail="Not authorized to access this test attempt"
         )
     
-    # Populate test structure
-    test_template = attempt.test_template
-    structure = {
-        "listening_parts": [],
-        "listening_questions": [],
-        "reading_passages": [],
-        "reading_questions": [],
-        "writing_tasks": [],
-        "speaking_tasks": []
-    }
-    
-    for section in test_template.sections:
-        if section.section_type == "listening":
-            structure["listening_parts"].extend(section.listening_parts)
-            structure["listening_questions"].extend(section.listening_questions)
-        elif section.section_type == "reading":
-            structure["reading_passages"].extend(section.reading_passages)
-            # Questions are linked to passages, but we might want them flat list too or nested
-            # For now, let's collect them from passages
-            for passage in section.reading_passages:
-                structure["reading_questions"].extend(passage.questions)
-        elif section.section_type == "writing":
-            structure["writing_tasks"].extend(section.writing_tasks)
-        elif section.section_type == "speaking":
-            structure["speaking_tasks"].extend(section.speaking_tasks)
-            
+    snapshot = None
+    if attempt.snapshot_version is not None:
+        snapshot = get_snapshot(db, attempt.test_template_id, attempt.snapshot_version)
+    # Attempts started before pinning, or finished ones whose version was pruned, get the latest.
+    # Writes never go to the replica session.
+    if snapshot is None:
+        snapshot = get_latest_snapshot(db, attempt.test_template_id) or get_or_create_snapshot(
+            primary_db, attempt.test_template_id
+        )
+    
     # Create response with structure
     response = TestAttemptWithDetails.model_validate(attempt)
-    response.test_structure = TestStructureResponse(**structure)
+    response.test_structure = TestStructureResponse.model_validate(snapshot.payload)
     
     return response
 
@@ -473,7 +519,7 @@ def get_test_attempt(
 def submit_test_attempt(
     attempt_id: int,
     submission_data: TestSubmission = None,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -481,13 +527,19 @@ def submit_test_attempt(
     
     This marks the test as submitted and records the end time.
     It also saves any writing answers provided in the body.
-    """
-    from app.models import WritingSubmission
     
+    Answers autosaved through PATCH /attempts/{id}/answers are finalized
+    here; answers in the body, if any, override the drafts for the same item.
+    
+    Writing answers are stored immediately. Listening and reading answers are
+    queued as a GradingJob and graded by the grading worker, so the request
+    returns without waiting for auto-grading.
+    """
+    # Waits for autosaves still being journaled; later ones find the attempt submitted
     attempt = db.query(TestAttempt).filter(
         TestAttempt.id == attempt_id,
         TestAttempt.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if not attempt:
         raise HTTPException(
@@ -501,289 +553,120 @@ def submit_test_attempt(
             detail="Test already submitted"
         )
     
-    # Save writing answers if provided
-    if submission_data:
-        # Process Writing Answers
-        from app.models import WritingTask
-        
-        # Get all writing tasks for this test
-        writing_tasks = db.query(WritingTask).join(TestSection).filter(
-            TestSection.test_template_id == attempt.test_template_id,
-            TestSection.section_type == "writing"
-        ).all()
-        
-        # Create submissions for all writing tasks (even if empty)
-        for task in writing_tasks:
-            # Check if submission already exists
-            existing_sub = db.query(WritingSubmission).filter(
-                WritingSubmission.test_attempt_id == attempt_id,
-                WritingSubmission.task_id == task.id
-            ).first()
-            
-            # Find the answer for this task (if provided)
-            task_answer = None
-            if submission_data.writing_answers:
-                for answer in submission_data.writing_answers:
-                    if answer.task_id == task.id:
-                        task_answer = answer
-                        break
-            
-            response_text = task_answer.response_text if task_answer else ""
-            word_count = len(response_text.split()) if response_text else 0
-            
-            if existing_sub:
-                existing_sub.response_text = response_text
-                existing_sub.word_count = word_count
-                existing_sub.submitted_at = datetime.now(timezone.utc)
-            else:
-                new_sub = WritingSubmission(
-                    test_attempt_id=attempt_id,
-                    task_id=task.id,
-                    response_text=response_text,
-                    word_count=word_count,
-                    status="pending",
-                    assigned_teacher_id=None
-                )
-                db.add(new_sub)
-        
-        # Process Listening Answers
-        if submission_data.listening_answers:
-            from app.models import ListeningSubmission, ListeningQuestion
-            for answer in submission_data.listening_answers:
-                # Get question to check correctness
-                question = db.query(ListeningQuestion).get(answer.question_id)
-                is_correct = False
-                
-                if question:
-                    # Try grading with new service (for complex types)
-                    if question.answer_data is not None:
-                        user_val = answer.user_answer
-                        try:
-                            user_val = json.loads(answer.user_answer)
-                        except:
-                            pass
-                            
-                        grading_result = grade_question(
-                            question_type=question.question_type,
-                            user_answer=user_val,
-                            answer_data=question.answer_data,
-                            type_specific_data=question.type_specific_data
-                        )
-                        is_correct = grading_result["is_correct"]
-                    
-                    # Fallback to legacy logic if no answer_data or if we want to double check (though answer_data should take precedence)
-                    elif question.answers:
-                        # Check against all possible correct answers
-                        for correct_ans in question.answers:
-                            user_ans = answer.user_answer.strip()
-                            correct_ans_text = correct_ans.correct_answer.strip()
-                            
-                            # Respect case sensitivity setting
-                            if correct_ans.case_sensitive:
-                                if user_ans == correct_ans_text:
-                                    is_correct = True
-                                    break
-                            else:
-                                if user_ans.lower() == correct_ans_text.lower():
-                                    is_correct = True
-                                    break
-                            
-                            # Check alternative answers if any
-                            if correct_ans.alternative_answers:
-                                for alt in correct_ans.alternative_answers:
-                                    alt_text = alt.strip()
-                                    if correct_ans.case_sensitive:
-                                        if user_ans == alt_text:
-                                            is_correct = True
-                                            break
-                                    else:
-                                        if user_ans.lower() == alt_text.lower():
-                                            is_correct = True
-                                            break
-                            if is_correct: break
-                
-                existing_sub = db.query(ListeningSubmission).filter(
-                    ListeningSubmission.test_attempt_id == attempt_id,
-                    ListeningSubmission.question_id == answer.question_id
-                ).first()
-                
-                if existing_sub:
-                    existing_sub.user_answer = answer.user_answer
-                    existing_sub.is_correct = is_correct
-                    existing_sub.submitted_at = datetime.now(timezone.utc)
-                else:
-                    new_sub = ListeningSubmission(
-                        test_attempt_id=attempt_id,
-                        question_id=answer.question_id,
-                        user_answer=answer.user_answer,
-                        is_correct=is_correct
-                    )
-                    db.add(new_sub)
-
-        # Process Reading Answers
-        if submission_data.reading_answers:
-            from app.models import ReadingSubmission, ReadingQuestion
-            for answer in submission_data.reading_answers:
-                # Get question to check correctness
-                question = db.query(ReadingQuestion).get(answer.question_id)
-                is_correct = False
-                
-                if question:
-                    # Try grading with new service (for complex types)
-                    if question.answer_data is not None:
-                        user_val = answer.user_answer
-                        try:
-                            user_val = json.loads(answer.user_answer)
-                        except:
-                            pass
-                            
-                        grading_result = grade_question(
-                            question_type=question.question_type,
-                            user_answer=user_val,
-                            answer_data=question.answer_data,
-                            type_specific_data=question.type_specific_data
-                        )
-                        is_correct = grading_result["is_correct"]
-                    
-                    # Fallback to legacy logic
-                    elif question.answers:
-                        for correct_ans in question.answers:
-                            user_ans = answer.user_answer.strip()
-                            correct_ans_text = correct_ans.correct_answer.strip()
-                            
-                            # Respect case sensitivity setting
-                            if correct_ans.case_sensitive:
-                                if user_ans == correct_ans_text:
-                                    is_correct = True
-                                    break
-                            else:
-                                if user_ans.lower() == correct_ans_text.lower():
-                                    is_correct = True
-                                    break
-                            
-                            # Check alternative answers if any
-                            if correct_ans.alternative_answers:
-                                for alt in correct_ans.alternative_answers:
-                                    alt_text = alt.strip()
-                                    if correct_ans.case_sensitive:
-                                        if user_ans == alt_text:
-                                            is_correct = True
-                                            break
-                                    else:
-                                        if user_ans.lower() == alt_text.lower():
-                                            is_correct = True
-                                            break
-                            if is_correct: break
-                
-                existing_sub = db.query(ReadingSubmission).filter(
-                    ReadingSubmission.test_attempt_id == attempt_id,
-                    ReadingSubmission.question_id == answer.question_id
-                ).first()
-                
-                if existing_sub:
-                    existing_sub.user_answer = answer.user_answer
-                    existing_sub.is_correct = is_correct
-                    existing_sub.submitted_at = datetime.now(timezone.utc)
-                else:
-                    new_sub = ReadingSubmission(
-                        test_attempt_id=attempt_id,
-                        question_id=answer.question_id,
-                        user_answer=answer.user_answer,
-                        is_correct=is_correct
-                    )
-                    db.add(new_sub)
+    if settings.AUTOSAVE_BUFFER_ENABLED:
+        autosave_buffer.flush(db, attempt_id)
+    
+    answers = merge_answer_drafts(db, attempt_id, submission_data)
+    save_writing_answers(db, attempt_id, attempt.test_template_id, answers.writing_answers)
+    clear_answer_drafts(db, attempt_id)
+    abandoned_uploads = speaking_upload.abort_open_uploads(db, attempt_id)
+    
+    enqueue_grading_job(db, attempt_id, {
+        "listening_answers": [answer.model_dump() for answer in answers.listening_answers],
+        "reading_answers": [answer.model_dump() for answer in answers.reading_answers]
+    })
     
     attempt.status = "submitted"
     attempt.end_time = datetime.now(timezone.utc)
     
+    publish(db, user_channel(current_user.id), "attempt_submitted", {"test_attempt_id": attempt_id, "status": "submitted"})
+    publish(db, GRADING_CHANNEL, "attempt_submitted", {"test_attempt_id": attempt_id, "pending": queue_counts(db)})
+    
     db.commit()
+    for path in abandoned_uploads:
+        path.unlink(missing_ok=True)
     db.refresh(attempt)
     
-    # Calculate initial results (Listening & Reading)
-    try:
-        calculate_initial_results(attempt.id, db)
-    except Exception as e:
-        print(f"Error calculating results: {e}")
-    
     return attempt
 
-def calculate_initial_results(attempt_id: int, db: Session):
-    """
-    Calculate scores for auto-graded sections (Listening & Reading)
-    and create the initial TestResult record.
-    
-    Scores are calculated based on the sum of marks for correctly answered questions.
-    """
-    from app.models import ListeningSubmission, ReadingSubmission, TestResult, ListeningQuestion, ReadingQuestion
-    from sqlalchemy import func
-    
-    # Calculate Listening Score - sum of marks for correct answers
-    listening_score_result = db.query(func.coalesce(func.sum(ListeningQuestion.marks), 0)).join(
-        ListeningSubmission,
-        ListeningSubmission.question_id == ListeningQuestion.id
-    ).filter(
-        ListeningSubmission.test_attempt_id == attempt_id,
-        ListeningSubmission.is_correct == True
-    ).scalar()
-    listening_correct = int(listening_score_result or 0)
-    
-    # Get total possible listening marks
-    listening_total = db.query(func.coalesce(func.sum(ListeningQuestion.marks), 40)).join(
-        ListeningSubmission,
-        ListeningSubmission.question_id == ListeningQuestion.id
-    ).filter(
-        ListeningSubmission.test_attempt_id == attempt_id
-    ).scalar()
-    listening_total = int(listening_total or 40)
-    
-    # Simple band score mapping (approximate)
-    listening_score = min(9.0, round((listening_correct / max(listening_total, 1)) * 9 * 2) / 2) if listening_correct > 0 else 0.0
-    
-    # Calculate Reading Score - sum of marks for correct answers
-    reading_score_result = db.query(func.coalesce(func.sum(ReadingQuestion.marks), 0)).join(
-        ReadingSubmission,
-        ReadingSubmission.question_id == ReadingQuestion.id
-    ).filter(
-        ReadingSubmission.test_attempt_id == attempt_id,
-        ReadingSubmission.is_correct == True
-    ).scalar()
-    reading_correct = int(reading_score_result or 0)
-    
-    # Get total possible reading marks
-    reading_total = db.query(func.coalesce(func.sum(ReadingQuestion.marks), 40)).join(
-        ReadingSubmission,
-        ReadingSubmission.question_id == ReadingQuestion.id
-    ).filter(
-        ReadingSubmission.test_attempt_id == attempt_id
-    ).scalar()
-    reading_total = int(reading_total or 40)
-    
-    reading_score = min(9.0, round((reading_correct / max(reading_total, 1)) * 9 * 2) / 2) if reading_correct > 0 else 0.0
-    
-    # Create or Update TestResult
-    result = db.query(TestResult).filter(TestResult.test_attempt_id == attempt_id).first()
-    
-    if not result:
-        result = TestResult(
-            test_attempt_id=attempt_id,
-            listening_score=listening_score,
-            reading_score=reading_score,
-            writing_score=None, # Pending grading
-            speaking_score=None, # Pending grading
-            overall_band_score=0.0 # Will be calculated when all components are ready
+@router.patch("/attempts/{attempt_id}/answers", response_model=AnswerDraftSaveResponse)
+def autosave_answers(
+    attempt_id: int,
+    batch: AnswerDraftBatch,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Autosave changed answers of an in-progress attempt
+    
+    Send only the answers that changed since the last save, with a client
+    sequence number that increases on every request. Answers already saved
+    by a request with a higher sequence number are left untouched.
+    
+    With the autosave buffer enabled, answers are journaled and acknowledged
+    immediately, then written to the database in batches.
+    """
+    # Shared lock held until the answers are journaled, so submit can't miss them
+    attempt = db.query(TestAttempt).filter(
+        TestAttempt.id == attempt_id,
+        TestAttempt.user_id == current_user.id
+    ).with_for_update(read=True).first()
+    
+    if not attempt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test attempt not found"
+        )
+    
+    if attempt.status != "in_progress":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Test already submitted"
         )
-        db.add(result)
+    
+    distinct_items = len({(answer.section_type, answer.item_id) for answer in batch.answers})
+    if settings.AUTOSAVE_BUFFER_ENABLED:
+        saved = autosave_buffer.add(attempt_id, batch.client_seq, batch.answers)
     else:
-        result.listening_score = listening_score
-        result.reading_score = reading_score
-        
-    db.commit()
+        saved = save_answer_drafts(db, attempt_id, batch.client_seq, batch.answers)
+        db.commit()
+    
+    return AnswerDraftSaveResponse(client_seq=batch.client_seq, saved=saved, ignored=distinct_items - saved)
 
+@router.get("/autosave/stats")
+def get_autosave_stats(
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Get autosave buffer metrics (Admin only)
+    
+    Reports buffer depth, flush count and latency, and the coalescing ratio
+    (answers received per row written).
+    """
+    return {"enabled": settings.AUTOSAVE_BUFFER_ENABLED, **autosave_buffer.stats()}
+
+@router.get("/attempts/{attempt_id}/grading-status", response_model=GradingJobResponse)
+def get_grading_status(
+    attempt_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the auto-grading status of a submitted attempt
+    
+    Students can only see their own attempts; teachers and admins can see any.
+    """
+    attempt = db.query(TestAttempt).filter(TestAttempt.id == attempt_id).first()
+    
+    if not attempt or (attempt.user_id != current_user.id and current_user.role not in ["teacher", "admin"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test attempt not found"
+        )
+    
+    job = get_grading_job(db, attempt_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Grading job not found"
+        )
+    
+    return job
 
 @router.delete("/attempts/{attempt_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_test_attempt(
     attempt_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -819,11 +702,11 @@ def delete_test_attempt(
     return None
 
 @router.post("/attempts/{attempt_id}/speaking/{task_id}/upload", status_code=status.HTTP_200_OK)
-async def upload_speaking_audio(
+def upload_speaking_audio(
     attempt_id: int,
     task_id: int,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -859,35 +742,141 @@ async def upload_speaking_audio(
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
         
-    # Create or update SpeakingSubmission
-    from app.models import SpeakingSubmission
-    
-    # Mock duration for now since we don't extract it from audio yet
-    # In real app, use ffmpeg or similar to get duration
-    duration = 0 
-    
-    existing_sub = db.query(SpeakingSubmission).filter(
-        SpeakingSubmission.test_attempt_id == attempt_id,
-        SpeakingSubmission.task_id == task_id
-    ).first()
-    
     # Construct URL (assuming static file serving is set up or will be)
     # For local dev, we might need a route to serve these
     audio_url = f"/uploads/speaking/{filename}"
+    replaced = save_speaking_recording(db, attempt_id, task_id, audio_url)
+    db.commit()
+    speaking_upload.remove_recording(replaced)
     
-    if existing_sub:
-        existing_sub.audio_url = audio_url
-        existing_sub.submitted_at = datetime.now(timezone.utc)
-    else:
-        new_sub = SpeakingSubmission(
-            test_attempt_id=attempt_id,
-            task_id=task_id,
-            audio_url=audio_url,
-            duration_seconds=duration, # Placeholder
-            status="pending"
+    return {"filename": filename, "status": "uploaded", "audio_url": audio_url}
+
+
+# ==================== Resumable Speaking Uploads ====================
+
+def _get_in_progress_attempt(db: Session, attempt_id: int, user_id: int) -> TestAttempt:
+    attempt = db.query(TestAttempt).filter(
+        TestAttempt.id == attempt_id,
+        TestAttempt.user_id == user_id
+    ).first()
+    
+    if not attempt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test attempt not found"
         )
-        db.add(new_sub)
         
-    db.commit()
+    if attempt.status != "in_progress":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Test is not in progress"
+        )
     
-    return {"filename": filename, "status": "uploaded", "audio_url": audio_url}
+    return attempt
+
+def _get_speaking_upload(db: Session, attempt_id: int, upload_id: int, lock: bool = False):
+    upload = speaking_upload.get_upload(db, upload_id, attempt_id, lock=lock)
+    
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    
+    return upload
+
+@router.post(
+    "/attempts/{attempt_id}/speaking/{task_id}/uploads",
+    response_model=SpeakingUploadResponse,
+    status_code=status.HTTP_201_CREATED
+)
+def create_speaking_upload(
+    attempt_id: int,
+    task_id: int,
+    upload_data: SpeakingUploadCreate,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a resumable upload of a speaking recording
+    
+    Send the recording with PATCH requests to the returned upload, then
+    finalize it. An unfinished upload for the same task is abandoned.
+    """
+    attempt = _get_in_progress_attempt(db, attempt_id, current_user.id)
+    
+    if not db.query(SpeakingTask.id).filter(SpeakingTask.id == task_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Speaking task not found"
+        )
+    
+    upload = speaking_upload.create_upload(
+        db, attempt, task_id,
+        size=upload_data.size,
+        sha256=upload_data.sha256,
+        filename=upload_data.filename
+    )
+    response.headers["Upload-Offset"] = "0"
+    return upload
+
+@router.get("/attempts/{attempt_id}/speaking/uploads/{upload_id}", response_model=SpeakingUploadResponse)
+def get_speaking_upload(
+    attempt_id: int,
+    upload_id: int,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a speaking upload's progress
+    
+    After a dropped connection, resume by sending the recording from the
+    returned offset.
+    """
+    _get_in_progress_attempt(db, attempt_id, current_user.id)
+    upload = _get_speaking_upload(db, attempt_id, upload_id)
+    response.headers["Upload-Offset"] = str(upload.received_bytes)
+    return upload
+
+@router.patch("/attempts/{attempt_id}/speaking/uploads/{upload_id}", response_model=SpeakingUploadResponse)
+def append_speaking_upload(
+    attempt_id: int,
+    upload_id: int,
+    response: Response,
+    chunk: bytes = Body(..., media_type=CHUNK_CONTENT_TYPE),
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Append a chunk of a speaking recording
+    
+    Send it as application/offset+octet-stream with the Upload-Offset it
+    starts at and an Upload-Checksum of "sha256 <base64 digest>". A wrong
+    offset is refused with 409 and the expected Upload-Offset header.
+    """
+    _get_in_progress_attempt(db, attempt_id, current_user.id)
+    upload = _get_speaking_upload(db, attempt_id, upload_id, lock=True)
+    upload = speaking_upload.append_chunk(db, upload, upload_offset, chunk, upload_checksum)
+    response.headers["Upload-Offset"] = str(upload.received_bytes)
+    return upload
+
+@router.post("/attempts/{attempt_id}/speaking/uploads/{upload_id}/finalize", response_model=SpeakingUploadResponse)
+def finalize_speaking_upload(
+    attempt_id: int,
+    upload_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Finish a speaking upload and submit the recording for the task
+    
+    The recording is checked against the declared SHA-256 before it
+    replaces the task's previous recording.
+    """
+    _get_in_progress_attempt(db, attempt_id, current_user.id)
+    upload = _get_speaking_upload(db, attempt_id, upload_id, lock=True)
+    return speaking_upload.finalize_upload(db, upload)
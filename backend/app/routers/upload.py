@@ -1,115 +1,151 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from app.core.security import get_current_user
-from app.models import User
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Response
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.config import settings
+from app.core.pagination import paginate, set_next_cursor
+from app.core.security import CurrentUser, get_current_user, get_current_admin_user
+from app.database import get_db
+from app.models import MediaBlob, MediaReference
+from app.schemas.media import MediaFileResponse
+from app.services.media_store import MEDIA_DIRS, collect_garbage, reference_count, register_blob
+from app.services.upload_service import save_upload
 import os
-import uuid
 from pathlib import Path
 
 router = APIRouter()
 
-UPLOAD_DIR = Path("uploads")
+UPLOAD_DIR = Path(settings.UPLOAD_DIR)
 UPLOAD_DIR.mkdir(exist_ok=True)
 (UPLOAD_DIR / "audio").mkdir(exist_ok=True)
 (UPLOAD_DIR / "images").mkdir(exist_ok=True)
 
 @router.post("/audio")
-async def upload_audio(
+def upload_audio(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """Upload audio file for speaking section"""
     # Validate file type
-    if not file.content_type.startswith("audio/"):
+    if not (file.content_type or "").startswith("audio/"):
         raise HTTPException(400, "File must be audio")
     
-    # Generate unique filename
-    ext = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
-    filepath = UPLOAD_DIR / "audio" / filename
+    # Stream to disk in chunks (size limit, extension allowlist, SHA-256);
+    # identical content is stored once and gets the same URL
+    saved = save_upload(file, UPLOAD_DIR / "audio", settings.audio_extensions)
+    blob = register_blob(db, saved, UPLOAD_DIR, current_user.id, file.filename, file.content_type)
     
-    # Save file
-    with open(filepath, "wb") as f:
-        content = await file.read()
-        f.write(content)
-    
-    return {"url": f"/uploads/audio/{filename}"}
+    return {
+        "url": f"/uploads/audio/{saved.filename}",
+        "size": saved.size,
+        "sha256": saved.sha256,
+        "deduplicated": saved.deduplicated,
+        "id": blob.id
+    }
 
 @router.post("/image")
-async def upload_image(
+def upload_image(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """Upload image for writing task"""
-    if not file.content_type.startswith("image/"):
+    if not (file.content_type or "").startswith("image/"):
         raise HTTPException(400, "File must be image")
     
-    ext = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
-    filepath = UPLOAD_DIR / "images" / filename
-    
-    with open(filepath, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    saved = save_upload(file, UPLOAD_DIR / "images", settings.image_extensions)
+    blob = register_blob(db, saved, UPLOAD_DIR, current_user.id, file.filename, file.content_type)
     
-    
-    return {"url": f"/uploads/images/{filename}"}
+    return {
+        "url": f"/uploads/images/{saved.filename}",
+        "size": saved.size,
+        "sha256": saved.sha256,
+        "deduplicated": saved.deduplicated,
+        "id": blob.id
+    }
 
-@router.get("/files")
-async def get_files(
+@router.get("/files", response_model=List[MediaFileResponse])
+def get_files(
+    response: Response,
     type: str = "all",  # all, audio, images
-    current_user: User = Depends(get_current_user)
+    uploaded_by: Optional[int] = Query(None, description="Filter by uploader"),
+    in_use: Optional[bool] = Query(None, description="Only files test content uses (true) or doesn't (false)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
-    """List uploaded files"""
-    files = []
+    """
+    List uploaded files, newest first
     
-    if type in ["all", "audio"]:
-        audio_dir = UPLOAD_DIR / "audio"
-        if audio_dir.exists():
-            for f in audio_dir.iterdir():
-                if f.is_file():
-                    files.append({
-                        "name": f.name,
-                        "type": "audio",
-                        "url": f"/uploads/audio/{f.name}",
-                        "size": f.stat().st_size,
-                        "created_at": f.stat().st_ctime
-                    })
+    Reads the media catalog; files uploaded before it existed appear once
+    scripts/backfill_media_catalog.py has run.
+    """
+    if type not in ["all", "audio", "images"]:
+        raise HTTPException(400, "Invalid file type")
     
-    if type in ["all", "images"]:
-        image_dir = UPLOAD_DIR / "images"
-        if image_dir.exists():
-            for f in image_dir.iterdir():
-                if f.is_file():
-                    files.append({
-                        "name": f.name,
-                        "type": "image",
-                        "url": f"/uploads/images/{f.name}",
-                        "size": f.stat().st_size,
-                        "created_at": f.stat().st_ctime
-                    })
+    query = db.query(MediaBlob)
+    if type != "all":
+        query = query.filter(MediaBlob.media_type == MEDIA_DIRS[type])
+    if uploaded_by is not None:
+        query = query.filter(MediaBlob.uploaded_by == uploaded_by)
+    if in_use is not None:
+        referenced = exists().where(MediaReference.blob_id == MediaBlob.id)
+        query = query.filter(referenced if in_use else ~referenced)
     
-    # Sort by created_at desc
-    files.sort(key=lambda x: x["created_at"], reverse=True)
+    files = paginate(query, [MediaBlob.created_at, MediaBlob.id], cursor=cursor, limit=limit, descending=True)
+    set_next_cursor(response, files)
     return files
 
 @router.delete("/files/{file_type}/{filename}")
-async def delete_file(
+def delete_file(
     file_type: str,
     filename: str,
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
-    """Delete a file"""
+    """
+    Delete a file (refused while test content still uses it)
+    
+    The catalog entry is removed first, so a file whose removal fails is
+    never listed without existing; the garbage collector sweeps up such
+    leftovers.
+    """
     if file_type not in ["audio", "images"]:
         raise HTTPException(400, "Invalid file type")
         
     filepath = UPLOAD_DIR / file_type / filename
     
-    if not filepath.exists():
+    blob = db.query(MediaBlob).filter(MediaBlob.path == f"{file_type}/{filename}").with_for_update().first()
+    if not blob and not filepath.exists():
         raise HTTPException(404, "File not found")
-        
+    
+    if blob:
+        references = reference_count(db, blob)
+        if references:
+            raise HTTPException(409, f"File is in use ({references} references)")
+        db.delete(blob)
+        db.commit()
+    
     try:
         os.remove(filepath)
+    except FileNotFoundError:
+        pass
     except Exception as e:
         raise HTTPException(500, f"Failed to delete file: {str(e)}")
-        
+    
     return {"message": "File deleted"}
+
+@router.post("/gc")
+def collect_media_garbage(
+    current_user: CurrentUser = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Collect unreferenced media now (Admin only)
+    
+    Deletes uploaded files no test content has used for
+    MEDIA_GC_GRACE_SECONDS; the grading worker also does this periodically.
+    """
+    return collect_garbage(db, UPLOAD_DIR)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.schemas.user import (
@@ -13,13 +14,16 @@ from app.schemas.user import (
     PasswordChange
 )
 from app.models import User, UserProfile
-from app.core.security import get_current_user, get_current_admin_user, get_password_hash, verify_password
+from app.core.pagination import paginate, set_next_cursor
+from app.core.security import (
+    CurrentUser, get_current_user, get_current_db_user, get_current_admin_user, hash_password_async, verify_password_async, invalidate_user
+)
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_db_user)
 ):
     """
     Get current authenticated user information
@@ -29,7 +33,7 @@ def get_current_user_info(
 @router.put("/me", response_model=UserResponse)
 def update_current_user(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -53,34 +57,36 @@ def update_current_user(
     
     db.commit()
     db.refresh(current_user)
+    invalidate_user(current_user.id)
     
     return current_user
 
 @router.post("/me/change-password", status_code=status.HTTP_200_OK)
-def change_password(
+async def change_password(
     password_data: PasswordChange,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: Session = Depends(get_db)
 ):
     """
     Change current user's password
     """
     # Verify old password
-    if not verify_password(password_data.old_password, current_user.password_hash):
+    matches, _ = await verify_password_async(password_data.old_password, current_user.password_hash)
+    if not matches:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect password"
         )
     
     # Update password
-    current_user.password_hash = get_password_hash(password_data.new_password)
-    db.commit()
+    current_user.password_hash = await hash_password_async(password_data.new_password)
+    await run_in_threadpool(db.commit)
     
     return {"message": "Password changed successfully"}
 
 @router.get("/me/profile", response_model=UserProfileResponse)
 def get_current_user_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -97,7 +103,7 @@ def get_current_user_profile(
 @router.post("/me/profile", response_model=UserProfileResponse, status_code=status.HTTP_201_CREATED)
 def create_user_profile(
     profile_data: UserProfileCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -125,7 +131,7 @@ def create_user_profile(
 @router.put("/me/profile", response_model=UserProfileResponse)
 def update_user_profile(
     profile_update: UserProfileUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -149,7 +155,7 @@ def update_user_profile(
 
 @router.delete("/me/profile", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -169,7 +175,7 @@ def delete_user_profile(
 
 @router.get("/me/stats", response_model=dict)
 def get_student_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -213,10 +219,11 @@ def get_student_stats(
 # Admin endpoints
 @router.get("", response_model=List[UserResponse])
 def get_all_users(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(20, ge=1, le=100),
     role: str = Query(None, description="Filter by role: student, teacher, admin"),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -229,14 +236,15 @@ def get_all_users(
     if role:
         query = query.filter(User.role == role)
     
-    users = query.offset(skip).limit(limit).all()
+    users = paginate(query, [User.id], cursor=cursor, limit=limit, descending=True)
+    set_next_cursor(response, users)
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user_by_id(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get user by ID
@@ -259,9 +267,9 @@ def get_user_by_id(
     return user
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user_by_admin(
+async def create_user_by_admin(
     user_data: UserCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -270,7 +278,7 @@ def create_user_by_admin(
     Admins can create users with any role: student, teacher, or admin
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(lambda: db.query(User).filter(User.email == user_data.email).first())
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -278,7 +286,7 @@ def create_user_by_admin(
         )
     
     # Create new user with admin-specified role
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     new_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -288,15 +296,15 @@ def create_user_by_admin(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(db.commit)
+    await run_in_threadpool(db.refresh, new_user)
     
     return new_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
     user_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -329,5 +337,6 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     
     return None
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.schemas.question import (
@@ -8,15 +8,17 @@ from app.schemas.question import (
     WritingTaskUpdate,
     WritingTaskResponse
 )
-from app.models import User, WritingTask, TestSection
-from app.core.security import get_current_user, get_current_admin_user
+from app.models import WritingTask, TestSection
+from app.core.security import CurrentUser, get_current_user, get_current_admin_user
+from app.core.pagination import paginate, set_next_cursor
+from app.services.test_snapshot import refresh_section_snapshot
 
 router = APIRouter()
 
 @router.post("/tasks", response_model=WritingTaskResponse, status_code=status.HTTP_201_CREATED)
 def create_writing_task(
     task_data: WritingTaskCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -38,24 +40,27 @@ def create_writing_task(
     
     db.add(task)
     db.commit()
+    refresh_section_snapshot(db, task.section_id)
     db.refresh(task)
     
     return task
 
 @router.get("/tasks", response_model=List[WritingTaskResponse])
 def get_writing_tasks(
+    response: Response,
     section_id: int,
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get all writing tasks for a section
     """
-    tasks = db.query(WritingTask).filter(
+    tasks = paginate(db.query(WritingTask).filter(
         WritingTask.section_id == section_id
-    ).order_by(WritingTask.task_number).offset(skip).limit(limit).all()
+    ), [WritingTask.task_number, WritingTask.id], cursor=cursor, limit=limit)
+    set_next_cursor(response, tasks)
     
     return tasks
 
@@ -63,7 +68,7 @@ def get_writing_tasks(
 def get_writing_task(
     task_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get a specific writing task
@@ -82,7 +87,7 @@ def get_writing_task(
 def update_writing_task(
     task_id: int,
     task_update: WritingTaskUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -101,6 +106,7 @@ def update_writing_task(
         setattr(task, field, value)
     
     db.commit()
+    refresh_section_snapshot(db, task.section_id)
     db.refresh(task)
     
     return task
@@ -108,7 +114,7 @@ def update_writing_task(
 @router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_writing_task(
     task_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: CurrentUser = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -122,7 +128,9 @@ def delete_writing_task(
             detail="Writing task not found"
         )
     
+    section_id = task.section_id
     db.delete(task)
     db.commit()
+    refresh_section_snapshot(db, section_id)
     
     return None
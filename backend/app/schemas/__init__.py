@@ -10,11 +10,11 @@ from .test import (
 )
 from .question import (
     QuestionTypeTemplateResponse, QuestionOptionCreate, QuestionOptionResponse,
-    ListeningQuestionBase, ListeningQuestionCreate, ListeningQuestionUpdate, ListeningQuestionResponse,
+    ListeningQuestionBase, ListeningQuestionCreate, ListeningQuestionUpdate, ListeningQuestionResponse, ListeningQuestionStudentResponse,
     ListeningAnswerCreate, ListeningAnswerUpdate, ListeningAnswerResponse,
     ListeningQuestionWithAnswer, ListeningQuestionWithAnswerCreate,
     ReadingPassageBase, ReadingPassageCreate, ReadingPassageUpdate, ReadingPassageResponse, ReadingPassageWithQuestions,
-    ReadingQuestionBase, ReadingQuestionCreate, ReadingQuestionUpdate, ReadingQuestionResponse,
+    ReadingQuestionBase, ReadingQuestionCreate, ReadingQuestionUpdate, ReadingQuestionResponse, ReadingQuestionStudentResponse,
     ReadingAnswerCreate, ReadingAnswerUpdate, ReadingAnswerResponse,
     ReadingQuestionWithAnswer, ReadingQuestionWithAnswerCreate,
     WritingTaskBase, WritingTaskCreate, WritingTaskUpdate, WritingTaskResponse,
@@ -26,14 +26,17 @@ from .submission import (
     ReadingSubmissionCreate, ReadingSubmissionUpdate, ReadingSubmissionResponse,
     WritingSubmissionCreate, WritingSubmissionUpdate, WritingSubmissionResponse, WritingSubmissionWithGrade,
     SpeakingSubmissionCreate, SpeakingSubmissionUpdate, SpeakingSubmissionResponse, SpeakingSubmissionWithGrade,
+    SpeakingUploadCreate, SpeakingUploadResponse,
     BatchListeningSubmission, BatchReadingSubmission, BatchSubmissionResponse, AnswerItem
 )
 from .grade import (
     WritingGradeCreate, WritingGradeUpdate, WritingGradeResponse,
     SpeakingGradeCreate, SpeakingGradeUpdate, SpeakingGradeResponse,
     TestResultResponse, TestResultDetailed,
-    TeacherAssignmentCreate, TeacherAssignmentUpdate, TeacherAssignmentResponse, TeacherWorkload
+    TeacherAssignmentCreate, TeacherAssignmentUpdate, TeacherAssignmentResponse, TeacherWorkload,
+    GradingHistoryItem
 )
+from .media import MediaFileResponse
 
 __all__ = [
     # User schemas
@@ -48,11 +51,11 @@ __all__ = [
     
     # Question schemas
     "QuestionTypeTemplateResponse", "QuestionOptionCreate", "QuestionOptionResponse",
-    "ListeningQuestionBase", "ListeningQuestionCreate", "ListeningQuestionUpdate", "ListeningQuestionResponse",
+    "ListeningQuestionBase", "ListeningQuestionCreate", "ListeningQuestionUpdate", "ListeningQuestionResponse", "ListeningQuestionStudentResponse",
     "ListeningAnswerCreate", "ListeningAnswerUpdate", "ListeningAnswerResponse",
     "ListeningQuestionWithAnswer", "ListeningQuestionWithAnswerCreate",
     "ReadingPassageBase", "ReadingPassageCreate", "ReadingPassageUpdate", "ReadingPassageResponse", "ReadingPassageWithQuestions",
-    "ReadingQuestionBase", "ReadingQuestionCreate", "ReadingQuestionUpdate", "ReadingQuestionResponse",
+    "ReadingQuestionBase", "ReadingQuestionCreate", "ReadingQuestionUpdate", "ReadingQuestionResponse", "ReadingQuestionStudentResponse",
     "ReadingAnswerCreate", "ReadingAnswerUpdate", "ReadingAnswerResponse",
     "ReadingQuestionWithAnswer", "ReadingQuestionWithAnswerCreate",
     "WritingTaskBase", "WritingTaskCreate", "WritingTaskUpdate", "WritingTaskResponse",
@@ -64,6 +67,7 @@ __all__ = [
     "ReadingSubmissionCreate", "ReadingSubmissionUpdate", "ReadingSubmissionResponse",
     "WritingSubmissionCreate", "WritingSubmissionUpdate", "WritingSubmissionResponse", "WritingSubmissionWithGrade",
     "SpeakingSubmissionCreate", "SpeakingSubmissionUpdate", "SpeakingSubmissionResponse", "SpeakingSubmissionWithGrade",
+    "SpeakingUploadCreate", "SpeakingUploadResponse",
     "BatchListeningSubmission", "BatchReadingSubmission", "BatchSubmissionResponse", "AnswerItem",
     
     # Grade schemas
@@ -71,4 +75,8 @@ __all__ = [
     "SpeakingGradeCreate", "SpeakingGradeUpdate", "SpeakingGradeResponse",
     "TestResultResponse", "TestResultDetailed",
     "TeacherAssignmentCreate", "TeacherAssignmentUpdate", "TeacherAssignmentResponse", "TeacherWorkload",
+    "GradingHistoryItem",
+    
+    # Media schemas
+    "MediaFileResponse",
 ]
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 # Writing Grade Schemas
 class WritingGradeCreate(BaseModel):
@@ -76,6 +76,54 @@ class TestResultResponse(BaseModel):
 class TestResultDetailed(TestResultResponse):
     test_attempt: "TestAttemptResponse"
 
+# Grading Job Schemas
+class GradingJobResponse(BaseModel):
+    test_attempt_id: int
+    status: str = Field(..., description="queued, running, completed, failed")
+    attempts: int
+    last_error: Optional[str]
+    created_at: datetime
+    completed_at: Optional[datetime]
+    
+    model_config = ConfigDict(from_attributes=True)
+
+# Regrade Job Schemas
+class RegradeJobCreate(BaseModel):
+    test_template_id: Optional[int] = None
+    listening_question_ids: Optional[List[int]] = None
+    reading_question_ids: Optional[List[int]] = None
+    submitted_from: Optional[datetime] = None
+    submitted_to: Optional[datetime] = None
+    
+    @model_validator(mode="after")
+    def require_filter(self):
+        if not any([
+            self.test_template_id, self.listening_question_ids, self.reading_question_ids,
+            self.submitted_from, self.submitted_to
+        ]):
+            raise ValueError("Provide a test template, question ids or a date range")
+        return self
+
+class RegradeJobResponse(BaseModel):
+    id: int
+    status: str = Field(..., description="queued, running, completed, failed")
+    test_template_id: Optional[int]
+    listening_question_ids: Optional[List[int]]
+    reading_question_ids: Optional[List[int]]
+    submitted_from: Optional[datetime]
+    submitted_to: Optional[datetime]
+    current_section: str
+    total_submissions: Optional[int]
+    processed_submissions: int
+    changed_submissions: int
+    results_recalculated: int
+    last_error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    
+    model_config = ConfigDict(from_attributes=True)
+
 # Teacher Assignment Schemas
 class TeacherAssignmentCreate(BaseModel):
     teacher_id: int
@@ -93,10 +141,31 @@ class TeacherAssignmentResponse(BaseModel):
     submission_type: str
     assigned_at: datetime
     status: str
+    lease_expires_at: Optional[datetime] = None
     completed_at: Optional[datetime]
     
     model_config = ConfigDict(from_attributes=True)
 
+class GradingClaimRequest(BaseModel):
+    submission_type: str = Field(..., pattern="^(writing|speaking)$", description="writing or speaking")
+    count: int = Field(1, ge=1, le=50, description="Number of submissions to claim")
+
+class GradingClaimResponse(TeacherAssignmentResponse):
+    """A claim together with the submission it covers"""
+    writing_submission: Optional["WritingSubmissionResponse"] = None
+    speaking_submission: Optional["SpeakingSubmissionResponse"] = None
+
+class GradingHistoryItem(BaseModel):
+    """One row of a teacher's grading history (writing or speaking)"""
+    id: int  # Grade id
+    submission_id: int
+    student: str
+    type: str = Field(..., description="Writing or Speaking")
+    task: str
+    score: float
+    graded_at: datetime
+    feedback: Optional[str]
+
 class TeacherWorkload(BaseModel):
     teacher_id: int
     teacher_name: str
@@ -104,3 +173,11 @@ class TeacherWorkload(BaseModel):
     pending_speaking: int
     completed_today: int
     total_pending: int
+
+# Import after class definitions to avoid circular imports
+from app.schemas.submission import (
+    WritingSubmissionResponse,
+    SpeakingSubmissionResponse
+)
+
+GradingClaimResponse.model_rebuild()
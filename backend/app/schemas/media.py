@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
+from datetime import datetime, timezone
+from typing import Optional
+
+# Media Library Schemas
+class MediaFileResponse(BaseModel):
+    id: int
+    name: str
+    type: str = Field(..., validation_alias="media_type")  # audio, image
+    url: str
+    size: int
+    mime_type: Optional[str] = None
+    sha256: str
+    original_filename: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    uploaded_by: Optional[int] = None
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_serializer("created_at")
+    def serialize_created_at(self, value: datetime) -> str:
+        # Stored as naive UTC; send the offset so clients don't read it as local time
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
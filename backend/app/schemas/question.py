@@ -82,6 +82,24 @@ class ListeningQuestionResponse(ListeningQuestionBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class ListeningQuestionStudentResponse(BaseModel):
+    """What a student sees while taking the test (no answer key)"""
+    id: int
+    section_id: int
+    part_id: int
+    question_number: int
+    question_type: str
+    question_text: str
+    order: int
+    has_options: Optional[bool] = False
+    options: Optional[List[dict]] = None
+    marks: int = 1
+    instructions: Optional[str] = None
+    image_url: Optional[str] = None
+    type_specific_data: Optional[Dict[str, Any]] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
 # Listening Answer Schemas
 class ListeningAnswerCreate(BaseModel):
     correct_answer: str
@@ -174,6 +192,23 @@ class ReadingQuestionResponse(ReadingQuestionBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class ReadingQuestionStudentResponse(BaseModel):
+    """What a student sees while taking the test (no answer key)"""
+    id: int
+    passage_id: int
+    question_number: int
+    question_type: str
+    question_text: str
+    order: int
+    has_options: Optional[bool] = False
+    options: Optional[List[dict]] = None
+    marks: int = 1
+    instructions: Optional[str] = None
+    image_url: Optional[str] = None
+    type_specific_data: Optional[Dict[str, Any]] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
 # Reading Answer Schemas
 class ReadingAnswerCreate(BaseModel):
     correct_answer: str
@@ -100,6 +100,23 @@ class SpeakingSubmissionResponse(BaseModel):
 class SpeakingSubmissionWithGrade(SpeakingSubmissionResponse):
     grade: Optional["SpeakingGradeResponse"] = None
 
+# Resumable speaking upload schemas
+class SpeakingUploadCreate(BaseModel):
+    size: int = Field(..., gt=0, description="Size of the whole recording in bytes")
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$", description="Hex SHA-256 of the whole recording, checked on finalize")
+    filename: Optional[str] = Field(None, description="Original file name; its extension is kept (default .webm)")
+
+class SpeakingUploadResponse(BaseModel):
+    id: int
+    test_attempt_id: int
+    task_id: int
+    size: int = Field(..., validation_alias="upload_length")
+    offset: int = Field(..., validation_alias="received_bytes")
+    status: str
+    audio_url: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
 # Batch Submission Schemas
 class AnswerItem(BaseModel):
     question_id: int
@@ -102,18 +102,19 @@ from app.schemas.submission import (
 )
 from app.schemas.question import (
     ListeningPartResponse,
-    ListeningQuestionResponse,
+    ListeningQuestionStudentResponse,
     ReadingPassageResponse,
-    ReadingQuestionResponse,
+    ReadingQuestionStudentResponse,
     WritingTaskResponse,
     SpeakingTaskResponse
 )
 
 class TestStructureResponse(BaseModel):
+    """Student-facing test content; question models leave out answer keys"""
     listening_parts: List[ListeningPartResponse] = []
-    listening_questions: List[ListeningQuestionResponse] = []
+    listening_questions: List[ListeningQuestionStudentResponse] = []
     reading_passages: List[ReadingPassageResponse] = []
-    reading_questions: List[ReadingQuestionResponse] = []
+    reading_questions: List[ReadingQuestionStudentResponse] = []
     writing_tasks: List[WritingTaskResponse] = []
     speaking_tasks: List[SpeakingTaskResponse] = []
 
@@ -136,4 +137,19 @@ class StandardAnswerItem(BaseModel):
 class TestSubmission(BaseModel):
     writing_answers: List[WritingAnswerItem] = []
     listening_answers: List[StandardAnswerItem] = []
-    reading_answers: List[StandardAnswerItem] = []
\ No newline at end of file
+    reading_answers: List[StandardAnswerItem] = []
+
+# Autosave Schemas
+class DraftAnswerItem(BaseModel):
+    section_type: str = Field(..., pattern="^(listening|reading|writing)$")
+    item_id: int = Field(..., description="Question id, or task id for writing")
+    answer: str
+
+class AnswerDraftBatch(BaseModel):
+    client_seq: int = Field(..., ge=0, description="Increases with every autosave request of the attempt")
+    answers: List[DraftAnswerItem] = Field(..., max_length=200)
+
+class AnswerDraftSaveResponse(BaseModel):
+    client_seq: int
+    saved: int
+    ignored: int = Field(..., description="Answers skipped because a newer write was already stored")
\ No newline at end of file
@@ -0,0 +1,358 @@
+"""
+Autosave Buffer
+
+In-process write-behind buffer for draft answers.
+
+Autosave requests are merged in memory per (attempt, section, item), keeping
+only the answer with the highest client sequence, and written to the
+answer_drafts table with one bulk upsert per flush. A flush runs on a timer,
+early when AUTOSAVE_FLUSH_MAX_ITEMS answers are pending, and for a single
+attempt when it is submitted.
+
+Every accepted write is appended to a local journal (and fsynced) before the
+request is acknowledged. The journal is split into segments; a full flush
+closes the current segment and deletes the closed ones once the upsert has
+committed. Segments left behind by a crashed process are replayed on the next
+startup. Replays are safe because the upsert never overwrites a draft with an
+older client sequence.
+
+Segments are named by a random id chosen when the buffer is created, and the
+writing process holds an flock() on each of its segments until it deletes
+them. A segment that can be locked therefore has no live writer, whatever its
+name; process ids can't be trusted for this, since in a container the server
+is PID 1 on every start.
+
+The buffer is per process, but AUTOSAVE_JOURNAL_DIR must be shared by every
+API process (as UPLOAD_DIR is). Other processes' drafts reach answer_drafts
+when they flush, which the timer bounds to AUTOSAVE_FLUSH_INTERVAL_SECONDS;
+submitting an attempt doesn't wait for that but reads the attempt's drafts
+from every process's journal. Submit locks the attempt row and autosave
+holds a shared lock on it while journaling, so no answer can be acknowledged
+after submit has read the journals. Flushes and journal replays only write
+drafts of attempts that are still in progress (holding a shared lock on
+them until commit), so drafts that arrive after submit cleared them are
+dropped rather than left behind.
+"""
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models import TestAttempt
+from app.services.submission_service import upsert_answer_drafts
+
+DraftKey = Tuple[int, str, int]  # (test_attempt_id, section_type, item_id)
+
+
+class AutosaveBuffer:
+    """Coalesces draft answer writes in memory and flushes them in batches"""
+
+    def __init__(
+        self,
+        journal_dir: Optional[str] = None,
+        flush_interval: Optional[float] = None,
+        max_items: Optional[int] = None,
+        fsync: Optional[bool] = None
+    ):
+        self.journal_dir = journal_dir or settings.AUTOSAVE_JOURNAL_DIR
+        self.flush_interval = flush_interval if flush_interval is not None else settings.AUTOSAVE_FLUSH_INTERVAL_SECONDS
+        self.max_items = max_items or settings.AUTOSAVE_FLUSH_MAX_ITEMS
+        self.fsync = settings.AUTOSAVE_JOURNAL_FSYNC if fsync is None else fsync
+
+        self._pending: Dict[DraftKey, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.journal_id = uuid.uuid4().hex
+        self._segment = 0
+        self._journal: Optional[TextIO] = None
+        # Closed segments stay open (and locked) until their entries are committed
+        self._closed_segments: List[TextIO] = []
+
+        # Metrics
+        self.writes_received = 0
+        self.writes_coalesced = 0
+        self.writes_ignored = 0
+        self.rows_flushed = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.last_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Journal
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.journal_dir, f"autosave-{self.journal_id}-{segment}.jsonl")
+
+    def _open_segment(self) -> None:
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self._segment += 1
+        self._journal = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        fcntl.flock(self._journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _rotate_segment(self) -> None:
+        """Stop writing to the current segment; it is deleted once its entries are committed"""
+        if self._journal is not None:
+            self._closed_segments.append(self._journal)
+            self._journal = None
+
+    def _journaled_drafts(self, test_attempt_id: int) -> List[Tuple]:
+        """An attempt's drafts from the journal segments of every process"""
+        drafts = []
+        for path in glob.glob(os.path.join(self.journal_dir, "autosave-*.jsonl")):
+            try:
+                with open(path, encoding="utf-8") as journal:
+                    drafts.extend(draft for draft in _read_segment(journal) if draft[0] == test_attempt_id)
+            except FileNotFoundError:
+                # Deleted after its entries were committed
+                continue
+        return drafts
+
+    def _append_journal(self, entries: List[List[Any]]) -> None:
+        if self._journal is None:
+            self._open_segment()
+        self._journal.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add(self, test_attempt_id: int, client_seq: int, answers: List[Any]) -> int:
+        """
+        Buffer one autosave request's answers.
+
+        Returns the number of answers accepted. Answers older than one already
+        pending for the same item are ignored.
+        """
+        with self._lock:
+            accepted = []
+            for answer in answers:
+                key = (test_attempt_id, answer.section_type, answer.item_id)
+                self.writes_received += 1
+
+                pending = self._pending.get(key)
+                if pending is not None and pending[1] >= client_seq:
+                    self.writes_ignored += 1
+                    continue
+                if pending is not None:
+                    self.writes_coalesced += 1
+
+                self._pending[key] = (answer.answer, client_seq)
+                accepted.append([test_attempt_id, answer.section_type, answer.item_id, answer.answer, client_seq])
+
+            if accepted:
+                self._append_journal(accepted)
+
+            depth = len(self._pending)
+
+        if depth >= self.max_items:
+            self._wake.set()
+
+        return len(accepted)
+
+    def _merge_back(self, batch: Dict[DraftKey, Tuple[str, int]]) -> None:
+        """Return a failed batch to the buffer without overwriting newer writes"""
+        with self._lock:
+            for key, (answer, client_seq) in batch.items():
+                pending = self._pending.get(key)
+                if pending is None or pending[1] < client_seq:
+                    self._pending[key] = (answer, client_seq)
+
+    def flush(self, db: Session, test_attempt_id: Optional[int] = None) -> int:
+        """
+        Write pending drafts with one bulk upsert and commit.
+
+        With test_attempt_id only that attempt's drafts are written (used on
+        submit), together with those other processes have journaled for it,
+        and the caller commits, so they are part of its transaction. The
+        journal is then left as is, since replaying it is harmless.
+        Returns the number of drafts written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if test_attempt_id is None:
+                    batch = self._pending
+                    self._pending = {}
+                    self._rotate_segment()
+                    segments = list(self._closed_segments)
+                else:
+                    batch = {key: value for key, value in self._pending.items() if key[0] == test_attempt_id}
+                    for key in batch:
+                        del self._pending[key]
+                    segments = []
+
+            journaled = self._journaled_drafts(test_attempt_id) if test_attempt_id is not None else []
+            if not batch and not segments and not journaled:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                written = upsert_answer_drafts(db, _open_attempt_drafts(db, list(chain(journaled, (
+                    (attempt_id, section_type, item_id, answer, client_seq)
+                    for (attempt_id, section_type, item_id), (answer, client_seq) in batch.items()
+                )))))
+                if test_attempt_id is None:
+                    db.commit()
+            except Exception:
+                db.rollback()
+                self._merge_back(batch)
+                self.flush_failures += 1
+                raise
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.rows_flushed += len(batch)
+            self.last_flush_ms = elapsed_ms
+            self.total_flush_ms += elapsed_ms
+
+            for segment in segments:
+                # Removed before unlocking, so no other process can replay it meanwhile
+                os.remove(segment.name)
+                segment.close()
+                self._closed_segments.remove(segment)
+
+            return written
+
+    def recover(self, db: Session) -> int:
+        """Replay journal segments whose writer is gone (nobody holds their lock)"""
+        segments = []
+        drafts = []
+
+        try:
+            for path in sorted(glob.glob(os.path.join(self.journal_dir, "autosave-*.jsonl"))):
+                journal = open(path, encoding="utf-8")
+                try:
+                    fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Still being written by a running process (or this one)
+                    journal.close()
+                    continue
+
+                segments.append(journal)
+                drafts.extend(_read_segment(journal))
+
+            if not segments:
+                return 0
+
+            written = upsert_answer_drafts(db, _open_attempt_drafts(db, drafts))
+            db.commit()
+
+            for journal in segments:
+                os.remove(journal.name)
+        finally:
+            for journal in segments:
+                journal.close()
+
+        print(f"✅ Recovered {len(drafts)} autosaved answers from {len(segments)} journal segment(s)")
+        return written
+
+    # ------------------------------------------------------------------
+    # Background flusher
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush_with_new_session()
+
+    def _flush_with_new_session(self) -> None:
+        db = SessionLocal()
+        try:
+            self.flush(db)
+        except Exception as e:
+            print(f"Error flushing autosave buffer: {e}")
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        """Replay leftover journals and start the background flusher"""
+        db = SessionLocal()
+        try:
+            self.recover(db)
+        except Exception as e:
+            print(f"Error recovering autosave journal: {e}")
+        finally:
+            db.close()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="autosave-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write everything still pending"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush_with_new_session()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer depth, flush latency and coalescing ratio"""
+        with self._lock:
+            depth = len(self._pending)
+
+        return {
+            "buffer_depth": depth,
+            "writes_received": self.writes_received,
+            "writes_coalesced": self.writes_coalesced,
+            "writes_ignored": self.writes_ignored,
+            "rows_flushed": self.rows_flushed,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            # Answers received per row written; 1.0 means nothing was coalesced
+            "coalescing_ratio": round(self.writes_received / self.rows_flushed, 3) if self.rows_flushed else 1.0
+        }
+
+
+def _open_attempt_drafts(db: Session, drafts: List[Tuple]) -> List[Tuple]:
+    """
+    Drafts of attempts that are still in progress.
+
+    Their attempt rows stay share-locked until the caller commits, so a
+    submit (which locks the row for update) can't clear the drafts in between.
+    """
+    attempt_ids = sorted({draft[0] for draft in drafts})
+    if not attempt_ids:
+        return []
+    open_ids = {attempt_id for (attempt_id,) in db.query(TestAttempt.id).filter(
+        TestAttempt.id.in_(attempt_ids),
+        TestAttempt.status == "in_progress"
+    ).order_by(TestAttempt.id).with_for_update(read=True)}
+    return [draft for draft in drafts if draft[0] in open_ids]
+
+
+def _read_segment(journal: TextIO) -> Iterator[Tuple]:
+    for line in journal:
+        try:
+            yield tuple(json.loads(line))
+        except ValueError:
+            # Torn final line from a crash mid-write (or a write in progress); it was never acknowledged
+            continue
+
+
+autosave_buffer = AutosaveBuffer()
@@ -0,0 +1,221 @@
+"""
+Event Bus
+
+Pushes grading queue and result updates to clients connected to the
+/events/stream Server-Sent Events endpoint, so dashboards don't have to poll.
+
+Write paths call publish(db, channel, event, data) before they commit. The
+event is staged on the session and delivered once the transaction commits;
+a rollback discards it. Each connected client is a Subscription with its
+own asyncio queue, fed thread-safely from whichever thread committed.
+
+On PostgreSQL (with EVENTS_PG_NOTIFY), publish() issues pg_notify in the
+same transaction instead, which PostgreSQL also only delivers on commit.
+Every API process LISTENs on one channel and hands what it hears to its own
+subscribers, so events reach clients connected to any worker process,
+including events raised by the grading worker. Without it, events only
+reach clients of the process that committed them.
+
+Delivery is best-effort. A client that falls more than EVENTS_QUEUE_SIZE
+events behind gets a single "resync" event and should refetch its state.
+"""
+import asyncio
+import json
+import select
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import engine
+
+NOTIFY_CHANNEL = "ace_events"
+PENDING_KEY = "pending_events"
+
+# Channels
+GRADING_CHANNEL = "grading"  # Teacher dashboards
+
+
+def user_channel(user_id: int) -> str:
+    """A user's own channel (their attempts and results)"""
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """One connected client: the channels it listens to and its event queue"""
+
+    def __init__(self, channels: Iterable[str], loop: asyncio.AbstractEventLoop, max_size: int):
+        self.channels = set(channels)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+
+    def _put(self, message: Dict[str, Any]) -> None:
+        """Queue a message (runs on the subscriber's event loop)"""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind for deltas to be useful; have the client refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"channel": None, "event": "resync", "data": {}})
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next message, or None if nothing arrived within timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    """In-process pub/sub between committed writes and SSE subscribers"""
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or settings.EVENTS_QUEUE_SIZE
+
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Metrics
+        self.events_delivered = 0
+        self.notifications_received = 0
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """Register a client; call from the event loop that will read it"""
+        subscription = Subscription(channels, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def deliver(self, message: Dict[str, Any]) -> int:
+        """Hand a message to every subscriber of its channel; returns how many"""
+        with self._lock:
+            subscribers = [s for s in self._subscribers if message["channel"] in s.channels]
+
+        delivered = 0
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, message)
+                delivered += 1
+            except RuntimeError:
+                # Its event loop is gone
+                self.unsubscribe(subscription)
+
+        self.events_delivered += delivered
+        return delivered
+
+    # ------------------------------------------------------------------
+    # PostgreSQL LISTEN
+    # ------------------------------------------------------------------
+
+    def _listen(self) -> None:
+        """Deliver notifications from every process until stopped, reconnecting on errors"""
+        while not self._stop.is_set():
+            connection = None
+            try:
+                # A dedicated connection, so LISTEN never leaks into the pool
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                connection = engine.dialect.connect(*cargs, **cparams)
+                connection.autocommit = True
+                connection.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        self.notifications_received += 1
+                        self.deliver(json.loads(notification.payload))
+            except Exception as e:
+                print(f"Error listening for events: {e}")
+                self._stop.wait(settings.EVENTS_LISTEN_RETRY_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def start(self) -> None:
+        """Start listening for other processes' events (PostgreSQL only)"""
+        if not settings.EVENTS_PG_NOTIFY or engine.dialect.name != "postgresql":
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="event-bus-listen", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {
+            "subscribers": subscribers,
+            "events_delivered": self.events_delivered,
+            "notifications_received": self.notifications_received,
+            "listening": self._thread is not None and self._thread.is_alive()
+        }
+
+
+event_bus = EventBus()
+
+
+def publish(db: Session, channel: str, event_name: str, data: Dict[str, Any]) -> None:
+    """Publish an event when db's current transaction commits"""
+    message = {"channel": channel, "event": event_name, "data": data}
+
+    if settings.EVENTS_PG_NOTIFY and db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": NOTIFY_CHANNEL, "payload": json.dumps(message, default=str)}
+        )
+        return
+
+    if not db.in_transaction():
+        db.begin()  # So the event belongs to a transaction that commits or rolls back
+    db.info.setdefault(PENDING_KEY, []).append(json.loads(json.dumps(message, default=str)))
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session):
+    for message in session.info.pop(PENDING_KEY, []):
+        event_bus.deliver(message)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    # Also fires when no database transaction had begun; keep events on a savepoint rollback
+    if not session.in_transaction():
+        session.info.pop(PENDING_KEY, None)
+
+
+def publish_result(db: Session, attempt: Any, result: Any) -> None:
+    """Tell a student their attempt's result changed (on commit)"""
+    publish(db, user_channel(attempt.user_id), "result_updated", {
+        "test_attempt_id": attempt.id,
+        "status": attempt.status,
+        "listening_score": result.listening_score,
+        "reading_score": result.reading_score,
+        "writing_score": result.writing_score,
+        "speaking_score": result.speaking_score,
+        "overall_band_score": result.overall_band_score
+    })
@@ -0,0 +1,187 @@
+"""
+Grading Claims Service
+
+Hands writing/speaking submissions to teachers so no two grade the same one.
+
+A teacher claims the next N unclaimed submissions: the oldest pending rows
+are selected with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent claims
+split the queue between them instead of waiting on (or double-taking) each
+other's rows. Each claimed submission moves to under_review and gets a
+TeacherAssignment whose lease lasts GRADING_CLAIM_LEASE_SECONDS. The
+grading page renews it with heartbeats; a lapsed lease is expired on the
+next claim and its submission goes back to the queue. Grading a submission
+completes the claim; the grade endpoints lock the submission row, so a
+concurrent claim can't take a submission that is being graded.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import TeacherAssignment, WritingSubmission, SpeakingSubmission
+from app.services.queue_stats import count_status_change
+
+CLAIM_ACTIVE = "pending"
+CLAIM_COMPLETED = "completed"
+CLAIM_RELEASED = "released"
+CLAIM_EXPIRED = "expired"
+
+SUBMISSION_MODELS = {
+    "writing": WritingSubmission,
+    "speaking": SpeakingSubmission,
+}
+
+
+def _return_to_queue(db: Session, assignment: TeacherAssignment) -> None:
+    """Put a claimed submission back in the queue (unless it was graded meanwhile)"""
+    model = SUBMISSION_MODELS[assignment.submission_type]
+    requeued = db.query(model).filter(
+        model.id == assignment.submission_id,
+        model.status == "under_review",
+        model.assigned_teacher_id == assignment.teacher_id
+    ).update({"status": "pending", "assigned_teacher_id": None}, synchronize_session=False)
+    if requeued:
+        count_status_change(db, assignment.submission_type, "under_review", assignment.teacher_id, "pending", None)
+
+
+def expire_claims(db: Session, now: Optional[datetime] = None) -> int:
+    """Expire lapsed leases and requeue their submissions (not committed)"""
+    now = now or datetime.now(timezone.utc)
+
+    lapsed = db.query(TeacherAssignment).filter(
+        TeacherAssignment.status == CLAIM_ACTIVE,
+        TeacherAssignment.lease_expires_at < now
+    ).with_for_update(skip_locked=True).all()
+
+    for assignment in lapsed:
+        assignment.status = CLAIM_EXPIRED
+        _return_to_queue(db, assignment)
+
+    db.flush()
+    return len(lapsed)
+
+
+def claim_submissions(
+    db: Session,
+    teacher_id: int,
+    submission_type: str,
+    count: int = 1
+) -> List[Tuple[TeacherAssignment, Any]]:
+    """Atomically claim up to `count` of the oldest unclaimed submissions"""
+    model = SUBMISSION_MODELS[submission_type]
+    now = datetime.now(timezone.utc)
+    expire_claims(db, now)
+
+    submissions = db.query(model).filter(
+        model.status == "pending",
+        model.assigned_teacher_id == None
+    ).order_by(model.submitted_at, model.id).limit(
+        min(count, settings.GRADING_CLAIM_MAX_BATCH)
+    ).with_for_update(skip_locked=True).all()
+
+    lease_expires_at = now + timedelta(seconds=settings.GRADING_CLAIM_LEASE_SECONDS)
+    claimed = []
+    for submission in submissions:
+        submission.status = "under_review"
+        submission.assigned_teacher_id = teacher_id
+        assignment = TeacherAssignment(
+            teacher_id=teacher_id,
+            submission_id=submission.id,
+            submission_type=submission_type,
+            assigned_at=now,
+            status=CLAIM_ACTIVE,
+            lease_expires_at=lease_expires_at
+        )
+        db.add(assignment)
+        claimed.append((assignment, submission))
+
+    if claimed:
+        count_status_change(db, submission_type, "pending", None, "under_review", teacher_id, count=len(claimed))
+    db.commit()
+    return claimed
+
+
+def get_active_claims(db: Session, teacher_id: int) -> List[TeacherAssignment]:
+    """A teacher's live claims, oldest first"""
+    return db.query(TeacherAssignment).filter(
+        TeacherAssignment.teacher_id == teacher_id,
+        TeacherAssignment.status == CLAIM_ACTIVE,
+        TeacherAssignment.lease_expires_at >= datetime.now(timezone.utc)
+    ).order_by(TeacherAssignment.assigned_at, TeacherAssignment.id).all()
+
+
+def renew_claim(db: Session, assignment_id: int, teacher_id: int) -> Optional[TeacherAssignment]:
+    """
+    Extend a live claim's lease (heartbeat).
+
+    Returns None when the claim isn't this teacher's or has already lapsed;
+    the conditional UPDATE makes that check and the renewal one step.
+    """
+    now = datetime.now(timezone.utc)
+    renewed = db.query(TeacherAssignment).filter(
+        TeacherAssignment.id == assignment_id,
+        TeacherAssignment.teacher_id == teacher_id,
+        TeacherAssignment.status == CLAIM_ACTIVE,
+        TeacherAssignment.lease_expires_at >= now
+    ).update(
+        {"lease_expires_at": now + timedelta(seconds=settings.GRADING_CLAIM_LEASE_SECONDS)},
+        synchronize_session=False
+    )
+    db.commit()
+
+    if not renewed:
+        return None
+    return db.query(TeacherAssignment).filter(TeacherAssignment.id == assignment_id).first()
+
+
+def release_claim(db: Session, assignment_id: int, teacher_id: int) -> Optional[TeacherAssignment]:
+    """Give a claimed submission back to the queue"""
+    assignment = db.query(TeacherAssignment).filter(
+        TeacherAssignment.id == assignment_id,
+        TeacherAssignment.teacher_id == teacher_id,
+        TeacherAssignment.status == CLAIM_ACTIVE
+    ).with_for_update().first()
+
+    if assignment is None:
+        return None
+
+    assignment.status = CLAIM_RELEASED
+    _return_to_queue(db, assignment)
+    db.commit()
+    db.refresh(assignment)
+    return assignment
+
+
+def claim_holder(db: Session, submission_type: str, submission_id: int) -> Optional[int]:
+    """Teacher holding a live claim on a submission, if any"""
+    row = db.query(TeacherAssignment.teacher_id).filter(
+        TeacherAssignment.submission_type == submission_type,
+        TeacherAssignment.submission_id == submission_id,
+        TeacherAssignment.status == CLAIM_ACTIVE,
+        TeacherAssignment.lease_expires_at >= datetime.now(timezone.utc)
+    ).first()
+    return row[0] if row else None
+
+
+def complete_claim(db: Session, submission_type: str, submission_id: int, teacher_id: int) -> None:
+    """
+    Mark the grading teacher's claim completed and release any other live one (not committed).
+
+    Another teacher's claim can only be live here when its lease lapsed
+    and hasn't been expired yet; it must not outlive the grade.
+    """
+    now = datetime.now(timezone.utc)
+    active = db.query(TeacherAssignment).filter(
+        TeacherAssignment.submission_type == submission_type,
+        TeacherAssignment.submission_id == submission_id,
+        TeacherAssignment.status == CLAIM_ACTIVE
+    )
+    active.filter(TeacherAssignment.teacher_id == teacher_id).update(
+        {"status": CLAIM_COMPLETED, "completed_at": now},
+        synchronize_session=False
+    )
+    active.filter(TeacherAssignment.teacher_id != teacher_id).update(
+        {"status": CLAIM_RELEASED},
+        synchronize_session=False
+    )
@@ -0,0 +1,216 @@
+"""
+Grading Queue Service
+
+Durable, database-backed job queue for auto-grading submitted attempts.
+
+Submitting a test only stores the raw answers in a GradingJob row. Grading
+workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, grade the
+listening/reading answers, create the initial TestResult and mark the job
+completed. Failures are retried with exponential backoff until
+max_attempts is reached. Every step is idempotent, so a job reclaimed
+after a worker crash simply runs again.
+"""
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models import GradingJob
+from app.schemas.test import StandardAnswerItem
+from app.services.event_bus import publish_result
+from app.services.grading_service import grading_service
+from app.services.media_store import collect_garbage
+from app.services.queue_stats import reconcile_queue_stats
+from app.services.regrade_service import create_regrade_executor, process_regrade_jobs
+from app.services.speaking_upload import expire_uploads
+from app.services.submission_service import save_objective_answers
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Retry delay is 2^attempts seconds, capped
+MAX_RETRY_DELAY_SECONDS = 300
+
+
+def enqueue_grading_job(db: Session, test_attempt_id: int, payload: Dict[str, Any]) -> GradingJob:
+    """
+    Queue an attempt for grading.
+
+    The job is added to the session but not committed, so it is persisted
+    in the same transaction that marks the attempt as submitted.
+    """
+    job = GradingJob(
+        test_attempt_id=test_attempt_id,
+        status=JOB_QUEUED,
+        payload=payload,
+        max_attempts=settings.GRADING_JOB_MAX_ATTEMPTS,
+        run_after=datetime.now(timezone.utc)
+    )
+    db.add(job)
+    return job
+
+
+def claim_jobs(db: Session, worker_id: str, limit: int = 10) -> List[GradingJob]:
+    """
+    Atomically claim up to `limit` runnable jobs for a worker.
+
+    Runnable jobs are queued jobs whose retry delay has passed, plus running
+    jobs whose lease expired because their worker died. Rows locked by
+    another worker's claim are skipped rather than waited on.
+    """
+    now = datetime.now(timezone.utc)
+    lease_expired_before = now - timedelta(seconds=settings.GRADING_JOB_LEASE_SECONDS)
+
+    candidates = db.query(GradingJob).filter(
+        or_(
+            and_(GradingJob.status == JOB_QUEUED, GradingJob.run_after <= now),
+            and_(GradingJob.status == JOB_RUNNING, GradingJob.locked_at < lease_expired_before)
+        )
+    ).order_by(GradingJob.run_after, GradingJob.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    claimed = []
+    for job in candidates:
+        if job.attempts >= job.max_attempts:
+            # Lease expired on the final attempt
+            job.status = JOB_FAILED
+            job.last_error = job.last_error or "Worker lease expired"
+            job.locked_by = None
+            job.locked_at = None
+            continue
+
+        job.status = JOB_RUNNING
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts += 1
+        claimed.append(job)
+
+    db.commit()
+    return claimed
+
+
+def run_job(db: Session, job: GradingJob) -> bool:
+    """
+    Grade a claimed job's answers and create the initial TestResult.
+
+    Returns True on success. On failure the job is requeued with backoff,
+    or marked failed once it has used all of its attempts.
+    """
+    job_id = job.id
+    payload = job.payload or {}
+
+    try:
+        save_objective_answers(
+            db,
+            job.test_attempt_id,
+            listening_answers=[StandardAnswerItem(**answer) for answer in payload.get("listening_answers", [])],
+            reading_answers=[StandardAnswerItem(**answer) for answer in payload.get("reading_answers", [])]
+        )
+        db.commit()
+
+        result = grading_service.calculate_initial_results(db, job.test_attempt_id)
+        if result is not None and result.test_attempt is not None:
+            publish_result(db, result.test_attempt, result)
+
+        job.status = JOB_COMPLETED
+        job.completed_at = datetime.now(timezone.utc)
+        job.locked_by = None
+        job.locked_at = None
+        job.last_error = None
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"Error grading attempt {job.test_attempt_id} (job {job_id}): {e}")
+
+        job = db.query(GradingJob).filter(GradingJob.id == job_id).first()
+        if job is None:
+            return False
+
+        job.last_error = str(e)[:2000]
+        job.locked_by = None
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = JOB_FAILED
+        else:
+            job.status = JOB_QUEUED
+            delay = min(2 ** job.attempts, MAX_RETRY_DELAY_SECONDS)
+            job.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        db.commit()
+        return False
+
+
+def process_jobs(db: Session, worker_id: str, limit: int = 10) -> int:
+    """Claim and run one batch of jobs. Returns the number of jobs claimed."""
+    jobs = claim_jobs(db, worker_id, limit)
+    for job in jobs:
+        run_job(db, job)
+    return len(jobs)
+
+
+def get_grading_job(db: Session, test_attempt_id: int) -> Optional[GradingJob]:
+    """Get the grading job for an attempt"""
+    return db.query(GradingJob).filter(GradingJob.test_attempt_id == test_attempt_id).first()
+
+
+def run_worker(
+    worker_id: Optional[str] = None,
+    poll_interval: Optional[float] = None,
+    batch_size: Optional[int] = None
+) -> None:
+    """
+    Poll the queue forever, sleeping only when there is nothing to do.
+
+    Each poll grades a batch of submitted attempts, then advances a bulk
+    regrade job by a few chunks, so regrades never starve live grading.
+    Several workers can run side by side; SKIP LOCKED keeps them from
+    claiming the same job. Every GRADING_STATS_RECONCILE_SECONDS the worker
+    also recounts the teacher dashboard counters, every
+    MEDIA_GC_INTERVAL_SECONDS it collects unreferenced media blobs, and every
+    SPEAKING_UPLOAD_SWEEP_INTERVAL_SECONDS it expires abandoned speaking uploads.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    poll_interval = poll_interval if poll_interval is not None else settings.GRADING_WORKER_POLL_SECONDS
+    batch_size = batch_size or settings.GRADING_WORKER_BATCH_SIZE
+    next_reconcile = time.monotonic()
+    next_media_gc = time.monotonic()
+    next_upload_sweep = time.monotonic()
+    # Created once, so polls don't pay process startup for every regrade batch
+    regrade_executor = create_regrade_executor()
+
+    print(f"🚀 Grading worker {worker_id} started")
+    try:
+        while True:
+            db = SessionLocal()
+            try:
+                processed = process_jobs(db, worker_id, batch_size)
+                processed += process_regrade_jobs(db, worker_id, executor=regrade_executor)
+                if time.monotonic() >= next_reconcile:
+                    next_reconcile = time.monotonic() + settings.GRADING_STATS_RECONCILE_SECONDS
+                    reconcile_queue_stats(db)
+                if time.monotonic() >= next_media_gc:
+                    next_media_gc = time.monotonic() + settings.MEDIA_GC_INTERVAL_SECONDS
+                    collect_garbage(db)
+                if time.monotonic() >= next_upload_sweep:
+                    next_upload_sweep = time.monotonic() + settings.SPEAKING_UPLOAD_SWEEP_INTERVAL_SECONDS
+                    expire_uploads(db)
+            except Exception as e:
+                print(f"Error polling grading queue: {e}")
+                processed = 0
+            finally:
+                db.close()
+
+            if processed == 0:
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print(f"👋 Grading worker {worker_id} stopped")
+    finally:
+        if regrade_executor is not None:
+            regrade_executor.shutdown()
@@ -1,8 +1,11 @@
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
 from app.models import (
     TestAttempt,
+    ListeningQuestion,
+    ReadingQuestion,
     ListeningSubmission,
     ReadingSubmission,
     WritingSubmission,
@@ -13,6 +16,12 @@ from app.models import (
 )
 
 
+# Attempt ids per aggregate query in bulk recomputes
+SCORE_BATCH_SIZE = 500
+
+SectionScores = Tuple[float, float, float, float, float]
+
+
 class GradingService:
     """Service for calculating IELTS band scores"""
     
@@ -29,7 +38,11 @@ class GradingService:
         if not scores:
             return 0.0
         
-        avg = sum(scores) / len(scores)
+        return GradingService.round_band_score(sum(scores) / len(scores))
+    
+    @staticmethod
+    def round_band_score(avg: float) -> float:
+        """Round an average band score to the nearest 0.5 (see calculate_band_score)"""
         decimal_part = avg % 1
         whole_part = int(avg)
         
@@ -84,93 +97,231 @@ class GradingService:
         else:
             return 2.5
     
+    @staticmethod
+    def _objective_totals(db: Session, submission_model, attempt_ids: List[int]):
+        """Per-attempt (total, correct) counts of listening or reading submissions"""
+        return db.query(
+            submission_model.test_attempt_id.label("test_attempt_id"),
+            func.count(submission_model.id).label("total"),
+            func.sum(case((submission_model.is_correct == True, 1), else_=0)).label("correct")
+        ).filter(
+            submission_model.test_attempt_id.in_(attempt_ids)
+        ).group_by(submission_model.test_attempt_id)
+    
+    @staticmethod
+    def _grade_totals(db: Session, submission_model, grade_model, attempt_ids: List[int]):
+        """Per-attempt (sum, count) of writing or speaking grade band scores"""
+        return db.query(
+            submission_model.test_attempt_id.label("test_attempt_id"),
+            func.sum(grade_model.overall_band_score).label("grade_sum"),
+            func.count(grade_model.id).label("graded")
+        ).join(
+            grade_model, grade_model.submission_id == submission_model.id
+        ).filter(
+            submission_model.test_attempt_id.in_(attempt_ids)
+        ).group_by(submission_model.test_attempt_id)
+    
+    @staticmethod
+    def _objective_band(total: int, correct: int, section_type: str) -> float:
+        if not total:
+            return 0.0
+        return GradingService.convert_correct_answers_to_band(int(correct or 0), total, section_type)
+    
+    @staticmethod
+    def _graded_band(grade_sum: float, graded: int) -> float:
+        if not graded:
+            return 0.0
+        return GradingService.round_band_score(grade_sum / graded)
+    
     @staticmethod
     def calculate_listening_score(db: Session, test_attempt_id: int) -> float:
         """Calculate listening section band score"""
-        submissions = db.query(ListeningSubmission).filter(
-            ListeningSubmission.test_attempt_id == test_attempt_id
-        ).all()
-        
-        if not submissions:
-            return 0.0
-        
-        correct_count = sum(1 for s in submissions if s.is_correct)
-        total = len(submissions)
-        
-        return GradingService.convert_correct_answers_to_band(correct_count, total, "listening")
+        row = GradingService._objective_totals(db, ListeningSubmission, [test_attempt_id]).first()
+        return GradingService._objective_band(row.total, row.correct, "listening") if row else 0.0
     
     @staticmethod
     def calculate_reading_score(db: Session, test_attempt_id: int) -> float:
         """Calculate reading section band score"""
-        submissions = db.query(ReadingSubmission).filter(
-            ReadingSubmission.test_attempt_id == test_attempt_id
-        ).all()
-        
-        if not submissions:
-            return 0.0
-        
-        correct_count = sum(1 for s in submissions if s.is_correct)
-        total = len(submissions)
-        
-        return GradingService.convert_correct_answers_to_band(correct_count, total, "reading")
+        row = GradingService._objective_totals(db, ReadingSubmission, [test_attempt_id]).first()
+        return GradingService._objective_band(row.total, row.correct, "reading") if row else 0.0
     
     @staticmethod
     def get_writing_score(db: Session, test_attempt_id: int) -> float:
         """Get writing section band score (average of all writing task grades)"""
-        writing_submissions = db.query(WritingSubmission).filter(
-            WritingSubmission.test_attempt_id == test_attempt_id
-        ).all()
-        
-        grades = []
-        for submission in writing_submissions:
-            grade = db.query(WritingGrade).filter(
-                WritingGrade.submission_id == submission.id
-            ).first()
-            if grade:
-                grades.append(grade.overall_band_score)
-        
-        if not grades:
-            return 0.0
-        
-        return GradingService.calculate_band_score(*grades)
+        row = GradingService._grade_totals(db, WritingSubmission, WritingGrade, [test_attempt_id]).first()
+        return GradingService._graded_band(row.grade_sum, row.graded) if row else 0.0
     
     @staticmethod
     def get_speaking_score(db: Session, test_attempt_id: int) -> float:
         """Get speaking section band score (average of all speaking task grades)"""
-        speaking_submissions = db.query(SpeakingSubmission).filter(
-            SpeakingSubmission.test_attempt_id == test_attempt_id
-        ).all()
+        row = GradingService._grade_totals(db, SpeakingSubmission, SpeakingGrade, [test_attempt_id]).first()
+        return GradingService._graded_band(row.grade_sum, row.graded) if row else 0.0
+    
+    @staticmethod
+    def calculate_overall_scores_bulk(
+        db: Session,
+        attempt_ids: List[int],
+        include_missing: bool = True
+    ) -> Dict[int, SectionScores]:
+        """
+        Calculate section and overall scores for many attempts
         
-        grades = []
-        for submission in speaking_submissions:
-            grade = db.query(SpeakingGrade).filter(
-                SpeakingGrade.submission_id == submission.id
-            ).first()
-            if grade:
-                grades.append(grade.overall_band_score)
+        Submissions are counted and grades summed in SQL with one aggregated
+        query per SCORE_BATCH_SIZE attempts, instead of loading every row.
+        Attempts without any submissions get all zeros; ids that don't exist
+        do too, unless include_missing is False.
         
-        if not grades:
-            return 0.0
+        Returns: {attempt_id: (listening, reading, writing, speaking, overall)}
+        """
+        results = {}
+        attempt_ids = list(dict.fromkeys(attempt_ids))
+        
+        for start in range(0, len(attempt_ids), SCORE_BATCH_SIZE):
+            chunk = attempt_ids[start:start + SCORE_BATCH_SIZE]
+            
+            listening = GradingService._objective_totals(db, ListeningSubmission, chunk).subquery()
+            reading = GradingService._objective_totals(db, ReadingSubmission, chunk).subquery()
+            writing = GradingService._grade_totals(db, WritingSubmission, WritingGrade, chunk).subquery()
+            speaking = GradingService._grade_totals(db, SpeakingSubmission, SpeakingGrade, chunk).subquery()
+            
+            rows = db.query(
+                TestAttempt.id,
+                listening.c.total, listening.c.correct,
+                reading.c.total, reading.c.correct,
+                writing.c.grade_sum, writing.c.graded,
+                speaking.c.grade_sum, speaking.c.graded
+            ).outerjoin(
+                listening, listening.c.test_attempt_id == TestAttempt.id
+            ).outerjoin(
+                reading, reading.c.test_attempt_id == TestAttempt.id
+            ).outerjoin(
+                writing, writing.c.test_attempt_id == TestAttempt.id
+            ).outerjoin(
+                speaking, speaking.c.test_attempt_id == TestAttempt.id
+            ).filter(TestAttempt.id.in_(chunk)).all()
+            
+            for (attempt_id, l_total, l_correct, r_total, r_correct,
+                 w_sum, w_graded, s_sum, s_graded) in rows:
+                listening_score = GradingService._objective_band(l_total, l_correct, "listening")
+                reading_score = GradingService._objective_band(r_total, r_correct, "reading")
+                writing_score = GradingService._graded_band(w_sum, w_graded)
+                speaking_score = GradingService._graded_band(s_sum, s_graded)
+                
+                # Overall is average of all four sections
+                scores = [s for s in [listening_score, reading_score, writing_score, speaking_score] if s > 0]
+                overall_score = GradingService.calculate_band_score(*scores) if scores else 0.0
+                
+                results[attempt_id] = (listening_score, reading_score, writing_score, speaking_score, overall_score)
         
-        return GradingService.calculate_band_score(*grades)
+        if include_missing:
+            for attempt_id in attempt_ids:
+                results.setdefault(attempt_id, (0.0, 0.0, 0.0, 0.0, 0.0))
+        
+        return results
     
     @staticmethod
-    def calculate_overall_score(db: Session, test_attempt_id: int) -> Tuple[float, float, float, float, float]:
+    def calculate_overall_score(db: Session, test_attempt_id: int) -> SectionScores:
         """
         Calculate all section scores and overall band score
         
         Returns: (listening, reading, writing, speaking, overall)
         """
-        listening_score = GradingService.calculate_listening_score(db, test_attempt_id)
-        reading_score = GradingService.calculate_reading_score(db, test_attempt_id)
-        writing_score = GradingService.get_writing_score(db, test_attempt_id)
-        speaking_score = GradingService.get_speaking_score(db, test_attempt_id)
+        return GradingService.calculate_overall_scores_bulk(db, [test_attempt_id])[test_attempt_id]
+    
+    @staticmethod
+    def marks_to_band(correct_marks: int, total_marks: int) -> float:
+        """Simple band score mapping (approximate) used for auto-graded sections"""
+        if correct_marks <= 0:
+            return 0.0
+        return min(9.0, round((correct_marks / max(total_marks, 1)) * 9 * 2) / 2)
+    
+    @staticmethod
+    def _objective_marks(db: Session, submission_model, question_model, attempt_ids: List[int]):
+        """Per-attempt (correct marks, total marks) of listening or reading submissions"""
+        return db.query(
+            submission_model.test_attempt_id.label("test_attempt_id"),
+            func.sum(case((submission_model.is_correct == True, question_model.marks), else_=0)).label("correct"),
+            func.sum(question_model.marks).label("total")
+        ).join(
+            question_model, submission_model.question_id == question_model.id
+        ).filter(
+            submission_model.test_attempt_id.in_(attempt_ids)
+        ).group_by(submission_model.test_attempt_id)
+    
+    @staticmethod
+    def recalculate_objective_results(db: Session, attempt_ids: List[int], commit: bool = True) -> Dict[int, TestResult]:
+        """
+        Recalculate Listening & Reading scores of many attempts
+        
+        Scores are the sum of marks for correctly answered questions, computed
+        with one aggregated query per SCORE_BATCH_SIZE attempts. Missing
+        TestResult rows are created. Where an overall band score was already
+        published on the attempt, it is recalculated from the new section scores.
+        """
+        results = {}
+        attempt_ids = list(dict.fromkeys(attempt_ids))
         
-        # Overall is average of all four sections
-        scores = [s for s in [listening_score, reading_score, writing_score, speaking_score] if s > 0]
-        overall_score = GradingService.calculate_band_score(*scores) if scores else 0.0
+        for start in range(0, len(attempt_ids), SCORE_BATCH_SIZE):
+            chunk = attempt_ids[start:start + SCORE_BATCH_SIZE]
+            
+            listening = GradingService._objective_marks(db, ListeningSubmission, ListeningQuestion, chunk).subquery()
+            reading = GradingService._objective_marks(db, ReadingSubmission, ReadingQuestion, chunk).subquery()
+            
+            rows = db.query(
+                TestAttempt, TestResult,
+                listening.c.correct, listening.c.total,
+                reading.c.correct, reading.c.total
+            ).outerjoin(
+                TestResult, TestResult.test_attempt_id == TestAttempt.id
+            ).outerjoin(
+                listening, listening.c.test_attempt_id == TestAttempt.id
+            ).outerjoin(
+                reading, reading.c.test_attempt_id == TestAttempt.id
+            ).filter(TestAttempt.id.in_(chunk)).all()
+            
+            for attempt, result, l_correct, l_total, r_correct, r_total in rows:
+                listening_score = GradingService.marks_to_band(int(l_correct or 0), int(l_total or 40))
+                reading_score = GradingService.marks_to_band(int(r_correct or 0), int(r_total or 40))
+                
+                if result is None:
+                    result = TestResult(
+                        test_attempt_id=attempt.id,
+                        listening_score=listening_score,
+                        reading_score=reading_score,
+                        writing_score=None, # Pending grading
+                        speaking_score=None, # Pending grading
+                        overall_band_score=0.0 # Will be calculated when all components are ready
+                    )
+                    db.add(result)
+                else:
+                    result.listening_score = listening_score
+                    result.reading_score = reading_score
+                
+                if attempt.overall_band_score is not None:
+                    scores = [
+                        score for score in [
+                            result.listening_score, result.reading_score,
+                            result.writing_score, result.speaking_score
+                        ] if score is not None
+                    ]
+                    result.overall_band_score = round(sum(scores) / len(scores) * 2) / 2
+                    attempt.overall_band_score = result.overall_band_score
+                
+                results[attempt.id] = result
         
-        return listening_score, reading_score, writing_score, speaking_score, overall_score
+        if commit:
+            db.commit()
+        return results
+    
+    @staticmethod
+    def calculate_initial_results(db: Session, test_attempt_id: int) -> TestResult:
+        """
+        Calculate scores for auto-graded sections (Listening & Reading)
+        and create the initial TestResult record.
+        
+        Scores are calculated based on the sum of marks for correctly answered questions.
+        """
+        return GradingService.recalculate_objective_results(db, [test_attempt_id])[test_attempt_id]
     
     @staticmethod
     def generate_test_result(db: Session, test_attempt_id: int) -> TestResult:
@@ -212,6 +363,38 @@ class GradingService:
             db.refresh(result)
             return result
     
+    @staticmethod
+    def generate_test_results_bulk(db: Session, attempt_ids: List[int]) -> int:
+        """
+        Generate or update test results for many attempts (e.g. nightly recompute)
+        
+        Scores come from calculate_overall_scores_bulk, existing results are
+        loaded with one query per batch, and everything is committed once.
+        Returns the number of results written.
+        """
+        scores = GradingService.calculate_overall_scores_bulk(db, attempt_ids, include_missing=False)
+        attempt_ids = list(scores.keys())
+        
+        existing = {}
+        for start in range(0, len(attempt_ids), SCORE_BATCH_SIZE):
+            chunk = attempt_ids[start:start + SCORE_BATCH_SIZE]
+            for result in db.query(TestResult).filter(TestResult.test_attempt_id.in_(chunk)).all():
+                existing[result.test_attempt_id] = result
+        
+        for attempt_id, (listening, reading, writing, speaking, overall) in scores.items():
+            result = existing.get(attempt_id)
+            if result is None:
+                result = TestResult(test_attempt_id=attempt_id)
+                db.add(result)
+            result.listening_score = listening if listening > 0 else None
+            result.reading_score = reading if reading > 0 else None
+            result.writing_score = writing if writing > 0 else None
+            result.speaking_score = speaking if speaking > 0 else None
+            result.overall_band_score = overall
+        
+        db.commit()
+        return len(scores)
+    
     @staticmethod
     def is_test_complete(db: Session, test_attempt_id: int) -> bool:
         """
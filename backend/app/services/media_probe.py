@@ -0,0 +1,196 @@
+"""
+Media Probe
+
+Reads the duration of audio files and the dimensions of images from their
+headers, for the media catalog. Only the few bytes that hold the answer
+are read, never the whole file, and no third-party decoder is needed.
+
+Supported: MP3 (Xing/Info frame count, else constant bitrate), WAV, Ogg
+Vorbis/Opus and MP4/M4A for audio; PNG, JPEG, GIF and WebP for images.
+Anything unrecognised or malformed yields None rather than an error, since
+the catalog treats these values as optional.
+"""
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+HEADER_BYTES = 256 * 1024  # Covers ID3 tags and JPEG EXIF blocks ahead of the data we need
+TAIL_BYTES = 64 * 1024  # Ogg: the last page holds the final granule position
+
+# MPEG audio Layer III
+MP3_BITRATES_KBPS = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = (44100, 48000, 32000)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _mp3_duration(f: BinaryIO, size: int) -> Optional[float]:
+    data = f.read(HEADER_BYTES)
+    start = 0
+    if data[:3] == b"ID3":
+        tag_size = 0
+        for byte in data[6:10]:
+            tag_size = (tag_size << 7) | (byte & 0x7F)  # Syncsafe integer
+        start = 10 + tag_size
+        f.seek(start)
+        data = f.read(HEADER_BYTES)
+
+    for i in range(len(data) - 4):
+        if data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+            continue
+        version_bits = (data[i + 1] >> 3) & 0x03  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+        layer_bits = (data[i + 1] >> 1) & 0x03
+        bitrate_index = data[i + 2] >> 4
+        rate_index = (data[i + 2] >> 2) & 0x03
+        if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+
+        mpeg1 = version_bits == 3
+        sample_rate = MP3_SAMPLE_RATES[rate_index] >> (0 if mpeg1 else 1 if version_bits == 2 else 2)
+        samples_per_frame = 1152 if mpeg1 else 576
+
+        # A Xing/Info header in the first frame carries the exact frame count (VBR files)
+        for tag in (b"Xing", b"Info"):
+            tag_at = data.find(tag, i + 4, i + 64)
+            if tag_at != -1:
+                flags, frames = struct.unpack(">II", data[tag_at + 4:tag_at + 12])
+                if flags & 0x01:
+                    return frames * samples_per_frame / sample_rate
+
+        bitrate = MP3_BITRATES_KBPS[1 if mpeg1 else 2][bitrate_index] * 1000
+        return (size - start - i) * 8 / bitrate
+    return None
+
+
+def _wav_duration(f: BinaryIO) -> Optional[float]:
+    data = f.read(HEADER_BYTES)
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    byte_rate = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, chunk_size = data[offset:offset + 4], struct.unpack("<I", data[offset + 4:offset + 8])[0]
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack("<I", data[offset + 16:offset + 20])[0]
+        elif chunk_id == b"data":
+            return chunk_size / byte_rate if byte_rate else None
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _ogg_duration(f: BinaryIO, size: int) -> Optional[float]:
+    data = f.read(HEADER_BYTES)
+    if data[:4] != b"OggS":
+        return None
+    packet = data[27 + data[26]:]
+    if packet[:7] == b"\x01vorbis":
+        sample_rate, pre_skip = struct.unpack("<I", packet[12:16])[0], 0
+    elif packet[:8] == b"OpusHead":
+        sample_rate, pre_skip = 48000, struct.unpack("<H", packet[10:12])[0]  # Opus granules are always 48 kHz
+    else:
+        return None
+
+    f.seek(max(0, size - TAIL_BYTES))
+    tail = f.read(TAIL_BYTES)
+    last_page = tail.rfind(b"OggS")
+    if last_page == -1 or not sample_rate:
+        return None
+    granule = struct.unpack("<q", tail[last_page + 6:last_page + 14])[0]
+    return max(granule - pre_skip, 0) / sample_rate
+
+
+def _mp4_atoms(f: BinaryIO, start: int, end: int):
+    """(type, content offset, content size) of the atoms between start and end"""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield kind, offset + header, size - header
+        offset += size
+
+
+def _mp4_duration(f: BinaryIO, size: int) -> Optional[float]:
+    for kind, moov_start, moov_size in _mp4_atoms(f, 0, size):
+        if kind != b"moov":
+            continue
+        for child, start, _ in _mp4_atoms(f, moov_start, moov_start + moov_size):
+            if child != b"mvhd":
+                continue
+            f.seek(start)
+            header = f.read(32)
+            if header[0] == 1:
+                timescale, duration = struct.unpack(">IQ", header[20:32])
+            else:
+                timescale, duration = struct.unpack(">II", header[12:20])
+            return duration / timescale if timescale else None
+    return None
+
+
+def _image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", data[6:10])
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            b0, b1, b2, b3 = data[21:25]
+            return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+        if chunk == b"VP8X":
+            return 1 + int.from_bytes(data[24:27], "little"), 1 + int.from_bytes(data[27:30], "little")
+        return None
+    if data[:2] == b"\xff\xd8":
+        offset = 2
+        while offset + 9 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+            marker = data[offset + 1]
+            if marker == 0xFF:  # Fill byte
+                offset += 1
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + struct.unpack(">H", data[offset + 2:offset + 4])[0]
+    return None
+
+
+def probe(path: Path, media_type: str) -> Dict[str, Optional[float]]:
+    """{"duration_seconds": ...} for audio or {"width": ..., "height": ...} for images; None where unknown"""
+    extension = path.suffix.lower()
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            if media_type == "image":
+                dimensions = _image_dimensions(f.read(HEADER_BYTES))
+                width, height = dimensions or (None, None)
+                return {"width": width, "height": height}
+
+            if extension == ".mp3":
+                duration = _mp3_duration(f, size)
+            elif extension == ".wav":
+                duration = _wav_duration(f)
+            elif extension in (".ogg", ".oga", ".opus"):
+                duration = _ogg_duration(f, size)
+            elif extension in (".m4a", ".mp4", ".aac"):
+                duration = _mp4_duration(f, size)
+            else:
+                duration = None
+    except (OSError, struct.error, ValueError, IndexError):
+        return {"width": None, "height": None} if media_type == "image" else {"duration_seconds": None}
+
+    return {"duration_seconds": round(duration, 3) if duration is not None else None}
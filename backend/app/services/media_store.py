@@ -0,0 +1,334 @@
+"""
+Media Store
+
+Bookkeeping for content-addressed uploads. save_upload names every audio
+and image upload by its SHA-256, so identical files share one blob on disk
+and one URL, and the static file server can let clients cache them forever.
+register_blob records each blob in media_blobs, which doubles as the media
+library's catalog (size, MIME type, checksum, duration or dimensions,
+uploader), so listing it is an indexed query rather than a directory scan.
+media_references ties blobs to the content columns that point at them:
+
+    ListeningPart.audio_url, ListeningQuestion.image_url,
+    ReadingQuestion.image_url, WritingTask.image_url
+
+A flush hook keeps the references current whenever those columns are
+inserted, changed or deleted through the ORM, so a blob's reference count
+is its number of media_references rows.
+
+collect_garbage first rebuilds the references from the content tables
+(catching bulk updates, database cascades and manual SQL), then deletes
+blobs that nothing references and that were not uploaded within
+MEDIA_GC_GRACE_SECONDS. The grace period covers the gap between uploading
+a file and saving the content that uses it. The grading worker runs it
+every MEDIA_GC_INTERVAL_SECONDS, so it must see the same UPLOAD_DIR as the
+API (the uploads volume in docker-compose).
+
+Files stored before content addressing keep their random names. Once
+backfill_catalog has catalogued them, references to them are tracked like
+any other, but the garbage collector only ever deletes content-addressed
+blobs.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import event, exists, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import (
+    ListeningPart,
+    ListeningQuestion,
+    MediaBlob,
+    MediaReference,
+    ReadingQuestion,
+    WritingTask
+)
+from app.services.media_probe import probe
+from app.services.upload_service import SavedUpload
+
+# owner_type -> (model, URL column)
+SOURCES = {
+    "listening_part": (ListeningPart, "audio_url"),
+    "listening_question": (ListeningQuestion, "image_url"),
+    "reading_question": (ReadingQuestion, "image_url"),
+    "writing_task": (WritingTask, "image_url"),
+}
+_OWNERS = {model: (owner_type, column) for owner_type, (model, column) in SOURCES.items()}
+
+# Directory under UPLOAD_DIR -> media type
+MEDIA_DIRS = {"audio": "audio", "images": "image"}
+
+URL_PREFIX = "/uploads/"
+BLOB_NAME = re.compile(r"^[0-9a-f]{64}\.[0-9a-z]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+HASH_BLOCK_SIZE = 1024 * 1024
+BACKFILL_BATCH_SIZE = 100
+
+
+def blob_path(url: Optional[str]) -> Optional[str]:
+    """The UPLOAD_DIR-relative path behind an audio/image upload URL, else None"""
+    if not url or URL_PREFIX not in url:
+        return None
+    path = url.split(URL_PREFIX, 1)[1].split("?", 1)[0]
+    directory, _, name = path.partition("/")
+    return path if directory in MEDIA_DIRS and name and "/" not in name else None
+
+
+def is_content_addressed(path: str) -> bool:
+    return bool(BLOB_NAME.match(path.rsplit("/", 1)[-1]))
+
+
+def _upsert(db: Session, model, key_columns, values: Dict, update: Dict) -> None:
+    """Insert a row, or update the row with the same key (not committed)"""
+    dialect = db.get_bind().dialect.name
+    table = model.__table__
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table).values(**values).on_conflict_do_update(index_elements=key_columns, set_=update)
+        db.execute(stmt)
+        return
+
+    key = {column: values[column] for column in key_columns}
+    updated = db.execute(table.update().filter_by(**key).values(**update)).rowcount
+    if not updated:
+        db.execute(table.insert().values(**values))
+
+
+def _catalog_entry(path: Path, relative_path: str, sha256: str, size: int) -> Dict:
+    """Catalog columns of a stored file, read from its name and headers"""
+    media_type = MEDIA_DIRS[relative_path.split("/", 1)[0]]
+    return {
+        "path": relative_path,
+        "sha256": sha256,
+        "size": size,
+        "media_type": media_type,
+        "mime_type": mimetypes.guess_type(path.name)[0],
+        **probe(path, media_type)
+    }
+
+
+def register_blob(
+    db: Session,
+    saved: SavedUpload,
+    root: Path,
+    uploaded_by: Optional[int] = None,
+    original_filename: Optional[str] = None,
+    content_type: Optional[str] = None
+) -> MediaBlob:
+    """
+    Catalog a stored upload, or restart the grace period of the blob it matched (commits).
+
+    A re-upload keeps the original entry (first uploader and name).
+    """
+    path = saved.path.relative_to(root).as_posix()
+    now = datetime.now(timezone.utc)
+
+    if db.query(MediaBlob.id).filter(MediaBlob.path == path).first():
+        values = {"path": path, "sha256": saved.sha256, "size": saved.size, "media_type": MEDIA_DIRS[path.split("/", 1)[0]]}
+    else:
+        values = _catalog_entry(saved.path, path, saved.sha256, saved.size)
+        values["mime_type"] = values["mime_type"] or content_type
+        values.update(uploaded_by=uploaded_by, original_filename=original_filename)
+
+    _upsert(db, MediaBlob, ["path"], {**values, "created_at": now, "uploaded_at": now}, {"uploaded_at": now})
+    db.commit()
+    return db.query(MediaBlob).filter(MediaBlob.path == path).one()
+
+
+def reference_count(db: Session, blob: MediaBlob) -> int:
+    return db.query(MediaReference).filter(MediaReference.blob_id == blob.id).count()
+
+
+def _set_references(db: Session, owners: Dict) -> None:
+    """Point each (owner_type, owner_id) at the blob behind its URL, or at nothing (not committed)"""
+    paths = {path for path in (blob_path(url) for url in owners.values()) if path}
+    blob_ids = dict(db.execute(
+        select(MediaBlob.path, MediaBlob.id).where(MediaBlob.path.in_(paths))
+    ).all()) if paths else {}
+
+    table = MediaReference.__table__
+    now = datetime.now(timezone.utc)
+    for (owner_type, owner_id), url in sorted(owners.items()):
+        blob_id = blob_ids.get(blob_path(url))
+        if blob_id is None:
+            db.execute(table.delete().where(table.c.owner_type == owner_type, table.c.owner_id == owner_id))
+            continue
+        _upsert(
+            db, MediaReference, ["owner_type", "owner_id"],
+            {"blob_id": blob_id, "owner_type": owner_type, "owner_id": owner_id, "created_at": now},
+            {"blob_id": blob_id}
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_references(session, flush_context):
+    # Runs before the flushed changes are forgotten, so new/dirty/deleted and attribute history are intact
+    owners = {}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        owner = _OWNERS.get(type(obj))
+        if owner is None:
+            continue
+        owner_type, column = owner
+        if obj in session.deleted:
+            owners[(owner_type, obj.id)] = None
+        elif obj in session.new or inspect(obj).attrs[column].history.has_changes():
+            owners[(owner_type, obj.id)] = getattr(obj, column)
+
+    if owners:
+        _set_references(session, owners)
+
+
+def sync_references(db: Session) -> int:
+    """
+    Rebuild the references from the content tables and fix any drift (commits).
+
+    Returns the number of references corrected.
+    """
+    actual = {}
+    for owner_type, (model, column) in SOURCES.items():
+        url = getattr(model, column)
+        for owner_id, value in db.query(model.id, url).filter(url.like(f"%{URL_PREFIX}%")):
+            if blob_path(value):
+                actual[(owner_type, owner_id)] = value
+
+    blob_ids = dict(db.query(MediaBlob.path, MediaBlob.id).all())
+    stored = {
+        (reference.owner_type, reference.owner_id): reference.blob_id
+        for reference in db.query(MediaReference).all()
+    }
+
+    drifted = {}
+    for key in set(stored) | set(actual):
+        blob_id = blob_ids.get(blob_path(actual.get(key)))
+        if stored.get(key) != blob_id:
+            drifted[key] = actual.get(key)
+
+    _set_references(db, drifted)
+    db.commit()
+
+    if drifted:
+        print(f"⚠️ Reconciled {len(drifted)} media references")
+    return len(drifted)
+
+
+def collect_garbage(db: Session, root: Optional[Path] = None, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Delete blobs nothing references once their grace period is over (commits).
+
+    Blob files on disk without a media_blobs row (left by a crash between
+    storing and registering an upload) are removed after the same grace
+    period.
+    """
+    root = root or Path(settings.UPLOAD_DIR)
+    now = now or datetime.now(timezone.utc)
+    if not any((root / directory).is_dir() for directory in MEDIA_DIRS):
+        # Not the upload directory the API writes to; deleting rows here would lose track of real files
+        print(f"⚠️ Skipping media garbage collection: no media directories under {root.resolve()}")
+        return {"blobs_deleted": 0, "orphans_deleted": 0, "bytes_freed": 0, "references_corrected": 0}
+    cutoff = now - timedelta(seconds=settings.MEDIA_GC_GRACE_SECONDS)
+
+    references_corrected = sync_references(db)
+
+    referenced = exists().where(MediaReference.blob_id == MediaBlob.id)
+    candidates = db.query(MediaBlob).filter(
+        MediaBlob.uploaded_at < cutoff,
+        ~referenced
+    ).order_by(MediaBlob.id).with_for_update(skip_locked=True).all()
+    # Backfilled files with random names may be used outside the tracked columns
+    garbage = [blob for blob in candidates if is_content_addressed(blob.path)]
+
+    paths = [blob.path for blob in garbage]
+    bytes_freed = sum(blob.size for blob in garbage)
+    for blob in garbage:
+        db.delete(blob)
+    db.commit()
+
+    for path in paths:
+        (root / path).unlink(missing_ok=True)
+
+    known = {path for (path,) in db.query(MediaBlob.path).all()}
+    orphans = 0
+    for directory in MEDIA_DIRS:
+        if not (root / directory).is_dir():
+            continue
+        for entry in os.scandir(root / directory):
+            if not (entry.is_file() and BLOB_NAME.match(entry.name)):
+                continue
+            stat = entry.stat()
+            if f"{directory}/{entry.name}" in known or stat.st_mtime >= cutoff.timestamp():
+                continue
+            os.unlink(entry.path)
+            bytes_freed += stat.st_size
+            orphans += 1
+
+    if paths or orphans:
+        print(f"🗑️ Collected {len(paths)} unreferenced media blobs and {orphans} orphaned files")
+    return {
+        "blobs_deleted": len(paths),
+        "orphans_deleted": orphans,
+        "bytes_freed": bytes_freed,
+        "references_corrected": references_corrected
+    }
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def backfill_catalog(db: Session, root: Optional[Path] = None) -> int:
+    """
+    Catalog audio/image files already on disk that have no entry (commits).
+
+    For files uploaded before the catalog existed; safe to run again, as
+    catalogued files are skipped. Their upload time is taken from the file's
+    modification time and the uploader is unknown. References to the new
+    entries are synced afterwards. Returns the number of files added.
+    """
+    root = root or Path(settings.UPLOAD_DIR)
+    known = {path for (path,) in db.query(MediaBlob.path).all()}
+
+    added = 0
+    for directory in MEDIA_DIRS:
+        if not (root / directory).is_dir():
+            continue
+        for entry in os.scandir(root / directory):
+            relative_path = f"{directory}/{entry.name}"
+            if not entry.is_file() or relative_path in known:
+                continue
+            stat = entry.stat()
+            modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+            values = _catalog_entry(Path(entry.path), relative_path, _file_sha256(entry.path), stat.st_size)
+            _upsert(db, MediaBlob, ["path"], {**values, "created_at": modified, "uploaded_at": modified}, {"size": stat.st_size})
+            added += 1
+            if added % BACKFILL_BATCH_SIZE == 0:
+                db.commit()
+    db.commit()
+
+    sync_references(db)
+    if added:
+        print(f"📚 Catalogued {added} media files")
+    return added
+
+
+class MediaStaticFiles(StaticFiles):
+    """Serves uploads; content-addressed files never change, so clients may cache them forever"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if BLOB_NAME.match(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -3,16 +3,34 @@ Question Grading Service
 
 Type-aware grading logic for all IELTS question families.
 This module handles the actual answer comparison and scoring.
+
+Answer data is first compiled into an answer key: frozen sets of normalized
+acceptable answers per blank, label or item, with optional words already
+expanded. Grading is then a set lookup per answer. Keys for stored questions
+are memoized in an LRU cache keyed by question id and updated_at, so
+re-grading many attempts compiles each question once.
 """
-from typing import Dict, Any, List, Tuple
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple
 from app.models.question_types import get_question_family
 
+# Parenthesized optional words, e.g. "(fast) food"
+OPTIONAL_WORDS_PATTERN = re.compile(r'\((.*?)\)')
+
+# Compiled answer keys kept in memory (one per question)
+ANSWER_KEY_CACHE_SIZE = 4096
+
 
 def grade_question(
     question_type: str,
     user_answer: Any,
     answer_data: Dict[str, Any],
-    type_specific_data: Dict[str, Any]
+    type_specific_data: Dict[str, Any],
+    key: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Grade a question based on its type.
@@ -22,6 +40,7 @@ def grade_question(
         user_answer: The user's submitted answer (structure depends on type)
         answer_data: The correct answer data from the question
         type_specific_data: Type-specific configuration (max_words, case_sensitive, etc.)
+        key: Precompiled answer key (see compile_answer_key); compiled on the fly if omitted
     
     Returns:
         {
@@ -38,20 +57,20 @@ def grade_question(
     family = get_question_family(question_type)
     
     if family == "completion":
-        return grade_completion(user_answer, answer_data, type_specific_data)
+        return grade_completion(user_answer, answer_data, type_specific_data, key)
     elif family == "matching":
-        return grade_matching(user_answer, answer_data, type_specific_data)
+        return grade_matching(user_answer, answer_data, type_specific_data, key)
     elif family == "mcq":
-        return grade_mcq(user_answer, answer_data, type_specific_data)
+        return grade_mcq(user_answer, answer_data, type_specific_data, key)
     elif family == "tfng":
-        return grade_tfng(user_answer, answer_data)
+        return grade_tfng(user_answer, answer_data, key)
     elif family == "diagram":
-        return grade_diagram(user_answer, answer_data, type_specific_data)
+        return grade_diagram(user_answer, answer_data, type_specific_data, key)
     elif family == "short_answer":
-        return grade_short_answer(user_answer, answer_data, type_specific_data)
+        return grade_short_answer(user_answer, answer_data, type_specific_data, key)
     else:
         # Fallback to simple string comparison
-        return grade_simple(user_answer, answer_data)
+        return grade_simple(user_answer, answer_data, key)
 
 
 def normalize_text(text: str, case_sensitive: bool = False) -> str:
@@ -73,12 +92,9 @@ def expand_optional_answers(text: str) -> List[str]:
     if not text:
         return []
     
-    import re
-    
     # Find all parenthesized groups
     # This regex handles simple non-nested parentheses
-    pattern = r'\((.*?)\)'
-    matches = list(re.finditer(pattern, text))
+    matches = list(OPTIONAL_WORDS_PATTERN.finditer(text))
     
     if not matches:
         return [text]
@@ -121,10 +137,235 @@ def check_word_count(text: str, max_words: int) -> bool:
     return word_count <= max_words
 
 
+@lru_cache(maxsize=ANSWER_KEY_CACHE_SIZE * 4)
+def _expanded_answer_set(text: str, case_sensitive: bool) -> FrozenSet[str]:
+    """Normalized variations of one answer, memoized per distinct answer string"""
+    return frozenset(normalize_text(exp, case_sensitive) for exp in expand_optional_answers(text))
+
+
+def acceptable_answer_set(answers: Iterable[str], case_sensitive: bool = False) -> FrozenSet[str]:
+    """Union of the normalized, optional-word-expanded variations of every answer"""
+    result = set()
+    for answer in answers:
+        result |= _expanded_answer_set(answer, case_sensitive)
+    return frozenset(result)
+
+
+# ============================================================================
+# Answer Key Compilation
+# ============================================================================
+
+def compile_completion_key(answer_data: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Compile completion answers: {"blanks": {blank_id: (acceptable, max_words, case_sensitive)}}"""
+    blank_configs = {b.get("blank_id"): b for b in config.get("blanks", [])}
+    blanks = {}
+    
+    for blank_id, correct_answers in answer_data.get("blanks", {}).items():
+        blank_config = blank_configs.get(blank_id, {})
+        case_sensitive = blank_config.get("case_sensitive", False)
+        raw_correct_list = correct_answers if isinstance(correct_answers, list) else [correct_answers]
+        blanks[blank_id] = (
+            acceptable_answer_set(raw_correct_list, case_sensitive),
+            blank_config.get("max_words", 3),
+            case_sensitive
+        )
+    
+    return {"family": "completion", "blanks": blanks}
+
+
+def compile_matching_key(answer_data: Dict[str, Any], config: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Compile matching answers: {"mappings": {item_num: (correct_option, normalized_option)}}"""
+    return {
+        "family": "matching",
+        "mappings": {
+            item_num: (correct_option, correct_option.upper())
+            for item_num, correct_option in answer_data.get("mappings", {}).items()
+        }
+    }
+
+
+def compile_mcq_key(answer_data: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Compile MCQ answers: {"correct": [options], "correct_set": frozenset, "allow_multiple": bool}"""
+    correct_options = answer_data.get("correct_options", [])
+    if not isinstance(correct_options, list):
+        correct_options = [correct_options]
+    correct_options = [c.upper() for c in correct_options]
+    
+    return {
+        "family": "mcq",
+        "correct": correct_options,
+        "correct_set": frozenset(correct_options),
+        "allow_multiple": config.get("allow_multiple", False)
+    }
+
+
+def normalize_tfng(value: str) -> str:
+    """Normalize a TRUE/FALSE/NOT GIVEN value ("not_given" -> "NOT GIVEN")"""
+    return value.upper().replace("_", " ").strip()
+
+
+def compile_tfng_key(answer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Compile TFNG answers: {"answers": {stmt_num: (correct_value, normalized_value)}}"""
+    return {
+        "family": "tfng",
+        "answers": {
+            stmt_num: (correct_value, normalize_tfng(correct_value))
+            for stmt_num, correct_value in answer_data.get("answers", {}).items()
+        }
+    }
+
+
+def compile_diagram_key(answer_data: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Compile diagram answers: {"labels": {label_id: acceptable}, "max_words": int} (case-insensitive)"""
+    labels = {}
+    
+    for label_id, correct_answers in answer_data.get("labels", {}).items():
+        # Handle different answer formats: list, dict, or string
+        if isinstance(correct_answers, list):
+            candidates = correct_answers
+        elif isinstance(correct_answers, dict):
+            candidates = list(correct_answers.values())
+        else:
+            candidates = [correct_answers]
+        labels[label_id] = frozenset(
+            normalize_text(correct, case_sensitive=False)
+            for correct in candidates if isinstance(correct, str)
+        )
+    
+    return {
+        "family": "diagram",
+        "labels": labels,
+        "max_words": config.get("max_words_per_label", 2)
+    }
+
+
+def compile_short_answer_key(answer_data: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Compile short answers: {"acceptable": frozenset, "max_words": int, "case_sensitive": bool}"""
+    correct_answers = answer_data.get("correct_answers", [])
+    if not isinstance(correct_answers, list):
+        correct_answers = [correct_answers]
+    
+    # Fallback to legacy singular format if correct_answers is empty
+    if not correct_answers:
+        legacy_answer = answer_data.get("correct_answer", "")
+        if legacy_answer:
+            correct_answers = [legacy_answer]
+    
+    case_sensitive = config.get("case_sensitive", False)
+    return {
+        "family": "short_answer",
+        "acceptable": acceptable_answer_set(correct_answers, case_sensitive),
+        "max_words": config.get("max_words", 3),
+        "case_sensitive": case_sensitive
+    }
+
+
+def compile_simple_key(answer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Compile legacy answers: {"acceptable": frozenset, "case_sensitive": bool}"""
+    correct_answer = answer_data.get("correct_answer", "")
+    alternatives = answer_data.get("alternative_answers", [])
+    case_sensitive = answer_data.get("case_sensitive", False)
+    
+    all_correct = [correct_answer] + (alternatives if isinstance(alternatives, list) else [])
+    return {
+        "family": "simple",
+        "acceptable": acceptable_answer_set(all_correct, case_sensitive),
+        "case_sensitive": case_sensitive
+    }
+
+
+def compile_answer_key(
+    question_type: str,
+    answer_data: Dict[str, Any],
+    type_specific_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Compile a question's answer data into the key used by its family's grader"""
+    answer_data = answer_data or {}
+    type_specific_data = type_specific_data or {}
+    
+    family = get_question_family(question_type)
+    
+    if family == "completion":
+        return compile_completion_key(answer_data, type_specific_data)
+    elif family == "matching":
+        return compile_matching_key(answer_data, type_specific_data)
+    elif family == "mcq":
+        return compile_mcq_key(answer_data, type_specific_data)
+    elif family == "tfng":
+        return compile_tfng_key(answer_data)
+    elif family == "diagram":
+        return compile_diagram_key(answer_data, type_specific_data)
+    elif family == "short_answer":
+        return compile_short_answer_key(answer_data, type_specific_data)
+    else:
+        return compile_simple_key(answer_data)
+
+
+class AnswerKeyCache:
+    """
+    Thread-safe LRU cache of compiled answer keys for stored questions.
+    
+    Entries are keyed by (table, question id, updated_at): editing a question
+    bumps updated_at, so a stale key is never served and simply ages out.
+    """
+    
+    def __init__(self, maxsize: int = ANSWER_KEY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, question: Any) -> Dict[str, Any]:
+        """Get the compiled key for a ListeningQuestion/ReadingQuestion, compiling on a miss"""
+        updated_at = getattr(question, "updated_at", None)
+        if question.id is None or updated_at is None:
+            # Unsaved questions have no stable version to cache under
+            return compile_answer_key(question.question_type, question.answer_data, question.type_specific_data)
+        
+        cache_key = (getattr(question, "__tablename__", type(question).__name__), question.id, updated_at)
+        
+        with self._lock:
+            key = self._entries.get(cache_key)
+            if key is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return key
+            self.misses += 1
+        
+        key = compile_answer_key(question.question_type, question.answer_data, question.type_specific_data)
+        
+        with self._lock:
+            self._entries[cache_key] = key
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        
+        return key
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+answer_key_cache = AnswerKeyCache()
+
+
+def get_answer_key(question: Any) -> Dict[str, Any]:
+    """Get the cached compiled answer key for a stored question"""
+    return answer_key_cache.get(question)
+
+
 def grade_completion(
     user_answer: Any,
     answer_data: Dict[str, Any],
-    config: Dict[str, Any]
+    config: Dict[str, Any],
+    key: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Grade completion (fill-in-blank) questions.
@@ -147,17 +388,11 @@ def grade_completion(
         # Legacy: single answer text
         user_blanks = {"BLANK_1": user_answer}
     
-    correct_blanks = answer_data.get("blanks", {})
-    blank_configs = {b.get("blank_id"): b for b in config.get("blanks", [])}
-    
-    total_blanks = len(correct_blanks)
+    key = key or compile_completion_key(answer_data, config)
+    total_blanks = len(key["blanks"])
     
-    for blank_id, correct_answers in correct_blanks.items():
+    for blank_id, (acceptable, max_words, case_sensitive) in key["blanks"].items():
         user_text = user_blanks.get(blank_id, "")
-        blank_config = blank_configs.get(blank_id, {})
-        
-        max_words = blank_config.get("max_words", 3)
-        case_sensitive = blank_config.get("case_sensitive", False)
         
         # Check word count
         if not check_word_count(user_text, max_words):
@@ -169,22 +404,8 @@ def grade_completion(
             }
             continue
         
-        # Normalize and compare
-        user_normalized = normalize_text(user_text, case_sensitive)
-        
-        # Check against all acceptable answers
-        is_correct = False
-        
-        raw_correct_list = correct_answers if isinstance(correct_answers, list) else [correct_answers]
-        acceptable_variations = []
-        
-        for raw_ans in raw_correct_list:
-            # Expand optional words: "(fast) food" -> ["fast food", "food"]
-            expanded = expand_optional_answers(raw_ans)
-            for exp in expanded:
-                acceptable_variations.append(normalize_text(exp, case_sensitive))
-                
-        is_correct = user_normalized in acceptable_variations
+        # Normalize and check against all acceptable answers
+        is_correct = normalize_text(user_text, case_sensitive) in acceptable
         
         results[blank_id] = {
             "correct": is_correct,
@@ -208,7 +429,8 @@ def grade_completion(
 def grade_matching(
     user_answer: Any,
     answer_data: Dict[str, Any],
-    config: Dict[str, Any]
+    config: Dict[str, Any],
+    key: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Grade matching questions.
@@ -226,13 +448,13 @@ def grade_matching(
         if not user_mappings:
             user_mappings = {k: v for k, v in user_answer.items() if k.isdigit() or (isinstance(k, str) and k.isdigit())}
     
-    correct_mappings = answer_data.get("mappings", {})
-    total_items = len(correct_mappings)
+    key = key or compile_matching_key(answer_data, config)
+    total_items = len(key["mappings"])
     
-    for item_num, correct_option in correct_mappings.items():
+    for item_num, (correct_option, normalized_option) in key["mappings"].items():
         user_option = user_mappings.get(str(item_num), "")
         
-        is_correct = user_option.upper() == correct_option.upper()
+        is_correct = user_option.upper() == normalized_option
         
         results[item_num] = {
             "correct": is_correct,
@@ -257,7 +479,8 @@ def grade_matching(
 def grade_mcq(
     user_answer: Any,
     answer_data: Dict[str, Any],
-    config: Dict[str, Any]
+    config: Dict[str, Any],
+    key: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Grade multiple choice questions.
@@ -278,17 +501,14 @@ def grade_mcq(
     # Normalize to uppercase
     user_selected = [s.upper() for s in user_selected if s]
     
-    correct_options = answer_data.get("correct_options", [])
-    if not isinstance(correct_options, list):
-        correct_options = [correct_options]
-    correct_options = [c.upper() for c in correct_options]
-    
-    allow_multiple = config.get("allow_multiple", False)
+    key = key or compile_mcq_key(answer_data, config)
+    correct_options = key["correct"]
+    allow_multiple = key["allow_multiple"]
     
     # For single select: exact match
     # For multi-select: must match exactly (no extra, no missing)
     user_set = set(user_selected)
-    correct_set = set(correct_options)
+    correct_set = key["correct_set"]
     
     is_correct = user_set == correct_set
     
@@ -313,7 +533,8 @@ def grade_mcq(
 
 def grade_tfng(
     user_answer: Any,
-    answer_data: Dict[str, Any]
+    answer_data: Dict[str, Any],
+    key: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Grade True/False/Not Given or Yes/No/Not Given questions.
@@ -331,17 +552,13 @@ def grade_tfng(
         if not user_answers:
             user_answers = {k: v for k, v in user_answer.items() if k.isdigit() or (isinstance(k, str) and k.isdigit())}
     
-    correct_answers = answer_data.get("answers", {})
-    total_statements = len(correct_answers)
+    key = key or compile_tfng_key(answer_data)
+    total_statements = len(key["answers"])
     
-    for stmt_num, correct_value in correct_answers.items():
+    for stmt_num, (correct_value, correct_normalized) in key["answers"].items():
         user_value = user_answers.get(str(stmt_num), "")
         
-        # Normalize for comparison
-        user_normalized = user_value.upper().replace("_", " ").strip()
-        correct_normalized = correct_value.upper().replace("_", " ").strip()
-        
-        is_correct = user_normalized == correct_normalized
+        is_correct = normalize_tfng(user_value) == correct_normalized
         
         results[stmt_num] = {
             "correct": is_correct,
@@ -366,7 +583,8 @@ def grade_tfng(
 def grade_diagram(
     user_answer: Any,
     answer_data: Dict[str, Any],
-    config: Dict[str, Any]
+    config: Dict[str, Any],
+    key: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Grade diagram/map labeling questions.
@@ -384,11 +602,11 @@ def grade_diagram(
         if not user_labels:
             user_labels = {k: v for k, v in user_answer.items() if isinstance(k, str)}
     
-    correct_labels = answer_data.get("labels", {})
-    max_words = config.get("max_words_per_label", 2)
-    total_labels = len(correct_labels)
+    key = key or compile_diagram_key(answer_data, config)
+    max_words = key["max_words"]
+    total_labels = len(key["labels"])
     
-    for label_id, correct_answers in correct_labels.items():
+    for label_id, acceptable in key["labels"].items():
         user_text = user_labels.get(str(label_id), "")
         
         # Check word count
@@ -401,23 +619,7 @@ def grade_diagram(
             continue
         
         # Compare (case-insensitive)
-        user_normalized = normalize_text(user_text, case_sensitive=False)
-        
-        is_correct = False
-        # Handle different answer formats: list, dict, or string
-        if isinstance(correct_answers, list):
-            for correct in correct_answers:
-                if isinstance(correct, str) and normalize_text(correct, case_sensitive=False) == user_normalized:
-                    is_correct = True
-                    break
-        elif isinstance(correct_answers, dict):
-            # If correct_answers is a dict, check values
-            for correct in correct_answers.values():
-                if isinstance(correct, str) and normalize_text(correct, case_sensitive=False) == user_normalized:
-                    is_correct = True
-                    break
-        elif isinstance(correct_answers, str):
-            is_correct = normalize_text(correct_answers, case_sensitive=False) == user_normalized
+        is_correct = normalize_text(user_text, case_sensitive=False) in acceptable
         
         results[label_id] = {
             "correct": is_correct,
@@ -441,7 +643,8 @@ def grade_diagram(
 def grade_short_answer(
     user_answer: Any,
     answer_data: Dict[str, Any],
-    config: Dict[str, Any]
+    config: Dict[str, Any],
+    key: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Grade short answer questions.
@@ -455,8 +658,8 @@ def grade_short_answer(
     elif isinstance(user_answer, str):
         user_text = user_answer
     
-    max_words = config.get("max_words", 3)
-    case_sensitive = config.get("case_sensitive", False)
+    key = key or compile_short_answer_key(answer_data, config)
+    max_words = key["max_words"]
     
     # Check word count
     if not check_word_count(user_text, max_words):
@@ -470,28 +673,8 @@ def grade_short_answer(
             }
         }
     
-    correct_answers = answer_data.get("correct_answers", [])
-    if not isinstance(correct_answers, list):
-        correct_answers = [correct_answers]
-    
-    # Fallback to legacy singular format if correct_answers is empty
-    if not correct_answers:
-        legacy_answer = answer_data.get("correct_answer", "")
-        if legacy_answer:
-            correct_answers = [legacy_answer]
-    
-    user_normalized = normalize_text(user_text, case_sensitive)
-    
     # Check against expanded optional answers
-    is_correct = False
-    for correct in correct_answers:
-        expanded = expand_optional_answers(correct)
-        for exp in expanded:
-            if normalize_text(exp, case_sensitive) == user_normalized:
-                is_correct = True
-                break
-        if is_correct:
-            break
+    is_correct = normalize_text(user_text, key["case_sensitive"]) in key["acceptable"]
     
     return {
         "is_correct": is_correct,
@@ -504,7 +687,8 @@ def grade_short_answer(
 
 def grade_simple(
     user_answer: Any,
-    answer_data: Dict[str, Any]
+    answer_data: Dict[str, Any],
+    key: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Fallback simple grading for legacy questions.
@@ -516,24 +700,10 @@ def grade_simple(
     elif isinstance(user_answer, dict):
         user_text = str(user_answer.get("text", user_answer.get("answer", "")))
     
-    correct_answer = answer_data.get("correct_answer", "")
-    alternatives = answer_data.get("alternative_answers", [])
-    case_sensitive = answer_data.get("case_sensitive", False)
-    
-    all_correct = [correct_answer] + (alternatives if isinstance(alternatives, list) else [])
-    
-    user_normalized = normalize_text(user_text, case_sensitive)
+    key = key or compile_simple_key(answer_data)
     
     # Check against expanded optional answers
-    is_correct = False
-    for correct in all_correct:
-        expanded = expand_optional_answers(correct)
-        for exp in expanded:
-            if normalize_text(exp, case_sensitive) == user_normalized:
-                is_correct = True
-                break
-        if is_correct:
-            break
+    is_correct = normalize_text(user_text, key["case_sensitive"]) in key["acceptable"]
     
     return {
         "is_correct": is_correct,
@@ -542,3 +712,125 @@ def grade_simple(
             "user_answer": user_text
         }
     }
+
+
+# ============================================================================
+# Batch Grading
+# ============================================================================
+
+def grade_with_key(user_answer: Any, key: Dict[str, Any]) -> Dict[str, Any]:
+    """Grade one answer using only a compiled answer key"""
+    family = key["family"]
+    
+    if family == "completion":
+        return grade_completion(user_answer, {}, {}, key)
+    elif family == "matching":
+        return grade_matching(user_answer, {}, {}, key)
+    elif family == "mcq":
+        return grade_mcq(user_answer, {}, {}, key)
+    elif family == "tfng":
+        return grade_tfng(user_answer, {}, key)
+    elif family == "diagram":
+        return grade_diagram(user_answer, {}, {}, key)
+    elif family == "short_answer":
+        return grade_short_answer(user_answer, {}, {}, key)
+    else:
+        return grade_simple(user_answer, {}, key)
+
+
+def _answer_text(user_answer: Any, family: str) -> Optional[str]:
+    """Plain text of a short answer/legacy answer, None when the full grader is needed"""
+    if family not in ("short_answer", "simple"):
+        return None
+    if isinstance(user_answer, str):
+        return user_answer
+    if isinstance(user_answer, dict) and family == "short_answer":
+        text = user_answer.get("text", "")
+        return text if isinstance(text, str) else None
+    return None
+
+
+def _grade_batch_answer(
+    user_answer: Any,
+    key: Dict[str, Any],
+    include_details: bool
+) -> Tuple[bool, float, Optional[Dict[str, Any]]]:
+    """Grade one distinct answer, skipping the details dict when it isn't wanted"""
+    text = None if include_details else _answer_text(user_answer, key["family"])
+    
+    if text is not None:
+        max_words = key.get("max_words")
+        if max_words is not None and not check_word_count(text, max_words):
+            return False, 0.0, None
+        is_correct = normalize_text(text, key["case_sensitive"]) in key["acceptable"]
+        return is_correct, 1.0 if is_correct else 0.0, None
+    
+    result = grade_with_key(user_answer, key)
+    return result["is_correct"], result["score"], result["details"]
+
+
+def grade_questions_batch(
+    questions: Iterable[Any],
+    question_ids: List[int],
+    user_answers: List[Any],
+    include_details: bool = False
+) -> Dict[str, Any]:
+    """
+    Grade a column of answers, e.g. every submission of a cohort, in one call.
+    
+    Args:
+        questions: Questions with structured answer_data (ListeningQuestion/ReadingQuestion rows)
+        question_ids: Question id of each answer
+        user_answers: Decoded user answers, aligned with question_ids
+        include_details: Also return the per-answer details dict of grade_question
+    
+    Each question's answer key is compiled once (via the shared cache) and
+    identical text answers to the same question are graded once, so a cohort
+    that mostly gives the same few answers costs little more than one
+    attempt. Plain-text short answer and legacy answers skip the details
+    dict and go straight to a set lookup.
+    
+    Returns:
+        {
+            "is_correct": array('b') of 0/1 per answer,
+            "score": array('d') of scores (0.0 to 1.0) per answer,
+            "details": list of details dicts (None for unknown questions), or None
+        }
+    
+    Answers to unknown question ids score 0.
+    """
+    if len(question_ids) != len(user_answers):
+        raise ValueError("question_ids and user_answers must have the same length")
+    
+    keys = {question.id: get_answer_key(question) for question in questions}
+    
+    count = len(question_ids)
+    is_correct = array("b", bytes(count))
+    scores = array("d", bytes(8 * count))
+    details: Optional[List[Optional[Dict[str, Any]]]] = [None] * count if include_details else None
+    
+    # Outcomes of distinct (question id, answer text) pairs
+    graded: Dict[Tuple[int, Optional[str]], Tuple[bool, float, Optional[Dict[str, Any]]]] = {}
+    
+    for position, (question_id, user_answer) in enumerate(zip(question_ids, user_answers)):
+        key = keys.get(question_id)
+        if key is None:
+            continue
+        
+        cacheable = user_answer is None or isinstance(user_answer, str)
+        outcome = graded.get((question_id, user_answer)) if cacheable else None
+        if outcome is None:
+            outcome = _grade_batch_answer(user_answer, key, include_details)
+            if cacheable:
+                graded[(question_id, user_answer)] = outcome
+        
+        is_correct[position] = 1 if outcome[0] else 0
+        scores[position] = outcome[1]
+        if details is not None:
+            details[position] = outcome[2]
+    
+    return {
+        "is_correct": is_correct,
+        "score": scores,
+        "details": details
+    }
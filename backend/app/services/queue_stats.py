@@ -0,0 +1,263 @@
+"""
+Grading Queue Stats
+
+Materialized counters behind the teacher dashboard, so the workload, queue
+and stats endpoints read a few small rows instead of counting the
+submission and grade tables on every poll.
+
+grading_queue_stats holds the number of open writing/speaking submissions
+per status (pending, under_review) and assigned teacher (0 = unassigned).
+grading_daily_stats holds how many submissions each teacher graded per UTC
+day. Every path that creates, claims, requeues or grades a submission
+adjusts them with count = count + n in its own transaction, so a counter
+commits or rolls back together with the change it counts.
+
+Every submit and claim touches the unassigned pending counter, and holds
+its row lock until the transaction commits. That counter is therefore
+split over GRADING_STATS_SHARDS rows, each writer picking one at random,
+and readers sum the shards. Counters of assigned teachers only see that
+teacher's traffic and keep a single row (shard 0).
+
+Changes made outside those paths (cascading deletes of attempts or users,
+manual SQL, seed scripts) are corrected by reconcile_queue_stats, which the
+grading worker runs every GRADING_STATS_RECONCILE_SECONDS.
+"""
+import random
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import Base
+from app.models import (
+    GradingQueueStat,
+    GradingDailyStat,
+    WritingSubmission,
+    SpeakingSubmission,
+    WritingGrade,
+    SpeakingGrade
+)
+
+QUEUE_STATUSES = ("pending", "under_review")
+UNASSIGNED = 0
+
+QUEUE_KEY = ["submission_type", "status", "teacher_id", "shard"]
+DAILY_KEY = ["teacher_id", "day", "submission_type"]
+
+# submission_type -> (submission model, grade model)
+SOURCES = {
+    "writing": (WritingSubmission, WritingGrade),
+    "speaking": (SpeakingSubmission, SpeakingGrade),
+}
+
+
+def _add(db: Session, model: Type[Base], key_columns: Sequence[str], deltas: Dict[Tuple, int]) -> None:
+    """
+    Add deltas to counter rows, creating missing rows (not committed).
+
+    Keys are applied in sorted order, so concurrent transactions lock
+    counter rows in the same order and cannot deadlock on them.
+    """
+    now = datetime.now(timezone.utc)
+    dialect = db.get_bind().dialect.name
+
+    for key in sorted(deltas):
+        delta = deltas[key]
+        if not delta:
+            continue
+        values = dict(zip(key_columns, key))
+
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(model).values(**values, count=delta, updated_at=now)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={"count": model.count + stmt.excluded["count"], "updated_at": now}
+            )
+            db.execute(stmt)
+            continue
+
+        updated = db.query(model).filter_by(**values).update(
+            {"count": model.count + delta, "updated_at": now}, synchronize_session=False
+        )
+        if not updated:
+            db.add(model(**values, count=delta, updated_at=now))
+            db.flush()
+
+
+def _queue_key(submission_type: str, status: str, teacher_id: Optional[int]) -> Tuple:
+    if not teacher_id:
+        return (submission_type, status, UNASSIGNED, random.randrange(settings.GRADING_STATS_SHARDS))
+    return (submission_type, status, teacher_id, 0)
+
+
+def count_submitted(db: Session, submission_type: str, count: int = 1) -> None:
+    """Count new pending, unassigned submissions (not committed)"""
+    _add(db, GradingQueueStat, QUEUE_KEY, {_queue_key(submission_type, "pending", None): count})
+
+
+def count_status_change(
+    db: Session,
+    submission_type: str,
+    old_status: str,
+    old_teacher_id: Optional[int],
+    new_status: str,
+    new_teacher_id: Optional[int],
+    count: int = 1
+) -> None:
+    """Move submissions between queue counters (not committed); statuses outside the queue aren't counted"""
+    deltas = Counter()
+    if old_status in QUEUE_STATUSES:
+        deltas[_queue_key(submission_type, old_status, old_teacher_id)] -= count
+    if new_status in QUEUE_STATUSES:
+        deltas[_queue_key(submission_type, new_status, new_teacher_id)] += count
+    _add(db, GradingQueueStat, QUEUE_KEY, deltas)
+
+
+def count_graded(db: Session, submission_type: str, teacher_id: int, graded_at: datetime) -> None:
+    """Count a graded submission towards the teacher's day (not committed)"""
+    _add(db, GradingDailyStat, DAILY_KEY, {(teacher_id, graded_at.date(), submission_type): 1})
+
+
+def queue_counts(db: Session, teacher_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Open (pending or under review) submissions per type.
+
+    With teacher_id, only those assigned to that teacher or unassigned.
+    """
+    query = db.query(GradingQueueStat.submission_type, func.sum(GradingQueueStat.count))
+    if teacher_id is not None:
+        query = query.filter(GradingQueueStat.teacher_id.in_([teacher_id, UNASSIGNED]))
+
+    counts = dict.fromkeys(SOURCES, 0)
+    for submission_type, count in query.group_by(GradingQueueStat.submission_type).all():
+        counts[submission_type] = int(count or 0)
+    return counts
+
+
+def graded_today(db: Session, teacher_id: int) -> int:
+    """Submissions the teacher graded since midnight UTC"""
+    total = db.query(func.sum(GradingDailyStat.count)).filter(
+        GradingDailyStat.teacher_id == teacher_id,
+        GradingDailyStat.day == datetime.now(timezone.utc).date()
+    ).scalar()
+    return int(total or 0)
+
+
+def _recount_queue(db: Session) -> Counter:
+    actual = Counter()
+    for submission_type, (model, _) in SOURCES.items():
+        rows = db.query(model.status, model.assigned_teacher_id, func.count(model.id)).filter(
+            model.status.in_(QUEUE_STATUSES)
+        ).group_by(model.status, model.assigned_teacher_id).all()
+        for status, teacher_id, count in rows:
+            actual[(submission_type, status, teacher_id or UNASSIGNED)] += count
+    return actual
+
+
+def _recount_daily(db: Session, since: date) -> Counter:
+    actual = Counter()
+    for submission_type, (_, model) in SOURCES.items():
+        day = func.date(model.graded_at)
+        rows = db.query(model.teacher_id, day, func.count(model.id)).filter(
+            model.teacher_id != None,
+            model.graded_at >= datetime.combine(since, time.min, tzinfo=timezone.utc)
+        ).group_by(model.teacher_id, day).all()
+        for teacher_id, graded_on, count in rows:
+            # SQLite returns DATE() as text
+            if isinstance(graded_on, str):
+                graded_on = date.fromisoformat(graded_on)
+            actual[(teacher_id, graded_on, submission_type)] += count
+    return actual
+
+
+def _correct_queue(db: Session, stored: Dict[Tuple, Any], actual: Counter) -> int:
+    """Fix counters whose shards don't add up to the actual count, through their shard 0 row"""
+    shards = defaultdict(list)
+    for (submission_type, status, teacher_id, _), row in stored.items():
+        shards[(submission_type, status, teacher_id)].append(row)
+
+    corrected = 0
+    missing = {}
+    for key in set(shards) | set(actual):
+        drift = actual.get(key, 0) - sum(row.count for row in shards.get(key, []))
+        if not drift:
+            continue
+        first = stored.get((*key, 0))
+        if first is None:
+            missing[(*key, 0)] = drift
+        else:
+            first.count += drift
+        corrected += 1
+
+    # Added rather than inserted, in case a writer created the row meanwhile
+    _add(db, GradingQueueStat, QUEUE_KEY, missing)
+    return corrected
+
+
+def _correct(
+    db: Session,
+    model: Type[Base],
+    key_columns: Sequence[str],
+    stored: Dict[Tuple, Any],
+    actual: Counter
+) -> int:
+    corrected = 0
+    missing = {}
+    for key in set(stored) | set(actual):
+        count = actual.get(key, 0)
+        row = stored.get(key)
+        if row is None:
+            missing[key] = count
+        elif row.count != count:
+            row.count = count
+        else:
+            continue
+        corrected += 1
+
+    # Added rather than inserted, in case a writer created the row meanwhile
+    _add(db, model, key_columns, missing)
+    return corrected
+
+
+def reconcile_queue_stats(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Recount the counters from the submission and grade tables and fix any drift (commits).
+
+    Existing counter rows are locked before counting: writers that changed
+    a submission earlier are waited for and included in the recount, and
+    later ones apply their delta after it, so no change is lost. Daily
+    counters are recounted for today and yesterday; older days are final.
+
+    Returns the number of counters corrected.
+    """
+    now = now or datetime.now(timezone.utc)
+    since = now.date() - timedelta(days=1)
+
+    stored_queue = {
+        (row.submission_type, row.status, row.teacher_id, row.shard): row
+        for row in db.query(GradingQueueStat).order_by(
+            GradingQueueStat.submission_type, GradingQueueStat.status, GradingQueueStat.teacher_id,
+            GradingQueueStat.shard
+        ).with_for_update().all()
+    }
+    stored_daily = {
+        (row.teacher_id, row.day, row.submission_type): row
+        for row in db.query(GradingDailyStat).filter(GradingDailyStat.day >= since).order_by(
+            GradingDailyStat.teacher_id, GradingDailyStat.day, GradingDailyStat.submission_type
+        ).with_for_update().all()
+    }
+
+    corrected = (
+        _correct_queue(db, stored_queue, _recount_queue(db)) +
+        _correct(db, GradingDailyStat, DAILY_KEY, stored_daily, _recount_daily(db, since))
+    )
+    db.commit()
+
+    if corrected:
+        print(f"⚠️ Reconciled {corrected} grading queue counters")
+    return corrected
@@ -0,0 +1,337 @@
+"""
+Regrade Service
+
+Bulk regrading of listening/reading submissions after an answer key change.
+
+A RegradeJob selects submissions by test template, question ids and/or
+submission date. The grading worker walks them in id order, REGRADE_CHUNK_SIZE
+at a time. Each chunk is one transaction that updates the changed is_correct
+flags, recalculates the affected TestResult rows and attempt band scores, and
+advances the job's cursor. A job interrupted at any point resumes from the
+last committed chunk, and a 100k-submission regrade never holds one giant
+transaction.
+
+Structured answers are graded with grade_questions_batch, optionally split
+across the worker's process pool; legacy questions are matched against their answer rows.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, false, or_
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.models import (
+    RegradeJob,
+    TestAttempt,
+    ListeningQuestion,
+    ReadingQuestion,
+    ListeningSubmission,
+    ReadingSubmission
+)
+from app.services.grading_service import grading_service
+from app.services.question_grading import grade_questions_batch
+from app.services.submission_service import matches_legacy_answers, parse_user_answer
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+SECTIONS = {
+    "listening": (ListeningSubmission, ListeningQuestion, "listening_question_ids"),
+    "reading": (ReadingSubmission, ReadingQuestion, "reading_question_ids"),
+}
+SECTION_ORDER = ["listening", "reading"]
+
+
+@dataclass(frozen=True)
+class QuestionSpec:
+    """Picklable copy of the fields grade_questions_batch needs"""
+    id: int
+    question_type: str
+    answer_data: Any
+    type_specific_data: Any
+
+
+def _grade_slice(specs: List[QuestionSpec], question_ids: List[int], user_answers: List[Any]) -> List[bool]:
+    """Grade one slice of a chunk (runs in a pool process)"""
+    batch = grade_questions_batch(specs, question_ids, user_answers)
+    return [bool(flag) for flag in batch["is_correct"]]
+
+
+def create_regrade_job(db: Session, job_in: Any, created_by_id: Optional[int] = None) -> RegradeJob:
+    """Queue a regrade job and record how many submissions it covers"""
+    job = RegradeJob(
+        created_by_id=created_by_id,
+        status=JOB_QUEUED,
+        test_template_id=job_in.test_template_id,
+        listening_question_ids=job_in.listening_question_ids,
+        reading_question_ids=job_in.reading_question_ids,
+        submitted_from=job_in.submitted_from,
+        submitted_to=job_in.submitted_to,
+        current_section=SECTION_ORDER[0],
+        last_submission_id=0
+    )
+    job.total_submissions = sum(
+        submission_filter(db, job, section).count() for section in SECTION_ORDER
+    )
+
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def submission_filter(db: Session, job: RegradeJob, section: str, *columns: Any):
+    """Query of the submissions a job covers in one section (ids unless columns are given)"""
+    submission_model, _, question_ids_field = SECTIONS[section]
+    query = db.query(*(columns or (submission_model.id,)))
+
+    question_ids = getattr(job, question_ids_field)
+    other_ids = job.reading_question_ids if section == "listening" else job.listening_question_ids
+    if question_ids is not None:
+        query = query.filter(submission_model.question_id.in_(question_ids))
+    elif other_ids is not None:
+        # Only the other section's questions were selected
+        query = query.filter(false())
+
+    if job.test_template_id is not None:
+        query = query.join(TestAttempt, TestAttempt.id == submission_model.test_attempt_id).filter(
+            TestAttempt.test_template_id == job.test_template_id
+        )
+    if job.submitted_from is not None:
+        query = query.filter(submission_model.submitted_at >= job.submitted_from)
+    if job.submitted_to is not None:
+        query = query.filter(submission_model.submitted_at <= job.submitted_to)
+
+    return query
+
+
+def claim_regrade_job(db: Session, worker_id: str) -> Optional[RegradeJob]:
+    """Claim the oldest runnable regrade job, or take over one whose worker died"""
+    now = datetime.now(timezone.utc)
+    lease_expired_before = now - timedelta(seconds=settings.GRADING_JOB_LEASE_SECONDS)
+
+    job = db.query(RegradeJob).filter(
+        or_(
+            RegradeJob.status == JOB_QUEUED,
+            and_(RegradeJob.status == JOB_RUNNING, RegradeJob.locked_at < lease_expired_before)
+        )
+    ).order_by(RegradeJob.id).limit(1).with_for_update(skip_locked=True).first()
+
+    if job is None:
+        db.commit()
+        return None
+
+    job.status = JOB_RUNNING
+    job.locked_by = worker_id
+    job.locked_at = now
+    job.started_at = job.started_at or now
+    db.commit()
+    return job
+
+
+def _load_questions(
+    db: Session,
+    question_model: Any,
+    question_ids: List[int],
+    cache: Dict[Tuple[str, int], Any]
+) -> None:
+    """Load questions (with legacy answers) into the per-run cache"""
+    missing = [qid for qid in set(question_ids) if (question_model.__tablename__, qid) not in cache]
+    if not missing:
+        return
+
+    for question in db.query(question_model).options(
+        selectinload(question_model.answers)
+    ).filter(question_model.id.in_(missing)).all():
+        cache[(question_model.__tablename__, question.id)] = question
+
+
+def _grade_chunk(
+    rows: List[Any],
+    question_model: Any,
+    question_cache: Dict[Tuple[str, int], Any],
+    executor: Optional[Executor]
+) -> List[Optional[bool]]:
+    """New is_correct flag per row; None when the question no longer exists"""
+    flags: List[Optional[bool]] = [None] * len(rows)
+    structured_positions = []
+    specs = {}
+
+    for position, row in enumerate(rows):
+        question = question_cache.get((question_model.__tablename__, row.question_id))
+        if question is None:
+            continue
+        if question.answer_data is not None:
+            structured_positions.append(position)
+            specs[question.id] = QuestionSpec(
+                question.id, question.question_type, question.answer_data, question.type_specific_data
+            )
+        else:
+            flags[position] = bool(question.answers) and matches_legacy_answers(row.user_answer, question.answers)
+
+    if not structured_positions:
+        return flags
+
+    question_ids = [rows[p].question_id for p in structured_positions]
+    user_answers = [parse_user_answer(rows[p].user_answer) for p in structured_positions]
+
+    if executor is None:
+        graded = _grade_slice(list(specs.values()), question_ids, user_answers)
+    else:
+        workers = max(settings.REGRADE_PROCESSES, 1)
+        size = -(-len(question_ids) // workers)
+        futures = [
+            executor.submit(
+                _grade_slice,
+                [specs[qid] for qid in set(question_ids[start:start + size])],
+                question_ids[start:start + size],
+                user_answers[start:start + size]
+            )
+            for start in range(0, len(question_ids), size)
+        ]
+        graded = [flag for future in futures for flag in future.result()]
+
+    for position, flag in zip(structured_positions, graded):
+        flags[position] = flag
+
+    return flags
+
+
+def run_regrade_chunk(
+    db: Session,
+    job: RegradeJob,
+    question_cache: Optional[Dict[Tuple[str, int], Any]] = None,
+    executor: Optional[Executor] = None,
+    chunk_size: Optional[int] = None
+) -> bool:
+    """
+    Regrade the next chunk of a job and commit it together with the cursor.
+
+    Returns False once the job has completed.
+    """
+    question_cache = question_cache if question_cache is not None else {}
+    chunk_size = chunk_size or settings.REGRADE_CHUNK_SIZE
+    submission_model, question_model, _ = SECTIONS[job.current_section]
+
+    # Keyset pagination on the submission id doubles as the resume cursor
+    rows = submission_filter(
+        db, job, job.current_section,
+        submission_model.id,
+        submission_model.test_attempt_id,
+        submission_model.question_id,
+        submission_model.user_answer,
+        submission_model.is_correct
+    ).filter(
+        submission_model.id > job.last_submission_id
+    ).order_by(submission_model.id).limit(chunk_size).all()
+
+    if not rows:
+        next_index = SECTION_ORDER.index(job.current_section) + 1
+        if next_index < len(SECTION_ORDER):
+            job.current_section = SECTION_ORDER[next_index]
+            job.last_submission_id = 0
+            job.locked_at = datetime.now(timezone.utc)
+            db.commit()
+            return True
+
+        job.status = JOB_COMPLETED
+        job.completed_at = datetime.now(timezone.utc)
+        job.locked_by = None
+        job.locked_at = None
+        db.commit()
+        return False
+
+    _load_questions(db, question_model, [row.question_id for row in rows], question_cache)
+    flags = _grade_chunk(rows, question_model, question_cache, executor)
+
+    changes = [
+        {"id": row.id, "is_correct": flag}
+        for row, flag in zip(rows, flags)
+        if flag is not None and flag != row.is_correct
+    ]
+    if changes:
+        db.bulk_update_mappings(submission_model, changes)
+
+        changed_ids = {change["id"] for change in changes}
+        attempt_ids = sorted({row.test_attempt_id for row in rows if row.id in changed_ids})
+        grading_service.recalculate_objective_results(db, attempt_ids, commit=False)
+        job.results_recalculated += len(attempt_ids)
+
+    job.last_submission_id = rows[-1].id
+    job.processed_submissions += len(rows)
+    job.changed_submissions += len(changes)
+    job.locked_at = datetime.now(timezone.utc)  # Heartbeat keeps the lease
+    db.commit()
+    return True
+
+
+def process_regrade_jobs(
+    db: Session,
+    worker_id: str,
+    max_chunks: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> int:
+    """
+    Advance one regrade job by up to max_chunks chunks.
+
+    Structured answers are graded on executor when given (the worker's
+    long-lived pool from create_regrade_executor), otherwise in this process.
+    Returns the number of chunks processed, so the worker loop can interleave
+    regrades with the grading queue.
+    """
+    max_chunks = max_chunks or settings.REGRADE_CHUNKS_PER_POLL
+
+    job = db.query(RegradeJob).filter(
+        RegradeJob.status == JOB_RUNNING,
+        RegradeJob.locked_by == worker_id
+    ).order_by(RegradeJob.id).first() or claim_regrade_job(db, worker_id)
+
+    if job is None:
+        return 0
+
+    job_id = job.id
+    question_cache: Dict[Tuple[str, int], Any] = {}
+    chunks = 0
+
+    try:
+        while chunks < max_chunks:
+            chunks += 1
+            if not run_regrade_chunk(db, job, question_cache, executor):
+                print(f"✅ Regrade job {job_id} completed: {job.changed_submissions} of {job.processed_submissions} submissions changed")
+                break
+    except Exception as e:
+        db.rollback()
+        print(f"Error in regrade job {job_id}: {e}")
+
+        job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+        if job is not None:
+            job.status = JOB_FAILED
+            job.last_error = str(e)[:2000]
+            job.locked_by = None
+            job.locked_at = None
+            db.commit()
+
+    return chunks
+
+
+def create_regrade_executor() -> Optional[Executor]:
+    """Process pool for regrade grading, or None when REGRADE_PROCESSES is 0"""
+    if settings.REGRADE_PROCESSES <= 0:
+        return None
+    return ProcessPoolExecutor(max_workers=settings.REGRADE_PROCESSES)
+
+
+def resume_regrade_job(db: Session, job: RegradeJob) -> RegradeJob:
+    """Requeue a failed job; it continues from its last committed chunk"""
+    job.status = JOB_QUEUED
+    job.last_error = None
+    job.locked_by = None
+    job.locked_at = None
+    db.commit()
+    db.refresh(job)
+    return job
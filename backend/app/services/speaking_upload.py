@@ -0,0 +1,304 @@
+"""
+Speaking Upload Service
+
+Resumable upload of speaking recordings, modelled on the tus protocol:
+
+1. Create: the client declares the recording's size (and optionally its
+   SHA-256) and gets an upload id.
+2. Append: the client PATCHes chunks, each with the Upload-Offset it starts
+   at and an Upload-Checksum ("sha256 <base64 digest>") of the chunk. A
+   chunk is only appended, and the offset advanced, when its checksum
+   matches. A chunk for the wrong offset is refused with 409 and the
+   current offset, so after a dropped connection the client asks for the
+   offset and resends only what is missing.
+3. Finalize: once every byte has arrived, the file is checked against the
+   declared SHA-256 and moved into UPLOAD_DIR/speaking. Only then is the
+   task's SpeakingSubmission created or updated, so nothing reaches the
+   grading queue half uploaded.
+
+Chunks are appended to UPLOAD_DIR/tmp/speaking-<id>.part, so every API
+process must share the upload directory (as for all uploads).
+
+An unfinished upload expires once no chunk has arrived for
+SPEAKING_UPLOAD_EXPIRY_SECONDS: the grading worker aborts it and deletes its
+partial file. Submitting the attempt aborts its unfinished uploads at once.
+A recording that replaces an earlier one for the same task deletes the
+earlier file.
+"""
+import base64
+import binascii
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import SpeakingSubmission, SpeakingUpload, TestAttempt
+from app.services.queue_stats import count_submitted
+from app.services.upload_service import check_extension, upload_too_large
+
+UPLOAD_UPLOADING = "uploading"
+UPLOAD_COMPLETED = "completed"
+UPLOAD_ABORTED = "aborted"
+
+DEFAULT_EXTENSION = ".webm"
+HASH_BLOCK_SIZE = 1024 * 1024
+RECORDING_URL_PREFIX = "/uploads/speaking/"
+
+
+def partial_path(upload: SpeakingUpload) -> Path:
+    """Where an upload's chunks are assembled"""
+    return Path(settings.UPLOAD_DIR) / "tmp" / f"speaking-{upload.id}.part"
+
+
+def remove_recording(audio_url: Optional[str]) -> None:
+    """Delete a stored speaking recording by its URL; anything else is left alone"""
+    if not audio_url or not audio_url.startswith(RECORDING_URL_PREFIX):
+        return
+    name = audio_url[len(RECORDING_URL_PREFIX):]
+    if name and "/" not in name and name not in (".", ".."):
+        (Path(settings.UPLOAD_DIR) / "speaking" / name).unlink(missing_ok=True)
+
+
+def save_speaking_recording(db: Session, test_attempt_id: int, task_id: int, audio_url: str) -> Optional[str]:
+    """
+    Create or update the task's SpeakingSubmission for a stored recording (not committed).
+
+    Returns the URL of the recording it replaced, if any, for the caller to
+    remove_recording() once committed.
+    """
+    submission = db.query(SpeakingSubmission).filter(
+        SpeakingSubmission.test_attempt_id == test_attempt_id,
+        SpeakingSubmission.task_id == task_id
+    ).first()
+
+    if submission:
+        replaced = submission.audio_url
+        submission.audio_url = audio_url
+        submission.submitted_at = datetime.now(timezone.utc)
+        return replaced if replaced != audio_url else None
+
+    # Duration isn't extracted from the audio yet
+    submission = SpeakingSubmission(
+        test_attempt_id=test_attempt_id,
+        task_id=task_id,
+        audio_url=audio_url,
+        duration_seconds=0,
+        status="pending"
+    )
+    db.add(submission)
+    count_submitted(db, "speaking")
+    return None
+
+
+def create_upload(
+    db: Session,
+    attempt: TestAttempt,
+    task_id: int,
+    size: int,
+    sha256: Optional[str] = None,
+    filename: Optional[str] = None
+) -> SpeakingUpload:
+    """Start a resumable upload; unfinished uploads for the same task are aborted"""
+    if size > settings.max_upload_size_bytes:
+        raise upload_too_large()
+    extension = check_extension(filename, settings.speaking_extensions) if filename else DEFAULT_EXTENSION
+
+    superseded = db.query(SpeakingUpload).filter(
+        SpeakingUpload.test_attempt_id == attempt.id,
+        SpeakingUpload.task_id == task_id,
+        SpeakingUpload.status == UPLOAD_UPLOADING
+    ).all()
+    for stale in superseded:
+        stale.status = UPLOAD_ABORTED
+        partial_path(stale).unlink(missing_ok=True)
+
+    upload = SpeakingUpload(
+        test_attempt_id=attempt.id,
+        task_id=task_id,
+        user_id=attempt.user_id,
+        upload_length=size,
+        received_bytes=0,
+        sha256=sha256,
+        extension=extension,
+        status=UPLOAD_UPLOADING
+    )
+    db.add(upload)
+    db.flush()
+
+    path = partial_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    open(path, "wb").close()
+
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+
+def get_upload(db: Session, upload_id: int, test_attempt_id: int, lock: bool = False) -> Optional[SpeakingUpload]:
+    """An attempt's upload; lock=True holds its row until commit, serializing chunks"""
+    query = db.query(SpeakingUpload).filter(
+        SpeakingUpload.id == upload_id,
+        SpeakingUpload.test_attempt_id == test_attempt_id
+    )
+    if lock:
+        query = query.with_for_update()
+    return query.first()
+
+
+def parse_checksum(header: Optional[str]) -> bytes:
+    """Digest from an Upload-Checksum header ("sha256 <base64 digest>")"""
+    algorithm, _, encoded = (header or "").strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload-Checksum must be \"sha256 <base64 digest>\""
+        )
+    try:
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        digest = b""
+    if len(digest) != hashlib.sha256().digest_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload-Checksum must be \"sha256 <base64 digest>\""
+        )
+    return digest
+
+
+def _offset_conflict(upload: SpeakingUpload, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=detail,
+        headers={"Upload-Offset": str(upload.received_bytes)}
+    )
+
+
+def append_chunk(db: Session, upload: SpeakingUpload, offset: int, chunk: bytes, checksum: Optional[str]) -> SpeakingUpload:
+    """
+    Append a chunk that starts at offset and matches its checksum.
+
+    The file is cut back to the committed offset first, so bytes left by a
+    chunk whose request failed after writing are overwritten, never kept.
+    """
+    digest = parse_checksum(checksum)
+
+    if upload.status != UPLOAD_UPLOADING:
+        raise _offset_conflict(upload, f"Upload is {upload.status}")
+    if offset != upload.received_bytes:
+        raise _offset_conflict(upload, f"Upload-Offset must be {upload.received_bytes}")
+    if offset + len(chunk) > upload.upload_length:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chunk goes past the declared upload size"
+        )
+    if hashlib.sha256(chunk).digest() != digest:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chunk checksum mismatch"
+        )
+
+    with open(partial_path(upload), "r+b") as out:
+        out.truncate(offset)
+        out.seek(offset)
+        out.write(chunk)
+        out.flush()
+        os.fsync(out.fileno())
+
+    upload.received_bytes = offset + len(chunk)
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize_upload(db: Session, upload: SpeakingUpload) -> SpeakingUpload:
+    """
+    Store a fully received recording and attach it to the task's SpeakingSubmission.
+
+    Finalizing a completed upload again is a no-op, so a client that lost
+    the response can simply retry.
+    """
+    if upload.status == UPLOAD_COMPLETED:
+        return upload
+    if upload.status != UPLOAD_UPLOADING:
+        raise _offset_conflict(upload, f"Upload is {upload.status}")
+    if upload.received_bytes != upload.upload_length:
+        raise _offset_conflict(upload, f"Upload incomplete ({upload.received_bytes} of {upload.upload_length} bytes)")
+
+    path = partial_path(upload)
+    if upload.sha256 and _file_sha256(path) != upload.sha256:
+        upload.status = UPLOAD_ABORTED
+        db.commit()
+        path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Recording checksum mismatch; upload it again"
+        )
+
+    filename = f"{upload.test_attempt_id}_{upload.task_id}_{upload.id}{upload.extension}"
+    destination = Path(settings.UPLOAD_DIR) / "speaking" / filename
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(path, destination)
+
+    upload.audio_url = f"{RECORDING_URL_PREFIX}{filename}"
+    upload.status = UPLOAD_COMPLETED
+    upload.completed_at = datetime.now(timezone.utc)
+    replaced = save_speaking_recording(db, upload.test_attempt_id, upload.task_id, upload.audio_url)
+    db.commit()
+    remove_recording(replaced)
+    db.refresh(upload)
+    return upload
+
+
+def abort_open_uploads(db: Session, test_attempt_id: int) -> List[Path]:
+    """
+    Abort an attempt's unfinished uploads, e.g. on submit (not committed).
+
+    Returns their partial files, for the caller to delete once committed.
+    """
+    uploads = db.query(SpeakingUpload).filter(
+        SpeakingUpload.test_attempt_id == test_attempt_id,
+        SpeakingUpload.status == UPLOAD_UPLOADING
+    ).all()
+    for upload in uploads:
+        upload.status = UPLOAD_ABORTED
+    return [partial_path(upload) for upload in uploads]
+
+
+def expire_uploads(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Abort unfinished uploads idle for SPEAKING_UPLOAD_EXPIRY_SECONDS and delete their partial files (commits).
+
+    Returns the number of uploads expired.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=settings.SPEAKING_UPLOAD_EXPIRY_SECONDS)
+
+    # SKIP LOCKED: an upload receiving a chunk right now isn't idle
+    uploads = db.query(SpeakingUpload).filter(
+        SpeakingUpload.status == UPLOAD_UPLOADING,
+        SpeakingUpload.updated_at < cutoff
+    ).with_for_update(skip_locked=True).all()
+    for upload in uploads:
+        upload.status = UPLOAD_ABORTED
+    paths = [partial_path(upload) for upload in uploads]
+    db.commit()
+
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+    if paths:
+        print(f"🧹 Expired {len(paths)} unfinished speaking uploads")
+    return len(paths)
@@ -0,0 +1,335 @@
+"""
+Submission Service
+
+Batched persistence of test answers. Every referenced question is loaded
+with one IN (...) query per table, answers are graded in memory, and the
+results are written with a single multi-row upsert instead of one lookup
+and one write per answer.
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, selectinload
+
+from app.database import Base
+from app.models import (
+    AnswerDraft,
+    TestSection,
+    ListeningQuestion,
+    ReadingQuestion,
+    WritingTask,
+    ListeningSubmission,
+    ReadingSubmission,
+    WritingSubmission
+)
+from app.schemas.test import StandardAnswerItem, TestSubmission, WritingAnswerItem
+from app.services.queue_stats import count_submitted
+from app.services.question_grading import grade_questions_batch
+
+# Rows per INSERT statement, keeps bound parameters well under driver limits
+UPSERT_CHUNK_SIZE = 500
+
+
+def parse_user_answer(user_answer: str) -> Any:
+    """Decode JSON-encoded answers from complex question renderers, falling back to the raw string"""
+    try:
+        return json.loads(user_answer)
+    except (TypeError, ValueError):
+        return user_answer
+
+
+def matches_legacy_answers(user_answer: str, answers: Iterable[Any]) -> bool:
+    """Compare a plain-text answer against ListeningAnswer/ReadingAnswer rows"""
+    user_ans = user_answer.strip()
+
+    for correct_ans in answers:
+        candidates = [correct_ans.correct_answer] + list(correct_ans.alternative_answers or [])
+        for candidate in candidates:
+            candidate_text = candidate.strip()
+            if correct_ans.case_sensitive:
+                if user_ans == candidate_text:
+                    return True
+            elif user_ans.lower() == candidate_text.lower():
+                return True
+
+    return False
+
+
+def bulk_upsert(
+    db: Session,
+    model: Type[Base],
+    rows: List[Dict[str, Any]],
+    index_elements: List[str],
+    update_columns: List[str],
+    newer_column: Optional[str] = None
+) -> int:
+    """
+    Insert rows, updating update_columns where index_elements already exist.
+
+    With newer_column, an existing row is only updated when the incoming
+    value of that column is greater than the stored one, so late or
+    replayed writes cannot overwrite newer data.
+
+    Uses INSERT ... ON CONFLICT on PostgreSQL and SQLite. Other backends
+    load the existing keys in one query and split the rows into a bulk
+    insert and a bulk update.
+
+    Returns the number of rows inserted or updated.
+    """
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        written = 0
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = insert(model).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            where = None
+            if newer_column:
+                where = model.__table__.c[newer_column] < stmt.excluded[newer_column]
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={column: stmt.excluded[column] for column in update_columns},
+                where=where
+            )
+            written += db.execute(stmt).rowcount
+        return written
+
+    key_columns = [getattr(model, column) for column in index_elements]
+    extra_columns = [getattr(model, newer_column)] if newer_column else []
+    keys = [tuple(row[column] for column in index_elements) for row in rows]
+    existing = {
+        tuple(found[:len(key_columns)]): found[len(key_columns):]
+        for found in db.query(*key_columns, model.id, *extra_columns).filter(tuple_(*key_columns).in_(keys)).all()
+    }
+
+    inserts = []
+    updates = []
+    for key, row in zip(keys, rows):
+        if key in existing:
+            if newer_column and not row[newer_column] > existing[key][1]:
+                continue
+            updates.append({"id": existing[key][0], **{column: row[column] for column in update_columns}})
+        else:
+            inserts.append(row)
+
+    if inserts:
+        db.bulk_insert_mappings(model, inserts)
+    if updates:
+        db.bulk_update_mappings(model, updates)
+    return len(inserts) + len(updates)
+
+
+def grade_objective_answers(
+    db: Session,
+    question_model: Type[Base],
+    test_attempt_id: int,
+    answers: List[Any]
+) -> List[Dict[str, Any]]:
+    """
+    Grade listening or reading answers in memory.
+
+    Returns submission rows ready for bulk_upsert. When a question is
+    answered twice the last answer wins; answers to unknown questions are
+    dropped.
+    """
+    latest_answers = {answer.question_id: answer.user_answer for answer in answers}
+    if not latest_answers:
+        return []
+
+    questions = db.query(question_model).options(
+        selectinload(question_model.answers)
+    ).filter(question_model.id.in_(latest_answers.keys())).all()
+    questions_by_id = {question.id: question for question in questions}
+
+    # Structured questions are graded in one batch, legacy ones against their answer rows
+    structured_ids = [
+        question_id for question_id in latest_answers
+        if question_id in questions_by_id and questions_by_id[question_id].answer_data is not None
+    ]
+    batch = grade_questions_batch(
+        [questions_by_id[question_id] for question_id in structured_ids],
+        structured_ids,
+        [parse_user_answer(latest_answers[question_id]) for question_id in structured_ids]
+    )
+    correctness = dict(zip(structured_ids, batch["is_correct"]))
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for question_id, user_answer in latest_answers.items():
+        question = questions_by_id.get(question_id)
+        if question is None:
+            continue
+
+        if question_id in correctness:
+            is_correct = bool(correctness[question_id])
+        else:
+            is_correct = bool(question.answers) and matches_legacy_answers(user_answer, question.answers)
+
+        rows.append({
+            "test_attempt_id": test_attempt_id,
+            "question_id": question_id,
+            "user_answer": user_answer,
+            "is_correct": is_correct,
+            "submitted_at": now,
+            "created_at": now,
+            "updated_at": now
+        })
+
+    return rows
+
+
+def save_objective_answers(
+    db: Session,
+    test_attempt_id: int,
+    listening_answers: Optional[List[Any]] = None,
+    reading_answers: Optional[List[Any]] = None
+) -> None:
+    """Grade and upsert listening and reading answers for an attempt (caller commits)"""
+    for question_model, submission_model, answers in (
+        (ListeningQuestion, ListeningSubmission, listening_answers),
+        (ReadingQuestion, ReadingSubmission, reading_answers),
+    ):
+        if not answers:
+            continue
+
+        rows = grade_objective_answers(db, question_model, test_attempt_id, answers)
+        bulk_upsert(
+            db,
+            submission_model,
+            rows,
+            index_elements=["test_attempt_id", "question_id"],
+            update_columns=["user_answer", "is_correct", "submitted_at", "updated_at"]
+        )
+
+
+def save_writing_answers(
+    db: Session,
+    test_attempt_id: int,
+    test_template_id: int,
+    writing_answers: Optional[List[Any]] = None
+) -> None:
+    """
+    Upsert a writing submission for every writing task of the template (caller commits).
+
+    Tasks without an answer get an empty submission so they still reach the grading queue.
+    """
+    task_ids = [task_id for (task_id,) in db.query(WritingTask.id).join(TestSection).filter(
+        TestSection.test_template_id == test_template_id,
+        TestSection.section_type == "writing"
+    ).all()]
+
+    answers_by_task = {answer.task_id: answer.response_text for answer in (writing_answers or [])}
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for task_id in task_ids:
+        response_text = answers_by_task.get(task_id) or ""
+        rows.append({
+            "test_attempt_id": test_attempt_id,
+            "task_id": task_id,
+            "response_text": response_text,
+            "word_count": len(response_text.split()) if response_text else 0,
+            "status": "pending",
+            "assigned_teacher_id": None,
+            "submitted_at": now,
+            "created_at": now,
+            "updated_at": now
+        })
+
+    # Rows that already exist were counted when they entered the queue
+    existing = {task_id for (task_id,) in db.query(WritingSubmission.task_id).filter(
+        WritingSubmission.test_attempt_id == test_attempt_id
+    ).all()}
+    bulk_upsert(
+        db,
+        WritingSubmission,
+        rows,
+        index_elements=["test_attempt_id", "task_id"],
+        update_columns=["response_text", "word_count", "submitted_at", "updated_at"]
+    )
+    count_submitted(db, "writing", len(set(task_ids) - existing))
+
+
+def upsert_answer_drafts(db: Session, drafts: Iterable[Tuple[int, str, int, str, int]]) -> int:
+    """
+    Upsert (test_attempt_id, section_type, item_id, answer, client_seq) drafts (caller commits).
+
+    A stored draft is only replaced by a write with a higher client_seq, so
+    retried or reordered writes are ignored. Returns the number of drafts written.
+    """
+    latest = {}
+    for test_attempt_id, section_type, item_id, answer, client_seq in drafts:
+        key = (test_attempt_id, section_type, item_id)
+        if key not in latest or latest[key][1] <= client_seq:
+            latest[key] = (answer, client_seq)
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "test_attempt_id": test_attempt_id,
+            "section_type": section_type,
+            "item_id": item_id,
+            "answer": answer,
+            "client_seq": client_seq,
+            "created_at": now,
+            "updated_at": now
+        }
+        for (test_attempt_id, section_type, item_id), (answer, client_seq) in latest.items()
+    ]
+
+    return bulk_upsert(
+        db,
+        AnswerDraft,
+        rows,
+        index_elements=["test_attempt_id", "section_type", "item_id"],
+        update_columns=["answer", "client_seq", "updated_at"],
+        newer_column="client_seq"
+    )
+
+
+def save_answer_drafts(
+    db: Session,
+    test_attempt_id: int,
+    client_seq: int,
+    answers: List[Any]
+) -> int:
+    """Upsert one autosave request's answers for an in-progress attempt (caller commits)"""
+    return upsert_answer_drafts(db, (
+        (test_attempt_id, answer.section_type, answer.item_id, answer.answer, client_seq)
+        for answer in answers
+    ))
+
+
+def merge_answer_drafts(db: Session, test_attempt_id: int, submission: Optional[TestSubmission] = None) -> TestSubmission:
+    """
+    Combine an attempt's autosaved drafts with the answers sent on submit.
+
+    Answers in the submit body take precedence over drafts for the same item.
+    """
+    merged = {"listening": {}, "reading": {}, "writing": {}}
+    for section_type, item_id, answer in db.query(
+        AnswerDraft.section_type, AnswerDraft.item_id, AnswerDraft.answer
+    ).filter(AnswerDraft.test_attempt_id == test_attempt_id).all():
+        merged[section_type][item_id] = answer
+
+    if submission:
+        merged["listening"].update({a.question_id: a.user_answer for a in submission.listening_answers})
+        merged["reading"].update({a.question_id: a.user_answer for a in submission.reading_answers})
+        merged["writing"].update({a.task_id: a.response_text for a in submission.writing_answers})
+
+    return TestSubmission(
+        listening_answers=[StandardAnswerItem(question_id=k, user_answer=v) for k, v in merged["listening"].items()],
+        reading_answers=[StandardAnswerItem(question_id=k, user_answer=v) for k, v in merged["reading"].items()],
+        writing_answers=[WritingAnswerItem(task_id=k, response_text=v) for k, v in merged["writing"].items()]
+    )
+
+
+def clear_answer_drafts(db: Session, test_attempt_id: int) -> None:
+    """Delete an attempt's drafts once they have been finalized (caller commits)"""
+    db.query(AnswerDraft).filter(AnswerDraft.test_attempt_id == test_attempt_id).delete(synchronize_session=False)
@@ -0,0 +1,190 @@
+"""
+Test Structure Snapshot Service
+
+Compiles a TestTemplate into the student-facing TestStructureResponse once,
+when the template is published or edited, and stores it as a versioned row.
+Attempt pages then read a single snapshot instead of walking every section,
+part, passage and question on each load.
+
+An attempt is pinned to the version that was current when it started, so an
+edit made during an exam doesn't change the questions a student is already
+answering. Each new version prunes the older ones that no in-progress
+attempt is pinned to; finished attempts fall back to the latest version.
+
+Questions are loaded with only the columns the student response models
+declare, so answer keys never enter the session or the payload.
+"""
+from typing import Dict, Any, Optional
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import (
+    TestAttempt, TestSection, TestStructureSnapshot, ListeningQuestion, ReadingPassage, ReadingQuestion
+)
+from app.schemas.question import ListeningQuestionStudentResponse, ReadingQuestionStudentResponse
+from app.schemas.test import TestStructureResponse
+
+
+def student_columns(model: Any, schema: Any) -> list:
+    """Model columns backing the fields of a student response schema"""
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+# Student-visible question columns; answer_data and the answers relationship are never loaded
+LISTENING_QUESTION_COLUMNS = student_columns(ListeningQuestion, ListeningQuestionStudentResponse)
+READING_QUESTION_COLUMNS = student_columns(ReadingQuestion, ReadingQuestionStudentResponse)
+
+SNAPSHOT_VERSION_RETRIES = 3
+
+
+def compile_test_structure(db: Session, template_id: int) -> Dict[str, Any]:
+    """
+    Build the JSON payload of a template's test structure.
+
+    Loads every section with its content in a fixed number of queries.
+    """
+    sections = db.query(TestSection).options(
+        selectinload(TestSection.listening_parts),
+        selectinload(TestSection.listening_questions).load_only(*LISTENING_QUESTION_COLUMNS),
+        selectinload(TestSection.reading_passages).selectinload(ReadingPassage.questions).load_only(
+            *READING_QUESTION_COLUMNS
+        ),
+        selectinload(TestSection.writing_tasks),
+        selectinload(TestSection.speaking_tasks)
+    ).filter(
+        TestSection.test_template_id == template_id
+    ).order_by(TestSection.order, TestSection.id).all()
+
+    structure = {
+        "listening_parts": [],
+        "listening_questions": [],
+        "reading_passages": [],
+        "reading_questions": [],
+        "writing_tasks": [],
+        "speaking_tasks": []
+    }
+
+    for section in sections:
+        if section.section_type == "listening":
+            structure["listening_parts"].extend(section.listening_parts)
+            structure["listening_questions"].extend(section.listening_questions)
+        elif section.section_type == "reading":
+            structure["reading_passages"].extend(section.reading_passages)
+            for passage in section.reading_passages:
+                structure["reading_questions"].extend(passage.questions)
+        elif section.section_type == "writing":
+            structure["writing_tasks"].extend(section.writing_tasks)
+        elif section.section_type == "speaking":
+            structure["speaking_tasks"].extend(section.speaking_tasks)
+
+    return TestStructureResponse(**structure).model_dump(mode="json")
+
+
+def get_latest_snapshot(db: Session, template_id: int) -> Optional[TestStructureSnapshot]:
+    """Get the newest snapshot version for a template"""
+    return db.query(TestStructureSnapshot).filter(
+        TestStructureSnapshot.test_template_id == template_id
+    ).order_by(TestStructureSnapshot.version.desc()).first()
+
+
+def get_snapshot(db: Session, template_id: int, version: int) -> Optional[TestStructureSnapshot]:
+    """Get one snapshot version of a template"""
+    return db.query(TestStructureSnapshot).filter(
+        TestStructureSnapshot.test_template_id == template_id,
+        TestStructureSnapshot.version == version
+    ).first()
+
+
+def prune_snapshots(db: Session, template_id: int, latest_version: int) -> int:
+    """Delete versions older than latest_version that no in-progress attempt is pinned to (commits)"""
+    pinned = db.query(TestAttempt.snapshot_version).filter(
+        TestAttempt.test_template_id == template_id,
+        TestAttempt.status == "in_progress",
+        TestAttempt.snapshot_version != None
+    )
+    pruned = db.query(TestStructureSnapshot).filter(
+        TestStructureSnapshot.test_template_id == template_id,
+        TestStructureSnapshot.version < latest_version,
+        TestStructureSnapshot.version.notin_(pinned)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return pruned
+
+
+def _insert_snapshot(db: Session, template_id: int, version: int) -> Optional[TestStructureSnapshot]:
+    """Compile and store a snapshot version; None if a concurrent request already stored it"""
+    snapshot = TestStructureSnapshot(
+        test_template_id=template_id,
+        version=version,
+        payload=compile_test_structure(db, template_id)
+    )
+
+    db.add(snapshot)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost the race on uq_structure_snapshot_version
+        db.rollback()
+        return None
+    db.refresh(snapshot)
+
+    return snapshot
+
+
+def create_snapshot(db: Session, template_id: int) -> TestStructureSnapshot:
+    """
+    Compile the template and store it as the next snapshot version.
+
+    When a concurrent edit takes the same version, the template is compiled
+    again for the version after it, so the newest snapshot includes both edits.
+    """
+    for _ in range(SNAPSHOT_VERSION_RETRIES):
+        latest_version = db.query(func.max(TestStructureSnapshot.version)).filter(
+            TestStructureSnapshot.test_template_id == template_id
+        ).scalar()
+
+        snapshot = _insert_snapshot(db, template_id, (latest_version or 0) + 1)
+        if snapshot is not None:
+            prune_snapshots(db, template_id, snapshot.version)
+            return snapshot
+
+    raise RuntimeError(f"Could not store a snapshot of test template {template_id}")
+
+
+def get_or_create_snapshot(db: Session, template_id: int) -> TestStructureSnapshot:
+    """Get the latest snapshot, compiling one for templates published before snapshots existed"""
+    snapshot = get_latest_snapshot(db, template_id)
+    if snapshot is None:
+        # Concurrent first loads all try version 1; the losers read the winner's
+        snapshot = _insert_snapshot(db, template_id, 1) or get_latest_snapshot(db, template_id)
+    return snapshot
+
+
+def refresh_snapshot(db: Session, template_id: int) -> Optional[TestStructureSnapshot]:
+    """
+    Recompile after an edit.
+
+    Templates that were never published have no snapshot yet and are skipped,
+    so drafts don't pay the compile cost on every change.
+    """
+    has_snapshot = db.query(TestStructureSnapshot.id).filter(
+        TestStructureSnapshot.test_template_id == template_id
+    ).first()
+
+    if not has_snapshot:
+        return None
+
+    return create_snapshot(db, template_id)
+
+
+def refresh_section_snapshot(db: Session, section_id: int) -> Optional[TestStructureSnapshot]:
+    """Recompile the snapshot of the template owning a section"""
+    template_id = db.query(TestSection.test_template_id).filter(
+        TestSection.id == section_id
+    ).scalar()
+
+    if template_id is None:
+        return None
+
+    return refresh_snapshot(db, template_id)
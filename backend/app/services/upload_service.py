@@ -0,0 +1,169 @@
+"""
+Upload Service
+
+Streams uploaded files to disk with constant memory per upload.
+
+An upload is copied in UPLOAD_CHUNK_SIZE pieces from the request's spooled
+file to a temporary file, hashed (SHA-256) and measured on the way, and
+moved into place only once it is complete, so a failed or rejected upload
+never leaves a partial file behind. The copy is blocking I/O; callers run
+it off the event loop (plain def endpoints run in FastAPI's threadpool).
+
+Files are named by their SHA-256, so uploading the same content again
+lands on the same file (and URL) instead of storing another copy; see
+media_store for the blob and reference bookkeeping.
+
+MAX_UPLOAD_SIZE_MB is enforced twice: UploadSizeLimitMiddleware rejects an
+oversized multipart body with 413 while it is still being received, before
+the multipart parser spools it to disk, and save_upload checks the file
+itself as it is copied. The middleware also caps resumable upload chunks
+(CHUNK_CONTENT_TYPE bodies) at UPLOAD_MAX_CHUNK_BYTES.
+"""
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Body type of a resumable upload chunk (as in the tus protocol)
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+@dataclass
+class SavedUpload:
+    """A file written by save_upload"""
+    filename: str
+    path: Path
+    size: int
+    sha256: str
+    deduplicated: bool = False  # The same content was already stored
+
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large (max {settings.MAX_UPLOAD_SIZE_MB} MB)"
+    )
+
+
+def chunk_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Chunk too large (max {settings.UPLOAD_MAX_CHUNK_BYTES} bytes)"
+    )
+
+
+def check_extension(filename: Optional[str], allowed_extensions: Iterable[str]) -> str:
+    """The file's lower-cased extension; 400 unless it is allowed"""
+    extension = Path(filename or "").suffix.lower()
+    if extension not in allowed_extensions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed (allowed: {', '.join(sorted(allowed_extensions))})"
+        )
+    return extension
+
+
+def save_upload(file: UploadFile, directory: Path, allowed_extensions: Iterable[str]) -> SavedUpload:
+    """
+    Stream an upload into directory as <sha256><extension>.
+
+    Raises 400 for a disallowed extension and 413 once the file exceeds
+    MAX_UPLOAD_SIZE_MB; nothing is left on disk in either case.
+    """
+    extension = check_extension(file.filename, allowed_extensions)
+
+    partial_dir = directory.parent / "tmp"
+    directory.mkdir(parents=True, exist_ok=True)
+    partial_dir.mkdir(parents=True, exist_ok=True)
+    partial = partial_dir / f"{uuid.uuid4()}{extension}.part"
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(partial, "wb") as out:
+            while True:
+                chunk = file.file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.max_upload_size_bytes:
+                    raise upload_too_large()
+                digest.update(chunk)
+                out.write(chunk)
+
+        filename = f"{digest.hexdigest()}{extension}"
+        deduplicated = (directory / filename).exists()
+        # Replaced even when present: identical bytes, and the file is back if it was just collected
+        os.replace(partial, directory / filename)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    return SavedUpload(
+        filename=filename,
+        path=directory / filename,
+        size=size,
+        sha256=digest.hexdigest(),
+        deduplicated=deduplicated
+    )
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects multipart/form-data bodies over MAX_UPLOAD_SIZE_MB, and upload
+    chunks over UPLOAD_MAX_CHUNK_BYTES, with 413.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read; otherwise the body is counted as it arrives and the
+    request fails as soon as it passes the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            limit, too_large = settings.max_upload_size_bytes + MULTIPART_OVERHEAD_BYTES, upload_too_large
+        elif content_type.startswith(CHUNK_CONTENT_TYPE):
+            limit, too_large = settings.UPLOAD_MAX_CHUNK_BYTES, chunk_too_large
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            error = too_large()
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised while the body is parsed; FastAPI passes HTTPExceptions through
+                    raise too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,12 @@
+"""
+Grading worker for submitted test attempts
+Run one or more of these alongside the API server:
+
+    python grading_worker.py
+"""
+
+from app.services.grading_queue import run_worker
+
+
+if __name__ == "__main__":
+    run_worker()
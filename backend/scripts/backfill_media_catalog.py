@@ -0,0 +1,38 @@
+"""
+One-time media catalog backfill.
+
+Catalogs audio/image files already in UPLOAD_DIR (uploaded before the
+media catalog existed) so they appear in GET /upload/files, then links
+them to the test content that uses them. Catalogued files are skipped, so
+running it again is harmless.
+
+Usage:
+    python scripts/backfill_media_catalog.py [--upload-dir uploads]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.services.media_store import backfill_catalog
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upload-dir", default=settings.UPLOAD_DIR)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        added = backfill_catalog(db, Path(args.upload_dir))
+    finally:
+        db.close()
+    print(f"✅ Backfill complete: {added} files added to the media catalog")
+
+
+if __name__ == "__main__":
+    main()
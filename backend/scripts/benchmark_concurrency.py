@@ -0,0 +1,79 @@
+"""
+Concurrency benchmark.
+
+Logs in once, then fires many parallel authenticated GET requests at one
+endpoint of a running API and reports the latency distribution. Useful to
+check that nothing blocks the event loop: with blocking handlers every
+request queues behind the slowest one and p99 grows with concurrency.
+
+Usage:
+    python scripts/benchmark_concurrency.py --email admin@ace.com --password secret \
+        --path /api/v1/admin/users --concurrency 200 --requests 2000 [--url http://localhost:8000]
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark_login_storm import percentile
+
+
+def get_token(url: str, email: str, password: str) -> str:
+    body = json.dumps({"email": email, "password": password}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{url}/api/v1/auth/login", data=body, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())["access_token"]
+
+
+def fetch(url: str, token: str) -> tuple:
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = "error"
+    return status, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--path", default="/api/v1/admin/users")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    token = get_token(args.url, args.email, args.password)
+    target = f"{args.url}{args.path}"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: fetch(target, token), range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for status, _ in results)
+    latencies = [ms for _, ms in results]
+
+    print(f"GET {args.path}: {args.requests} requests, {args.concurrency} concurrent, "
+          f"{elapsed:.1f}s ({args.requests / elapsed:.1f} req/s)")
+    print(f"Status codes: {dict(statuses)}")
+    print(
+        f"Latency ms: p50={percentile(latencies, 0.50):.0f} p95={percentile(latencies, 0.95):.0f} "
+        f"p99={percentile(latencies, 0.99):.0f} max={max(latencies):.0f} mean={statistics.mean(latencies):.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
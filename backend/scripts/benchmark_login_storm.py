@@ -0,0 +1,75 @@
+"""
+Login storm benchmark.
+
+Fires many concurrent POST /auth/login requests at a running API (a class
+signing in at 9:00) and reports the latency distribution and how many
+requests were shed with 429.
+
+Usage:
+    python scripts/benchmark_login_storm.py --email student@ace.com --password secret \
+        --concurrency 200 --requests 1000 [--url http://localhost:8000]
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def login(url: str, email: str, password: str) -> tuple:
+    body = json.dumps({"email": email, "password": password}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{url}/api/v1/auth/login", data=body, headers={"Content-Type": "application/json"}
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = "error"
+    return status, (time.perf_counter() - started) * 1000
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(
+            lambda _: login(args.url, args.email, args.password), range(args.requests)
+        ))
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for status, _ in results)
+    accepted = [ms for status, ms in results if status == 200]
+    shed = [ms for status, ms in results if status == 429]
+
+    print(f"{args.requests} logins, {args.concurrency} concurrent, {elapsed:.1f}s ({args.requests / elapsed:.1f} req/s)")
+    print(f"Status codes: {dict(statuses)}")
+    if accepted:
+        print(
+            f"200 latency ms: p50={percentile(accepted, 0.50):.0f} p95={percentile(accepted, 0.95):.0f} "
+            f"p99={percentile(accepted, 0.99):.0f} max={max(accepted):.0f} mean={statistics.mean(accepted):.0f}"
+        )
+    if shed:
+        print(f"429 latency ms: p50={percentile(shed, 0.50):.0f} max={max(shed):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,19 @@ import os
 # Set environment variable for test database BEFORE importing app
 os.environ["DATABASE_URL"] = "sqlite:///./test.db"
 os.environ["TESTING"] = "True"
+# Autosave writes go straight to the test database instead of the background buffer
+os.environ["AUTOSAVE_BUFFER_ENABLED"] = "False"
+# Cheapest bcrypt cost keeps the many test logins fast
+os.environ["BCRYPT_ROUNDS"] = "4"
 
 # Add the app directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: needs a PostgreSQL database at TEST_POSTGRES_URL (skipped otherwise)")
+
+
 @pytest.fixture
 def completion_question_data():
     """Sample data for completion question tests"""
@@ -137,6 +145,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 from app.database import Base, get_db
+from app.core.security import token_cache, user_cache
 from app.main import app
 
 # Use in-memory SQLite for tests
@@ -155,6 +164,9 @@ def db():
     """
     Create a fresh database for each test.
     """
+    # User ids are reused between tests, so cached principals must not carry over
+    token_cache.clear()
+    user_cache.clear()
     Base.metadata.create_all(bind=engine)
     session = TestingSessionLocal()
     try:
@@ -304,6 +316,7 @@ def submission_factory(db, test_template_factory, user_factory):
     Fixture to create a submission (writing or speaking) for grading tests.
     """
     from app.models import TestAttempt, WritingSubmission, SpeakingSubmission
+    from app.services.queue_stats import reconcile_queue_stats
     from datetime import datetime, timezone
     import uuid
     
@@ -356,6 +369,8 @@ def submission_factory(db, test_template_factory, user_factory):
             db.add(submission)
             
         db.commit()
+        # Inserted directly, so the dashboard counters pick it up by reconciling
+        reconcile_queue_stats(db)
         db.refresh(submission)
         return submission
         
@@ -1,5 +1,6 @@
 import pytest
-from app.core.security import verify_password, get_password_hash
+import time
+from app.core.security import verify_password, get_password_hash, token_cache, user_cache, ExpiringCache
 from app.models import User
 
 def test_login_user(client, user_factory):
@@ -125,3 +126,99 @@ def test_reset_password_invalid_token(client):
         json={"token": "invalid_token", "new_password": "newpassword123"}
     )
     assert response.status_code == 400
+
+def _login(client, email):
+    res = client.post("/api/v1/auth/token", data={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+def test_authenticated_requests_use_cached_principal(client, db, user_factory):
+    from sqlalchemy import event
+    
+    user_factory(email="cached@example.com", password="password123")
+    headers = _login(client, email="cached@example.com")
+    assert client.get("/api/v1/users/me/stats", headers=headers).status_code == 200
+    
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        assert client.get("/api/v1/users/me/stats", headers=headers).status_code == 200
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+    
+    assert statements
+    assert not any("FROM users" in statement for statement in statements)
+    assert token_cache.stats()["hits"] >= 1
+    assert user_cache.stats()["hits"] >= 1
+
+def test_role_change_invalidates_cached_principal(client, user_factory):
+    user_factory(email="promote_admin@example.com", password="password123", role="admin")
+    student = user_factory(email="promote_me@example.com", password="password123")
+    admin_headers = _login(client, "promote_admin@example.com")
+    headers = _login(client, "promote_me@example.com")
+    
+    assert client.get("/api/v1/grading/queue", headers=headers).status_code == 403
+    
+    response = client.put(f"/api/v1/admin/users/{student.id}/role?role=teacher", headers=admin_headers)
+    assert response.status_code == 200
+    
+    # Same token, new role
+    assert client.get("/api/v1/grading/queue", headers=headers).status_code == 200
+
+def test_deleted_user_token_is_rejected(client, user_factory):
+    user_factory(email="delete_admin@example.com", password="password123", role="admin")
+    doomed = user_factory(email="doomed@example.com", password="password123")
+    admin_headers = _login(client, "delete_admin@example.com")
+    headers = _login(client, "doomed@example.com")
+    
+    assert client.get("/api/v1/users/me/stats", headers=headers).status_code == 200
+    assert client.delete(f"/api/v1/users/{doomed.id}", headers=admin_headers).status_code == 204
+    assert client.get("/api/v1/users/me/stats", headers=headers).status_code == 401
+
+def test_expired_cache_entries_are_dropped():
+    cache = ExpiringCache(max_size=2)
+    cache.set("expired", "x", time.time() - 1)
+    cache.set("a", 1, time.time() + 60)
+    cache.set("b", 2, time.time() + 60)
+    
+    assert cache.get("expired") is None
+    assert cache.get("a") == 1
+    
+    # Least recently used entry is evicted first
+    cache.set("c", 3, time.time() + 60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+def test_login_rehashes_outdated_password_hash(client, db, user_factory):
+    from passlib.context import CryptContext
+    from app.core.config import settings
+    
+    user = user_factory(email="rehash@example.com", password="password123")
+    user.password_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("password123")
+    db.commit()
+    
+    response = client.post("/api/v1/auth/login", json={"email": "rehash@example.com", "password": "password123"})
+    assert response.status_code == 200
+    
+    db.refresh(user)
+    assert user.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert verify_password("password123", user.password_hash)
+
+def test_login_returns_429_when_password_pool_is_full(client, user_factory, monkeypatch):
+    import threading
+    from app.core import security
+    
+    user_factory(email="storm@example.com", password="password123")
+    monkeypatch.setattr(security, "password_slots", threading.BoundedSemaphore(1))
+    security.password_slots.acquire()
+    
+    response = client.post("/api/v1/auth/login", json={"email": "storm@example.com", "password": "password123"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(security.settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)
+    
+    security.password_slots.release()
+    response = client.post("/api/v1/auth/login", json={"email": "storm@example.com", "password": "password123"})
+    assert response.status_code == 200
@@ -0,0 +1,179 @@
+import json
+import os
+
+import pytest
+
+from app.models import AnswerDraft, GradingJob, TestAttempt, WritingSubmission
+from app.schemas.test import DraftAnswerItem
+from app.services.autosave_buffer import AutosaveBuffer
+from app.services.submission_service import save_answer_drafts
+
+
+@pytest.fixture
+def student_headers(client, user_factory):
+    user_factory(email="autosave_student@test.com", password="password123")
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": "autosave_student@test.com", "password": "password123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def attempt_id(client, student_headers, test_template_factory):
+    template = test_template_factory()
+    response = client.post("/api/v1/tests/attempts", headers=student_headers, json={"test_template_id": template.id})
+    return response.json()["id"]
+
+
+def autosave(client, headers, attempt_id, client_seq, answers):
+    return client.patch(
+        f"/api/v1/tests/attempts/{attempt_id}/answers",
+        headers=headers,
+        json={"client_seq": client_seq, "answers": answers}
+    )
+
+
+def test_autosave_skips_stale_sequences(client, db, student_headers, attempt_id):
+    response = autosave(client, student_headers, attempt_id, 2, [
+        {"section_type": "listening", "item_id": 1, "answer": "second"},
+    ])
+    assert response.status_code == 200
+    assert response.json() == {"client_seq": 2, "saved": 1, "ignored": 0}
+
+    # A delayed request with an older sequence must not overwrite the newer answer
+    response = autosave(client, student_headers, attempt_id, 1, [
+        {"section_type": "listening", "item_id": 1, "answer": "first"},
+        {"section_type": "reading", "item_id": 1, "answer": "new item"},
+    ])
+    assert response.json() == {"client_seq": 1, "saved": 1, "ignored": 1}
+
+    drafts = {(d.section_type, d.item_id): d.answer for d in db.query(AnswerDraft).all()}
+    assert drafts == {("listening", 1): "second", ("reading", 1): "new item"}
+
+
+def test_autosave_rejects_invalid_section(client, student_headers, attempt_id):
+    response = autosave(client, student_headers, attempt_id, 1, [
+        {"section_type": "speaking", "item_id": 1, "answer": "x"},
+    ])
+    assert response.status_code == 422
+
+
+def test_submit_finalizes_drafts(client, db, student_headers, attempt_id):
+    attempt = db.get(TestAttempt, attempt_id)
+    task = next(s for s in attempt.test_template.sections if s.section_type == "writing").writing_tasks[0]
+
+    autosave(client, student_headers, attempt_id, 1, [
+        {"section_type": "writing", "item_id": task.id, "answer": "Draft essay text"},
+        {"section_type": "listening", "item_id": 7, "answer": "draft"},
+        {"section_type": "reading", "item_id": 8, "answer": "draft"},
+    ])
+
+    response = client.put(
+        f"/api/v1/tests/attempts/{attempt_id}/submit",
+        headers=student_headers,
+        json={"reading_answers": [{"question_id": 8, "user_answer": "final"}]}
+    )
+    assert response.status_code == 200
+
+    submission = db.query(WritingSubmission).filter(WritingSubmission.test_attempt_id == attempt_id).one()
+    assert submission.response_text == "Draft essay text"
+
+    job = db.query(GradingJob).filter(GradingJob.test_attempt_id == attempt_id).one()
+    assert job.payload["listening_answers"] == [{"question_id": 7, "user_answer": "draft"}]
+    assert job.payload["reading_answers"] == [{"question_id": 8, "user_answer": "final"}]
+
+    assert db.query(AnswerDraft).count() == 0
+
+    response = autosave(client, student_headers, attempt_id, 2, [
+        {"section_type": "listening", "item_id": 7, "answer": "too late"},
+    ])
+    assert response.status_code == 400
+
+
+def test_save_answer_drafts_generic_fallback(db, attempt_id, monkeypatch):
+    monkeypatch.setattr(db.get_bind().dialect, "name", "generic")
+
+    assert save_answer_drafts(db, attempt_id, 5, [DraftAnswerItem(section_type="reading", item_id=1, answer="a")]) == 1
+    db.commit()
+    assert save_answer_drafts(db, attempt_id, 4, [DraftAnswerItem(section_type="reading", item_id=1, answer="b")]) == 0
+    assert save_answer_drafts(db, attempt_id, 6, [DraftAnswerItem(section_type="reading", item_id=1, answer="c")]) == 1
+    db.commit()
+    db.expire_all()
+
+    assert db.query(AnswerDraft).one().answer == "c"
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    return AutosaveBuffer(journal_dir=str(tmp_path), flush_interval=60, max_items=100, fsync=False)
+
+
+def draft(section_type, item_id, answer):
+    return DraftAnswerItem(section_type=section_type, item_id=item_id, answer=answer)
+
+
+def test_buffer_coalesces_writes_into_one_flush(db, attempt_id, buffer):
+    assert buffer.add(attempt_id, 1, [draft("listening", 1, "a"), draft("listening", 2, "b")]) == 2
+    assert buffer.add(attempt_id, 2, [draft("listening", 1, "a2")]) == 1
+    assert buffer.add(attempt_id, 1, [draft("listening", 2, "stale")]) == 0
+    assert db.query(AnswerDraft).count() == 0
+
+    assert buffer.flush(db) == 2
+
+    drafts = {d.item_id: (d.answer, d.client_seq) for d in db.query(AnswerDraft).all()}
+    assert drafts == {1: ("a2", 2), 2: ("b", 1)}
+
+    stats = buffer.stats()
+    assert stats["buffer_depth"] == 0
+    assert stats["writes_received"] == 4
+    assert stats["writes_coalesced"] == 1
+    assert stats["flushes"] == 1
+    assert stats["coalescing_ratio"] == 2.0
+    # Flushed segments are removed from the journal
+    assert list(os.listdir(buffer.journal_dir)) == []
+
+
+def test_buffer_flushes_single_attempt(db, attempt_id, buffer):
+    buffer.add(attempt_id, 1, [draft("reading", 1, "mine")])
+    buffer.add(attempt_id + 1000, 1, [draft("reading", 1, "other")])
+    # Acknowledged by another API process, which hasn't flushed yet
+    worker = AutosaveBuffer(journal_dir=buffer.journal_dir, fsync=False)
+    worker.add(attempt_id, 2, [draft("reading", 2, "from another worker")])
+
+    buffer.flush(db, attempt_id)
+    db.commit()
+
+    assert sorted(d.answer for d in db.query(AnswerDraft).all()) == ["from another worker", "mine"]
+    assert buffer.stats()["buffer_depth"] == 1
+
+
+def test_buffer_recovers_journal_of_dead_process(db, attempt_id, buffer, tmp_path):
+    # Left behind by a crashed process; its name says PID 1, like this container's server
+    segment = tmp_path / "autosave-1-1.jsonl"
+    segment.write_text(
+        json.dumps([attempt_id, "writing", 5, "essay draft", 3]) + "\n" + '[1, "torn'
+    )
+    # Journals of running processes are locked and left alone
+    live = AutosaveBuffer(journal_dir=str(tmp_path), fsync=False)
+    live.add(attempt_id, 4, [draft("writing", 6, "in flight")])
+    buffer.add(attempt_id, 1, [draft("writing", 7, "mine")])
+
+    assert buffer.recover(db) == 1
+    assert db.query(AnswerDraft).one().answer == "essay draft"
+    assert not segment.exists()
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_buffer_drops_drafts_of_submitted_attempts(db, attempt_id, buffer, tmp_path):
+    # Still buffered by another process when the attempt was submitted
+    buffer.add(attempt_id, 1, [draft("reading", 1, "late")])
+    segment = tmp_path / "autosave-crashed-1.jsonl"
+    segment.write_text(json.dumps([attempt_id, "writing", 5, "late essay", 3]) + "\n")
+    db.query(TestAttempt).filter(TestAttempt.id == attempt_id).update({"status": "submitted"})
+    db.commit()
+
+    assert buffer.flush(db) == 0
+    assert buffer.recover(db) == 0
+    assert db.query(AnswerDraft).count() == 0
+    assert not segment.exists()
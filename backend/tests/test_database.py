@@ -0,0 +1,127 @@
+import pytest
+
+from app import database
+from app.database import get_async_database_url
+
+
+def test_async_url_uses_async_drivers():
+    assert get_async_database_url("postgresql://u:p@db:5432/ace") == "postgresql+asyncpg://u:p@db:5432/ace"
+    assert get_async_database_url("postgresql+psycopg2://u:p@db/ace") == "postgresql+asyncpg://u:p@db/ace"
+    assert get_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def test_async_url_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        get_async_database_url("mysql://u:p@db/ace")
+
+
+def test_async_engine_is_created_lazily():
+    # Importing the app must not require the async driver
+    assert database.AsyncSessionLocal is None
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """A second in-memory database standing in for a read replica"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    replica_engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    database.Base.metadata.create_all(bind=replica_engine)
+    monkeypatch.setattr(database, "replica_engines", [replica_engine])
+    monkeypatch.setattr(database, "_replica_down_until", {})
+    yield replica_engine
+    database.Base.metadata.drop_all(bind=replica_engine)
+
+
+@pytest.fixture
+def admin_headers(client, user_factory):
+    admin = user_factory(email="replica_admin@test.com", password="password123", role="admin")
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": "replica_admin@test.com", "password": "password123"}
+    )
+    return admin, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _add_template(engine, title, created_by):
+    from sqlalchemy.orm import sessionmaker
+    from app.models import TestTemplate, User
+
+    session = sessionmaker(bind=engine)()
+    if session.get(User, created_by) is None:
+        session.add(User(id=created_by, email=f"copy_{created_by}@test.com", full_name="Copy", password_hash="x"))
+    session.add(TestTemplate(title=title, test_type="ACADEMIC", duration_minutes=180, is_published=True, created_by=created_by))
+    session.commit()
+    session.close()
+
+
+def test_read_endpoints_use_replica(client, replica, admin_headers):
+    admin, headers = admin_headers
+    _add_template(replica, "Replica Template", admin.id)
+
+    response = client.get("/api/v1/tests/templates", headers=headers)
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()] == ["Replica Template"]
+
+
+def test_reads_stick_to_primary_after_a_write(client, replica, admin_headers):
+    _, headers = admin_headers
+
+    response = client.post(
+        "/api/v1/tests/templates",
+        headers=headers,
+        json={"title": "Fresh Template", "test_type": "ACADEMIC", "duration_minutes": 180}
+    )
+    assert response.status_code == 201
+    assert database.PRIMARY_COOKIE in response.cookies
+
+    # The replica hasn't caught up, but the writer reads from the primary
+    response = client.get("/api/v1/tests/templates", headers=headers)
+    assert [t["title"] for t in response.json()] == ["Fresh Template"]
+
+    client.cookies.clear()
+    response = client.get("/api/v1/tests/templates", headers=headers)
+    assert response.json() == []
+
+
+def test_unreachable_replica_falls_back_to_primary(client, monkeypatch, admin_headers):
+    from sqlalchemy import create_engine
+
+    _, headers = admin_headers
+    broken = create_engine("sqlite:////nonexistent-dir/replica.db")
+    monkeypatch.setattr(database, "replica_engines", [broken])
+    monkeypatch.setattr(database, "_replica_down_until", {})
+
+    response = client.get("/api/v1/tests/templates", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == []
+    assert 0 in database._replica_down_until
+
+
+def test_attempt_snapshot_is_compiled_on_primary(client, db, replica, user_factory, test_template_factory):
+    from sqlalchemy.orm import sessionmaker
+    from app.models import TestAttempt, TestStructureSnapshot, TestTemplate, User
+
+    user_factory(email="replica_student@test.com", password="password123")
+    template = test_template_factory()
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": "replica_student@test.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    attempt_id = client.post("/api/v1/tests/attempts", headers=headers, json={"test_template_id": template.id}).json()["id"]
+
+    # The replica has caught up on the attempt, and the template has no snapshot yet
+    session = sessionmaker(bind=replica)()
+    for table in (User.__table__, TestTemplate.__table__, TestAttempt.__table__):
+        session.execute(table.insert(), [dict(row._mapping) for row in db.execute(table.select())])
+    session.commit()
+    client.cookies.clear()
+
+    response = client.get(f"/api/v1/tests/attempts/{attempt_id}", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["test_structure"]["speaking_tasks"]) == 1
+    assert db.query(TestStructureSnapshot).count() == 1
+    assert session.query(TestStructureSnapshot).count() == 0
+    session.close()
@@ -0,0 +1,143 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.security import CurrentUser, create_access_token, create_stream_ticket, get_current_stream_user
+from app.models import UserRole
+from app.routers.events import stream_events
+from app.services.event_bus import GRADING_CHANNEL, EventBus, event_bus, publish, user_channel
+
+
+def login(client, email):
+    response = client.post("/api/v1/auth/token", data={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def collect(channels, action, count=1, timeout=2.0):
+    """Subscribe, run the blocking action in a thread, and return the next `count` messages"""
+    async def run():
+        subscription = event_bus.subscribe(channels)
+        try:
+            await asyncio.to_thread(action)
+            messages = []
+            for _ in range(count):
+                message = await subscription.get(timeout)
+                if message is None:
+                    break
+                messages.append(message)
+            return messages
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return asyncio.run(run())
+
+
+def test_events_are_delivered_on_commit_only(db):
+    def rolled_back_then_committed():
+        publish(db, "test", "discarded", {"n": 1})
+        db.rollback()
+        publish(db, "test", "kept", {"n": 2})
+        db.commit()
+
+    messages = collect(["test"], rolled_back_then_committed, count=2, timeout=0.5)
+    assert [m["event"] for m in messages] == ["kept"]
+    assert messages[0]["data"] == {"n": 2}
+
+
+def test_lagging_subscriber_is_told_to_resync():
+    bus = EventBus(queue_size=2)
+
+    async def run():
+        subscription = bus.subscribe(["test"])
+        for n in range(3):
+            bus.deliver({"channel": "test", "event": "tick", "data": {"n": n}})
+        bus.deliver({"channel": "other", "event": "tick", "data": {}})
+        await asyncio.sleep(0)
+        return [await subscription.get(0.1), await subscription.get(0.1)]
+
+    resync, nothing = asyncio.run(run())
+    assert resync["event"] == "resync"
+    assert nothing is None
+
+
+def test_grading_publishes_to_teachers_and_student(client, db, user_factory, submission_factory):
+    user_factory(email="events_teacher@test.com", role="teacher")
+    student = user_factory(email="events_student@test.com")
+    headers = login(client, "events_teacher@test.com")
+    submission = submission_factory(user=student, submission_type="writing")
+
+    grade = {
+        "task_achievement_score": 7, "coherence_cohesion_score": 7,
+        "lexical_resource_score": 7, "grammatical_range_score": 7
+    }
+    messages = collect(
+        [GRADING_CHANNEL, user_channel(student.id)],
+        lambda: client.post(f"/api/v1/grading/writing/{submission.id}", headers=headers, json=grade),
+        count=2
+    )
+
+    graded, result = messages
+    assert graded["event"] == "submission_graded"
+    assert graded["data"]["submission_id"] == submission.id
+    assert graded["data"]["pending"] == {"writing": 0, "speaking": 0}
+    assert result["event"] == "result_updated"
+    assert result["channel"] == user_channel(student.id)
+    assert result["data"]["writing_score"] == 7.0
+
+
+def test_stream_sends_ready_then_events(db):
+    teacher = CurrentUser(id=1, email="t@test.com", full_name="T", role=UserRole.TEACHER)
+
+    async def run():
+        response = await stream_events(current_user=teacher)
+        body = response.body_iterator
+        chunks = [await body.__anext__(), await body.__anext__()]
+        event_bus.deliver({"channel": GRADING_CHANNEL, "event": "attempt_submitted", "data": {"test_attempt_id": 9}})
+        event_bus.deliver({"channel": user_channel(2), "event": "result_updated", "data": {}})
+        chunks.append(await asyncio.wait_for(body.__anext__(), 1))
+        await body.aclose()
+        return response, chunks
+
+    response, (retry, ready, submitted) = asyncio.run(run())
+    assert response.media_type == "text/event-stream"
+    assert retry.startswith("retry:")
+    assert json.loads(ready.split("data: ")[1])["channels"] == ["user:1", GRADING_CHANNEL]
+    assert submitted == 'event: attempt_submitted\ndata: {"test_attempt_id": 9}\n\n'
+    assert event_bus.stats()["subscribers"] == 0
+
+
+def test_stream_requires_a_token(client, user_factory):
+    assert client.get("/api/v1/events/stream").status_code == 401
+    assert client.get("/api/v1/events/stream", params={"ticket": "not-a-token"}).status_code == 401
+
+
+def test_stream_tickets_are_not_access_tokens(client, user_factory):
+    user_factory(email="student@test.com")
+    headers = login(client, "student@test.com")
+
+    response = client.post("/api/v1/events/ticket", headers=headers)
+    assert response.status_code == 200
+    ticket = response.json()["ticket"]
+    assert response.json()["expires_in"] == settings.EVENTS_TICKET_TTL_SECONDS
+
+    # A ticket can't be used as a bearer token, and an access token isn't a ticket
+    assert client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+    access_token = headers["Authorization"].split(" ")[1]
+    assert client.get("/api/v1/events/stream", params={"ticket": access_token}).status_code == 401
+
+
+def test_stream_ticket_authenticates_its_user(db, user_factory):
+    student = user_factory(email="student@test.com")
+    ticket = create_stream_ticket(student.id)
+
+    principal = asyncio.run(get_current_stream_user(token=None, ticket=ticket, db=db))
+    assert principal.id == student.id
+
+    expired = create_access_token({"sub": str(student.id), "purpose": "stream"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_current_stream_user(token=None, ticket=expired, db=db))
+    assert error.value.status_code == 401
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import TeacherAssignment, WritingSubmission
+from app.services.grading_claims import CLAIM_ACTIVE, CLAIM_COMPLETED, CLAIM_EXPIRED, CLAIM_RELEASED
+
+
+def login(client, email):
+    response = client.post("/api/v1/auth/token", data={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def teachers(client, user_factory):
+    user_factory(email="claim_a@test.com", role="teacher")
+    user_factory(email="claim_b@test.com", role="teacher")
+    return login(client, "claim_a@test.com"), login(client, "claim_b@test.com")
+
+
+@pytest.fixture
+def submissions(db):
+    now = datetime.now(timezone.utc)
+    rows = [
+        WritingSubmission(test_attempt_id=i + 1, task_id=1, response_text="essay", word_count=250,
+                          submitted_at=now - timedelta(minutes=10 - i))
+        for i in range(5)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def claim(client, headers, count):
+    response = client.post("/api/v1/grading/claims", headers=headers, json={"submission_type": "writing", "count": count})
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_concurrent_claims_never_overlap(client, db, teachers, submissions):
+    a, b = teachers
+
+    first = claim(client, a, 3)
+    second = claim(client, b, 3)
+    third = claim(client, a, 3)
+
+    a_ids = [c["submission_id"] for c in first]
+    b_ids = [c["submission_id"] for c in second]
+    assert a_ids == [s.id for s in submissions[:3]]  # Oldest first
+    assert b_ids == [s.id for s in submissions[3:]]
+    assert third == []
+
+    assert first[0]["writing_submission"]["response_text"] == "essay"
+    assert first[0]["lease_expires_at"]
+    assert db.query(WritingSubmission).filter(WritingSubmission.status == "under_review").count() == 5
+
+
+def test_heartbeat_renews_only_own_live_claim(client, db, teachers, submissions):
+    a, b = teachers
+    assignment = claim(client, a, 1)[0]
+
+    response = client.post(f"/api/v1/grading/claims/{assignment['id']}/heartbeat", headers=a)
+    assert response.status_code == 200
+    assert response.json()["lease_expires_at"] >= assignment["lease_expires_at"]
+
+    response = client.post(f"/api/v1/grading/claims/{assignment['id']}/heartbeat", headers=b)
+    assert response.status_code == 409
+
+
+def test_lapsed_lease_returns_submission_to_queue(client, db, teachers, submissions):
+    a, b = teachers
+    stale = claim(client, a, 1)[0]
+
+    row = db.query(TeacherAssignment).filter(TeacherAssignment.id == stale["id"]).one()
+    row.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+
+    # The next claim expires the lapsed lease and can take its submission
+    taken = claim(client, b, 1)[0]
+    assert taken["submission_id"] == stale["submission_id"]
+    db.refresh(row)
+    assert row.status == CLAIM_EXPIRED
+
+    response = client.post(f"/api/v1/grading/claims/{stale['id']}/heartbeat", headers=a)
+    assert response.status_code == 409
+
+    grade = {
+        "task_achievement_score": 6, "coherence_cohesion_score": 6,
+        "lexical_resource_score": 6, "grammatical_range_score": 6
+    }
+    response = client.post(f"/api/v1/grading/writing/{stale['submission_id']}", headers=a, json=grade)
+    assert response.status_code == 409
+
+    response = client.post(f"/api/v1/grading/writing/{stale['submission_id']}", headers=b, json=grade)
+    assert response.status_code == 201
+    assert db.query(TeacherAssignment).filter(TeacherAssignment.id == taken["id"]).one().status == CLAIM_COMPLETED
+
+
+def test_release_and_my_claims(client, db, teachers, submissions):
+    a, b = teachers
+    claimed = claim(client, a, 2)
+
+    response = client.get("/api/v1/grading/claims", headers=a)
+    assert [c["id"] for c in response.json()] == [c["id"] for c in claimed]
+
+    response = client.post(f"/api/v1/grading/claims/{claimed[0]['id']}/release", headers=b)
+    assert response.status_code == 404
+
+    response = client.post(f"/api/v1/grading/claims/{claimed[0]['id']}/release", headers=a)
+    assert response.status_code == 200
+    assert response.json()["status"] == "released"
+
+    released = db.query(WritingSubmission).filter(WritingSubmission.id == claimed[0]["submission_id"]).one()
+    assert released.status == "pending" and released.assigned_teacher_id is None
+    assert claim(client, b, 1)[0]["submission_id"] == released.id
+
+    active = db.query(TeacherAssignment).filter(TeacherAssignment.status == CLAIM_ACTIVE).count()
+    assert active == 2
+
+
+def test_pending_list_hides_other_teachers_claims(client, db, teachers, submissions):
+    a, b = teachers
+    mine = claim(client, a, 2)
+    claim(client, b, 1)
+
+    response = client.get("/api/v1/grading/writing/pending", headers=a)
+    listed = [s["id"] for s in response.json()]
+    assert listed == [c["submission_id"] for c in mine] + [s.id for s in submissions[3:]]
+
+
+def test_grading_releases_a_lapsed_claim_of_another_teacher(client, db, teachers, submissions):
+    a, b = teachers
+    stale = claim(client, a, 1)[0]
+    row = db.query(TeacherAssignment).filter(TeacherAssignment.id == stale["id"]).one()
+    row.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+
+    grade = {
+        "task_achievement_score": 7, "coherence_cohesion_score": 7,
+        "lexical_resource_score": 7, "grammatical_range_score": 7
+    }
+    response = client.post(f"/api/v1/grading/writing/{stale['submission_id']}", headers=b, json=grade)
+    assert response.status_code == 201
+
+    db.refresh(row)
+    assert row.status == CLAIM_RELEASED
+    # Nothing claimable is left behind for the graded submission
+    assert stale["submission_id"] not in [c["submission_id"] for c in claim(client, a, 5)]
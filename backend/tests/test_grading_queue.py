@@ -0,0 +1,135 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from app.models import (
+    TestAttempt, TestResult, ListeningPart, ListeningQuestion,
+    ListeningSubmission, GradingJob
+)
+from app.services import grading_queue
+from app.services.grading_queue import (
+    JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING,
+    claim_jobs, enqueue_grading_job, process_jobs
+)
+
+
+@pytest.fixture
+def student_token(client, user_factory):
+    user_factory(email="queue_student@test.com", password="password123")
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": "queue_student@test.com", "password": "password123"}
+    )
+    return response.json()["access_token"]
+
+
+@pytest.fixture
+def queued_attempt(db, test_template_factory):
+    template = test_template_factory()
+    listening_section = next(s for s in template.sections if s.section_type == "listening")
+
+    part = ListeningPart(section_id=listening_section.id, part_number=1, audio_url="url")
+    db.add(part)
+    db.commit()
+
+    question = ListeningQuestion(
+        section_id=listening_section.id,
+        part_id=part.id,
+        question_number=1,
+        question_type="listening_short_answer",
+        question_text="q1",
+        order=1,
+        answer_data={"correct_answers": ["library"]}
+    )
+    db.add(question)
+    db.commit()
+
+    return template, question
+
+
+def test_submit_enqueues_grading_job(client, db, student_token, queued_attempt):
+    template, question = queued_attempt
+    headers = {"Authorization": f"Bearer {student_token}"}
+
+    attempt_id = client.post(
+        "/api/v1/tests/attempts", headers=headers, json={"test_template_id": template.id}
+    ).json()["id"]
+
+    response = client.put(
+        f"/api/v1/tests/attempts/{attempt_id}/submit",
+        headers=headers,
+        json={"listening_answers": [{"question_id": question.id, "user_answer": "library"}]}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "submitted"
+
+    # Grading is deferred to the worker
+    assert db.query(ListeningSubmission).count() == 0
+    status_res = client.get(f"/api/v1/tests/attempts/{attempt_id}/grading-status", headers=headers)
+    assert status_res.status_code == 200
+    assert status_res.json()["status"] == JOB_QUEUED
+
+    assert process_jobs(db, "test-worker") == 1
+
+    submission = db.query(ListeningSubmission).filter(ListeningSubmission.test_attempt_id == attempt_id).one()
+    assert submission.is_correct is True
+    assert db.query(TestResult).filter(TestResult.test_attempt_id == attempt_id).count() == 1
+
+    status_res = client.get(f"/api/v1/tests/attempts/{attempt_id}/grading-status", headers=headers)
+    assert status_res.json()["status"] == JOB_COMPLETED
+    assert status_res.json()["attempts"] == 1
+
+
+def test_failed_job_is_retried_then_failed(db, queued_attempt, user_factory, monkeypatch):
+    template, _ = queued_attempt
+    student = user_factory(email="retry_student@test.com")
+    attempt = TestAttempt(user_id=student.id, test_template_id=template.id, status="submitted")
+    db.add(attempt)
+    db.commit()
+
+    job = enqueue_grading_job(db, attempt.id, {"listening_answers": [], "reading_answers": []})
+    job.max_attempts = 2
+    db.commit()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("grading exploded")
+
+    monkeypatch.setattr(grading_queue.grading_service, "calculate_initial_results", broken)
+
+    assert process_jobs(db, "test-worker") == 1
+    db.refresh(job)
+    assert job.status == JOB_QUEUED
+    assert job.attempts == 1
+    assert "grading exploded" in job.last_error
+
+    # Backoff keeps the job out of the next claim
+    assert claim_jobs(db, "test-worker") == []
+
+    job.run_after = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+    assert process_jobs(db, "test-worker") == 1
+    db.refresh(job)
+    assert job.status == JOB_FAILED
+    assert job.attempts == 2
+
+
+def test_expired_lease_is_reclaimed(db, queued_attempt, user_factory):
+    template, _ = queued_attempt
+    student = user_factory(email="lease_student@test.com")
+    attempt = TestAttempt(user_id=student.id, test_template_id=template.id, status="submitted")
+    db.add(attempt)
+    db.commit()
+
+    enqueue_grading_job(db, attempt.id, {})
+    db.commit()
+
+    [job] = claim_jobs(db, "crashed-worker")
+    assert job.status == JOB_RUNNING
+    assert claim_jobs(db, "other-worker") == []
+
+    job.locked_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.commit()
+
+    [reclaimed] = claim_jobs(db, "other-worker")
+    assert reclaimed.locked_by == "other-worker"
+    assert reclaimed.attempts == 2
+    assert db.query(GradingJob).count() == 1
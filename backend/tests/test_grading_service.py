@@ -305,3 +305,58 @@ def test_is_test_complete(db, submission_factory):
     sub1.status = "graded"
     db.commit()
     assert GradingService.is_test_complete(db, attempt1.id) == True
+
+def test_bulk_scores_match_single_attempt(db, submission_factory, test_template_factory):
+    from app.models import ListeningPart
+    from sqlalchemy import event
+
+    template = test_template_factory()
+    l_sec = next(s for s in template.sections if s.section_type == "listening")
+    l_part = ListeningPart(section_id=l_sec.id, part_number=1, audio_url="url")
+    db.add(l_part)
+    db.commit()
+    questions = []
+    for i in range(4):
+        q = ListeningQuestion(section_id=l_sec.id, part_id=l_part.id, question_number=i+1, question_type="mcq", question_text="q", order=i+1)
+        db.add(q)
+        questions.append(q)
+    db.commit()
+
+    graded = submission_factory(template=template, submission_type="writing")
+    ungraded = submission_factory(template=template, submission_type="writing")
+    for i, q in enumerate(questions):
+        db.add(ListeningSubmission(test_attempt_id=graded.test_attempt_id, question_id=q.id, user_answer="a", is_correct=(i < 3)))
+        db.add(ListeningSubmission(test_attempt_id=ungraded.test_attempt_id, question_id=q.id, user_answer="a", is_correct=False))
+    db.add(WritingGrade(
+        submission_id=graded.id,
+        overall_band_score=6.5,
+        task_achievement_score=6.0,
+        coherence_cohesion_score=7.0,
+        lexical_resource_score=6.0,
+        grammatical_range_score=7.0
+    ))
+    db.commit()
+
+    attempt_ids = [graded.test_attempt_id, ungraded.test_attempt_id, 99999]
+
+    statements = []
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        scores = GradingService.calculate_overall_scores_bulk(db, attempt_ids)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    # One aggregated round trip regardless of how many rows each attempt has
+    assert len(statements) == 1
+    assert scores[graded.test_attempt_id] == GradingService.calculate_overall_score(db, graded.test_attempt_id)
+    assert scores[graded.test_attempt_id][0] == GradingService.calculate_listening_score(db, graded.test_attempt_id)
+    assert scores[graded.test_attempt_id][2] == 6.5
+    assert scores[ungraded.test_attempt_id] == (2.5, 0.0, 0.0, 0.0, 2.5)
+    assert scores[99999] == (0.0, 0.0, 0.0, 0.0, 0.0)
+
+    assert GradingService.generate_test_results_bulk(db, attempt_ids) == 2
+    results = {r.test_attempt_id: r for r in db.query(TestResult).all()}
+    assert set(results) == {graded.test_attempt_id, ungraded.test_attempt_id}
+    assert results[graded.test_attempt_id].writing_score == 6.5
+    assert results[ungraded.test_attempt_id].writing_score is None
@@ -0,0 +1,165 @@
+import struct
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.models import ListeningPart, MediaBlob, MediaReference, WritingTask
+from app.services.media_store import (
+    IMMUTABLE_CACHE_CONTROL,
+    MediaStaticFiles,
+    backfill_catalog,
+    collect_garbage,
+    sync_references
+)
+
+LATER = datetime.now(timezone.utc) + timedelta(days=2)
+
+
+@pytest.fixture
+def admin(client, user_factory):
+    user_factory(email="media_admin@test.com", role="admin")
+    response = client.post("/api/v1/auth/token", data={"username": "media_admin@test.com", "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.routers.upload.UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+def upload_audio(client, headers, content, name="track.mp3"):
+    response = client.post("/api/v1/upload/audio", headers=headers, files={"file": (name, content, "audio/mpeg")})
+    assert response.status_code == 200
+    return response.json()
+
+
+def listening_section(test_template_factory):
+    return next(s for s in test_template_factory().sections if s.section_type == "listening")
+
+
+def test_identical_uploads_share_one_blob(client, db, admin, upload_dir):
+    first = upload_audio(client, admin, b"same track", "part1.mp3")
+    second = upload_audio(client, admin, b"same track", "copy.mp3")
+    other = upload_audio(client, admin, b"another track")
+
+    assert second["url"] == first["url"] and second["deduplicated"] is True
+    assert first["deduplicated"] is False
+    assert other["url"] != first["url"]
+    assert len(list((upload_dir / "audio").iterdir())) == 2
+    assert db.query(MediaBlob).count() == 2
+
+
+def test_references_follow_content_columns(client, db, admin, upload_dir, test_template_factory):
+    url = upload_audio(client, admin, b"part audio")["url"]
+    section = listening_section(test_template_factory)
+
+    part = ListeningPart(section_id=section.id, part_number=1, audio_url=f"http://cdn.test{url}")
+    db.add(part)
+    db.commit()
+    assert db.query(MediaReference).one().owner_id == part.id
+
+    filename = url.rsplit("/", 1)[1]
+    response = client.delete(f"/api/v1/upload/files/audio/{filename}", headers=admin)
+    assert response.status_code == 409
+
+    part.audio_url = "/uploads/audio/legacy-name.mp3"
+    db.commit()
+    assert db.query(MediaReference).count() == 0
+
+    part.audio_url = url
+    db.commit()
+    db.delete(part)
+    db.commit()
+    assert db.query(MediaReference).count() == 0
+
+    assert client.delete(f"/api/v1/upload/files/audio/{filename}", headers=admin).status_code == 200
+    assert db.query(MediaBlob).count() == 0
+    assert not (upload_dir / "audio" / filename).exists()
+
+
+def test_garbage_collection_keeps_referenced_and_fresh_blobs(client, db, admin, upload_dir, test_template_factory):
+    used = upload_audio(client, admin, b"used")["url"]
+    unused = upload_audio(client, admin, b"unused")["url"]
+    section = listening_section(test_template_factory)
+    db.add(ListeningPart(section_id=section.id, part_number=1, audio_url=used))
+    db.commit()
+
+    # Within the grace period nothing is collected
+    assert collect_garbage(db, upload_dir)["blobs_deleted"] == 0
+
+    result = collect_garbage(db, upload_dir, now=LATER)
+    assert result["blobs_deleted"] == 1 and result["bytes_freed"] == len(b"unused")
+    assert [blob.path for blob in db.query(MediaBlob)] == [used.split("/uploads/")[1]]
+    assert not (upload_dir / unused.split("/uploads/")[1]).exists()
+    assert (upload_dir / used.split("/uploads/")[1]).exists()
+
+
+def test_sync_repairs_references_changed_behind_the_orm(client, db, admin, upload_dir, test_template_factory):
+    image = client.post(
+        "/api/v1/upload/image", headers=admin, files={"file": ("chart.png", b"chart", "image/png")}
+    ).json()["url"]
+    section = next(s for s in test_template_factory().sections if s.section_type == "writing")
+
+    # Bulk update: no flush hook runs
+    db.query(WritingTask).filter(WritingTask.section_id == section.id).update({"image_url": image})
+    db.commit()
+    assert db.query(MediaReference).count() == 0
+
+    assert sync_references(db) == 1
+    assert db.query(MediaReference).one().owner_type == "writing_task"
+    assert collect_garbage(db, upload_dir, now=LATER)["blobs_deleted"] == 0
+
+
+def test_orphaned_blob_files_are_collected(db, upload_dir):
+    (upload_dir / "audio").mkdir()
+    orphan = upload_dir / "audio" / f"{'a' * 64}.mp3"
+    orphan.write_bytes(b"crashed before registering")
+    legacy = upload_dir / "audio" / "3f2b-legacy.mp3"
+    legacy.write_bytes(b"old upload")
+
+    assert collect_garbage(db, upload_dir, now=LATER)["orphans_deleted"] == 1
+    assert not orphan.exists() and legacy.exists()
+
+
+def test_collection_skips_a_directory_without_uploads(client, db, admin, upload_dir, tmp_path_factory):
+    upload_audio(client, admin, b"unused")
+    elsewhere = tmp_path_factory.mktemp("worker")
+
+    assert collect_garbage(db, elsewhere, now=LATER)["blobs_deleted"] == 0
+    assert db.query(MediaBlob).count() == 1
+
+
+def test_content_addressed_files_are_cached_forever(tmp_path):
+    (tmp_path / f"{'b' * 64}.png").write_bytes(b"png")
+    (tmp_path / "recording.webm").write_bytes(b"webm")
+    static = TestClient(Starlette(routes=[Mount("/uploads", MediaStaticFiles(directory=tmp_path))]))
+
+    assert static.get(f"/uploads/{'b' * 64}.png").headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert "cache-control" not in static.get("/uploads/recording.webm").headers
+
+
+def test_backfill_catalogs_existing_files_once(db, upload_dir, test_template_factory):
+    (upload_dir / "audio").mkdir()
+    (upload_dir / "images").mkdir()
+    (upload_dir / "audio" / "3f2b-legacy.mp3").write_bytes(b"old upload")
+    (upload_dir / "images" / "chart.gif").write_bytes(b"GIF89a" + struct.pack("<HH", 32, 16) + b"\0" * 10)
+    section = listening_section(test_template_factory)
+    db.add(ListeningPart(section_id=section.id, part_number=1, audio_url="/uploads/audio/3f2b-legacy.mp3"))
+    db.commit()
+
+    assert backfill_catalog(db, upload_dir) == 2
+    assert backfill_catalog(db, upload_dir) == 0
+
+    image = db.query(MediaBlob).filter(MediaBlob.media_type == "image").one()
+    assert (image.width, image.height, image.mime_type) == (32, 16, "image/gif")
+    assert db.query(MediaReference).count() == 1
+
+    # Random-named files are tracked but never collected
+    db.query(ListeningPart).delete()
+    db.commit()
+    assert collect_garbage(db, upload_dir, now=LATER)["blobs_deleted"] == 0
+    assert (upload_dir / "audio" / "3f2b-legacy.mp3").exists()
@@ -0,0 +1,273 @@
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, inspect, text, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.pagination import CURSOR_HEADER
+from app.core.security import get_password_hash, token_cache, user_cache
+from app.database import Base, MIGRATIONS_DIR, get_db, run_migrations
+from app.main import app
+from app.models import (
+    User, TestTemplate, TestAttempt, ListeningSubmission, ReadingSubmission,
+    WritingSubmission, SpeakingSubmission, WritingGrade, SpeakingGrade
+)
+from app.schemas.grade import RegradeJobCreate
+from app.services.regrade_service import create_regrade_job, run_regrade_chunk
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def head_revision():
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+def current_revision(engine):
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def test_migrations_match_models(file_engine):
+    run_migrations(file_engine)
+
+    with file_engine.connect() as connection:
+        diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    assert diff == []
+
+
+def test_create_all_database_is_stamped_and_upgraded(file_engine):
+    from alembic import command
+
+    # The baseline schema without alembic_version is what create_all used to build
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    with file_engine.connect() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "0001")
+    with file_engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+
+    run_migrations(file_engine)
+    assert current_revision(file_engine) == head_revision()
+
+    # Running again on an up-to-date database is a no-op
+    run_migrations(file_engine)
+    assert current_revision(file_engine) == head_revision()
+    assert "idx_writing_queue" in {i["name"] for i in inspect(file_engine).get_indexes("writing_submissions")}
+
+
+# Tables big enough in production that reading one without an index hurts
+HOT_TABLES = {
+    "test_templates", "test_attempts", "listening_submissions", "reading_submissions",
+    "writing_submissions", "speaking_submissions", "writing_grades", "speaking_grades"
+}
+
+
+def seed_hot_tables(db):
+    """Enough rows that ANALYZE gives the planner real statistics"""
+    now = datetime.now(timezone.utc)
+    if db.get_bind().dialect.name == "postgresql":
+        # The rows reference users, templates and attempts that aren't seeded
+        db.execute(text("SET LOCAL session_replication_role = replica"))
+    statuses = ["graded"] * 8 + ["pending", "under_review"]
+
+    db.execute(insert(TestTemplate), [
+        {"title": f"T{i}", "test_type": "ACADEMIC", "duration_minutes": 180, "is_published": i % 4 == 0,
+         "is_deleted": False, "created_by": 1, "created_at": now - timedelta(hours=i), "updated_at": now}
+        for i in range(200)
+    ])
+    db.execute(insert(TestAttempt), [
+        {"user_id": i % 300, "test_template_id": i % 200, "status": "graded",
+         "start_time": now, "created_at": now - timedelta(minutes=i), "updated_at": now}
+        for i in range(3000)
+    ])
+    for model in (ListeningSubmission, ReadingSubmission):
+        db.execute(insert(model), [
+            {"test_attempt_id": i // 40, "question_id": i % 400, "user_answer": "a", "is_correct": True,
+             "submitted_at": now, "created_at": now, "updated_at": now}
+            for i in range(6000)
+        ])
+    for model, extra in ((WritingSubmission, {"task_id": 1, "response_text": "essay", "word_count": 250}),
+                         (SpeakingSubmission, {"task_id": 1, "audio_url": "a.webm", "duration_seconds": 60})):
+        db.execute(insert(model), [
+            {"test_attempt_id": i, "status": statuses[i % 10], "assigned_teacher_id": i % 7 or None,
+             "submitted_at": now - timedelta(minutes=i), "created_at": now, "updated_at": now, **extra}
+            for i in range(3000)
+        ])
+    for model, scores in ((WritingGrade, ("task_achievement_score", "coherence_cohesion_score")),
+                          (SpeakingGrade, ("fluency_coherence_score", "pronunciation_score"))):
+        db.execute(insert(model), [
+            {"submission_id": i, "teacher_id": i % 20, "lexical_resource_score": 6, "grammatical_range_score": 6,
+             "overall_band_score": 6, scores[0]: 6, scores[1]: 6,
+             "graded_at": now - timedelta(minutes=i), "created_at": now, "updated_at": now}
+            for i in range(3000)
+        ])
+    db.commit()
+
+
+def create_user(db, email, role):
+    user = User(email=email, password_hash=get_password_hash("password123"), role=role, full_name=email)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@contextmanager
+def captured_selects(db):
+    """Collect the SELECT statements (with parameters) run on db's engine"""
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def login(client, email):
+    response = client.post("/api/v1/auth/token", data={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def get_pages(client, url, headers, limit=5):
+    """The first two keyset pages, so the cursor filter is exercised too"""
+    response = client.get(url, headers=headers, params={"limit": limit})
+    assert response.status_code == 200, response.text
+    cursor = response.headers[CURSOR_HEADER]
+    assert client.get(url, headers=headers, params={"limit": limit, "cursor": cursor}).status_code == 200
+
+
+def hot_queries(db, client):
+    """
+    The queries the grading, catalog, history and regrade paths actually run.
+
+    Captured from requests against the routers (and a regrade job run by the
+    worker code), so they can't drift from what the endpoints execute.
+    """
+    seed_hot_tables(db)
+    teacher = create_user(db, "hot_teacher@test.com", "teacher")
+    student = create_user(db, "hot_student@test.com", "student")
+    db.execute(update(TestAttempt).where(TestAttempt.id <= 12).values(user_id=student.id))
+    db.commit()
+    teacher_headers = login(client, teacher.email)
+    student_headers = login(client, student.email)
+
+    with captured_selects(db) as statements:
+        for section in ("writing", "speaking"):
+            get_pages(client, f"/api/v1/grading/{section}/pending", teacher_headers)
+        get_pages(client, "/api/v1/grading/history", teacher_headers)
+        assert client.get("/api/v1/grading/workload", headers=teacher_headers).status_code == 200
+        assert client.get("/api/v1/grading/queue", headers=teacher_headers).status_code == 200
+        get_pages(client, "/api/v1/tests/templates", student_headers)
+        get_pages(client, "/api/v1/tests/attempts/me", student_headers)
+        assert client.get("/api/v1/tests/attempts/12", headers=student_headers).status_code == 200
+
+        job = create_regrade_job(db, RegradeJobCreate(listening_question_ids=[1, 2, 3]))
+        run_regrade_chunk(db, job)
+    return statements
+
+
+def sqlite_scans(db, statement, parameters):
+    """Hot tables the SQLite planner reads without an index"""
+    plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [
+        match.group(1) for row in plan
+        if (match := re.fullmatch(r"SCAN (\w+)(?: AS \w+)?", row[-1])) and match.group(1) in HOT_TABLES
+    ]
+
+
+def test_hot_queries_use_indexes(db, client):
+    statements = hot_queries(db, client)
+    db.execute(text("ANALYZE"))
+
+    scans = {
+        statement: tables
+        for statement, parameters in statements
+        if (tables := sqlite_scans(db, statement, parameters))
+    }
+    assert scans == {}
+
+
+@pytest.fixture
+def postgres_db():
+    """A session on TEST_POSTGRES_URL, migrated to head; the database is wiped before and after"""
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+
+    engine = create_engine(url)
+
+    def reset():
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+
+    reset()
+    run_migrations(engine)
+    token_cache.clear()
+    user_cache.clear()
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        reset()
+        engine.dispose()
+
+
+@pytest.fixture
+def postgres_client(postgres_db):
+    app.dependency_overrides[get_db] = lambda: postgres_db
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def postgres_scans(db, statement, parameters):
+    """Hot tables PostgreSQL reads with a sequential scan even when told to avoid them"""
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    return [
+        node["Relation Name"] for node in plan_nodes(plan[0]["Plan"])
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in HOT_TABLES
+    ]
+
+
+@pytest.mark.postgres
+def test_hot_queries_use_indexes_on_postgres(postgres_db, postgres_client):
+    statements = hot_queries(postgres_db, postgres_client)
+    postgres_db.execute(text("ANALYZE"))
+    # With seq scans priced out, one left in the plan means no index fits the query
+    postgres_db.execute(text("SET LOCAL enable_seqscan = off"))
+
+    scans = {
+        statement: tables
+        for statement, parameters in statements
+        if (tables := postgres_scans(postgres_db, statement, parameters))
+    }
+    assert scans == {}
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.pagination import CURSOR_HEADER
+from app.crud.test import test_template as crud_test_template
+from app.models import TestTemplate, WritingGrade, SpeakingGrade
+
+
+def login(client, email):
+    response = client.post("/api/v1/auth/token", data={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def walk(client, url, headers, limit):
+    """Follow X-Next-Cursor to the end; returns the pages"""
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, headers=headers, params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+@pytest.fixture
+def templates(db, user_factory):
+    admin = user_factory(email="page_admin@test.com", role="admin")
+    now = datetime.now(timezone.utc)
+    # Two share a created_at, so the id tie-breaker matters
+    stamps = [now - timedelta(minutes=m) for m in (5, 4, 4, 3, 2, 1, 0)]
+    rows = [
+        TestTemplate(title=f"Template {i}", test_type="ACADEMIC", duration_minutes=180,
+                     is_published=True, created_by=admin.id, created_at=stamp)
+        for i, stamp in enumerate(stamps)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return admin, rows
+
+
+def test_cursor_walks_every_row_once(client, templates):
+    headers = login(client, "page_admin@test.com")
+
+    pages = walk(client, "/api/v1/tests/templates", headers, limit=3)
+    titles = [t["title"] for page in pages for t in page]
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sorted(titles) == sorted(f"Template {i}" for i in range(7))
+    assert titles[0] == "Template 6"  # Newest first
+
+
+def test_inserts_between_pages_do_not_shift_rows(client, db, templates):
+    admin, _ = templates
+    headers = login(client, "page_admin@test.com")
+
+    first = client.get("/api/v1/tests/templates", headers=headers, params={"limit": 3})
+    db.add(TestTemplate(title="Newer", test_type="ACADEMIC", duration_minutes=180, created_by=admin.id))
+    db.commit()
+    second = client.get(
+        "/api/v1/tests/templates", headers=headers,
+        params={"limit": 3, "cursor": first.headers[CURSOR_HEADER]}
+    )
+
+    first_titles = {t["title"] for t in first.json()}
+    second_titles = {t["title"] for t in second.json()}
+    assert not first_titles & second_titles
+    assert "Newer" not in second_titles
+
+
+def test_tampered_or_foreign_cursor_is_rejected(client, templates):
+    headers = login(client, "page_admin@test.com")
+    cursor = client.get(
+        "/api/v1/tests/templates", headers=headers, params={"limit": 2}
+    ).headers[CURSOR_HEADER]
+
+    body, signature = cursor.split(".")
+    forged = body[:-2] + ("AA" if body[-2:] != "AA" else "BB") + "." + signature
+    response = client.get("/api/v1/tests/templates", headers=headers, params={"cursor": forged})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+    # Signed for the template ordering, so another list refuses it
+    response = client.get("/api/v1/users/", headers=headers, params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_grading_history_merges_writing_and_speaking(client, db, user_factory):
+    teacher = user_factory(email="page_teacher@test.com", role="teacher")
+    now = datetime.now(timezone.utc)
+    for i in range(5):
+        db.add(WritingGrade(
+            submission_id=100 + i, teacher_id=teacher.id, task_achievement_score=6, coherence_cohesion_score=6,
+            lexical_resource_score=6, grammatical_range_score=6, overall_band_score=6,
+            graded_at=now - timedelta(minutes=2 * i)
+        ))
+        db.add(SpeakingGrade(
+            submission_id=200 + i, teacher_id=teacher.id, fluency_coherence_score=7, lexical_resource_score=7,
+            grammatical_range_score=7, pronunciation_score=7, overall_band_score=7,
+            graded_at=now - timedelta(minutes=2 * i + 1)
+        ))
+    db.commit()
+    headers = login(client, "page_teacher@test.com")
+
+    pages = walk(client, "/api/v1/grading/history", headers, limit=3)
+    entries = [entry for page in pages for entry in page]
+
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert [e["type"] for e in entries] == ["Writing", "Speaking"] * 5
+    assert len({(e["type"], e["id"]) for e in entries}) == 10
+
+
+def test_crud_get_multi_pages(db, templates):
+    first = crud_test_template.get_multi(db, limit=4)
+    assert len(first) == 4 and first.next_cursor
+
+    rest = crud_test_template.get_multi(db, cursor=first.next_cursor, limit=4)
+    assert rest.next_cursor is None
+    assert [t.id for t in first] + [t.id for t in rest] == sorted(t.id for t in templates[1])
+
+
+def test_grading_history_is_one_query_with_ties(client, db, user_factory, test_template_factory):
+    from sqlalchemy import event
+    from app.models import TestAttempt, WritingSubmission
+
+    teacher = user_factory(email="tie_teacher@test.com", role="teacher")
+    student = user_factory(email="tie_student@test.com", full_name="Tie Student")
+    template = test_template_factory()
+    attempt = TestAttempt(user_id=student.id, test_template_id=template.id, status="submitted")
+    db.add(attempt)
+    db.commit()
+    submission = WritingSubmission(test_attempt_id=attempt.id, task_id=1, response_text="essay", word_count=250)
+    db.add(submission)
+    db.commit()
+
+    # Every grade shares one timestamp, so only (type, id) orders them
+    graded_at = datetime.now(timezone.utc)
+    for i in range(4):
+        db.add(WritingGrade(
+            submission_id=submission.id if i == 0 else 500 + i, teacher_id=teacher.id,
+            task_achievement_score=6, coherence_cohesion_score=6, lexical_resource_score=6,
+            grammatical_range_score=6, overall_band_score=6, graded_at=graded_at
+        ))
+        db.add(SpeakingGrade(
+            submission_id=600 + i, teacher_id=teacher.id, fluency_coherence_score=7, lexical_resource_score=7,
+            grammatical_range_score=7, pronunciation_score=7, overall_band_score=7, graded_at=graded_at
+        ))
+    db.commit()
+    headers = login(client, "tie_teacher@test.com")
+    client.get("/api/v1/grading/history", headers=headers)  # Warm the principal cache
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        pages = walk(client, "/api/v1/grading/history", headers, limit=3)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    entries = [entry for page in pages for entry in page]
+    assert len(statements) == len(pages)
+    assert all("UNION ALL" in statement for statement in statements)
+    assert len({(e["type"], e["id"]) for e in entries}) == 8
+    assert [e["type"] for e in entries] == ["Speaking"] * 4 + ["Writing"] * 4
+
+    named = next(e for e in entries if e["submission_id"] == submission.id)
+    assert named["student"] == "Tie Student"
+    assert named["task"] == "Task 1"
+    assert next(e for e in entries if e["submission_id"] == 501)["student"] == "Unknown"
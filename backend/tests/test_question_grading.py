@@ -20,7 +20,10 @@ from app.services.question_grading import (
     grade_short_answer,
     grade_simple,
     normalize_text,
-    check_word_count
+    check_word_count,
+    compile_answer_key,
+    grade_questions_batch,
+    AnswerKeyCache
 )
 
 
@@ -407,6 +410,53 @@ class TestGradeQuestionDispatcher:
         assert result["is_correct"] == True
 
 
+class TestAnswerKeyCompilation:
+    """Tests for compiled answer keys and their cache"""
+
+    def test_completion_key_expands_optional_words(self):
+        key = compile_answer_key(
+            "listening_sentence_completion",
+            {"blanks": {"BLANK_1": ["(fast) Food"]}},
+            {"blanks": [{"blank_id": "BLANK_1", "max_words": 2}]}
+        )
+        acceptable, max_words, case_sensitive = key["blanks"]["BLANK_1"]
+        assert acceptable == frozenset({"fast food", "food"})
+        assert max_words == 2
+        assert case_sensitive is False
+
+    def test_grading_with_key_matches_uncompiled(self, completion_question_data):
+        answer_data = completion_question_data["answer_data"]
+        config = completion_question_data["type_specific_data"]
+        key = compile_answer_key("listening_sentence_completion", answer_data, config)
+        user_answer = {"blanks": {"BLANK_1": "Nine AM", "BLANK_2": "tuesday"}}
+
+        assert grade_question(
+            "listening_sentence_completion", user_answer, answer_data, config, key=key
+        ) == grade_completion(user_answer, answer_data, config)
+
+    def test_cache_reuses_key_until_question_changes(self):
+        class Question:
+            __tablename__ = "listening_questions"
+            id = 1
+            updated_at = "v1"
+            question_type = "reading_short_answer"
+            answer_data = {"correct_answers": ["carbon dioxide"]}
+            type_specific_data = {}
+
+        cache = AnswerKeyCache(maxsize=1)
+        question = Question()
+
+        first = cache.get(question)
+        assert cache.get(question) is first
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        question.updated_at = "v2"
+        question.answer_data = {"correct_answers": ["CO2"]}
+        assert cache.get(question)["acceptable"] == frozenset({"co2"})
+        # The stale entry was evicted
+        assert len(cache) == 1
+
+
 class TestSimpleGrading:
     """Tests for legacy simple grading (fallback)"""
 
@@ -488,3 +538,63 @@ class TestGradingEdgeCases:
         except Exception:
             # If it raises another error, that's fine too for now
             pass
+
+
+class TestBatchGrading:
+    """Tests for grade_questions_batch"""
+
+    class Question:
+        __tablename__ = "batch_questions"
+
+        def __init__(self, id, question_type, answer_data, type_specific_data=None):
+            self.id = id
+            self.question_type = question_type
+            self.answer_data = answer_data
+            self.type_specific_data = type_specific_data or {}
+            self.updated_at = None
+
+    def test_batch_matches_single_grading(self, completion_question_data):
+        questions = [
+            self.Question(1, "reading_short_answer", {"correct_answers": ["(carbon) dioxide"]}),
+            self.Question(2, "listening_multiple_choice", {"correct_options": ["B"]}),
+            self.Question(
+                3, "listening_sentence_completion",
+                completion_question_data["answer_data"], completion_question_data["type_specific_data"]
+            ),
+        ]
+        question_ids = [1, 1, 1, 2, 3, 99]
+        user_answers = [
+            "Dioxide",
+            "carbon dioxide gas emissions",
+            "Dioxide",
+            {"selected": ["B"]},
+            {"blanks": {"BLANK_1": "9 am", "BLANK_2": "friday"}},
+            "orphan",
+        ]
+
+        batch = grade_questions_batch(questions, question_ids, user_answers, include_details=True)
+
+        by_id = {q.id: q for q in questions}
+        for position, (question_id, user_answer) in enumerate(zip(question_ids[:-1], user_answers[:-1])):
+            question = by_id[question_id]
+            single = grade_question(question.question_type, user_answer, question.answer_data, question.type_specific_data)
+            assert bool(batch["is_correct"][position]) == single["is_correct"]
+            assert batch["score"][position] == single["score"]
+            assert batch["details"][position] == single["details"]
+
+        assert list(batch["is_correct"]) == [1, 0, 1, 1, 0, 0]
+        assert batch["score"][4] == 0.5
+        assert batch["details"][5] is None
+
+    def test_batch_without_details(self):
+        questions = [self.Question(1, "reading_short_answer", {"correct_answers": ["oxygen"]})]
+
+        batch = grade_questions_batch(questions, [1] * 3, ["Oxygen", "OXYGEN ", "nitrogen"])
+
+        assert list(batch["is_correct"]) == [1, 1, 0]
+        assert list(batch["score"]) == [1.0, 1.0, 0.0]
+        assert batch["details"] is None
+
+    def test_batch_rejects_misaligned_columns(self):
+        with pytest.raises(ValueError):
+            grade_questions_batch([], [1, 2], ["a"])
@@ -0,0 +1,119 @@
+import pytest
+from sqlalchemy import event
+
+from app.models import SpeakingSubmission, WritingSubmission
+from app.services.queue_stats import queue_counts, reconcile_queue_stats
+
+
+def login(client, email):
+    response = client.post("/api/v1/auth/token", data={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def submitted(client, db, user_factory, test_template_factory, tmp_path, monkeypatch):
+    """An attempt submitted through the API: one writing and one speaking submission"""
+    monkeypatch.chdir(tmp_path)  # Speaking uploads are written under the working directory
+    user_factory(email="stats_student@test.com")
+    user_factory(email="stats_a@test.com", role="teacher")
+    user_factory(email="stats_b@test.com", role="teacher")
+    template = test_template_factory()
+    speaking_task = next(s for s in template.sections if s.section_type == "speaking").speaking_tasks[0]
+
+    headers = login(client, "stats_student@test.com")
+    attempt_id = client.post(
+        "/api/v1/tests/attempts", headers=headers, json={"test_template_id": template.id}
+    ).json()["id"]
+    response = client.post(
+        f"/api/v1/tests/attempts/{attempt_id}/speaking/{speaking_task.id}/upload",
+        headers=headers, files={"file": ("answer.webm", b"audio", "audio/webm")}
+    )
+    assert response.status_code == 200
+    response = client.put(f"/api/v1/tests/attempts/{attempt_id}/submit", headers=headers, json={})
+    assert response.status_code == 200
+
+    return login(client, "stats_a@test.com"), login(client, "stats_b@test.com")
+
+
+def test_counters_follow_submit_claim_and_grade(client, db, submitted):
+    a, b = submitted
+
+    assert client.get("/api/v1/grading/queue", headers=b).json()["pending_writing"] == 1
+    assert client.get("/api/v1/grading/workload", headers=b).json()["total_pending"] == 2
+
+    claimed = client.post(
+        "/api/v1/grading/claims", headers=a, json={"submission_type": "writing", "count": 1}
+    ).json()[0]
+
+    # Claimed by A: still open overall, but no longer in B's queue
+    assert client.get("/api/v1/grading/workload", headers=b).json()["pending_writing"] == 1
+    assert client.get("/api/v1/grading/queue", headers=b).json()["pending_writing"] == 0
+    assert client.get("/api/v1/grading/queue", headers=a).json()["pending_writing"] == 1
+
+    grade = {
+        "task_achievement_score": 7, "coherence_cohesion_score": 7,
+        "lexical_resource_score": 7, "grammatical_range_score": 7
+    }
+    response = client.post(f"/api/v1/grading/writing/{claimed['submission_id']}", headers=a, json=grade)
+    assert response.status_code == 201
+
+    workload = client.get("/api/v1/grading/workload", headers=a).json()
+    assert workload["pending_writing"] == 0 and workload["pending_speaking"] == 1
+    assert workload["completed_today"] == 1
+    assert client.get("/api/v1/grading/stats", headers=a).json()["graded_today"] == 1
+    assert client.get("/api/v1/grading/stats", headers=b).json()["graded_today"] == 0
+
+    # The write paths kept every counter exact
+    assert reconcile_queue_stats(db) == 0
+
+
+def test_reconcile_corrects_drift(db, submitted):
+    # Changes behind the counters' back
+    db.query(SpeakingSubmission).delete()
+    db.query(WritingSubmission).update({"status": "under_review", "assigned_teacher_id": 42})
+    db.commit()
+    assert queue_counts(db) == {"writing": 1, "speaking": 1}
+
+    assert reconcile_queue_stats(db) == 3
+    assert queue_counts(db) == {"writing": 1, "speaking": 0}
+    assert queue_counts(db, teacher_id=7) == {"writing": 0, "speaking": 0}
+    assert queue_counts(db, teacher_id=42) == {"writing": 1, "speaking": 0}
+    assert reconcile_queue_stats(db) == 0
+
+
+def test_dashboard_reads_do_not_count_submissions(client, db, submitted):
+    a, _ = submitted
+    client.get("/api/v1/grading/workload", headers=a)  # Warm the principal cache
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        client.get("/api/v1/grading/workload", headers=a)
+        client.get("/api/v1/grading/stats", headers=a)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert statements
+    assert not any("_submissions" in statement or "_grades" in statement for statement in statements)
+
+
+def test_unassigned_counter_is_sharded(db, monkeypatch):
+    from app.core.config import settings
+    from app.models import GradingQueueStat
+    from app.services.queue_stats import count_status_change, count_submitted
+
+    monkeypatch.setattr(settings, "GRADING_STATS_SHARDS", 4)
+    for _ in range(40):
+        count_submitted(db, "writing")
+    count_status_change(db, "writing", "pending", None, "under_review", 9, count=15)
+    db.commit()
+
+    rows = db.query(GradingQueueStat).filter(GradingQueueStat.teacher_id == 0).all()
+    assert len(rows) > 1
+    assert queue_counts(db) == {"writing": 40, "speaking": 0}
+    assert queue_counts(db, teacher_id=9) == {"writing": 40, "speaking": 0}
+
+    # No submissions exist behind these counters; reconcile zeroes the sums
+    assert reconcile_queue_stats(db) == 2
+    assert queue_counts(db) == {"writing": 0, "speaking": 0}
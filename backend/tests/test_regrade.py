@@ -0,0 +1,213 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.models import (
+    TestAttempt, TestResult, ListeningPart, ListeningQuestion, ListeningAnswer,
+    ListeningSubmission
+)
+from app.schemas.grade import RegradeJobCreate
+from app.services import regrade_service
+from app.services.regrade_service import (
+    JOB_COMPLETED, JOB_FAILED, JOB_QUEUED,
+    create_regrade_job, claim_regrade_job, process_regrade_jobs, resume_regrade_job, run_regrade_chunk
+)
+
+
+@pytest.fixture
+def admin_token(client, user_factory):
+    user_factory(email="regrade_admin@test.com", password="password123", role="admin")
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": "regrade_admin@test.com", "password": "password123"}
+    )
+    return response.json()["access_token"]
+
+
+@pytest.fixture
+def graded_attempts(db, test_template_factory, user_factory):
+    """Five attempts graded against a wrong key ("library" was marked wrong)"""
+    template = test_template_factory()
+    listening_section = next(s for s in template.sections if s.section_type == "listening")
+
+    part = ListeningPart(section_id=listening_section.id, part_number=1, audio_url="url")
+    db.add(part)
+    db.commit()
+
+    structured = ListeningQuestion(
+        section_id=listening_section.id,
+        part_id=part.id,
+        question_number=1,
+        question_type="listening_short_answer",
+        question_text="q1",
+        order=1,
+        answer_data={"correct_answers": ["library", "the library"]}
+    )
+    legacy = ListeningQuestion(
+        section_id=listening_section.id,
+        part_id=part.id,
+        question_number=2,
+        question_type="listening_short_answer",
+        question_text="q2",
+        order=2
+    )
+    db.add_all([structured, legacy])
+    db.commit()
+    db.add(ListeningAnswer(question_id=legacy.id, correct_answer="museum"))
+    db.commit()
+
+    attempts = []
+    for i in range(5):
+        student = user_factory(email=f"regrade_student_{i}@test.com")
+        attempt = TestAttempt(user_id=student.id, test_template_id=template.id, status="submitted")
+        db.add(attempt)
+        db.commit()
+        db.add_all([
+            ListeningSubmission(test_attempt_id=attempt.id, question_id=structured.id, user_answer="library", is_correct=False),
+            ListeningSubmission(test_attempt_id=attempt.id, question_id=legacy.id, user_answer="museum", is_correct=True),
+        ])
+        db.add(TestResult(test_attempt_id=attempt.id, listening_score=0.0, overall_band_score=0.0))
+        db.commit()
+        attempts.append(attempt)
+
+    return template, structured, legacy, attempts
+
+
+def test_regrade_job_fixes_flags_and_results(db, graded_attempts):
+    template, structured, _, attempts = graded_attempts
+
+    job = create_regrade_job(db, RegradeJobCreate(test_template_id=template.id))
+    assert job.status == JOB_QUEUED
+    assert job.total_submissions == 10
+
+    before = db.query(TestResult).filter(TestResult.test_attempt_id == attempts[0].id).one().listening_score
+
+    # Small chunks so the job spans several transactions
+    while run_regrade_chunk(db, claim_regrade_job(db, "w1") or job, chunk_size=3):
+        pass
+
+    db.refresh(job)
+    assert job.status == JOB_COMPLETED
+    assert job.processed_submissions == 10
+    assert job.changed_submissions == 5
+    assert job.results_recalculated == 5
+
+    flags = db.query(ListeningSubmission.is_correct).filter(ListeningSubmission.question_id == structured.id).all()
+    assert all(flag for (flag,) in flags)
+
+    result = db.query(TestResult).filter(TestResult.test_attempt_id == attempts[0].id).one()
+    db.refresh(result)
+    assert result.listening_score > before
+
+
+def test_regrade_job_resumes_from_cursor(db, graded_attempts):
+    _, structured, _, _ = graded_attempts
+
+    job = create_regrade_job(db, RegradeJobCreate(listening_question_ids=[structured.id]))
+    assert job.total_submissions == 5
+
+    claim_regrade_job(db, "w1")
+    assert run_regrade_chunk(db, job, chunk_size=2)
+    db.refresh(job)
+    assert job.processed_submissions == 2
+
+    # A new worker (fresh question cache) picks up after the committed chunk
+    while run_regrade_chunk(db, job, question_cache={}, chunk_size=2):
+        pass
+
+    # Nothing before the cursor was regraded twice
+    db.refresh(job)
+    assert job.processed_submissions == 5
+    assert job.changed_submissions == 5
+    assert job.status == JOB_COMPLETED
+
+
+def test_reading_only_filter_skips_listening(db, graded_attempts):
+    job = create_regrade_job(db, RegradeJobCreate(reading_question_ids=[999999]))
+    assert job.total_submissions == 0
+
+    assert process_regrade_jobs(db, "w1") >= 1
+    db.refresh(job)
+    assert job.status == JOB_COMPLETED
+    assert job.processed_submissions == 0
+
+
+def test_date_range_filter(db, graded_attempts):
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    job = create_regrade_job(db, RegradeJobCreate(submitted_from=future))
+    assert job.total_submissions == 0
+
+
+def test_failed_job_can_be_resumed(db, graded_attempts, monkeypatch):
+    template, _, _, _ = graded_attempts
+    job = create_regrade_job(db, RegradeJobCreate(test_template_id=template.id))
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("regrade exploded")
+
+    monkeypatch.setattr(regrade_service, "_grade_chunk", broken)
+    process_regrade_jobs(db, "w1")
+    db.refresh(job)
+    assert job.status == JOB_FAILED
+    assert "regrade exploded" in job.last_error
+    assert job.processed_submissions == 0
+
+    monkeypatch.undo()
+    resume_regrade_job(db, job)
+    assert job.status == JOB_QUEUED
+
+    monkeypatch.setattr(settings, "REGRADE_CHUNK_SIZE", 4)
+    while process_regrade_jobs(db, "w2", max_chunks=1):
+        db.refresh(job)
+        if job.status == JOB_COMPLETED:
+            break
+
+    assert job.status == JOB_COMPLETED
+    assert job.changed_submissions == 5
+
+
+def test_worker_executor_is_reused_across_polls(db, graded_attempts, monkeypatch):
+    template, _, _, _ = graded_attempts
+    job = create_regrade_job(db, RegradeJobCreate(test_template_id=template.id))
+    monkeypatch.setattr(settings, "REGRADE_CHUNK_SIZE", 4)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        while process_regrade_jobs(db, "w1", max_chunks=1, executor=executor):
+            db.refresh(job)
+            if job.status == JOB_COMPLETED:
+                break
+
+        # Still usable: polls leave shutting the pool down to the worker
+        assert executor.submit(lambda: 1).result() == 1
+
+    assert job.status == JOB_COMPLETED
+    assert job.changed_submissions == 5
+
+
+def test_regrade_job_endpoints(client, db, admin_token, graded_attempts):
+    template, _, _, _ = graded_attempts
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.post("/api/v1/admin/regrade-jobs", headers=headers, json={})
+    assert response.status_code == 422
+
+    response = client.post(
+        "/api/v1/admin/regrade-jobs", headers=headers, json={"test_template_id": template.id}
+    )
+    assert response.status_code == 201
+    job_id = response.json()["id"]
+    assert response.json()["total_submissions"] == 10
+
+    process_regrade_jobs(db, "w1")
+
+    response = client.get(f"/api/v1/admin/regrade-jobs/{job_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == JOB_COMPLETED
+    assert response.json()["changed_submissions"] == 5
+
+    response = client.post(f"/api/v1/admin/regrade-jobs/{job_id}/resume", headers=headers)
+    assert response.status_code == 400
+
+    response = client.get("/api/v1/admin/regrade-jobs/999999", headers=headers)
+    assert response.status_code == 404
@@ -117,3 +117,159 @@ def test_delete_test(client, admin_token):
         headers={"Authorization": f"Bearer {admin_token}"}
     )
     assert get_res.status_code == 404
+
+def test_publish_creates_structure_snapshot(client, admin_token, db):
+    from app.models import TestStructureSnapshot
+    
+    test_res = client.post(
+        "/api/v1/tests/templates",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"title": "Snapshot Test", "test_type": "ACADEMIC", "duration_minutes": 180}
+    )
+    test_id = test_res.json()["id"]
+    
+    response = client.post(
+        f"/api/v1/tests/templates/{test_id}/publish",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    
+    snapshots = db.query(TestStructureSnapshot).filter(
+        TestStructureSnapshot.test_template_id == test_id
+    ).all()
+    assert len(snapshots) == 1
+    assert snapshots[0].version == 1
+
+def test_get_attempt_serves_snapshot_without_answers(client, admin_token, student_token, db, test_template_factory):
+    from app.models import ListeningPart, ListeningQuestion, TestStructureSnapshot
+    
+    template = test_template_factory()
+    listening_section = next(s for s in template.sections if s.section_type == "listening")
+    part = ListeningPart(section_id=listening_section.id, part_number=1, audio_url="/uploads/audio/p1.mp3")
+    db.add(part)
+    db.commit()
+    db.add(ListeningQuestion(
+        section_id=listening_section.id,
+        part_id=part.id,
+        question_number=1,
+        question_type="listening_short_answer",
+        question_text="Name of the street?",
+        order=1,
+        answer_data={"correct_answers": ["baker street"]}
+    ))
+    db.commit()
+    
+    attempt_res = client.post(
+        "/api/v1/tests/attempts",
+        headers={"Authorization": f"Bearer {student_token}"},
+        json={"test_template_id": template.id}
+    )
+    attempt_id = attempt_res.json()["id"]
+    
+    response = client.get(
+        f"/api/v1/tests/attempts/{attempt_id}",
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.status_code == 200
+    structure = response.json()["test_structure"]
+    assert len(structure["listening_parts"]) == 1
+    assert len(structure["listening_questions"]) == 1
+    assert "answer_data" not in structure["listening_questions"][0]
+    assert len(structure["writing_tasks"]) == 1
+    assert len(structure["speaking_tasks"]) == 1
+    
+    # Editing content compiles a new version; the attempt in progress keeps its own
+    question_id = structure["listening_questions"][0]["id"]
+    def edit(text):
+        client.put(
+            f"/api/v1/listening/questions/{question_id}",
+            headers={"Authorization": f"Bearer {admin_token}"},
+            json={"question_text": text}
+        )
+    def versions():
+        return [v for (v,) in db.query(TestStructureSnapshot.version).filter(
+            TestStructureSnapshot.test_template_id == template.id
+        ).order_by(TestStructureSnapshot.version)]
+    edit("Name of the road?")
+    assert versions() == [1, 2]
+    
+    response = client.get(
+        f"/api/v1/tests/attempts/{attempt_id}",
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.json()["test_structure"]["listening_questions"][0]["question_text"] == "Name of the street?"
+    
+    # Versions nobody is taking are pruned; finished attempts see the latest
+    edit("Name of the avenue?")
+    assert versions() == [1, 3]
+    client.put(f"/api/v1/tests/attempts/{attempt_id}/submit", headers={"Authorization": f"Bearer {student_token}"}, json={})
+    edit("Name of the lane?")
+    assert versions() == [4]
+    
+    response = client.get(
+        f"/api/v1/tests/attempts/{attempt_id}",
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.json()["test_structure"]["listening_questions"][0]["question_text"] == "Name of the lane?"
+
+def test_concurrent_first_snapshot_reuses_the_winner(db, test_template_factory, monkeypatch):
+    from app.services import test_snapshot
+    
+    template = test_template_factory()
+    winner = test_snapshot.create_snapshot(db, template.id)
+    
+    # This request looked before the other one committed version 1
+    real_lookup = test_snapshot.get_latest_snapshot
+    lookups = []
+    
+    def stale_lookup(db, template_id):
+        lookups.append(template_id)
+        return None if len(lookups) == 1 else real_lookup(db, template_id)
+    
+    monkeypatch.setattr(test_snapshot, "get_latest_snapshot", stale_lookup)
+    
+    assert test_snapshot.get_or_create_snapshot(db, template.id).id == winner.id
+    assert len(lookups) == 2
+
+def test_compile_structure_never_selects_answer_keys(db, test_template_factory):
+    from sqlalchemy import event
+    from app.models import ListeningPart, ListeningQuestion, ReadingPassage, ReadingQuestion
+    from app.services.test_snapshot import compile_test_structure
+    
+    template = test_template_factory()
+    sections = {s.section_type: s for s in template.sections}
+    part = ListeningPart(section_id=sections["listening"].id, part_number=1, audio_url="/uploads/audio/p1.mp3")
+    passage = ReadingPassage(section_id=sections["reading"].id, passage_number=1, title="P1", content="Text", order=1)
+    db.add_all([part, passage])
+    db.commit()
+    db.add_all([
+        ListeningQuestion(
+            section_id=sections["listening"].id, part_id=part.id, question_number=1,
+            question_type="listening_short_answer", question_text="q1", order=1,
+            answer_data={"correct_answers": ["baker street"]}
+        ),
+        ReadingQuestion(
+            passage_id=passage.id, question_number=1, question_type="reading_short_answer",
+            question_text="q1", order=1, answer_data={"correct_answers": ["river"]}
+        )
+    ])
+    db.commit()
+    template_id = template.id
+    db.expunge_all()
+    
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        payload = compile_test_structure(db, template_id)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+    
+    assert len(payload["listening_questions"]) == 1
+    assert len(payload["reading_questions"]) == 1
+    assert "answer_data" not in payload["reading_questions"][0]
+    assert not any("answer_data" in statement for statement in statements)
+    assert not any("listening_answers" in statement or "reading_answers" in statement for statement in statements)
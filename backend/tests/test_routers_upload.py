@@ -1,5 +1,6 @@
+import hashlib
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -25,12 +26,12 @@ def student_token(client, user_factory):
     )
     return response.json()["access_token"]
 
-@patch("app.routers.upload.open")
-@patch("app.routers.upload.Path.mkdir")
-def test_upload_audio(mock_mkdir, mock_open, client, student_token):
-    mock_file = MagicMock()
-    mock_open.return_value.__enter__.return_value = mock_file
-    
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.routers.upload.UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+def test_upload_audio(client, student_token, upload_dir):
     files = {"file": ("test.mp3", b"audio content", "audio/mpeg")}
     response = client.post(
         "/api/v1/upload/audio",
@@ -40,13 +41,12 @@ def test_upload_audio(mock_mkdir, mock_open, client, student_token):
     assert response.status_code == 200
     assert "url" in response.json()
     assert response.json()["url"].startswith("/uploads/audio/")
-
-@patch("app.routers.upload.open")
-@patch("app.routers.upload.Path.mkdir")
-def test_upload_image(mock_mkdir, mock_open, client, student_token):
-    mock_file = MagicMock()
-    mock_open.return_value.__enter__.return_value = mock_file
+    assert response.json()["sha256"] == hashlib.sha256(b"audio content").hexdigest()
     
+    stored = upload_dir / "audio" / response.json()["url"].rsplit("/", 1)[1]
+    assert stored.read_bytes() == b"audio content"
+
+def test_upload_image(client, student_token, upload_dir):
     files = {"file": ("test.png", b"image content", "image/png")}
     response = client.post(
         "/api/v1/upload/image",
@@ -56,6 +56,7 @@ def test_upload_image(mock_mkdir, mock_open, client, student_token):
     assert response.status_code == 200
     assert "url" in response.json()
     assert response.json()["url"].startswith("/uploads/images/")
+    assert response.json()["size"] == len(b"image content")
 
 def test_upload_invalid_type(client, student_token):
     files = {"file": ("test.txt", b"text content", "text/plain")}
@@ -67,28 +68,73 @@ def test_upload_invalid_type(client, student_token):
     assert response.status_code == 400
     assert "File must be audio" in response.json()["detail"]
 
-@patch("app.routers.upload.Path.exists")
-@patch("app.routers.upload.Path.iterdir")
-def test_get_files(mock_iterdir, mock_exists, client, student_token):
-    mock_exists.return_value = True
+def test_upload_disallowed_extension(client, student_token, upload_dir):
+    files = {"file": ("test.exe", b"MZ", "audio/mpeg")}
+    response = client.post(
+        "/api/v1/upload/audio",
+        headers={"Authorization": f"Bearer {student_token}"},
+        files=files
+    )
+    assert response.status_code == 400
+    assert "not allowed" in response.json()["detail"]
+    assert not any(path.is_file() for path in upload_dir.rglob("*"))
+
+def test_upload_size_limit(client, student_token, upload_dir, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE_MB", 1)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 64 * 1024)
+    headers = {"Authorization": f"Bearer {student_token}"}
     
-    # Mock file object
-    mock_file = MagicMock()
-    mock_file.is_file.return_value = True
-    mock_file.name = "test.mp3"
-    mock_file.stat.return_value.st_size = 1024
-    mock_file.stat.return_value.st_ctime = 1000000
+    # Just over the limit: the body passes the middleware, the copy stops at the limit
+    files = {"file": ("big.mp3", b"x" * (1024 * 1024 + 1), "audio/mpeg")}
+    response = client.post("/api/v1/upload/audio", headers=headers, files=files)
+    assert response.status_code == 413
+    assert list((upload_dir / "audio").iterdir()) == []
+    assert list((upload_dir / "tmp").iterdir()) == []
     
-    mock_iterdir.return_value = [mock_file]
+    # Far over: refused from Content-Length before the body is read, with CORS headers the browser can read
+    files = {"file": ("big.mp3", b"x" * (2 * 1024 * 1024), "audio/mpeg")}
+    response = client.post(
+        "/api/v1/upload/audio", headers={**headers, "Origin": "http://localhost:5173"}, files=files
+    )
+    assert response.status_code == 413
+    assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:5173"
     
-    response = client.get(
-        "/api/v1/upload/files?type=audio",
-        headers={"Authorization": f"Bearer {student_token}"}
+    # No Content-Length (chunked): counted as it streams in
+    chunks = (b"x" * (256 * 1024) for _ in range(8))
+    response = client.post(
+        "/api/v1/upload/audio",
+        headers={**headers, "Content-Type": "multipart/form-data; boundary=limit"},
+        content=chunks
     )
+    assert response.status_code == 413
+    assert response.json()["detail"] == "File too large (max 1 MB)"
+
+def test_get_files(client, student_token, upload_dir):
+    headers = {"Authorization": f"Bearer {student_token}"}
+    for n in range(3):
+        client.post("/api/v1/upload/audio", headers=headers, files={"file": (f"track{n}.mp3", f"audio {n}".encode(), "audio/mpeg")})
+    client.post("/api/v1/upload/image", headers=headers, files={"file": ("chart.png", b"image", "image/png")})
+    
+    response = client.get("/api/v1/upload/files?type=audio&limit=2", headers=headers)
     assert response.status_code == 200
     data = response.json()
-    assert len(data) == 1
-    assert data[0]["name"] == "test.mp3"
+    assert [f["original_filename"] for f in data] == ["track2.mp3", "track1.mp3"]
+    assert data[0]["type"] == "audio" and data[0]["mime_type"] == "audio/mpeg"
+    assert data[0]["url"] == f"/uploads/audio/{data[0]['name']}"
+    assert data[0]["created_at"].endswith("+00:00")
+    
+    response = client.get(
+        "/api/v1/upload/files?type=audio&limit=2",
+        headers=headers,
+        params={"cursor": response.headers["X-Next-Cursor"]}
+    )
+    assert [f["original_filename"] for f in response.json()] == ["track0.mp3"]
+    assert "X-Next-Cursor" not in response.headers
+    
+    response = client.get("/api/v1/upload/files?type=images", headers=headers)
+    assert [f["type"] for f in response.json()] == ["image"]
+    assert len(client.get("/api/v1/upload/files", headers=headers).json()) == 4
 
 @patch("app.routers.upload.os.remove")
 @patch("app.routers.upload.Path.exists")
@@ -0,0 +1,175 @@
+import base64
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models import SpeakingSubmission, SpeakingUpload
+from app.services.speaking_upload import expire_uploads
+
+RECORDING = bytes(range(256)) * 40
+
+
+def login(client, email):
+    response = client.post("/api/v1/auth/token", data={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def checksum(data):
+    return "sha256 " + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def send(client, url, headers, offset, data, digest=None):
+    return client.patch(url, headers={
+        **headers,
+        "Content-Type": "application/offset+octet-stream",
+        "Upload-Offset": str(offset),
+        "Upload-Checksum": digest or checksum(data)
+    }, content=data)
+
+
+@pytest.fixture
+def attempt(client, user_factory, test_template_factory, tmp_path, monkeypatch):
+    """An in-progress attempt: (headers, attempt id, speaking task id)"""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    user_factory(email="resume_student@test.com")
+    template = test_template_factory()
+    task = next(s for s in template.sections if s.section_type == "speaking").speaking_tasks[0]
+
+    headers = login(client, "resume_student@test.com")
+    attempt_id = client.post(
+        "/api/v1/tests/attempts", headers=headers, json={"test_template_id": template.id}
+    ).json()["id"]
+    return headers, attempt_id, task.id
+
+
+def start(client, attempt, **body):
+    headers, attempt_id, task_id = attempt
+    response = client.post(
+        f"/api/v1/tests/attempts/{attempt_id}/speaking/{task_id}/uploads",
+        headers=headers, json={"size": len(RECORDING), **body}
+    )
+    assert response.status_code == 201
+    return f"/api/v1/tests/attempts/{attempt_id}/speaking/uploads/{response.json()['id']}"
+
+
+def test_upload_resumes_from_offset_and_submits_on_finalize(client, db, attempt, tmp_path):
+    headers = attempt[0]
+    url = start(client, attempt, sha256=hashlib.sha256(RECORDING).hexdigest(), filename="answer.ogg")
+
+    assert send(client, url, headers, 0, RECORDING[:4000]).headers["Upload-Offset"] == "4000"
+
+    # The connection dropped; the client asks where to resume
+    response = client.get(url, headers=headers)
+    assert response.json()["offset"] == 4000 and response.headers["Upload-Offset"] == "4000"
+    response = send(client, url, headers, 4000, RECORDING[4000:])
+    assert response.json()["offset"] == len(RECORDING)
+
+    # Nothing reaches the grading queue before finalize
+    assert db.query(SpeakingSubmission).count() == 0
+
+    response = client.post(f"{url}/finalize", headers=headers)
+    assert response.status_code == 200
+    upload = response.json()
+    assert upload["status"] == "completed"
+    assert upload["audio_url"].endswith(".ogg")
+
+    submission = db.query(SpeakingSubmission).one()
+    assert submission.audio_url == upload["audio_url"]
+    assert (tmp_path / "speaking" / upload["audio_url"].rsplit("/", 1)[1]).read_bytes() == RECORDING
+    assert not list((tmp_path / "tmp").iterdir())
+
+    # Retrying finalize is harmless
+    assert client.post(f"{url}/finalize", headers=headers).json() == upload
+
+
+def test_wrong_offset_and_bad_checksum_are_refused(client, attempt):
+    headers = attempt[0]
+    url = start(client, attempt)
+    send(client, url, headers, 0, RECORDING[:1000])
+
+    response = send(client, url, headers, 500, RECORDING[500:1500])
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "1000"
+
+    response = send(client, url, headers, 1000, RECORDING[1000:2000], digest=checksum(b"other"))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Chunk checksum mismatch"
+
+    assert send(client, url, headers, 1000, RECORDING[1000:2000], digest="md5 abc").status_code == 400
+    assert send(client, url, headers, 1000, RECORDING[1000:] + b"extra").status_code == 400
+    assert client.get(url, headers=headers).json()["offset"] == 1000
+
+    # Finalizing early is refused with the offset to resume from
+    response = client.post(f"{url}/finalize", headers=headers)
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "1000"
+
+
+def test_recording_checksum_mismatch_aborts_upload(client, db, attempt):
+    headers = attempt[0]
+    url = start(client, attempt, sha256=hashlib.sha256(b"something else").hexdigest())
+    send(client, url, headers, 0, RECORDING)
+
+    response = client.post(f"{url}/finalize", headers=headers)
+    assert response.status_code == 400
+    assert client.get(url, headers=headers).json()["status"] == "aborted"
+    assert db.query(SpeakingSubmission).count() == 0
+
+
+def test_new_upload_supersedes_unfinished_one(client, db, attempt):
+    headers = attempt[0]
+    first = start(client, attempt)
+    send(client, first, headers, 0, RECORDING[:100])
+    start(client, attempt)
+
+    assert client.get(first, headers=headers).json()["status"] == "aborted"
+    assert send(client, first, headers, 100, RECORDING[100:200]).status_code == 409
+    assert db.query(SpeakingUpload).filter(SpeakingUpload.status == "uploading").count() == 1
+
+
+def test_oversized_chunk_is_rejected(client, attempt, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_CHUNK_BYTES", 1024)
+    headers = attempt[0]
+    url = start(client, attempt)
+
+    response = send(client, url, headers, 0, RECORDING[:2048])
+    assert response.status_code == 413
+    assert client.get(url, headers=headers).json()["offset"] == 0
+
+
+def test_new_recording_replaces_the_old_file(client, db, attempt, tmp_path):
+    headers = attempt[0]
+    first = start(client, attempt)
+    send(client, first, headers, 0, RECORDING)
+    first_url = client.post(f"{first}/finalize", headers=headers).json()["audio_url"]
+
+    second = start(client, attempt)
+    send(client, second, headers, 0, RECORDING)
+    second_url = client.post(f"{second}/finalize", headers=headers).json()["audio_url"]
+
+    assert db.query(SpeakingSubmission).one().audio_url == second_url
+    assert [path.name for path in (tmp_path / "speaking").iterdir()] == [second_url.rsplit("/", 1)[1]]
+    assert first_url != second_url
+
+
+def test_abandoned_uploads_expire(client, db, attempt, tmp_path):
+    headers = attempt[0]
+    url = start(client, attempt)
+    send(client, url, headers, 0, RECORDING[:100])
+
+    assert expire_uploads(db) == 0
+    assert expire_uploads(db, now=datetime.now(timezone.utc) + timedelta(days=1)) == 1
+    assert client.get(url, headers=headers).json()["status"] == "aborted"
+    assert not list((tmp_path / "tmp").iterdir())
+
+
+def test_submit_aborts_unfinished_uploads(client, db, attempt, tmp_path):
+    headers, attempt_id, _ = attempt
+    url = start(client, attempt)
+    send(client, url, headers, 0, RECORDING[:100])
+
+    assert client.put(f"/api/v1/tests/attempts/{attempt_id}/submit", headers=headers).status_code == 200
+    assert db.query(SpeakingUpload).one().status == "aborted"
+    assert not list((tmp_path / "tmp").iterdir())
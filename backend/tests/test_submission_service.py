@@ -0,0 +1,137 @@
+import pytest
+from app.models import (
+    TestAttempt, ListeningPart, ListeningQuestion, ListeningAnswer,
+    ListeningSubmission, WritingSubmission
+)
+from app.schemas.test import StandardAnswerItem, WritingAnswerItem
+from app.services.submission_service import (
+    bulk_upsert,
+    matches_legacy_answers,
+    save_objective_answers,
+    save_writing_answers
+)
+
+
+@pytest.fixture
+def listening_setup(db, test_template_factory, user_factory):
+    template = test_template_factory()
+    student = user_factory(email="bulk_student@test.com")
+    listening_section = next(s for s in template.sections if s.section_type == "listening")
+
+    part = ListeningPart(section_id=listening_section.id, part_number=1, audio_url="url")
+    db.add(part)
+    db.commit()
+
+    structured = ListeningQuestion(
+        section_id=listening_section.id,
+        part_id=part.id,
+        question_number=1,
+        question_type="listening_short_answer",
+        question_text="q1",
+        order=1,
+        answer_data={"correct_answers": ["(the) library"]}
+    )
+    legacy = ListeningQuestion(
+        section_id=listening_section.id,
+        part_id=part.id,
+        question_number=2,
+        question_type="listening_sentence_completion",
+        question_text="q2",
+        order=2
+    )
+    db.add_all([structured, legacy])
+    db.commit()
+    db.add(ListeningAnswer(question_id=legacy.id, correct_answer="Monday", alternative_answers=["mon"]))
+
+    attempt = TestAttempt(user_id=student.id, test_template_id=template.id, status="in_progress")
+    db.add(attempt)
+    db.commit()
+
+    return template, attempt, structured, legacy
+
+
+def test_matches_legacy_answers_respects_alternatives_and_case():
+    class Answer:
+        correct_answer = "Monday"
+        alternative_answers = ["Mon"]
+        case_sensitive = False
+
+    assert matches_legacy_answers(" monday ", [Answer()]) is True
+    assert matches_legacy_answers("MON", [Answer()]) is True
+    assert matches_legacy_answers("Tuesday", [Answer()]) is False
+
+    Answer.case_sensitive = True
+    assert matches_legacy_answers("monday", [Answer()]) is False
+
+
+def test_save_objective_answers_upserts(db, listening_setup):
+    _, attempt, structured, legacy = listening_setup
+
+    save_objective_answers(db, attempt.id, listening_answers=[
+        StandardAnswerItem(question_id=structured.id, user_answer="library"),
+        StandardAnswerItem(question_id=legacy.id, user_answer="friday"),
+        StandardAnswerItem(question_id=99999, user_answer="ignored"),
+    ])
+    db.commit()
+
+    rows = {s.question_id: s for s in db.query(ListeningSubmission).filter(
+        ListeningSubmission.test_attempt_id == attempt.id
+    ).all()}
+    assert set(rows) == {structured.id, legacy.id}
+    assert rows[structured.id].is_correct is True
+    assert rows[legacy.id].is_correct is False
+
+    # Re-submitting updates in place rather than duplicating rows
+    save_objective_answers(db, attempt.id, listening_answers=[
+        StandardAnswerItem(question_id=legacy.id, user_answer="Monday"),
+    ])
+    db.commit()
+    db.expire_all()
+
+    rows = db.query(ListeningSubmission).filter(ListeningSubmission.test_attempt_id == attempt.id).all()
+    assert len(rows) == 2
+    assert next(s for s in rows if s.question_id == legacy.id).is_correct is True
+
+
+def test_save_writing_answers_covers_every_task(db, listening_setup):
+    template, attempt, _, _ = listening_setup
+    writing_section = next(s for s in template.sections if s.section_type == "writing")
+    task = writing_section.writing_tasks[0]
+
+    save_writing_answers(db, attempt.id, template.id, [
+        WritingAnswerItem(task_id=task.id, response_text="Four words essay here")
+    ])
+    db.commit()
+
+    submission = db.query(WritingSubmission).filter(WritingSubmission.test_attempt_id == attempt.id).one()
+    assert submission.word_count == 4
+    assert submission.status == "pending"
+
+
+def test_bulk_upsert_generic_fallback(db, listening_setup, monkeypatch):
+    _, attempt, structured, legacy = listening_setup
+    monkeypatch.setattr(db.get_bind().dialect, "name", "generic")
+
+    row = {
+        "test_attempt_id": attempt.id,
+        "question_id": structured.id,
+        "user_answer": "first",
+        "is_correct": False
+    }
+    bulk_upsert(db, ListeningSubmission, [row], ["test_attempt_id", "question_id"], ["user_answer", "is_correct"])
+    db.commit()
+
+    bulk_upsert(
+        db,
+        ListeningSubmission,
+        [{**row, "user_answer": "second", "is_correct": True}, {**row, "question_id": legacy.id}],
+        ["test_attempt_id", "question_id"],
+        ["user_answer", "is_correct"]
+    )
+    db.commit()
+    db.expire_all()
+
+    rows = {s.question_id: s for s in db.query(ListeningSubmission).all()}
+    assert len(rows) == 2
+    assert rows[structured.id].user_answer == "second"
+    assert rows[structured.id].is_correct is True
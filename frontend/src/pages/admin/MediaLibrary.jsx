@@ -7,16 +7,20 @@ export default function MediaLibrary() {
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('all'); // all, audio, image
   const [uploading, setUploading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchFiles();
   }, [filter]);
 
+  // The API returns one page at a time; X-Next-Cursor points at the next one
   const fetchFiles = async () => {
     try {
       setLoading(true);
-      const response = await apiClient.get(`/upload/files?type=${filter}`);
+      const response = await apiClient.get('/upload/files', { params: { type: filter } });
       setFiles(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Failed to fetch files:', error);
     } finally {
@@ -24,6 +28,19 @@ export default function MediaLibrary() {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await apiClient.get('/upload/files', { params: { type: filter, cursor: nextCursor } });
+      setFiles((current) => [...current, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Failed to load more files:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleFileUpload = async (e, type) => {
     const file = e.target.files[0];
     if (!file) return;
@@ -73,7 +90,7 @@ export default function MediaLibrary() {
   };
 
   const formatDate = (timestamp) => {
-    return new Date(timestamp * 1000).toLocaleDateString();
+    return new Date(timestamp).toLocaleDateString();
   };
 
   return (
@@ -140,8 +157,8 @@ export default function MediaLibrary() {
           </div>
         ) : (
           <div className="grid grid-cols-1 md:grid-cols-3 lg:grid-cols-4 gap-6">
-            {files.map((file, idx) => (
-              <div key={idx} className="bg-white border border-gray-200 rounded-lg overflow-hidden hover:shadow-md transition">
+            {files.map((file) => (
+              <div key={file.id} className="bg-white border border-gray-200 rounded-lg overflow-hidden hover:shadow-md transition">
                 <div className="aspect-w-16 aspect-h-9 bg-gray-100 flex items-center justify-center relative group">
                   {file.type === 'image' ? (
                     <img 
@@ -204,6 +221,18 @@ export default function MediaLibrary() {
             ))}
           </div>
         )}
+
+        {!loading && nextCursor && (
+          <div className="text-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 border border-gray-300 rounded-lg text-sm font-medium text-gray-700 hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </AdminLayout>
   );